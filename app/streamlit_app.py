@@ -4,6 +4,7 @@ import re
 import json
 import base64
 import tempfile
+from contextlib import ExitStack
 from datetime import datetime
 from typing import Dict, List, Optional
 import streamlit as st
@@ -35,6 +36,11 @@ from hdbcv2dsp.parse_cv import parse_hdbcalculationview, topo_order
 from hdbcv2dsp.parse_sql_view import parse_hdbview_or_sql, SQLViewModel
 from hdbcv2dsp.parse_procedure import parse_hdbprocedure_or_sql, ProcedureModel
 from hdbcv2dsp.parse_abap_cds import parse_abap_cds_text, ABAPCDSModel  # NEW
+from hdbcv2dsp.source_io import decode_bytes
+from hdbcv2dsp.parse_ddl import parse_ddl_text
+from hdbcv2dsp.profile_schema import profile_csv, profile_parquet
+from hdbcv2dsp.cost_estimate import load_table_stats
+from hdbcv2dsp.instrument import Metrics, collect
 from hdbcv2dsp.unify import (
     graph_from_cv,
     graph_from_sql_views,
@@ -44,6 +50,9 @@ from hdbcv2dsp.unify import (
 )
 from hdbcv2dsp.render_docx_general import render_docx_general
 from hdbcv2dsp.csn_exporter import build_csn_artifacts_zip
+from hdbcv2dsp.cv_to_sql import cv_to_sql_view
+from hdbcv2dsp.project_export import resolve_view_project
+from hdbcv2dsp.cv_optimize import prune_cv_model
 
 # ------------------------------ Small helpers ------------------------------
 def _logo_img_tag(path: str, height_px: int = 72, alt: str = "Blueprint Technologies") -> str:
@@ -67,94 +76,6 @@ def sanitize_filename(name: str) -> str:
         name += ".docx"
     return name or "Rebuild_Guide.docx"
 
-def _guess_cds_type(sql_type: str) -> Dict[str, object]:
-    t = (sql_type or "").strip().upper()
-    if t.startswith("INT") or t in {"INTEGER", "BIGINT", "SMALLINT"}:
-        return {"type": "cds.Integer"}
-    if (
-        t.startswith("DEC")
-        or t.startswith("NUM")
-        or t.startswith("REAL")
-        or t.startswith("DOUBLE")
-        or t.startswith("FLOAT")
-    ):
-        return {"type": "cds.Decimal", "precision": 38, "scale": 10}
-    if t == "DATE":
-        return {"type": "cds.Date"}
-    if t == "TIME":
-        return {"type": "cds.Time"}
-    if t in {"TIMESTAMP", "DATETIME"}:
-        return {"type": "cds.Timestamp"}
-    m = re.match(r'(?:VAR)?CHAR\s*\((\d+)\)', t)
-    if m:
-        return {"type": "cds.String", "length": int(m.group(1))}
-    m2 = re.match(r'(?:N)?VAR?CHAR\s*\((\d+)\)', t)
-    if m2:
-        return {"type": "cds.String", "length": int(m2.group(1))}
-    return {"type": "cds.String", "length": 500}
-
-def _split_columns_block(cols_block: str) -> List[str]:
-    parts: List[str] = []
-    buf: List[str] = []
-    depth = 0
-    for ch in cols_block:
-        if ch == "(":
-            depth += 1
-        elif ch == ")":
-            depth = max(0, depth - 1)
-        if ch == "," and depth == 0:
-            parts.append("".join(buf).strip())
-            buf = []
-        else:
-            buf.append(ch)
-    if buf:
-        parts.append("".join(buf).strip())
-    return parts
-
-def _parse_ddl_sql(text: str) -> Optional[Dict[str, dict]]:
-    """Parse simple CREATE TABLE DDL -> canonical schema. Returns {table_name: {"columns": [{"name":..., "type":..., ...}]}}"""
-    try:
-        m = re.search(
-            r'CREATE\s+TABLE\s+(["\w\.]+)\s*\((.*)\)\s*;?',
-            text,
-            flags=re.I | re.S,
-        )
-        if not m:
-            return None
-        table_name = m.group(1).strip().strip('"')
-        cols_block = m.group(2)
-        parts = _split_columns_block(cols_block)
-        columns = []
-        for p in parts:
-            if re.match(r"^(PRIMARY\s+KEY|FOREIGN\s+KEY|CONSTRAINT)\b", p, flags=re.I):
-                continue
-            toks = p.split()
-            if len(toks) < 2:
-                continue
-            col_name = toks[0].strip().strip('"')
-            col_type = " ".join(toks[1:])
-            elem = _guess_cds_type(col_type)
-            elem_dict = {"name": col_name, **elem}
-            if re.search(r"PRIMARY\s+KEY", p, flags=re.I):
-                elem_dict["key"] = True
-            columns.append(elem_dict)
-        if not columns:
-            return None
-        return {table_name: {"columns": columns}}
-    except Exception:
-        return None
-
-def _parse_csv_header(text: str, inferred_table_name: str) -> Optional[Dict[str, dict]]:
-    try:
-        first = text.splitlines()[0]
-        headers = [h.strip() for h in first.split(",") if h.strip()]
-        if not headers:
-            return None
-        cols = [{"name": h, "type": "cds.String", "length": 500} for h in headers]
-        return {inferred_table_name: {"columns": cols}}
-    except Exception:
-        return None
-
 def _parse_json_schema(text: str, inferred_table_name: str) -> Optional[Dict[str, dict]]:
     try:
         obj = json.loads(text)
@@ -174,20 +95,51 @@ def parse_uploaded_schemas(files) -> Dict[str, dict]:
     for fx in files:
         name = fx.name
         ext = os.path.splitext(name)[1].lower()
-        content = fx.read().decode("utf-8", errors="ignore")
+        base = os.path.splitext(os.path.basename(name))[0]
         parsed = None
-        if ext == ".sql":
-            parsed = _parse_ddl_sql(content)
+        if ext in (".sql", ".ddl", ".hdbtable", ".hdbcds"):
+            # every table in the dump, exact lengths / precision / scale and keys
+            parsed = parse_ddl_text(decode_bytes(fx.getvalue()), base)
         elif ext == ".csv":
-            base = os.path.splitext(os.path.basename(name))[0]
-            parsed = _parse_csv_header(content, base)
+            # sample data: column types profiled from the values, not just the header
+            try:
+                parsed = profile_csv(fx.getvalue(), base)
+            except ValueError as e:  # pandas ParserError / EmptyDataError, bad encoding
+                st.warning(f"Could not profile {name}: {e}")
+        elif ext == ".parquet":
+            try:
+                parsed = profile_parquet(fx.getvalue(), base)
+            except ImportError as e:
+                st.error(str(e))
         elif ext == ".json":
-            base = os.path.splitext(os.path.basename(name))[0]
-            parsed = _parse_json_schema(content, base)
+            parsed = _parse_json_schema(decode_bytes(fx.getvalue()), base)
         if parsed:
             schemas.update(parsed)
     return schemas
 
+def render_diagnostics(metrics: Metrics) -> None:
+    """Sidebar panel: stage timings, counters, JSON / Prometheus / profile downloads."""
+    data = metrics.as_dict()
+    with st.sidebar.expander("🩺 Diagnostics (this run)", expanded=True):
+        if data["stages"]:
+            st.dataframe(
+                [{"stage": k, **v} for k, v in sorted(data["stages"].items(), key=lambda kv: -kv[1]["seconds"])],
+                hide_index=True,
+                use_container_width=True,
+            )
+        else:
+            st.caption("No pipeline stage ran in this run.")
+        if data["counters"]:
+            st.json(data["counters"])
+        st.download_button("⬇️ Metrics (JSON)", metrics.to_json(), file_name="hdbcv2dsp_metrics.json",
+                           mime="application/json", key="dl_diag_json")
+        st.download_button("⬇️ Metrics (Prometheus)", metrics.to_prometheus(), file_name="hdbcv2dsp_metrics.prom",
+                           mime="text/plain", key="dl_diag_prom")
+        if metrics.profile:
+            st.download_button(f"⬇️ Profile ({metrics.profile_engine})", metrics.profile,
+                               file_name=f"hdbcv2dsp_profile_{metrics.profile_engine}.txt",
+                               mime="text/plain", key="dl_diag_profile")
+
 # ------------------------------ Header ------------------------------
 def render_header():
     # Tunables for look & feel
@@ -218,221 +170,248 @@ def render_header():
 # Render it once at the very top
 render_header()
 
-# ------------------------------ Tabs (DEFINE BEFORE USING) ------------------------------
-main_tab, export_tab = st.tabs(["📄 Rebuild Guide (DOCX)", "📦 Export (CSN/JSON)"])
-
-# =====================================================================
-# DOCX TAB
-# =====================================================================
-with main_tab:
-    st.markdown("#### 📤 Upload")
-    uploaded = st.file_uploader(
-        "Upload a Calculation View (.hdbcalculationview/.xml), SQL View (.hdbview/.sql), Stored Procedure (.hdbprocedure/.sql), or ABAP CDS (.cds/.txt)",
-        type=["hdbcalculationview", "xml", "hdbview", "hdbprocedure", "sql", "cds", "txt"],
-        key="uploader_main",
-    )
+# ------------------------------ Diagnostics (stage timings / profile per run) ------------------------------
+with st.sidebar:
+    st.markdown("#### 🩺 Diagnostics")
+    diag_on = st.checkbox("Collect stage timings", value=False, key="diag_on")
+    diag_profile = st.selectbox("Profile each run", ["Off", "cprofile", "pyinstrument"], key="diag_profile",
+                                disabled=not diag_on)
+# the with-block also unbinds collect() when st.rerun() or an error ends the run early
+with ExitStack() as _diag:
+    diag_metrics: Optional[Metrics] = None
+    if diag_on:
+        try:
+            diag_metrics = _diag.enter_context(collect(profile=None if diag_profile == "Off" else diag_profile))
+        except ImportError as e:
+            st.sidebar.error(str(e))
+            diag_metrics = _diag.enter_context(collect())
+
+    # ------------------------------ Tabs (DEFINE BEFORE USING) ------------------------------
+    main_tab, export_tab = st.tabs(["📄 Rebuild Guide (DOCX)", "📦 Export (CSN/JSON)"])
+
+    # =====================================================================
+    # DOCX TAB
+    # =====================================================================
+    with main_tab:
+        st.markdown("#### 📤 Upload")
+        uploaded = st.file_uploader(
+            "Upload a Calculation View (.hdbcalculationview/.xml), SQL View (.hdbview/.sql), Stored Procedure (.hdbprocedure/.sql), or ABAP CDS (.cds/.txt)",
+            type=["hdbcalculationview", "xml", "hdbview", "hdbprocedure", "sql", "cds", "txt"],
+            key="uploader_main",
+        )
 
-    st.markdown("#### 📝 Document Settings")
-    with st.container():
-        colA, colB = st.columns([2, 1])
-        with colA:
-            st.session_state.doc_title = st.text_input(
-                "Document Title (optional)",
-                value=st.session_state.doc_title,
-                key="doc_title_input_main",
-            )
-            st.session_state.out_name = st.text_input(
-                "Output filename",
-                value=st.session_state.out_name,
-                key="outname_main",
-            )
-        with colB:
-            if st.button("⏱️ Use timestamp filename", key="ts_btn_main"):
-                st.session_state.out_name = (
-                    f"Rebuild_Guide_{datetime.now().strftime('%Y%m%d_%H%M%S')}.docx"
+        st.markdown("#### 📝 Document Settings")
+        with st.container():
+            colA, colB = st.columns([2, 1])
+            with colA:
+                st.session_state.doc_title = st.text_input(
+                    "Document Title (optional)",
+                    value=st.session_state.doc_title,
+                    key="doc_title_input_main",
                 )
+                st.session_state.out_name = st.text_input(
+                    "Output filename",
+                    value=st.session_state.out_name,
+                    key="outname_main",
+                )
+            with colB:
+                if st.button("⏱️ Use timestamp filename", key="ts_btn_main"):
+                    st.session_state.out_name = (
+                        f"Rebuild_Guide_{datetime.now().strftime('%Y%m%d_%H%M%S')}.docx"
+                    )
+
+        stats_file = st.file_uploader(
+            "Table statistics (optional, .csv/.json: table, rows, column widths) — sizes the remote vs. replicate advice",
+            type=["csv", "json"],
+            key="stats_main",
+        )
 
-    generate_and_download = st.button("🧾 Generate DOCX", type="primary", key="gen_docx_main")
+        generate_and_download = st.button("🧾 Generate DOCX", type="primary", key="gen_docx_main")
 
-    if uploaded:
-        try:
-            tmp_dir = tempfile.gettempdir()
-            safe_name = os.path.basename(uploaded.name) or "uploaded.sql"
-            tmp_path = os.path.join(tmp_dir, safe_name)
-            content = uploaded.read()
-            with open(tmp_path, "wb") as f:
-                f.write(content)
-
-            ext = os.path.splitext(safe_name)[1].lower()
-            cv_model = None
-            sql_views: List[SQLViewModel] = []
-            procedures: List[ProcedureModel] = []
-            abap_cds_list: List[ABAPCDSModel] = []
-
-            if ext in [".hdbcalculationview", ".xml"]:
-                cv_model = parse_hdbcalculationview(tmp_path)
-                with st.expander("🧩 Calculation View summary", expanded=True):
-                    st.write(f"**ID:** `{cv_model.cv_id}`")
-                    if getattr(cv_model, "description", None):
-                        st.write(f"**Description:** {cv_model.description}")
-                    st.write(
-                        f"**Output View Type:** `{cv_model.output_view_type}` "
-                        f"Data Category: {cv_model.data_category}",
-                        unsafe_allow_html=True,
+        if uploaded:
+            try:
+                safe_name = os.path.basename(uploaded.name) or "uploaded.sql"
+                content = uploaded.getvalue()  # parsers read bytes directly (no temp file)
+
+                ext = os.path.splitext(safe_name)[1].lower()
+                cv_model = None
+                sql_views: List[SQLViewModel] = []
+                procedures: List[ProcedureModel] = []
+                abap_cds_list: List[ABAPCDSModel] = []
+
+                if ext in [".hdbcalculationview", ".xml"]:
+                    cv_model = parse_hdbcalculationview(content)
+                    with st.expander("🧩 Calculation View summary", expanded=True):
+                        st.write(f"**ID:** `{cv_model.cv_id}`")
+                        if getattr(cv_model, "description", None):
+                            st.write(f"**Description:** {cv_model.description}")
+                        st.write(
+                            f"**Output View Type:** `{cv_model.output_view_type}` "
+                            f"Data Category: {cv_model.data_category}",
+                            unsafe_allow_html=True,
+                        )
+                        if getattr(cv_model, "parameters", None):
+                            st.write("**Parameters:**")
+                            for p in cv_model.parameters:
+                                st.code(
+                                    f"{p['id']} ({p['sqlType']}), default={p.get('defaultValue')}, "
+                                    f"mandatory={p.get('isMandatory')}"
+                                )
+                        if getattr(cv_model, "data_sources", None):
+                            st.write("**Data Sources:**")
+                            for ds_id, uri in cv_model.data_sources.items():
+                                st.code(f"{ds_id} -> {uri}")
+                        _, prune_report = prune_cv_model(cv_model)
+                        if prune_report.removed_nodes or prune_report.columns_removed:
+                            st.write(
+                                f"**Pruning:** {len(prune_report.removed_nodes)} unreachable node(s), "
+                                f"{prune_report.columns_removed} unused column(s) dropped from the rebuild."
+                            )
+                        st.write("**Nodes (topological order):**")
+                        order = topo_order(cv_model)
+                        for idx, nid in enumerate(order, start=1):
+                            n = cv_model.nodes[nid]
+                            st.write(f"{idx}. `{n.node_id}` — {n.node_type}")
+
+                elif ext in [".hdbview", ".sql", ".hdbprocedure"]:
+                    text = decode_bytes(content)
+                    text_u = text.upper()
+                    is_proc = bool(
+                        re.search(r"\b(CREATE|ALTER)\s+(OR\s+REPLACE\s+)?(PROCEDURE|PROC)\b", text_u)
+                    )
+                    is_view = (
+                        ext == ".hdbview"
+                        or bool(re.search(r"\b(CREATE|ALTER)\s+(OR\s+REPLACE)\s+VIEW\b", text_u))
+                        or bool(re.search(r"\b(CREATE|ALTER)\s+VIEW\b", text_u))
                     )
-                    if getattr(cv_model, "parameters", None):
-                        st.write("**Parameters:**")
-                        for p in cv_model.parameters:
+                    if is_proc:
+                        proc = parse_hdbprocedure_or_sql(content)
+                        procedures.append(proc)
+                        with st.expander("🛠️ Stored Procedure summary", expanded=True):
                             st.code(
-                                f"{p['id']} ({p['sqlType']}), default={p.get('defaultValue')}, "
-                                f"mandatory={p.get('isMandatory')}"
-                            )
-                    if getattr(cv_model, "data_sources", None):
-                        st.write("**Data Sources:**")
-                        for ds_id, uri in cv_model.data_sources.items():
-                            st.code(f"{ds_id} -> {uri}")
-                    st.write("**Nodes (topological order):**")
-                    order = topo_order(cv_model)
-                    for idx, nid in enumerate(order, start=1):
-                        n = cv_model.nodes[nid]
-                        st.write(f"{idx}. `{n.node_id}` — {n.node_type}")
-
-            elif ext in [".hdbview", ".sql", ".hdbprocedure"]:
-                text = content.decode("utf-8", errors="ignore")
-                text_u = text.upper()
-                is_proc = bool(
-                    re.search(r"\b(CREATE|ALTER)\s+(OR\s+REPLACE\s+)?(PROCEDURE|PROC)\b", text_u)
-                )
-                is_view = (
-                    ext == ".hdbview"
-                    or bool(re.search(r"\b(CREATE|ALTER)\s+(OR\s+REPLACE)\s+VIEW\b", text_u))
-                    or bool(re.search(r"\b(CREATE|ALTER)\s+VIEW\b", text_u))
-                )
-                if is_proc:
-                    proc = parse_hdbprocedure_or_sql(tmp_path)
-                    procedures.append(proc)
-                    with st.expander("🛠️ Stored Procedure summary", expanded=True):
-                        st.code(
-                            f"""Name: {proc.name}
+                                f"""Name: {proc.name}
 Parameters: {[f"{x['mode']} {x['name']} {x['type']}" for x in proc.parameters]}
 Reads: {getattr(proc, 'reads_from', [])}
 Writes: {getattr(proc, 'writes_to', [])}
 Temp tables: {getattr(proc, 'temp_tables', [])}
 Calls: {getattr(proc, 'calls', [])}"""
-                        )
-                elif is_view:
-                    view = parse_hdbview_or_sql(tmp_path)
-                    sql_views.append(view)
-                    with st.expander("🧾 SQL View summary", expanded=True):
-                        cols_preview = ", ".join(view.columns[:10]) + (" ..." if len(view.columns) > 10 else "")
-                        st.code(f"Name: {view.name}\nInputs: {view.inputs}\nColumns: {cols_preview}")
+                            )
+                    elif is_view:
+                        view = parse_hdbview_or_sql(content)
+                        sql_views.append(view)
+                        with st.expander("🧾 SQL View summary", expanded=True):
+                            cols_preview = ", ".join(view.columns[:10]) + (" ..." if len(view.columns) > 10 else "")
+                            st.code(f"Name: {view.name}\nInputs: {view.inputs}\nColumns: {cols_preview}")
+                    else:
+                        st.warning("Unrecognized SQL content. Expecting CREATE/ALTER VIEW or CREATE/ALTER PROCEDURE/PROC.")
                 else:
-                    st.warning("Unrecognized SQL content. Expecting CREATE/ALTER VIEW or CREATE/ALTER PROCEDURE/PROC.")
-            else:
-                # Assume ABAP CDS (.cds / .txt)
-                txt = content.decode("utf-8", errors="ignore")
-                cds = parse_abap_cds_text(txt)
-                abap_cds_list.append(cds)
-                with st.expander("📘 ABAP CDS summary", expanded=True):
-                    st.write(f"**Name:** `{cds.name}`")
-                    if cds.sql_view_name:
-                        st.write(f"**SQL View:** `{cds.sql_view_name}`")
-                    st.write(f"**Extraction enabled:** `{cds.extraction_enabled}`")
-                    if cds.cdc_annotation:
-                        st.write(f"**CDC:** `{cds.cdc_annotation}`")
-                    st.write(f"**Parameters:** {len(cds.parameters)}")
-                    if cds.sources:
-                        st.code("Sources: " + ", ".join(cds.sources))
-
-            # Build union graph
-            graph: Dict[str, object] = {}
-            if cv_model:
-                graph = merge_graphs(graph, graph_from_cv(cv_model))
-            if sql_views:
-                graph = merge_graphs(graph, graph_from_sql_views(sql_views))
-            if procedures:
-                graph = merge_graphs(graph, graph_from_procedures(procedures))
-            if abap_cds_list:
-                graph = merge_graphs(graph, graph_from_abap_cds(abap_cds_list[0]))
-
-            if generate_and_download:
-                tmp_docx_path = os.path.join(tmp_dir, sanitize_filename(st.session_state.out_name))
-                render_docx_general(
-                    output_path=tmp_docx_path,
-                    title=st.session_state.doc_title or None,
-                    cv_model=cv_model,
-                    sql_views=sql_views,
-                    procedures=procedures,
-                    graph=graph if graph else None,
-                    abap_cds_list=abap_cds_list,  # NEW
-                )
-                with open(tmp_docx_path, "rb") as f:
-                    data = f.read()
-                st.download_button(
-                    "⬇️ Download Rebuild Guide (.docx)",
-                    data,
-                    file_name=os.path.basename(tmp_docx_path),
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                )
-        except Exception as e:
-            st.error(f"Failed to parse/generate: {e}")
-    else:
-        st.info(
-            "Upload a Calculation View (.hdbcalculationview/.xml), SQL View (.hdbview/.sql), Procedure (.hdbprocedure/.sql), or ABAP CDS (.cds/.txt) to begin."
-        )
+                    # Assume ABAP CDS (.cds / .txt)
+                    txt = decode_bytes(content)
+                    cds = parse_abap_cds_text(txt)
+                    abap_cds_list.append(cds)
+                    with st.expander("📘 ABAP CDS summary", expanded=True):
+                        st.write(f"**Name:** `{cds.name}`")
+                        if cds.sql_view_name:
+                            st.write(f"**SQL View:** `{cds.sql_view_name}`")
+                        st.write(f"**Extraction enabled:** `{cds.extraction_enabled}`")
+                        if cds.cdc_annotation:
+                            st.write(f"**CDC:** `{cds.cdc_annotation}`")
+                        st.write(f"**Parameters:** {len(cds.parameters)}")
+                        if cds.sources:
+                            st.code("Sources: " + ", ".join(cds.sources))
+
+                # Build union graph
+                graph: Dict[str, object] = {}
+                if cv_model:
+                    graph = merge_graphs(graph, graph_from_cv(cv_model))
+                if sql_views:
+                    graph = merge_graphs(graph, graph_from_sql_views(sql_views))
+                if procedures:
+                    graph = merge_graphs(graph, graph_from_procedures(procedures))
+                if abap_cds_list:
+                    graph = merge_graphs(graph, graph_from_abap_cds(abap_cds_list[0]))
+
+                if generate_and_download:
+                    tmp_docx_path = os.path.join(tempfile.gettempdir(), sanitize_filename(st.session_state.out_name))
+                    render_docx_general(
+                        output_path=tmp_docx_path,
+                        title=st.session_state.doc_title or None,
+                        cv_model=cv_model,
+                        sql_views=sql_views,
+                        procedures=procedures,
+                        graph=graph if graph else None,
+                        abap_cds_list=abap_cds_list,  # NEW
+                        summary_workers=1,  # no process pool inside the Streamlit server
+                        table_stats=load_table_stats(stats_file.getvalue(), os.path.splitext(stats_file.name)[1].lstrip(".").lower())
+                        if stats_file else None,
+                    )
+                    with open(tmp_docx_path, "rb") as f:
+                        data = f.read()
+                    st.download_button(
+                        "⬇️ Download Rebuild Guide (.docx)",
+                        data,
+                        file_name=os.path.basename(tmp_docx_path),
+                        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                    )
+            except Exception as e:
+                st.error(f"Failed to parse/generate: {e}")
+        else:
+            st.info(
+                "Upload a Calculation View (.hdbcalculationview/.xml), SQL View (.hdbview/.sql), Procedure (.hdbprocedure/.sql), or ABAP CDS (.cds/.txt) to begin."
+            )
 
-# =====================================================================
-# EXPORT TAB — three modes (Views-only, Tables-only, Replication Flow)
-# =====================================================================
-with export_tab:
-    st.markdown("#### 📦 Export to CSN/JSON (Datasphere)")
-
-    with st.expander("🧭 Choose what to generate", expanded=True):
-        generation_mode = st.radio(
-            "Mode",
-            [
-                "Create View(s) only (no tables)",
-                "Create Local Table(s) from uploaded schemas",
-                "Replication Flow (ABAP CDS)",
-            ],
-            index=0,
-            key="generation_mode",
-            horizontal=True,
-        )
+    # =====================================================================
+    # EXPORT TAB — three modes (Views-only, Tables-only, Replication Flow)
+    # =====================================================================
+    with export_tab:
+        st.markdown("#### 📦 Export to CSN/JSON (Datasphere)")
+
+        with st.expander("🧭 Choose what to generate", expanded=True):
+            generation_mode = st.radio(
+                "Mode",
+                [
+                    "Create View(s) only (no tables)",
+                    "Create Local Table(s) from uploaded schemas",
+                    "Replication Flow (ABAP CDS)",
+                ],
+                index=0,
+                key="generation_mode",
+                horizontal=True,
+            )
 
-        prev_mode = st.session_state.get("prev_generation_mode")
-        if prev_mode != generation_mode:
-            st.session_state["qa_selected"] = None
-        st.session_state["prev_generation_mode"] = generation_mode
+            prev_mode = st.session_state.get("prev_generation_mode")
+            if prev_mode != generation_mode:
+                st.session_state["qa_selected"] = None
+            st.session_state["prev_generation_mode"] = generation_mode
 
-        st.session_state["pref_generation_mode"] = generation_mode
+            st.session_state["pref_generation_mode"] = generation_mode
 
-        colA, colB = st.columns(2)                
+            colA, colB = st.columns(2)                
 
-        # Right column: View representation ONLY for View-only mode
-        with colB:
-            if generation_mode.startswith("Create View(s)"):
-                # show the control (remember last choice)
-                view_mode = st.selectbox(
-                    "View representation",
-                    ["SQL View (recommended)", "Graphical View (experimental)"],
-                    index=0 if st.session_state.get("pref_view_mode", "SQL View (recommended)").startswith("SQL View") else 1,
-                    key="view_mode",
-                )
-                st.session_state["pref_view_mode"] = view_mode
-            else:
-                # hide the control and silently enforce SQL for downstream code
-                st.session_state["pref_view_mode"] = "SQL View (recommended)"
-
-    # Prepare holders
-    col_left, col_right = st.columns([2, 1])
-    uploaded_exportas_files = None
-    table_schemas: Dict[str, dict] = {}
-    abap_cds_e: Optional[ABAPCDSModel] = None
-
-    # --- Quick actions: selected indicator styling ---
-    st.markdown(
-        """
+            # Right column: View representation ONLY for View-only mode
+            with colB:
+                if generation_mode.startswith("Create View(s)"):
+                    # show the control (remember last choice)
+                    view_mode = st.selectbox(
+                        "View representation",
+                        ["SQL View (recommended)", "Graphical View (experimental)"],
+                        index=0 if st.session_state.get("pref_view_mode", "SQL View (recommended)").startswith("SQL View") else 1,
+                        key="view_mode",
+                    )
+                    st.session_state["pref_view_mode"] = view_mode
+                else:
+                    # hide the control and silently enforce SQL for downstream code
+                    st.session_state["pref_view_mode"] = "SQL View (recommended)"
+
+        # Prepare holders
+        col_left, col_right = st.columns([2, 1])
+        uploaded_exportas_files = None
+        table_schemas: Dict[str, dict] = {}
+        abap_cds_e: Optional[ABAPCDSModel] = None
+
+        # --- Quick actions: selected indicator styling ---
+        st.markdown(
+            """
         <style>
         .qa-selected-indicator {
             color: #E53935;
@@ -442,527 +421,567 @@ with export_tab:
         }
         </style>
         """,
-        unsafe_allow_html=True,
-    )
-    
-    # Helper to determine if button is active and should be highlighted
-    def is_selected(mode):
-        return st.session_state.get("qa_selected") == mode
-
-    # ---------------------- VIEW-ONLY MODE ----------------------
-    if generation_mode.startswith("Create View"):
-        with col_left:
-            with st.expander("📤 Upload artifact for export", expanded=True):
-                uploaded_export = st.file_uploader(
-                    "Upload .hdbcalculationview / .xml / .hdbview / .hdbprocedure / .sql",
-                    type=["hdbcalculationview", "xml", "hdbview", "hdbprocedure", "sql"],
-                    key="uploader_export",
-                )
-
-        with col_right:
-            with st.expander("⚙️ Native SQL View template (optional)", expanded=True):
-                st.caption(
-                    "Upload a SQL View JSON exported from your Datasphere space. We'll clone it and inject your uploaded SQL so the editor shows it after import."
-                )
-                native_template = st.file_uploader(
-                    "Upload Native SQL View JSON",
-                    type=["json"],
-                    key="native_sqlview_template",
-                    accept_multiple_files=False,
-                )        
-
-                # Show the Output format picker only when a template is provided.
-                # Otherwise, default to Neutral (template-free).
-                if native_template:
-                    # Keep previous selection if available, otherwise default to Neutral
-                    prior_choice = st.session_state.get("pref_native_output", "Neutral only (csn.json)")
-                    choices = [
-                        "Neutral only (csn.json)",
-                        "Native only (csn.json)",
-                        "Both (neutral + native_csn.json)",
-                    ]
-                    default_index = (
-                        0 if prior_choice.startswith("Neutral") else (1 if prior_choice.startswith("Native only") else 2)
-                    )
-                    choice = st.selectbox(
-                        "Output format",
-                        choices,
-                        index=default_index,
-                        key="native_output_mode",
-                        help="""
-**Neutral:** Template‑free CSN (modelled view). SQL **may not be** shown in the SQL Editor after import.
-
-**Native:** Requires a Datasphere-exported SQL View template. Your SQL is injected into `@DataWarehouse.sqlEditor.query`, so it **appears in the editor** after import.
+            unsafe_allow_html=True,
+        )
 
-**Both:** Includes `csn.json` (neutral) **and** `native_csn.json` (native) in the ZIP.
-""",
+        # Helper to determine if button is active and should be highlighted
+        def is_selected(mode):
+            return st.session_state.get("qa_selected") == mode
+
+        # ---------------------- VIEW-ONLY MODE ----------------------
+        if generation_mode.startswith("Create View"):
+            with col_left:
+                with st.expander("📤 Upload artifact for export", expanded=True):
+                    uploaded_export = st.file_uploader(
+                        "Upload .hdbcalculationview / .xml / .hdbview / .hdbprocedure / .sql (several views export as one package)",
+                        type=["hdbcalculationview", "xml", "hdbview", "hdbprocedure", "sql"],
+                        key="uploader_export",
+                        accept_multiple_files=True,
                     )
-                    st.session_state["pref_native_output"] = choice
-                else:
-                    st.session_state["pref_native_output"] = "Neutral only (csn.json)"
 
-            # Analytic Model Template upload ONLY for Replication Flow Mode
-            analytic_model_template = None
-            if generation_mode == "Replication Flow (ABAP CDS)":
-                with st.expander("📊 Analytic Model Template (optional)", expanded=False):
+            with col_right:
+                with st.expander("⚙️ Native SQL View template (optional)", expanded=True):
                     st.caption(
-                        "Upload an Analytic Model JSON exported from your Datasphere tenant. "
-                        "SphereAhead will clone it and inject Replication Flow outputs."
+                        "Upload a SQL View JSON exported from your Datasphere space. We'll clone it and inject your uploaded SQL so the editor shows it after import."
                     )
-                    analytic_model_template = st.file_uploader(
-                        "Upload Analytic Model Template JSON",
+                    native_template = st.file_uploader(
+                        "Upload Native SQL View JSON",
                         type=["json"],
-                        key="analytic_model_template",
+                        key="native_sqlview_template",
                         accept_multiple_files=False,
-                    )                    
-
-        # ---------------------- Common: Package name ----------------------
-        with st.expander("🏷️ Package name", expanded=False):
-            package_name = st.text_input(
-                "Name to embed in csn.json",
-                value=f"ds_package_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-                key="pkg_name",
-            )
+                    )        
+
+                    # Show the Output format picker only when a template is provided.
+                    # Otherwise, default to Neutral (template-free).
+                    if native_template:
+                        # Keep previous selection if available, otherwise default to Neutral
+                        prior_choice = st.session_state.get("pref_native_output", "Neutral only (csn.json)")
+                        choices = [
+                            "Neutral only (csn.json)",
+                            "Native only (csn.json)",
+                            "Both (neutral + native_csn.json)",
+                        ]
+                        default_index = (
+                            0 if prior_choice.startswith("Neutral") else (1 if prior_choice.startswith("Native only") else 2)
+                        )
+                        choice = st.selectbox(
+                            "Output format",
+                            choices,
+                            index=default_index,
+                            key="native_output_mode",
+                            help="""
+**Neutral:** Template‑free CSN (modelled view). SQL **may not be** shown in the SQL Editor after import.
 
-        # ---------------------- PARSE / PREP based on selection ----------------------
-        cv_model_e = None
-        sql_views_e: List[SQLViewModel] = []
-        procedures_e: List[ProcedureModel] = []
-        graph_e: Dict[str, object] = {}
-        required_tables: List[str] = []
+**Native:** Requires a Datasphere-exported SQL View template. Your SQL is injected into `@DataWarehouse.sqlEditor.query`, so it **appears in the editor** after import.
 
-        if uploaded_export:
-            try:
-                tmp_dir = tempfile.gettempdir()
-                safe_name = os.path.basename(uploaded_export.name) or "uploaded.sql"
-                tmp_path = os.path.join(tmp_dir, safe_name)
-                with open(tmp_path, "wb") as f:
-                    f.write(uploaded_export.read())
+**Both:** Includes `csn.json` (neutral) **and** `native_csn.json` (native) in the ZIP.
+""",
+                        )
+                        st.session_state["pref_native_output"] = choice
+                    else:
+                        st.session_state["pref_native_output"] = "Neutral only (csn.json)"
 
-                ext = os.path.splitext(safe_name)[1].lower()
+                include_analytic_views = st.checkbox(
+                    "Include Analytic Model(s)",
+                    value=False,
+                    key="include_analytic_views",
+                    help="Adds analytic_model.json with attributes/measures derived from the CV logical model or SQL aggregate columns.",
+                )
 
-                if ext in [".hdbcalculationview", ".xml"]:
-                    cv_model_e = parse_hdbcalculationview(tmp_path)
+                # Analytic Model Template upload ONLY for Replication Flow Mode
+                analytic_model_template = None
+                if generation_mode == "Replication Flow (ABAP CDS)":
+                    with st.expander("📊 Analytic Model Template (optional)", expanded=False):
+                        st.caption(
+                            "Upload an Analytic Model JSON exported from your Datasphere tenant. "
+                            "SphereAhead will clone it and inject Replication Flow outputs."
+                        )
+                        analytic_model_template = st.file_uploader(
+                            "Upload Analytic Model Template JSON",
+                            type=["json"],
+                            key="analytic_model_template",
+                            accept_multiple_files=False,
+                        )                    
+
+            # ---------------------- Common: Package name ----------------------
+            with st.expander("🏷️ Package name", expanded=False):
+                package_name = st.text_input(
+                    "Name to embed in csn.json",
+                    value=f"ds_package_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                    key="pkg_name",
+                )
+                export_cache_dir = st.text_input(
+                    "Incremental cache folder (optional)",
+                    value="",
+                    key="export_cache_dir",
+                    help="Reuse unchanged definitions from the previous export in this folder; the ZIP then also contains delta/ with only the changed objects.",
+                ).strip() or None
+                chunk_mb = st.number_input(
+                    "Split csn.json into chunks of at most (MB, 0 = single file)",
+                    min_value=0.0,
+                    value=0.0,
+                    step=0.5,
+                    key="chunk_mb",
+                    help="Writes csn_001.json…csn_N.json in dependency order plus import_order.json (chunks of one level can be imported in parallel).",
+                )
 
-                elif ext in [".hdbview", ".sql", ".hdbprocedure"]:
-                    with open(tmp_path, "r", encoding="utf-8", errors="ignore") as fh:
-                        text = fh.read()
-                    text_u = text.upper()
-                    is_proc = bool(
-                        re.search(r"\b(CREATE|ALTER)\s+(OR\s+REPLACE\s+)?(PROCEDURE|PROC)\b", text_u)
-                    )
-                    is_view = (
-                        ext == ".hdbview"
-                        or bool(re.search(r"\b(CREATE|ALTER)\s+(OR\s+REPLACE)\s+VIEW\b", text_u))
-                        or bool(re.search(r"\b(CREATE|ALTER)\s+VIEW\b", text_u))
-                    )
-                    if is_proc:
-                        procedures_e.append(parse_hdbprocedure_or_sql(tmp_path))
-                    elif is_view:
-                        sql_views_e.append(parse_hdbview_or_sql(tmp_path))
+            # ---------------------- PARSE / PREP based on selection ----------------------
+            cv_model_e = None
+            sql_views_e: List[SQLViewModel] = []
+            procedures_e: List[ProcedureModel] = []
+            graph_e: Dict[str, object] = {}
+            required_tables: List[str] = []
+
+            for fx_e in uploaded_export or []:
+                try:
+                    safe_name = os.path.basename(fx_e.name) or "uploaded.sql"
+                    content_e = fx_e.getvalue()
+
+                    ext = os.path.splitext(safe_name)[1].lower()
+
+                    if ext in [".hdbcalculationview", ".xml"]:
+                        cv_e = parse_hdbcalculationview(content_e)
+                        if cv_model_e is None:
+                            cv_model_e = cv_e
+                        else:
+                            # one CV drives pruning / analytic model; further CVs export as plain SQL views
+                            sql_views_e.append(cv_to_sql_view(cv_e))
+
+                    elif ext in [".hdbview", ".sql", ".hdbprocedure"]:
+                        text = decode_bytes(content_e)
+                        text_u = text.upper()
+                        is_proc = bool(
+                            re.search(r"\b(CREATE|ALTER)\s+(OR\s+REPLACE\s+)?(PROCEDURE|PROC)\b", text_u)
+                        )
+                        is_view = (
+                            ext == ".hdbview"
+                            or bool(re.search(r"\b(CREATE|ALTER)\s+(OR\s+REPLACE)\s+VIEW\b", text_u))
+                            or bool(re.search(r"\b(CREATE|ALTER)\s+VIEW\b", text_u))
+                        )
+                        if is_proc:
+                            procedures_e.append(parse_hdbprocedure_or_sql(content_e))
+                        elif is_view:
+                            sql_views_e.append(parse_hdbview_or_sql(content_e))
+                        else:
+                            st.warning(f"{safe_name}: unrecognized SQL content. Expecting VIEW or PROCEDURE/PROC.")
                     else:
-                        st.warning("Unrecognized SQL content. Expecting VIEW or PROCEDURE/PROC.")
-                else:
-                    st.warning("Unsupported file type for export.")
-
-                if cv_model_e:
-                    graph_e = merge_graphs(graph_e, graph_from_cv(cv_model_e))
-                if sql_views_e:
-                    graph_e = merge_graphs(graph_e, graph_from_sql_views(sql_views_e))
-                if procedures_e:
-                    graph_e = merge_graphs(graph_e, graph_from_procedures(procedures_e))
-
-                # Determine base tables required by uploaded SQL views
-                req = set()
-                for v in sql_views_e:
-                    for src in getattr(v, "inputs", []) or []:
-                        req.add(src)
-                required_tables = sorted(req)
-            except Exception as e:
-                st.error(f"Failed to parse artifact: {e}")
-
-        # ---------------------- Validation section (left) ----------------------
-        with col_left:
-            with st.expander("🔎 Validation (prerequisites)", expanded=True):
-                if sql_views_e and required_tables:
-                    st.markdown("**Required base tables for the uploaded SQL View(s):**")
-                    for t in required_tables:
-                        st.write(f"- `{t}`")
-                    st.checkbox(
-                        "I confirm these tables already exist in the target Datasphere space (or I have imported/created them before deploying this view).",
-                        value=False,
-                        key="confirm_tables_exist_export",
-                    )
+                        st.warning(f"{safe_name}: unsupported file type for export.")
+                except Exception as e:
+                    st.error(f"Failed to parse {fx_e.name}: {e}")
+
+            if cv_model_e:
+                graph_e = merge_graphs(graph_e, graph_from_cv(cv_model_e))
+            if sql_views_e:
+                graph_e = merge_graphs(graph_e, graph_from_sql_views(sql_views_e))
+            if procedures_e:
+                graph_e = merge_graphs(graph_e, graph_from_procedures(procedures_e))
+
+            # Base tables required by the uploaded SQL views (and the compiled CV);
+            # references to other uploaded views are resolved within the package
+            if sql_views_e or cv_model_e:
+                project_e = resolve_view_project(sql_views_e + ([cv_to_sql_view(cv_model_e)] if cv_model_e else []))
+                required_tables = project_e.prerequisites
+
+            # ---------------------- Validation section (left) ----------------------
+            with col_left:
+                with st.expander("🔎 Validation (prerequisites)", expanded=True):
+                    if (sql_views_e or cv_model_e) and required_tables:
+                        st.markdown("**Required base tables for the uploaded SQL View(s)** (views uploaded together are not listed):")
+                        for t in required_tables:
+                            st.write(f"- `{t}`")
+                        st.checkbox(
+                            "I confirm these tables already exist in the target Datasphere space (or I have imported/created them before deploying this view).",
+                            value=False,
+                            key="confirm_tables_exist_export",
+                        )
+                    else:
+                        st.caption("No base table prerequisites found (or no SQL View inputs detected).")
+
+            # ---------------------- Quick actions + Generate / Download (RIGHT) ----------------------
+            with col_right:
+                # Selection badge (optional; you can keep or remove)
+                qa_selected = st.session_state.get("qa_selected", None)
+                badge = ""
+                if qa_selected == "native":
+                    badge = " <span style='font-size:0.9rem;color:rgba(49,51,63,.7)'>· Selected: <b>Native</b></span>"
+                elif qa_selected == "neutral":
+                    badge = " <span style='font-size:0.9rem;color:rgba(49,51,63,.7)'>· Selected: <b>Neutral</b></span>"
+                elif qa_selected == "tables":
+                    badge = " <span style='font-size:0.9rem;color:rgba(49,51,63,.7)'>· Selected: <b>Tables</b></span>"
+                st.markdown(f"#### ⚡ Quick actions{badge}", unsafe_allow_html=True)
+
+                # determine if a native template is present (uploaded in the right column expander)
+                has_native_template = bool(native_template)
+
+                # Scope the row so rules don't leak
+                st.markdown("<div id='qa-scope'>", unsafe_allow_html=True)
+
+                # --- 3. The Buttons with Custom Styling ---
+                qa_cols = st.columns(2)
+
+                # 1. Native
+                with qa_cols[0]:
+                    native_disabled = not (uploaded_export and (sql_views_e or cv_model_e) and bool(native_template))
+                    if is_selected("native"):
+                        st.markdown('<div class="qa-selected-indicator">✓ Selected</div>', unsafe_allow_html=True)
+                    qa_native = st.button("⚡ View-only: Native (csn.json)", key="qa_view_native", disabled=native_disabled, use_container_width=True)
+
+                # 2. Neutral
+                with qa_cols[1]:
+                    neutral_disabled = not (uploaded_export and (sql_views_e or cv_model_e))
+                    if is_selected("neutral"):
+                        st.markdown('<div class="qa-selected-indicator">✓ Selected</div>', unsafe_allow_html=True)
+                    qa_neutral = st.button("⚡ View-only: Neutral (csn.json)", key="qa_view_neutral", disabled=neutral_disabled, use_container_width=True)
+
+                st.markdown("</div>", unsafe_allow_html=True)        
+
+
+                # Prepare native output mode for main Generate
+                choice = st.session_state.get("native_output_mode", st.session_state["pref_native_output"])
+                if choice.startswith("Neutral"):
+                    exporter_native_mode = "neutral"
+                elif choice.startswith("Native only"):
+                    exporter_native_mode = "native"
                 else:
-                    st.caption("No base table prerequisites found (or no SQL View inputs detected).")
-
-        # ---------------------- Quick actions + Generate / Download (RIGHT) ----------------------
-        with col_right:
-            # Selection badge (optional; you can keep or remove)
-            qa_selected = st.session_state.get("qa_selected", None)
-            badge = ""
-            if qa_selected == "native":
-                badge = " <span style='font-size:0.9rem;color:rgba(49,51,63,.7)'>· Selected: <b>Native</b></span>"
-            elif qa_selected == "neutral":
-                badge = " <span style='font-size:0.9rem;color:rgba(49,51,63,.7)'>· Selected: <b>Neutral</b></span>"
-            elif qa_selected == "tables":
-                badge = " <span style='font-size:0.9rem;color:rgba(49,51,63,.7)'>· Selected: <b>Tables</b></span>"
-            st.markdown(f"#### ⚡ Quick actions{badge}", unsafe_allow_html=True)
-
-            # determine if a native template is present (uploaded in the right column expander)
-            has_native_template = bool(native_template)
-
-            # Scope the row so rules don't leak
-            st.markdown("<div id='qa-scope'>", unsafe_allow_html=True)
-
-            # --- 3. The Buttons with Custom Styling ---
-            qa_cols = st.columns(2)
-
-            # 1. Native
-            with qa_cols[0]:
-                native_disabled = not (uploaded_export and (sql_views_e or cv_model_e) and bool(native_template))
-                if is_selected("native"):
-                    st.markdown('<div class="qa-selected-indicator">✓ Selected</div>', unsafe_allow_html=True)
-                qa_native = st.button("⚡ View-only: Native (csn.json)", key="qa_view_native", disabled=native_disabled, use_container_width=True)
+                    exporter_native_mode = "both"
+                st.session_state["pref_native_output"] = choice
+
+                def _do_build(selected_table_mode: str, selected_native_output: str, force_native_template: bool = False):
+                    try:
+                        # Gates
+                        if selected_table_mode == 'view_only' and (sql_views_e or cv_model_e) and required_tables:
+                            if not st.session_state.get("confirm_tables_exist_export", False):
+                                st.error(
+                                    "Export skipped: Please ensure the required tables exist, or go back and create/import the table JSON first."
+                                )
+                                return None
+
+                        # Use the normalized preference; when the control is hidden, we forced it to "SQL View (recommended)"
+                        mode_views = 'sql' if st.session_state.get('pref_view_mode', 'SQL View (recommended)').startswith('SQL') else 'graphical'
+
+                        nb = None
+                        if native_template and (force_native_template or selected_native_output in ("native", "both")):
+                            nb = native_template.read()
+
+                        views_for_export = [] if selected_table_mode == 'tables_only' else sql_views_e
+
+                        # Determine analytic model template bytes ONLY for Replication Flow
+                        analytic_model_template_bytes = None
+                        if generation_mode == "Replication Flow (ABAP CDS)" and analytic_model_template:
+                            analytic_model_template_bytes = analytic_model_template.read()
+
+                        zip_bytes, manifest = build_csn_artifacts_zip(
+                            package_name=package_name,
+                            cv_model=None if selected_table_mode == 'tables_only' else cv_model_e,
+                            sql_views=views_for_export,
+                            procedures=[] if selected_table_mode == 'tables_only' else procedures_e,
+                            graph=None if selected_table_mode == 'tables_only' else (graph_e if graph_e else None),
+                            table_mode=selected_table_mode,  # 'view_only' or 'tables_only'
+                            view_mode=mode_views,
+                            include_analytic=include_analytic_views and selected_table_mode != 'tables_only',
+                            native_template_bytes=nb,
+                            native_single_file=False,
+                            table_schemas=table_schemas,
+                            native_output_mode=selected_native_output,  # "neutral" | "native" | "both",                                                                        
+                            analytic_model_template_bytes=analytic_model_template_bytes,  # NEW
+                            cache_dir=export_cache_dir,
+                            chunk_max_bytes=int(chunk_mb * 1024 * 1024) or None,
+                        )
+                        return zip_bytes, manifest
+                    except Exception as e:
+                        st.error(f"Failed to build packages: {e}")
+                        return None
 
-            # 2. Neutral
-            with qa_cols[1]:
-                neutral_disabled = not (uploaded_export and (sql_views_e or cv_model_e))
-                if is_selected("neutral"):
-                    st.markdown('<div class="qa-selected-indicator">✓ Selected</div>', unsafe_allow_html=True)
-                qa_neutral = st.button("⚡ View-only: Neutral (csn.json)", key="qa_view_neutral", disabled=neutral_disabled, use_container_width=True)
+                # Main "Generate" button
+                gen_csn_btn = st.button("🚀 Generate CSN/JSON", type="secondary", key="gen_csn")
 
-            st.markdown("</div>", unsafe_allow_html=True)        
+                # --- RUN ANY PENDING BUILD FROM A PREVIOUS CLICK (AFTER RERUN) ---
+                build_result = None
+                _pending = st.session_state.pop("_pending_build", None)
+                if _pending:
+                    tm, nm, force_tpl = _pending  # ('view_only'|'tables_only', 'neutral'|'native'|'both', bool)
+                    build_result = _do_build(tm, nm, force_native_template=force_tpl)
 
+                    # NEW: if build was skipped/blocked (e.g., validation pre-req not confirmed), remove the highlight
+                    if build_result is None:
+                        st.session_state["qa_selected"] = None        
 
-            # Prepare native output mode for main Generate
-            choice = st.session_state.get("native_output_mode", st.session_state["pref_native_output"])
-            if choice.startswith("Neutral"):
-                exporter_native_mode = "neutral"
-            elif choice.startswith("Native only"):
-                exporter_native_mode = "native"
-            else:
-                exporter_native_mode = "both"
-            st.session_state["pref_native_output"] = choice
 
-            def _do_build(selected_table_mode: str, selected_native_output: str, force_native_template: bool = False):
-                try:
-                    # Gates
-                    if selected_table_mode == 'view_only' and sql_views_e and required_tables:
-                        if not st.session_state.get("confirm_tables_exist_export", False):
-                            st.error(
-                                "Export skipped: Please ensure the required tables exist, or go back and create/import the table JSON first."
-                            )
-                            return None
-
-                    # Use the normalized preference; when the control is hidden, we forced it to "SQL View (recommended)"
-                    mode_views = 'sql' if st.session_state.get('pref_view_mode', 'SQL View (recommended)').startswith('SQL') else 'graphical'
-
-                    nb = None
-                    if native_template and (force_native_template or selected_native_output in ("native", "both")):
-                        nb = native_template.read()
-
-                    views_for_export = [] if selected_table_mode == 'tables_only' else sql_views_e
-
-                    # Determine analytic model template bytes ONLY for Replication Flow
-                    analytic_model_template_bytes = None
-                    if generation_mode == "Replication Flow (ABAP CDS)" and analytic_model_template:
-                        analytic_model_template_bytes = analytic_model_template.read()
-
-                    zip_bytes, manifest = build_csn_artifacts_zip(
-                        package_name=package_name,
-                        cv_model=None if selected_table_mode == 'tables_only' else cv_model_e,
-                        sql_views=views_for_export,
-                        procedures=[] if selected_table_mode == 'tables_only' else procedures_e,
-                        graph=None if selected_table_mode == 'tables_only' else (graph_e if graph_e else None),
-                        table_mode=selected_table_mode,  # 'view_only' or 'tables_only'
-                        view_mode=mode_views,
-                        include_analytic=false,  # For now, only the Replication Flow mode supports analytic models, and it's gated on having a template upload
-                        native_template_bytes=nb,
-                        native_single_file=False,
-                        table_schemas=table_schemas,
-                        native_output_mode=selected_native_output,  # "neutral" | "native" | "both",                                                                        
-                        analytic_model_template_bytes=analytic_model_template_bytes,  # NEW
-                    )
-                    return zip_bytes, manifest
-                except Exception as e:
-                    st.error(f"Failed to build packages: {e}")
-                    return None
-
-            # Main "Generate" button
-            gen_csn_btn = st.button("🚀 Generate CSN/JSON", type="secondary", key="gen_csn")
-
-            # --- RUN ANY PENDING BUILD FROM A PREVIOUS CLICK (AFTER RERUN) ---
-            build_result = None
-            _pending = st.session_state.pop("_pending_build", None)
-            if _pending:
-                tm, nm, force_tpl = _pending  # ('view_only'|'tables_only', 'neutral'|'native'|'both', bool)
-                build_result = _do_build(tm, nm, force_native_template=force_tpl)
-
-                # NEW: if build was skipped/blocked (e.g., validation pre-req not confirmed), remove the highlight
-                if build_result is None:
-                    st.session_state["qa_selected"] = None        
-
-
-            # --- HANDLE QUICK ACTIONS + MAIN GENERATE: QUEUE BUILD, SET HIGHLIGHT, AND RERUN ---
-            if qa_native:
-                st.session_state["qa_selected"] = "native"
-                st.session_state["_pending_build"] = ('view_only', 'native', True)
-                st.rerun()
-
-            elif qa_neutral:
-                st.session_state["qa_selected"] = "neutral"
-                st.session_state["_pending_build"] = ('view_only', 'neutral', False)
-                st.rerun()
-
-            elif gen_csn_btn:
-                # Map exporter mode → selection
-                if exporter_native_mode == "native":
+                # --- HANDLE QUICK ACTIONS + MAIN GENERATE: QUEUE BUILD, SET HIGHLIGHT, AND RERUN ---
+                if qa_native:
                     st.session_state["qa_selected"] = "native"
-                else:
-                    # For "neutral" and "both", highlight Neutral (unless you add a third quick action for 'Both')
-                    st.session_state["qa_selected"] = "neutral"
-                st.session_state["_pending_build"] = ('view_only', exporter_native_mode, False)
-                st.rerun()
-
-            # ---- DOWNLOAD / SUCCESS AREA (no extra 'with col_right:' here; we're already inside it) ----
-            if build_result:
-                zip_bytes, manifest = build_result
-                st.success("✅ Package generated.")
-                st.download_button(
-                    label="⬇️ Download Export Package (ZIP)",
-                    data=zip_bytes,
-                    file_name=f"{package_name}.zip",
-                    mime="application/zip",
-                    key="dl_csn_zip",
-                )
-                with st.expander("🧾 Manifest preview"):
-                    st.code(json.dumps(manifest, indent=2))
-                st.info(
-                    "If you chose a **Native** output, the SQL appears in the Datasphere SQL editor after import. "
-                    "Remember to **deploy** after import."
-                )
-
-    # ---------------------- TABLES-ONLY MODE ----------------------
-    elif generation_mode.startswith("Create Local Table"):
-        with col_left:
-            with st.expander("🗄️ Table Schemas (required for table creation)", expanded=True):
-                st.caption(
-                    "Upload **DDL .sql**, **CSV header**, or **JSON schema** to create Local Table entities."
-                )
-                schemas_files = st.file_uploader(
-                    "Upload table schemas",
-                    type=["sql", "csv", "json"],
-                    accept_multiple_files=True,
-                    key="schema_files",
-                )
-                table_schemas = parse_uploaded_schemas(schemas_files)
-                if table_schemas:
-                    for t in sorted(table_schemas.keys()):
-                        st.markdown(f"- ✅ `{t}`", unsafe_allow_html=True)
-                else:
-                    st.markdown("No schemas uploaded yet.", unsafe_allow_html=True)
-
-        with col_right:
-            st.info("View-related upload options are hidden because you selected **Tables-only** mode.")
+                    st.session_state["_pending_build"] = ('view_only', 'native', True)
+                    st.rerun()
 
-        with st.expander("🏷️ Package name", expanded=False):
-            package_name = st.text_input(
-                "Name to embed in csn.json",
-                value=f"ds_package_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-                key="pkg_name_tables",
-            )
+                elif qa_neutral:
+                    st.session_state["qa_selected"] = "neutral"
+                    st.session_state["_pending_build"] = ('view_only', 'neutral', False)
+                    st.rerun()
 
-        with col_right:
-            # Show selection indicator if Tables button is selected
-            if is_selected("tables"):
-                st.markdown('<div class="qa-selected-indicator">✓ Selected</div>', unsafe_allow_html=True)
-            qa_tables = st.button(
-                "⚡ Tables-only ZIP",
-                key="qa_tables_only_zip",
-                disabled=not bool(table_schemas),
-            )
-            if qa_tables:
-                # Set the selection state and flag for build on next rerun
-                st.session_state["qa_selected"] = "tables"
-                st.session_state["_build_tables_zip"] = True
-                st.rerun()
-            
-            # Build if flagged on previous run
-            if st.session_state.get("_build_tables_zip"):
-                st.session_state.pop("_build_tables_zip") 
-                try:
-                    zip_bytes, manifest = build_csn_artifacts_zip(
-                        package_name=package_name,
-                        cv_model=None,
-                        sql_views=[],
-                        procedures=[],
-                        graph=None,
-                        table_mode='tables_only',
-                        view_mode='sql',
-                        include_analytic=False,
-                        native_template_bytes=None,
-                        native_single_file=False,
-                        table_schemas=table_schemas,
-                        native_output_mode="neutral",
-                    )
-                    st.success("✅ Tables-only package generated.")
+                elif gen_csn_btn:
+                    # Map exporter mode → selection
+                    if exporter_native_mode == "native":
+                        st.session_state["qa_selected"] = "native"
+                    else:
+                        # For "neutral" and "both", highlight Neutral (unless you add a third quick action for 'Both')
+                        st.session_state["qa_selected"] = "neutral"
+                    st.session_state["_pending_build"] = ('view_only', exporter_native_mode, False)
+                    st.rerun()
+
+                # ---- DOWNLOAD / SUCCESS AREA (no extra 'with col_right:' here; we're already inside it) ----
+                if build_result:
+                    zip_bytes, manifest = build_result
+                    st.success("✅ Package generated.")
                     st.download_button(
                         label="⬇️ Download Export Package (ZIP)",
                         data=zip_bytes,
                         file_name=f"{package_name}.zip",
                         mime="application/zip",
-                        key="dl_tables_zip",
+                        key="dl_csn_zip",
                     )
                     with st.expander("🧾 Manifest preview"):
                         st.code(json.dumps(manifest, indent=2))
                     st.info(
-                        "This package contains **table entities only**. Import **csn.json** and deploy tables before creating views."
+                        "If you chose a **Native** output, the SQL appears in the Datasphere SQL editor after import. "
+                        "Remember to **deploy** after import."
                     )
-                except Exception as e:
-                    st.error(f"Failed to build packages: {e}")                       
-
-    # ---------------------- REPLICATION FLOW (ABAP CDS) ----------------------
-    else:
-        abap_cds_e = None 
-        # LEFT: Upload ABAP CDS and Replication Flow template
-        with col_left:
-            with st.expander("📤 Upload ABAP CDS and Replication Flow template", expanded=True):
-                uploaded_export = st.file_uploader(
-                    "Upload ABAP CDS file (.cds / .txt)",
-                    type=["cds", "txt"],
-                    key="uploader_export_cds",
-                )
-                native_template = st.file_uploader(
-                    "Upload Replication Flow JSON (exported from Datasphere)",
-                    type=["json"],
-                    key="rf_template",
-                    accept_multiple_files=False,
-                )
 
-            # -------------------------------------------
-            # Analytic Model (optional for RF only)
-            # -------------------------------------------
-            include_analytic = st.checkbox(
-                "Include Analytic Model (template)",
-                value=False,
-                key="include_analytic_rf"
-            )
-
-            analytic_model_template = None
-            if include_analytic:
-                with st.expander("📊 Analytic Model Template (optional)", expanded=False):
+        # ---------------------- TABLES-ONLY MODE ----------------------
+        elif generation_mode.startswith("Create Local Table"):
+            with col_left:
+                with st.expander("🗄️ Table Schemas (required for table creation)", expanded=True):
                     st.caption(
-                        "Upload an Analytic Model JSON exported from your Datasphere tenant. "
-                        "SphereAhead will clone it and inject Replication Flow outputs."
+                        "Upload **DDL** (.sql dumps with any number of tables, .hdbtable, .hdbcds), **sample data** (.csv, .parquet — types are profiled from the values), or **JSON schema** to create Local Table entities."
                     )
-                    analytic_model_template = st.file_uploader(
-                        "Upload Analytic Model Template JSON",
-                        type=["json"],
-                        key="analytic_model_template_rf",
-                        accept_multiple_files=False,
-                    )                           
-
-            abap_cds_e: Optional[ABAPCDSModel] = None
-            if uploaded_export:
-                txt = uploaded_export.read().decode("utf-8", errors="ignore")
-                abap_cds_e = parse_abap_cds_text(txt)
-
-            # Convert analytic model template into bytes (RF ONLY)
-            analytic_model_template_bytes = None
-            if include_analytic and analytic_model_template:
-                analytic_model_template_bytes = analytic_model_template.read()                
-
-                with st.expander("📘 ABAP CDS summary", expanded=True):
-                    st.write(f"**Name:** `{abap_cds_e.name}`")
-                    if abap_cds_e.sql_view_name:
-                        st.write(f"**SQL View:** `{abap_cds_e.sql_view_name}`")
-                    st.write(f"**Extraction enabled:** `{abap_cds_e.extraction_enabled}`")
-                    if abap_cds_e.cdc_annotation:
-                        st.write(f"**CDC:** `{abap_cds_e.cdc_annotation}`")
-                    st.write(f"**Parameters:** {len(abap_cds_e.parameters)}")
-                    if abap_cds_e.sources:
-                        st.code("Sources: " + ", ".join(abap_cds_e.sources))
-
-            # Sanity validator
-            ok_extract = bool(abap_cds_e and abap_cds_e.extraction_enabled)
-            ok_params = bool(abap_cds_e and not abap_cds_e.parameters)
-
-            with st.expander("🔎 Validation (sanity checks)", expanded=True):
-                st.write("• Extraction enabled:", "✅" if ok_extract else "❌")
-                st.write("• No input parameters:", "✅" if ok_params else "❌")
-                if not ok_extract:
-                    st.warning("Replication Flow requires `@Analytics.dataExtraction.enabled: true` on the CDS.")
-                if not ok_params:
-                    st.warning("Replication Flows do **not** support input parameters.")
-
-        # RIGHT: Options + Generate
-        with col_right:
-            st.markdown("#### ⚙️ Options")
-
-            rf_load_type = st.selectbox(
-                "Load Type",
-                ["INITIAL_ONLY", "INITIAL_AND_DELTA", "DELTA_ONLY"],
-                index=1,
-                key="rf_load_type",
-            )
-            rf_content_type = st.selectbox(
-                "Content Type (ABAP sources)",
-                ["Native", "Template", "Unspecified"],
-                index=0,
-                key="rf_content_type",
-                help="For ABAP-based sources (Datasphere wave 2025.04+), choose how date/timestamp types are applied to target. If unsure, keep Native.",
-            )
-            target_table = st.text_input(
-                "Target local table name",
-                value=(f"Z_{abap_cds_e.name}" if abap_cds_e else "Z_TARGET"),
-                key="rf_target_table",
-            )
+                    schemas_files = st.file_uploader(
+                        "Upload table schemas",
+                        type=["sql", "ddl", "hdbtable", "hdbcds", "csv", "parquet", "json"],
+                        accept_multiple_files=True,
+                        key="schema_files",
+                    )
+                    table_schemas = parse_uploaded_schemas(schemas_files)
+                    if table_schemas:
+                        for t in sorted(table_schemas.keys()):
+                            st.markdown(f"- ✅ `{t}`", unsafe_allow_html=True)
+                    else:
+                        st.markdown("No schemas uploaded yet.", unsafe_allow_html=True)
+
+            with col_right:
+                st.info("View-related upload options are hidden because you selected **Tables-only** mode.")
 
             with st.expander("🏷️ Package name", expanded=False):
                 package_name = st.text_input(
                     "Name to embed in csn.json",
                     value=f"ds_package_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-                    key="pkg_name_rf",
+                    key="pkg_name_tables",
                 )
 
-            gen_rf = st.button(
-                "🚀 Generate CSN/JSON",
-                type="secondary",
-                key="gen_rf",
-                disabled=not (abap_cds_e and native_template and ok_extract and ok_params),
-            )
-            if gen_rf:
-                try:
-                    nb = native_template.read() if native_template else None
-                    zip_bytes, manifest = build_csn_artifacts_zip(
-                        package_name=package_name,
-                        cv_model=None,
-                        sql_views=[],
-                        procedures=[],
-                        graph=None,
-                        table_mode='view_only',
-                        view_mode='sql',
-                        include_analytic=include_analytic,
-                        native_template_bytes=nb,
-                        table_schemas=None,
-                        native_output_mode="native",  # Replication Flows are native
-                        abap_cds=abap_cds_e,
-                        rf_load_type=rf_load_type,
-                        rf_content_type=(None if rf_content_type == "Unspecified" else rf_content_type),
-                        rf_target_table=target_table,
-                        analytic_model_template_bytes=analytic_model_template_bytes,
+            with col_right:
+                # Show selection indicator if Tables button is selected
+                if is_selected("tables"):
+                    st.markdown('<div class="qa-selected-indicator">✓ Selected</div>', unsafe_allow_html=True)
+                qa_tables = st.button(
+                    "⚡ Tables-only ZIP",
+                    key="qa_tables_only_zip",
+                    disabled=not bool(table_schemas),
+                )
+                if qa_tables:
+                    # Set the selection state and flag for build on next rerun
+                    st.session_state["qa_selected"] = "tables"
+                    st.session_state["_build_tables_zip"] = True
+                    st.rerun()
+
+                # Build if flagged on previous run
+                if st.session_state.get("_build_tables_zip"):
+                    st.session_state.pop("_build_tables_zip") 
+                    try:
+                        zip_bytes, manifest = build_csn_artifacts_zip(
+                            package_name=package_name,
+                            cv_model=None,
+                            sql_views=[],
+                            procedures=[],
+                            graph=None,
+                            table_mode='tables_only',
+                            view_mode='sql',
+                            include_analytic=False,
+                            native_template_bytes=None,
+                            native_single_file=False,
+                            table_schemas=table_schemas,
+                            native_output_mode="neutral",
+                        )
+                        st.success("✅ Tables-only package generated.")
+                        st.download_button(
+                            label="⬇️ Download Export Package (ZIP)",
+                            data=zip_bytes,
+                            file_name=f"{package_name}.zip",
+                            mime="application/zip",
+                            key="dl_tables_zip",
+                        )
+                        with st.expander("🧾 Manifest preview"):
+                            st.code(json.dumps(manifest, indent=2))
+                        st.info(
+                            "This package contains **table entities only**. Import **csn.json** and deploy tables before creating views."
+                        )
+                    except Exception as e:
+                        st.error(f"Failed to build packages: {e}")                       
+
+        # ---------------------- REPLICATION FLOW (ABAP CDS) ----------------------
+        else:
+            abap_cds_e = None 
+            # LEFT: Upload ABAP CDS and Replication Flow template
+            with col_left:
+                with st.expander("📤 Upload ABAP CDS and Replication Flow template", expanded=True):
+                    uploaded_export = st.file_uploader(
+                        "Upload ABAP CDS file(s) (.cds / .txt)",
+                        type=["cds", "txt"],
+                        key="uploader_export_cds",
+                        accept_multiple_files=True,
                     )
-                    st.success("✅ Replication Flow package generated.")
-                    st.download_button(
-                        label="⬇️ Download Export Package (ZIP)",
-                        data=zip_bytes,
-                        file_name=f"{package_name}.zip",
-                        mime="application/zip",
-                        key="dl_rf_zip",
+                    rf_stats_file = st.file_uploader(
+                        "Entity statistics (optional, .csv/.json: table, rows, row_bytes, daily_changes) — sizes flows, threads and delta intervals",
+                        type=["csv", "json"],
+                        key="rf_stats",
                     )
-                    with st.expander("🧾 Manifest preview"):
-                        st.code(json.dumps(manifest, indent=2))
-                    st.info("After import, set source/target connections if prompted, **deploy**, and then **run**.")
-                except Exception as e:
-                    st.error(f"Failed to build packages: {e}")
\ No newline at end of file
+                    native_template = st.file_uploader(
+                        "Upload Replication Flow JSON (exported from Datasphere)",
+                        type=["json"],
+                        key="rf_template",
+                        accept_multiple_files=False,
+                    )
+
+                # -------------------------------------------
+                # Analytic Model (optional for RF only)
+                # -------------------------------------------
+                include_analytic = st.checkbox(
+                    "Include Analytic Model (template)",
+                    value=False,
+                    key="include_analytic_rf"
+                )
+
+                analytic_model_template = None
+                if include_analytic:
+                    with st.expander("📊 Analytic Model Template (optional)", expanded=False):
+                        st.caption(
+                            "Upload an Analytic Model JSON exported from your Datasphere tenant. "
+                            "SphereAhead will clone it and inject Replication Flow outputs."
+                        )
+                        analytic_model_template = st.file_uploader(
+                            "Upload Analytic Model Template JSON",
+                            type=["json"],
+                            key="analytic_model_template_rf",
+                            accept_multiple_files=False,
+                        )                           
+
+                abap_cds_e: Optional[ABAPCDSModel] = None
+                abap_cds_list_e: List[ABAPCDSModel] = [
+                    parse_abap_cds_text(decode_bytes(fx.getvalue())) for fx in (uploaded_export or [])
+                ]
+                if abap_cds_list_e:
+                    abap_cds_e = abap_cds_list_e[0]
+                rf_stats = (load_table_stats(rf_stats_file.getvalue(), os.path.splitext(rf_stats_file.name)[1].lstrip(".").lower())
+                            if rf_stats_file else None)
+
+                # Convert analytic model template into bytes (RF ONLY)
+                analytic_model_template_bytes = None
+                if include_analytic and analytic_model_template:
+                    analytic_model_template_bytes = analytic_model_template.read()                
+
+                    with st.expander("📘 ABAP CDS summary", expanded=True):
+                        st.write(f"**Name:** `{abap_cds_e.name}`")
+                        if abap_cds_e.sql_view_name:
+                            st.write(f"**SQL View:** `{abap_cds_e.sql_view_name}`")
+                        st.write(f"**Extraction enabled:** `{abap_cds_e.extraction_enabled}`")
+                        if abap_cds_e.cdc_annotation:
+                            st.write(f"**CDC:** `{abap_cds_e.cdc_annotation}`")
+                        st.write(f"**Parameters:** {len(abap_cds_e.parameters)}")
+                        if abap_cds_e.sources:
+                            st.code("Sources: " + ", ".join(abap_cds_e.sources))
+
+                # Sanity validator
+                ok_extract = bool(abap_cds_list_e) and all(c.extraction_enabled for c in abap_cds_list_e)
+                ok_params = bool(abap_cds_list_e) and all(not c.parameters for c in abap_cds_list_e)
+
+                with st.expander("🔎 Validation (sanity checks)", expanded=True):
+                    st.write("• Extraction enabled:", "✅" if ok_extract else "❌")
+                    st.write("• No input parameters:", "✅" if ok_params else "❌")
+                    if not ok_extract:
+                        st.warning("Replication Flow requires `@Analytics.dataExtraction.enabled: true` on the CDS.")
+                    if not ok_params:
+                        st.warning("Replication Flows do **not** support input parameters.")
+
+            # RIGHT: Options + Generate
+            with col_right:
+                st.markdown("#### ⚙️ Options")
+
+                rf_load_type = st.selectbox(
+                    "Load Type",
+                    ["INITIAL_ONLY", "INITIAL_AND_DELTA", "DELTA_ONLY"],
+                    index=1,
+                    key="rf_load_type",
+                )
+                rf_content_type = st.selectbox(
+                    "Content Type (ABAP sources)",
+                    ["Native", "Template", "Unspecified"],
+                    index=0,
+                    key="rf_content_type",
+                    help="For ABAP-based sources (Datasphere wave 2025.04+), choose how date/timestamp types are applied to target. If unsure, keep Native.",
+                )
+                target_table = st.text_input(
+                    "Target local table name",
+                    value=(f"Z_{abap_cds_e.name}" if abap_cds_e else "Z_TARGET"),
+                    key="rf_target_table",
+                )
+
+                with st.expander("🏷️ Package name", expanded=False):
+                    package_name = st.text_input(
+                        "Name to embed in csn.json",
+                        value=f"ds_package_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                        key="pkg_name_rf",
+                    )
+
+                gen_rf = st.button(
+                    "🚀 Generate CSN/JSON",
+                    type="secondary",
+                    key="gen_rf",
+                    disabled=not (abap_cds_e and native_template and ok_extract and ok_params),
+                )
+                if gen_rf:
+                    try:
+                        nb = native_template.read() if native_template else None
+                        zip_bytes, manifest = build_csn_artifacts_zip(
+                            package_name=package_name,
+                            cv_model=None,
+                            sql_views=[],
+                            procedures=[],
+                            graph=None,
+                            table_mode='view_only',
+                            view_mode='sql',
+                            include_analytic=include_analytic,
+                            native_template_bytes=nb,
+                            table_schemas=None,
+                            native_output_mode="native",  # Replication Flows are native
+                            abap_cds=abap_cds_e,
+                            abap_cds_list=abap_cds_list_e,
+                            rf_stats=rf_stats,
+                            rf_load_type=rf_load_type,
+                            rf_content_type=(None if rf_content_type == "Unspecified" else rf_content_type),
+                            rf_target_table=target_table,
+                            analytic_model_template_bytes=analytic_model_template_bytes,
+                        )
+                        st.success("✅ Replication Flow package generated.")
+                        st.download_button(
+                            label="⬇️ Download Export Package (ZIP)",
+                            data=zip_bytes,
+                            file_name=f"{package_name}.zip",
+                            mime="application/zip",
+                            key="dl_rf_zip",
+                        )
+                        with st.expander("🧾 Manifest preview"):
+                            st.code(json.dumps(manifest, indent=2))
+                        st.info("After import, set source/target connections if prompted, **deploy**, and then **run**.")
+                    except Exception as e:
+                        st.error(f"Failed to build packages: {e}")
+
+# ------------------------------ Diagnostics panel ------------------------------
+if diag_metrics is not None:
+    render_diagnostics(diag_metrics)
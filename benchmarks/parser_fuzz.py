@@ -0,0 +1,158 @@
+# benchmarks/parser_fuzz.py
+# ======================================================================
+# Fuzz / performance regression corpus for the text parsers
+#  - Pathological cases: inputs that made the regex parsers quadratic
+#    (wide select lists, SELECT without FROM, unclosed brackets, header
+#    and CTAS patterns that never complete, unterminated strings and
+#    comments), each generated at SIZE repetitions
+#  - Fuzz cases: seeded random mutations (cut, duplicate, drop or insert
+#    brackets / quotes / keywords) of small valid artifacts
+#  - Every case must parse without raising and within --limit seconds;
+#    timeouts and fallbacks are counted through instrument
+#
+#   python benchmarks/parser_fuzz.py [--size 4000] [--fuzz 200] [--seed 1]
+#                                    [--budget 0.5] [--limit 2.0] [--json report.json]
+# ======================================================================
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from hdbcv2dsp.instrument import collect                       # noqa: E402
+from hdbcv2dsp.parse_abap_cds import parse_abap_cds_text       # noqa: E402
+from hdbcv2dsp.parse_ddl import parse_ddl_text                 # noqa: E402
+from hdbcv2dsp.parse_procedure import parse_hdbprocedure_or_sql  # noqa: E402
+from hdbcv2dsp.parse_sql_view import parse_hdbview_or_sql      # noqa: E402
+
+SEEDS = {
+    "view": """CREATE VIEW "S"."V_ORDERS" AS
+SELECT o.ORDER_ID, c.NAME AS CUSTOMER_NAME, SUM(o.AMOUNT) AS TOTAL, CAST(o.ORDER_DATE AS DATE) AS ODATE
+FROM "S"."ORDERS" o JOIN "S"."CUSTOMERS" c ON c.ID = o.CUSTOMER_ID
+WHERE o.STATUS = 'OPEN' AND c.COUNTRY IN ('DE', 'FR')
+GROUP BY o.ORDER_ID, c.NAME, o.ORDER_DATE
+HAVING SUM(o.AMOUNT) > 100;""",
+    "procedure": """CREATE PROCEDURE "S"."P_LOAD" (IN iv_date DATE, OUT ot_result TABLE (ID INT, AMT DECIMAL(15, 2)))
+LANGUAGE SQLSCRIPT AS
+BEGIN
+  lt_src = SELECT ID, AMT FROM "S"."SRC" WHERE LOAD_DATE = :iv_date;
+  CREATE TABLE #stage WITH (DISTRIBUTION = ROUND_ROBIN) AS SELECT * FROM :lt_src;
+  INSERT INTO "S"."TGT" SELECT ID, AMT FROM #stage;
+  ot_result = SELECT ID, AMT FROM "S"."TGT";
+END;""",
+    "abap_cds": """@AbapCatalog.sqlViewName: 'ZV_SO'
+@Analytics.dataExtraction.enabled: true
+define view ZI_SalesOrder with parameters p_date : abap.dats
+  as select from vbak
+  association [0..*] to vbap as _Item on $projection.vbeln = _Item.vbeln
+{
+  key vbak.vbeln,
+      vbak.erdat,
+      _Item
+}""",
+    "ddl": """CREATE COLUMN TABLE "S"."ORDERS" (
+  "ORDER_ID" INTEGER NOT NULL, "AMOUNT" DECIMAL(15, 2), "NOTE" NVARCHAR(100) DEFAULT 'a,b',
+  PRIMARY KEY ("ORDER_ID")
+);""",
+}
+
+
+def parsers(budget: float):
+    return {
+        "view": lambda text: parse_hdbview_or_sql(text.encode("utf-8"), budget_seconds=budget),
+        "procedure": lambda text: parse_hdbprocedure_or_sql(text.encode("utf-8"), budget_seconds=budget),
+        "abap_cds": parse_abap_cds_text,
+        "ddl": parse_ddl_text,
+    }
+
+
+def pathological(n: int):
+    """(name, parser kind, text) of the inputs the regex parsers used to choke on."""
+    cols = ", ".join(f"COALESCE(a.C{i}, 0) AS C{i}" for i in range(n))
+    params = ", ".join(f"IN p{i} DECIMAL(15, 2)" for i in range(n))
+    yield "view.wide_select", "view", f"CREATE VIEW V AS SELECT {cols} FROM T a WHERE a.X = 1"
+    yield "view.select_without_from", "view", "CREATE VIEW V AS " + "SELECT a, b " * n
+    yield "view.unclosed_parens", "view", "CREATE VIEW V AS SELECT " + "f(a, " * n + " FROM T"
+    yield "view.stray_closers", "view", "CREATE VIEW V AS SELECT " + "a), " * n + "b FROM T"
+    yield "view.where_chain", "view", "CREATE VIEW V AS SELECT a FROM T " + "WHERE x = 1 " * n
+    yield "view.nested_with", "view", "CREATE VIEW V AS " + "WITH a AS ( " * n
+    yield "view.unterminated_string", "view", "CREATE VIEW V AS SELECT 'a, " + "x, " * n + " FROM T"
+    yield "view.unclosed_brackets", "view", "CREATE VIEW V AS SELECT " + "ARRAY[1, " * n + " FROM T"
+    yield "view.unterminated_comment", "view", "CREATE VIEW V AS SELECT a " + "/* x, " * n + " FROM T"
+    yield "procedure.params_without_as", "procedure", "CREATE PROCEDURE P (" + params + " BEGIN " + "PROCEDURE x ( " * n
+    yield "procedure.ctas_unclosed", "procedure", "CREATE PROCEDURE P AS BEGIN " + "CREATE TABLE #t WITH ( x " * n + " END"
+    yield "procedure.inline_without_as", "procedure", "CREATE PROCEDURE P " + "IN p INT, " * n
+    yield "abap_cds.wide_elements", "abap_cds", "define view Z as select from t { " + ", ".join(f"t.f{i}" for i in range(n)) + " }"
+    yield "abap_cds.unclosed_annotations", "abap_cds", "@A.b: { " * n + "define view Z as select from t { f }"
+    yield "ddl.wide_table", "ddl", "CREATE TABLE T (" + ", ".join(f"C{i} DECIMAL(15, 2)" for i in range(n)) + ")"
+    yield "ddl.unclosed_table", "ddl", "CREATE TABLE T (" + "C NVARCHAR(10, " * n
+
+
+_NOISE = ["(", ")", "'", '"', ",", "/*", "--", "\n", " SELECT ", " FROM ", " WHERE ", " AS ", " WITH (",
+          " BEGIN ", " END ", ";", "{", "}", "@", " GROUP BY ", " CREATE TABLE #t "]
+
+
+def mutate(text: str, rng: random.Random) -> str:
+    for _ in range(rng.randint(1, 6)):
+        i, j = sorted(rng.randrange(len(text) + 1) for _ in range(2))
+        op = rng.randrange(4)
+        if op == 0:
+            text = text[:i] + text[j:]                         # cut
+        elif op == 1:
+            text = text[:j] + text[i:j] * rng.randint(2, 50) + text[j:]   # duplicate
+        elif op == 2:
+            text = text[:i] + rng.choice(_NOISE) * rng.randint(1, 200) + text[i:]
+        else:
+            text = text[:i] + "".join(rng.choice(_NOISE) for _ in range(rng.randint(1, 50))) + text[i:]
+    return text
+
+
+def fuzz(count_: int, seed: int):
+    rng = random.Random(seed)
+    for k in range(count_):
+        kind = rng.choice(sorted(SEEDS))
+        yield f"fuzz.{kind}.{k}", kind, mutate(SEEDS[kind], rng)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Fuzz / performance regression corpus for the text parsers")
+    ap.add_argument("--size", type=int, default=4000, help="repetitions per pathological case")
+    ap.add_argument("--fuzz", type=int, default=200, help="number of fuzz cases")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--budget", type=float, default=0.5, help="parse budget per artifact (seconds)")
+    ap.add_argument("--limit", type=float, default=2.0, help="max seconds per case")
+    ap.add_argument("--json", help="write the per-case report here")
+    args = ap.parse_args(argv)
+
+    run = parsers(args.budget)
+    report, failures = [], 0
+    with collect() as metrics:
+        for name, kind, text in list(pathological(args.size)) + list(fuzz(args.fuzz, args.seed)):
+            t0 = time.perf_counter()
+            error = None
+            try:
+                run[kind](text)
+            except Exception as e:              # a parser must never raise on garbage
+                error = f"{type(e).__name__}: {e}"
+            seconds = time.perf_counter() - t0
+            ok = error is None and seconds <= args.limit
+            failures += not ok
+            report.append({"case": name, "chars": len(text), "seconds": round(seconds, 4), "ok": ok, "error": error})
+            if not ok or name.split(".")[0] != "fuzz":
+                print(f"{'ok  ' if ok else 'FAIL'} {name:<40} {len(text):>9} chars {seconds:8.3f}s {error or ''}")
+    counters = metrics.as_dict()["counters"]
+    print(f"{len(report)} cases, {failures} failed; parse_timeouts={counters.get('parse_timeouts', 0)} "
+          f"parse_fallbacks={counters.get('parse_fallbacks', 0)}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"cases": report, "metrics": metrics.as_dict()}, fh, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+# benchmarks/split_bench.py
+# ======================================================================
+# Wide select lists: sql_text helpers against the regex they replaced
+#  - regex    the old lookahead split (re-scans the rest of the list for
+#             every comma: O(n^2))
+#  - split    sql_text.split_top_level
+#  - clauses  sql_text.sql_clauses on the whole view (token pass, select
+#             list, WHERE / GROUP BY / ORDER BY)
+#  - close    sql_text.matching_close over the whole nested list
+# Both splits must return the same columns; the regex is skipped above
+# --regex-max columns.
+#
+#   python benchmarks/split_bench.py [--widths 100,1000,5000,20000] [--repeat 3]
+# ======================================================================
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from hdbcv2dsp.sql_text import matching_close, split_top_level, sql_clauses  # noqa: E402
+
+_COMMA_OUTSIDE_PARENS = re.compile(r',(?=(?:[^()]*\([^()]*\))*[^()]*$)')
+
+
+def select_list(width: int) -> str:
+    kinds = ("a.C{i}", "COALESCE(a.C{i}, 0) AS C{i}", "CASE WHEN a.C{i} IN (1, 2) THEN 'x' ELSE 'y' END AS K{i}",
+             "SUBSTRING(a.S{i}, 1, 3) AS S{i}")
+    return ", ".join(kinds[i % len(kinds)].format(i=i) for i in range(width))
+
+
+def best(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Wide select list benchmark for the sql_text helpers")
+    ap.add_argument("--widths", default="100,1000,5000,20000")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--regex-max", type=int, default=5000, help="skip the quadratic regex above this width")
+    args = ap.parse_args(argv)
+
+    print(f"{'columns':>8} {'chars':>9} {'regex':>9} {'split':>9} {'clauses':>9} {'close':>9}")
+    for width in (int(w) for w in args.widths.split(",")):
+        cols = select_list(width)
+        view = f"CREATE VIEW V AS SELECT {cols} FROM T a WHERE a.C0 > 1 GROUP BY {cols} ORDER BY a.C0 DESC"
+        nested = "(" + cols + ")"
+        split = split_top_level(cols)
+        assert len(split) == width and sql_clauses(view).columns == split
+        assert matching_close(nested, 0) == len(nested) - 1
+        regex = "-"
+        if width <= args.regex_max:
+            assert [p.strip() for p in _COMMA_OUTSIDE_PARENS.split(cols)] == split
+            regex = f"{best(lambda: _COMMA_OUTSIDE_PARENS.split(cols), args.repeat):9.4f}"
+        print(f"{width:>8} {len(cols):>9} {regex:>9} "
+              f"{best(lambda: split_top_level(cols), args.repeat):9.4f} "
+              f"{best(lambda: sql_clauses(view), args.repeat):9.4f} "
+              f"{best(lambda: matching_close(nested, 0), args.repeat):9.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
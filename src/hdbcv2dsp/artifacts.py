@@ -1,6 +1,9 @@
 from dataclasses import dataclass, field
 from typing import Dict, List
 
+from .compact import compact_model
+
+@compact_model(intern=("id", "kind", "inputs"))
 @dataclass
 class ArtifactNode:
     id: str                     # object name (CV node / view / table / procedure)
@@ -0,0 +1,137 @@
+# hdbcv2dsp/compact.py
+# ======================================================================
+# Memory-compact artifact models
+#  - compact_model(): turns a dataclass into a __slots__ class (no per-
+#    instance __dict__) and interns its identifier fields, so the same
+#    table/column name is one string object across the whole catalog
+#  - lazy_text(): a str field that may stay None and be re-read from the
+#    artifact's origin file on access (SQL / procedure source text)
+# Works on Python 3.9 (dataclass(slots=True) needs 3.10).
+# ======================================================================
+from __future__ import annotations
+
+import os
+import re
+import sys
+from dataclasses import fields, is_dataclass
+from functools import lru_cache
+from typing import Callable, Iterable, Optional
+
+from .source_io import read_text
+
+# Identifier-like strings only: formulas and SQL snippets are left alone.
+_IDENT_LIKE_RE = re.compile(r'[^\s]{1,256}')
+
+
+def intern_ident(value):
+    """
+    sys.intern for identifiers; lists/dicts are interned element-wise (in place
+    for lists) and nested compact models via intern_model().
+    """
+    if hasattr(type(value), "__interned__"):
+        return intern_model(value)
+    if isinstance(value, str):
+        return sys.intern(value) if _IDENT_LIKE_RE.fullmatch(value) else value
+    if isinstance(value, list):
+        for i, item in enumerate(value):
+            value[i] = intern_ident(item)
+        return value
+    if isinstance(value, dict):
+        return {intern_ident(k): intern_ident(v) for k, v in value.items()}
+    return value
+
+
+def intern_model(obj):
+    """Intern the identifier fields declared by compact_model(intern=...) (recurses into nested models)."""
+    for n in type(obj).__interned__:
+        setattr(obj, n, intern_ident(getattr(obj, n)))
+    return obj
+
+
+def compact_model(*, intern: Iterable[str] = ()) -> Callable[[type], type]:
+    """
+    Class decorator for an existing @dataclass: rebuild it with __slots__ and
+    intern the named fields after __init__. Apply *above* @dataclass.
+    Parsers that fill lists after construction call intern_model() when done.
+    """
+    intern_fields = tuple(intern)
+
+    def wrap(cls: type) -> type:
+        if not is_dataclass(cls):
+            raise TypeError(f"compact_model expects a dataclass, got {cls.__name__}")
+        names = tuple(f.name for f in fields(cls))
+        ns = dict(cls.__dict__)
+        for n in names:
+            ns.pop(n, None)  # class-level defaults would clash with the slot descriptors
+        ns.pop("__dict__", None)
+        ns.pop("__weakref__", None)
+        ns["__slots__"] = names
+        ns["__interned__"] = intern_fields
+        new_cls = type(cls)(cls.__name__, cls.__bases__, ns)
+        new_cls.__qualname__ = cls.__qualname__
+
+        if intern_fields:
+            init = new_cls.__init__
+
+            def __init__(self, *args, **kwargs):
+                init(self, *args, **kwargs)
+                intern_model(self)
+
+            __init__.__wrapped__ = init
+            __init__.__doc__ = init.__doc__
+            new_cls.__init__ = __init__
+        return new_cls
+
+    return wrap
+
+
+# ----------------------------------------------------------------------
+# Lazy source text
+# ----------------------------------------------------------------------
+
+# Only the last file or two: a summarizer reads the same .sql several times in
+# a row, and anything larger would pin the very texts lazy_text() drops.
+@lru_cache(maxsize=2)
+def _read_cached(path: str, mtime: float) -> str:
+    return read_text(path)
+
+
+def read_source_text(path: str) -> str:
+    """Read an artifact file; the last two files read are kept (keyed by mtime)."""
+    return _read_cached(path, os.path.getmtime(path))
+
+
+def lazy_text(cls: type, name: str, path_field: str,
+              loader: Optional[Callable[[str], str]] = None) -> type:
+    """
+    Make slot *name* of a compact_model class lazy: when it holds None and
+    *path_field* is set, the text is (re-)loaded from that file on access and
+    not kept on the instance. *loader* post-processes the raw file text.
+    Pickling stores the raw slot (None), so lazy instances travel as their path.
+    """
+    slot = cls.__dict__[name]
+    path_slot = cls.__dict__[path_field]
+    load = loader or (lambda text: text)
+
+    def fget(self):
+        value = slot.__get__(self, cls)
+        if value is None:
+            path = path_slot.__get__(self, cls)
+            if path:
+                return load(read_source_text(path))
+        return value
+
+    def fset(self, value):
+        slot.__set__(self, value)
+
+    setattr(cls, name, property(fget, fset, doc=f"{name} (loaded from {path_field} when not kept in memory)"))
+    raw = dict(getattr(cls, "__lazy_slots__", {}), **{name: slot})
+    cls.__lazy_slots__ = raw
+
+    def __getstate__(self):
+        # default slot pickling goes through getattr() and would load the text
+        return None, {n: (raw[n].__get__(self, cls) if n in raw else getattr(self, n))
+                      for n in cls.__slots__}
+
+    cls.__getstate__ = __getstate__
+    return cls
@@ -0,0 +1,320 @@
+# hdbcv2dsp/cost_estimate.py
+# ======================================================================
+# Plan-style cost estimate for the rebuilt artifacts
+#  - Base tables take row counts / row widths from an optional stats file
+#    (CSV or JSON, see load_table_stats); tables without stats get
+#    DEFAULT_ROWS x DEFAULT_ROW_BYTES and mark everything downstream as
+#    estimated
+#  - Every artifact combines its inputs like a plan operator:
+#      join   rows = prod(rows) / ndv^(k-1), ndv = smallest input (key /
+#             foreign-key join); outer joins keep at least the largest input
+#      union  rows = sum(rows), width = widest input
+#      filter x FILTER_SELECTIVITY, aggregation x AGGREGATION_REDUCTION
+#    Operators come from CV node types and the SQL views' JOIN / UNION /
+#    WHERE / GROUP BY; other artifacts are joins of their inputs
+#  - Graph-wide and vectorised: levels are relaxed with np.maximum.at over
+#    the edge arrays, each level is one batch of ufunc.at reductions
+#  - bytes_in: rows x width crossing into the artifact; remote_bytes: bytes
+#    it pulls from base tables per run when everything is federated
+#  - A source is replicated when its scan bytes x the artifacts reading it
+#    (paths to it) reach replicate_bytes per refresh, else left remote
+# ======================================================================
+from __future__ import annotations
+
+import io
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .artifacts import ArtifactNode
+from .identifiers import NameIndex
+from .instrument import count, timed
+from .parse_cv import CVModel
+from .parse_sql_view import SQLViewModel
+from .source_io import SourceLike, is_path, read_text
+
+DEFAULT_ROWS = 100_000
+DEFAULT_ROW_BYTES = 64
+FILTER_SELECTIVITY = 1 / 3
+AGGREGATION_REDUCTION = 0.1
+REPLICATE_BYTES = 1 << 30          # per refresh
+# ceilings keeping runaway estimates (deep join chains) finite
+MAX_ROWS = 1e15
+MAX_ROW_BYTES = 1 << 16
+
+_JOIN, _OUTER, _UNION, _FILTER, _AGG = 1, 2, 4, 8, 16
+_OUTER_RE = re.compile(r"\b(?:LEFT|RIGHT|FULL)\s+(?:OUTER\s+)?JOIN\b", re.IGNORECASE)
+_UNION_RE = re.compile(r"\bUNION\b", re.IGNORECASE)
+
+
+@dataclass
+class TableStats:
+    rows: float
+    row_bytes: float = DEFAULT_ROW_BYTES
+    distinct: Optional[float] = None             # key cardinality, if known
+    daily_changes: Optional[float] = None        # changed rows per day (replication planning)
+    columns: Dict[str, float] = field(default_factory=dict)   # column -> bytes
+
+
+@dataclass
+class ArtifactCost:
+    id: str
+    kind: str
+    rows: float
+    row_bytes: float
+    bytes_in: float = 0.0
+    remote_bytes: float = 0.0
+    fanout: float = 1.0                          # rows / largest input
+    reduction: float = 1.0                       # rows / rows after combining the inputs
+    estimated: bool = False                      # some upstream table had no stats
+
+    def as_dict(self) -> dict:
+        return {"id": self.id, "kind": self.kind, "rows": round(self.rows), "rowBytes": round(self.row_bytes),
+                "bytesIn": round(self.bytes_in), "remoteBytes": round(self.remote_bytes),
+                "fanout": round(self.fanout, 4), "reduction": round(self.reduction, 4), "estimated": self.estimated}
+
+
+@dataclass
+class SourcePlacement:
+    source: str
+    mode: str                                    # 'remote' | 'replicate'
+    rows: float
+    scan_bytes: float
+    reads: int                                   # artifacts scanning it per refresh
+    reason: str
+
+    def as_dict(self) -> dict:
+        return {"source": self.source, "mode": self.mode, "rows": round(self.rows),
+                "scanBytes": round(self.scan_bytes), "reads": self.reads, "reason": self.reason}
+
+
+@dataclass
+class CostReport:
+    artifacts: Dict[str, ArtifactCost] = field(default_factory=dict)
+    sources: List[SourcePlacement] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return {"artifacts": [a.as_dict() for a in self.artifacts.values()],
+                "sources": [s.as_dict() for s in self.sources]}
+
+
+def format_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if n < 1024 or unit == "TB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+# ----------------------------------------------------------------------
+# Stats file
+# ----------------------------------------------------------------------
+
+def _stats_records(records: List[dict]) -> Dict[str, TableStats]:
+    out: Dict[str, TableStats] = {}
+    for r in records:
+        r = {str(k).strip().lower(): v for k, v in r.items()}
+        table = str(r.get("table") or r.get("name") or "").strip()
+        if not table:
+            continue
+        st = out.setdefault(table, TableStats(rows=0.0, row_bytes=0.0))
+        rows = r.get("rows", r.get("row_count"))
+        if rows not in (None, ""):
+            st.rows = max(st.rows, float(rows))
+        if r.get("distinct") not in (None, ""):
+            st.distinct = float(r["distinct"])
+        if r.get("daily_changes", r.get("changes_per_day")) not in (None, ""):
+            st.daily_changes = float(r.get("daily_changes", r.get("changes_per_day")))
+        elif r.get("change_rate") not in (None, ""):        # fraction of the rows per day
+            st.daily_changes = float(r["change_rate"]) * st.rows
+        if r.get("row_bytes") not in (None, ""):
+            st.row_bytes = float(r["row_bytes"])
+        cols = r.get("columns")
+        if isinstance(cols, dict):
+            st.columns.update({str(c): float(w) for c, w in cols.items()})
+        elif r.get("column") not in (None, "") and r.get("width", r.get("bytes")) not in (None, ""):
+            st.columns[str(r["column"])] = float(r.get("width", r.get("bytes")))
+    for st in out.values():
+        if not st.row_bytes:
+            st.row_bytes = sum(st.columns.values()) or DEFAULT_ROW_BYTES
+    return out
+
+
+def load_table_stats(source: SourceLike, fmt: Optional[str] = None) -> Dict[str, TableStats]:
+    """
+    Table statistics from a stats file (path or bytes), *fmt* 'csv' | 'json'
+    (default: by extension / content):
+      CSV  table,rows[,row_bytes][,distinct][,daily_changes | change_rate]
+           or one line per column:
+           table,rows,column,width  (row width = sum of the widths)
+      JSON {"S.T": {"rows": 1e6, "row_bytes": 80, "columns": {"A": 10}}}
+           or a list of records with the CSV fields
+    """
+    text = read_text(source)
+    if fmt is None:
+        ext = os.path.splitext(os.fspath(source))[1].lower().lstrip(".") if is_path(source) else ""
+        fmt = ext if ext in ("csv", "json") else ("json" if text.lstrip()[:1] in "{[" else "csv")
+    if fmt == "json":
+        data = json.loads(text or "{}")
+        if isinstance(data, dict):
+            data = [{"table": k, **(v if isinstance(v, dict) else {"rows": v})} for k, v in data.items()]
+        return _stats_records(data)
+    frame = pd.read_csv(io.StringIO(text), dtype=str, keep_default_na=False, skipinitialspace=True)
+    return _stats_records(frame.to_dict("records"))
+
+
+# ----------------------------------------------------------------------
+# Estimate
+# ----------------------------------------------------------------------
+
+def _operator_flags(graph: Dict[str, ArtifactNode], names: NameIndex,
+                    cv_model: Optional[CVModel], sql_views: List[SQLViewModel]) -> Dict[str, int]:
+    flags: Dict[str, int] = {}
+    for nid, n in (cv_model.nodes.items() if cv_model else ()):
+        t = (n.node_type or "").lower()
+        f = _UNION if "union" in t else _JOIN if "join" in t else 0
+        if f == _JOIN and "outer" in (n.join_type or "").lower():
+            f |= _OUTER
+        if "aggregation" in t:
+            f |= _AGG
+        if n.filters:
+            f |= _FILTER
+        flags[names.resolve(nid) or nid] = f
+    for v in sql_views:
+        sql = v.sql or ""
+        f = _UNION if _UNION_RE.search(sql) else _JOIN
+        if f == _JOIN and _OUTER_RE.search(sql):
+            f |= _OUTER
+        if v.group_by:
+            f |= _AGG
+        if v.where:
+            f |= _FILTER
+        flags[names.resolve(v.name) or v.name] = f
+    for nid, n in graph.items():
+        flags.setdefault(nid, _JOIN if n.inputs else 0)
+    return flags
+
+
+@timed("cost_estimate")
+def estimate_costs(
+    graph: Dict[str, ArtifactNode],
+    stats: Optional[Dict[str, TableStats]] = None,
+    cv_model: Optional[CVModel] = None,
+    sql_views: Optional[List[SQLViewModel]] = None,
+    replicate_bytes: float = REPLICATE_BYTES,
+) -> CostReport:
+    """Rows / widths / bytes per artifact of *graph* and a remote-vs-replicate call per base source."""
+    ids = list(graph)
+    n = len(ids)
+    report = CostReport()
+    if not n:
+        return report
+    count("nodes", n)
+    index = {nid: i for i, nid in enumerate(ids)}
+    names = NameIndex(ids)
+    stat_names = NameIndex(stats or ())
+    pairs = [(index[names.resolve(i) or i], index[nid]) for nid, node in graph.items()
+             for i in node.inputs if (names.resolve(i) or i) in index]
+    src, dst = (np.array(a, dtype=np.int64) for a in zip(*pairs)) if pairs else (np.zeros(0, np.int64),) * 2
+    flags_by_id = _operator_flags(graph, names, cv_model, list(sql_views or []))
+    flags = np.array([flags_by_id.get(nid, 0) for nid in ids], dtype=np.int64)
+
+    # base tables: nodes without inputs
+    indeg = np.bincount(dst, minlength=n)
+    base = indeg == 0
+    rows = np.full(n, float(DEFAULT_ROWS))
+    width = np.full(n, float(DEFAULT_ROW_BYTES))
+    ndv = np.full(n, np.inf)
+    unknown = np.zeros(n, dtype=bool)
+    for i in np.flatnonzero(base):
+        key = stat_names.resolve(ids[i])
+        st = (stats or {}).get(key) if key else None
+        if st is None:
+            unknown[i] = True
+            continue
+        rows[i], width[i] = max(st.rows, 1.0), st.row_bytes
+        if st.distinct:
+            ndv[i] = st.distinct
+
+    # levels: longest path from a base table (relaxed edge-wise; cycles stop after n rounds)
+    level = np.zeros(n, dtype=np.int64)
+    for _ in range(n):
+        before = level.copy()
+        np.maximum.at(level, dst, level[src] + 1)
+        if np.array_equal(before, level):
+            break
+    level[base] = 0
+
+    bytes_in = np.zeros(n)
+    remote = np.zeros(n)
+    fanout = np.ones(n)
+    reduction = np.ones(n)
+    edge_level = level[dst]
+    for lv in range(1, int(level.max()) + 1):
+        e = edge_level == lv
+        if not e.any():
+            continue
+        s, d = src[e], dst[e]
+        nodes = np.unique(d)
+        r, w = rows[s], width[s]
+
+        total = np.zeros(n); np.add.at(total, d, r)
+        largest = np.zeros(n); np.maximum.at(largest, d, r)
+        smallest = np.full(n, np.inf); np.minimum.at(smallest, d, r)
+        log_rows = np.zeros(n); np.add.at(log_rows, d, np.log(r))
+        k = np.bincount(d, minlength=n)
+        wsum = np.zeros(n); np.add.at(wsum, d, w)
+        wmax = np.zeros(n); np.maximum.at(wmax, d, w)
+        key_ndv = np.full(n, np.inf); np.minimum.at(key_ndv, d, ndv[s])
+        np.add.at(bytes_in, d, r * w)
+        np.add.at(remote, d, np.where(base[s], r * w, remote[s]))
+        np.logical_or.at(unknown, d, unknown[s])
+
+        f = flags[nodes]
+        union = (f & _UNION) != 0
+        join_ndv = np.minimum(smallest[nodes], key_ndv[nodes])
+        log_joined = log_rows[nodes] - (k[nodes] - 1) * np.log(np.maximum(join_ndv, 1.0))
+        joined = np.exp(np.minimum(log_joined, np.log(MAX_ROWS)))
+        joined = np.where((f & _OUTER) != 0, np.maximum(joined, largest[nodes]), joined)
+        combined = np.minimum(np.where(union, total[nodes], np.where(k[nodes] > 1, joined, largest[nodes])), MAX_ROWS)
+        out = combined * np.where((f & _FILTER) != 0, FILTER_SELECTIVITY, 1.0)
+        out = np.where((f & _AGG) != 0, out * AGGREGATION_REDUCTION, out)
+        out = np.clip(out, 1.0, MAX_ROWS)
+
+        rows[nodes] = out
+        width[nodes] = np.minimum(np.where(union, wmax[nodes], wsum[nodes]), MAX_ROW_BYTES)
+        fanout[nodes] = combined / np.maximum(largest[nodes], 1.0)
+        reduction[nodes] = out / np.maximum(combined, 1.0)
+        ndv[nodes] = np.where((f & _AGG) != 0, out, ndv[nodes])
+
+    for i, nid in enumerate(ids):
+        report.artifacts[nid] = ArtifactCost(
+            id=nid, kind=graph[nid].kind, rows=float(rows[i]), row_bytes=float(width[i]),
+            bytes_in=float(bytes_in[i]), remote_bytes=float(remote[i]), fanout=float(fanout[i]),
+            reduction=float(reduction[i]), estimated=bool(unknown[i]))
+
+    # reads per base table: paths from it to the artifacts above (reverse levels)
+    reads = np.zeros(n)
+    src_level = level[src]
+    for lv in range(int(level.max()) - 1, -1, -1):
+        e = src_level == lv
+        np.add.at(reads, src[e], 1.0 + reads[dst[e]])
+    for i in np.flatnonzero(base & (reads > 0)):
+        scan = float(rows[i] * width[i])
+        per_refresh = scan * reads[i]
+        if unknown[i]:
+            mode, reason = "remote", "no statistics — federate until row counts are known"
+        elif per_refresh >= replicate_bytes:
+            mode, reason = "replicate", (f"{format_bytes(scan)} scanned by {int(reads[i])} artifact(s) ≈ "
+                                         f"{format_bytes(per_refresh)} per refresh")
+        else:
+            mode, reason = "remote", f"{format_bytes(per_refresh)} per refresh is below {format_bytes(replicate_bytes)}"
+        report.sources.append(SourcePlacement(source=ids[i], mode=mode, rows=float(rows[i]), scan_bytes=scan,
+                                              reads=int(reads[i]), reason=reason))
+    report.sources.sort(key=lambda s: (s.mode != "replicate", -s.scan_bytes * s.reads, s.source))
+    return report
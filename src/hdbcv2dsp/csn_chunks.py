@@ -0,0 +1,127 @@
+# hdbcv2dsp/csn_chunks.py
+# ======================================================================
+# Dependency-ordered, size-bounded CSN packaging
+#  - Dependencies between definitions come from the merged artifact graph
+#    (ArtifactNode.inputs) and the parsed views' inputs
+#  - Definitions are layered: level 0 references nothing in the package,
+#    level k only references levels < k. Each level is cut into chunks of
+#    at most max_bytes (serialised), so a chunk only references objects in
+#    earlier chunks and chunks of one level can be imported in parallel
+#  - Cycles (rare, e.g. mis-parsed names) share one final level
+# ======================================================================
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+from .artifacts import ArtifactNode
+
+DEFAULT_CHUNK_BYTES = 2 * 1024 * 1024
+
+
+@dataclass
+class CSNChunk:
+    index: int                    # 1-based, import order
+    level: int
+    definitions: List[str] = field(default_factory=list)
+    depends_on: List[int] = field(default_factory=list)   # chunk indexes referenced
+    size: int = 0                 # serialised bytes of the definitions
+
+    @property
+    def file_name(self) -> str:
+        return f"csn_{self.index:03d}.json"
+
+    def as_dict(self) -> dict:
+        return {
+            "file": self.file_name,
+            "level": self.level,
+            "definitions": self.definitions,
+            "dependsOn": [f"csn_{i:03d}.json" for i in self.depends_on],
+            "bytes": self.size,
+        }
+
+
+def definition_dependencies(
+    names: Iterable[str],
+    graph: Optional[Dict[str, ArtifactNode]] = None,
+    views: Iterable[object] = (),
+) -> Dict[str, Set[str]]:
+    """Definition -> the other definitions of the package it references."""
+    names = set(names)
+    deps: Dict[str, Set[str]] = {n: set() for n in names}
+    for nid, node in (graph or {}).items():
+        if nid in names:
+            deps[nid].update(i for i in node.inputs if i in names and i != nid)
+    for v in views:
+        name = getattr(v, "name", None)
+        if name in names:
+            deps[name].update(i for i in (getattr(v, "inputs", None) or []) if i in names and i != name)
+    return deps
+
+
+def dependency_levels(deps: Dict[str, Set[str]]) -> Dict[str, int]:
+    """Longest-path level per definition (Kahn layering); cycle members get one level after the rest."""
+    indeg = {n: len(d) for n, d in deps.items()}
+    users: Dict[str, List[str]] = {n: [] for n in deps}
+    for n, d in deps.items():
+        for dep in d:
+            users[dep].append(n)
+    level: Dict[str, int] = {}
+    frontier = sorted(n for n, k in indeg.items() if k == 0)
+    depth = 0
+    while frontier:
+        nxt = []
+        for n in frontier:
+            level[n] = depth
+            for u in users[n]:
+                indeg[u] -= 1
+                if indeg[u] == 0:
+                    nxt.append(u)
+        frontier, depth = sorted(nxt), depth + 1
+    for n in deps:
+        level.setdefault(n, depth)
+    return level
+
+
+def chunk_definitions(
+    definitions: Dict[str, dict],
+    deps: Dict[str, Set[str]],
+    max_bytes: int = DEFAULT_CHUNK_BYTES,
+) -> List[CSNChunk]:
+    """Cut *definitions* into dependency-ordered chunks of at most *max_bytes* (a larger single definition gets its own chunk)."""
+    level = dependency_levels({n: deps.get(n, set()) for n in definitions})
+    chunks: List[CSNChunk] = []
+    chunk_of: Dict[str, int] = {}
+    for lvl in sorted(set(level.values())):
+        current: Optional[CSNChunk] = None
+        for name in sorted(n for n in definitions if level[n] == lvl):
+            size = len(json.dumps({name: definitions[name]}, indent=2))
+            if current is None or (current.definitions and current.size + size > max_bytes):
+                current = CSNChunk(index=len(chunks) + 1, level=lvl)
+                chunks.append(current)
+            current.definitions.append(name)
+            current.size += size
+            chunk_of[name] = current.index
+    for chunk in chunks:
+        refs = {chunk_of[d] for n in chunk.definitions for d in deps.get(n, ()) if d in chunk_of}
+        chunk.depends_on = sorted(refs - {chunk.index})
+    return chunks
+
+
+def chunked_packages(csn_pkg: dict, chunks: List[CSNChunk]) -> Dict[str, dict]:
+    """File name -> CSN package holding one chunk's definitions (header keys copied)."""
+    header = {k: v for k, v in csn_pkg.items() if k != "definitions"}
+    defs = csn_pkg.get("definitions") or {}
+    return {c.file_name: dict(header, definitions={n: defs[n] for n in c.definitions}) for c in chunks}
+
+
+def import_order_manifest(chunks: List[CSNChunk]) -> dict:
+    """Import plan: chunks in order, grouped into levels whose chunks may be imported in parallel."""
+    levels: Dict[int, List[str]] = {}
+    for c in chunks:
+        levels.setdefault(c.level, []).append(c.file_name)
+    return {
+        "chunks": [c.as_dict() for c in chunks],
+        "parallelGroups": [levels[lvl] for lvl in sorted(levels)],
+    }
@@ -0,0 +1,219 @@
+# hdbcv2dsp/csn_diff.py
+# ======================================================================
+# Definition-level diff between two CSN exports
+#  - Inputs: package dicts, JSON text/bytes, a build_csn_artifacts_zip zip
+#    (bytes or path) or a tenant export; definitions, analytic models
+#    (businessLayerDefinitions) and replication flows are compared
+#  - Every definition is normalised once (keys sorted, ignored keys
+#    dropped) and hashed; only definitions whose hashes differ are
+#    looked at element by element, so the compare is O(n)
+# ======================================================================
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import re
+import zipfile
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+PackageLike = Union[dict, str, bytes, "os.PathLike[str]"]
+
+_SECTIONS = ("definitions", "businessLayerDefinitions", "replicationflows")
+# package files of an export zip that hold definitions (delta/ copies are skipped)
+_ZIP_PACKAGES = ("csn.json", "native_csn.json", "replication_csn.json", "analytic_model.json")
+_CHUNK_RE = re.compile(r"csn_\d{3}\.json")
+# element-like children compared member by member
+_MEMBER_KEYS = ("elements", "attributes", "measures")
+
+
+@dataclass
+class ElementChange:
+    member: str                   # 'elements' | 'attributes' | 'measures'
+    name: str
+    change: str                   # 'added' | 'removed' | 'modified'
+    before: Optional[dict] = None
+    after: Optional[dict] = None
+
+    def as_dict(self) -> dict:
+        d = {"member": self.member, "name": self.name, "change": self.change}
+        if self.change == "modified":
+            d["fields"] = _changed_fields(self.before, self.after)
+        return d
+
+
+@dataclass
+class DefinitionChange:
+    section: str
+    name: str
+    change: str                   # 'added' | 'removed' | 'modified'
+    kind: Optional[str] = None
+    properties: List[str] = field(default_factory=list)   # changed top-level keys (besides members)
+    elements: List[ElementChange] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        d = {"section": self.section, "name": self.name, "change": self.change}
+        if self.kind:
+            d["kind"] = self.kind
+        if self.properties:
+            d["properties"] = self.properties
+        if self.elements:
+            d["elements"] = [e.as_dict() for e in self.elements]
+        return d
+
+
+@dataclass
+class CSNDiff:
+    changes: List[DefinitionChange] = field(default_factory=list)
+    unchanged: int = 0
+
+    def _names(self, change: str) -> List[str]:
+        return [c.name for c in self.changes if c.change == change]
+
+    @property
+    def added(self) -> List[str]:
+        return self._names("added")
+
+    @property
+    def removed(self) -> List[str]:
+        return self._names("removed")
+
+    @property
+    def modified(self) -> List[str]:
+        return self._names("modified")
+
+    def as_dict(self) -> dict:
+        return {
+            "added": self.added,
+            "removed": self.removed,
+            "modified": self.modified,
+            "unchanged": self.unchanged,
+            "changes": [c.as_dict() for c in self.changes],
+        }
+
+
+# ----------------------------------------------------------------------
+# Loading
+# ----------------------------------------------------------------------
+
+def _packages_from_zip(data: bytes) -> List[dict]:
+    out = []
+    with zipfile.ZipFile(io.BytesIO(data)) as z:
+        names = set(z.namelist())
+        chunks = sorted(n for n in names if _CHUNK_RE.fullmatch(n))     # chunked csn.json (chunk_max_bytes)
+        if "import_order.json" in names:
+            order = json.loads(z.read("import_order.json").decode("utf-8"))
+            chunks = [c["file"] for c in order.get("chunks") or [] if c.get("file") in names] or chunks
+        for name in list(_ZIP_PACKAGES) + chunks:
+            if name in names:
+                out.append(json.loads(z.read(name).decode("utf-8")))
+    return out
+
+
+def load_definitions(source: PackageLike) -> Dict[Tuple[str, str], dict]:
+    """(section, name) -> definition for a package / JSON / export zip."""
+    if isinstance(source, dict):
+        packages = [source]
+    else:
+        if isinstance(source, (bytes, bytearray)):
+            data = bytes(source)
+        elif isinstance(source, str) and source.lstrip().startswith("{"):
+            data = source.encode("utf-8")
+        else:
+            with open(source, "rb") as f:
+                data = f.read()
+        if data[:2] == b"PK":
+            packages = _packages_from_zip(data)
+        else:
+            packages = [json.loads(data.decode("utf-8-sig"))]
+    defs: Dict[Tuple[str, str], dict] = {}
+    for pkg in packages:
+        for section in _SECTIONS:
+            for name, obj in (pkg.get(section) or {}).items():
+                defs[(section, name)] = obj
+    return defs
+
+
+# ----------------------------------------------------------------------
+# Normalised hashing
+# ----------------------------------------------------------------------
+
+# one shared canonical encoder (sorted keys, no whitespace); ~30% faster than json.dumps per call
+_CANONICAL = json.JSONEncoder(sort_keys=True, separators=(",", ":"), check_circular=False, default=str)
+
+
+def _strip(obj, ignore: frozenset):
+    if isinstance(obj, dict):
+        return {k: _strip(v, ignore) for k, v in obj.items() if k not in ignore}
+    if isinstance(obj, list):
+        return [_strip(v, ignore) for v in obj]
+    return obj
+
+
+def subtree_hash(obj, ignore: Iterable[str] = ()) -> str:
+    """Hash of a JSON subtree, independent of key order; keys in *ignore* are dropped at any depth."""
+    ignore = frozenset(ignore)
+    if ignore:
+        obj = _strip(obj, ignore)
+    text = _CANONICAL.encode(obj)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _changed_fields(before: Optional[dict], after: Optional[dict]) -> Dict[str, list]:
+    before, after = before or {}, after or {}
+    if not isinstance(before, dict) or not isinstance(after, dict):
+        return {"value": [before, after]}
+    return {k: [before.get(k), after.get(k)] for k in sorted(set(before) | set(after))
+            if before.get(k) != after.get(k)}
+
+
+def _member_changes(member: str, old: dict, new: dict, ignore: frozenset) -> List[ElementChange]:
+    out: List[ElementChange] = []
+    for name, obj in old.items():
+        if name not in new:
+            out.append(ElementChange(member, name, "removed", before=obj))
+        elif subtree_hash(obj, ignore) != subtree_hash(new[name], ignore):
+            out.append(ElementChange(member, name, "modified", before=obj, after=new[name]))
+    out.extend(ElementChange(member, name, "added", after=obj) for name, obj in new.items() if name not in old)
+    return out
+
+
+def _definition_change(section: str, name: str, old: dict, new: dict, ignore: frozenset) -> DefinitionChange:
+    change = DefinitionChange(section, name, "modified", kind=new.get("kind") or old.get("kind"))
+    for key in sorted(set(old) | set(new)):
+        if key in ignore:
+            continue
+        a, b = old.get(key), new.get(key)
+        if key in _MEMBER_KEYS and isinstance(a or {}, dict) and isinstance(b or {}, dict):
+            change.elements.extend(_member_changes(key, a or {}, b or {}, ignore))
+        elif subtree_hash(a, ignore) != subtree_hash(b, ignore):
+            change.properties.append(key)
+    return change
+
+
+# ----------------------------------------------------------------------
+# Diff
+# ----------------------------------------------------------------------
+
+def diff_csn(old: PackageLike, new: PackageLike, ignore_keys: Iterable[str] = ()) -> CSNDiff:
+    """
+    Compare two exports by definition. *ignore_keys* (e.g. '@EndUserText.label'
+    or tenant bookkeeping keys) are left out of every comparison.
+    """
+    ignore = frozenset(ignore_keys)
+    old_defs, new_defs = load_definitions(old), load_definitions(new)
+    result = CSNDiff()
+    for key in sorted(set(old_defs) | set(new_defs)):
+        section, name = key
+        a, b = old_defs.get(key), new_defs.get(key)
+        if a is None:
+            result.changes.append(DefinitionChange(section, name, "added", kind=b.get("kind")))
+        elif b is None:
+            result.changes.append(DefinitionChange(section, name, "removed", kind=a.get("kind")))
+        elif subtree_hash(a, ignore) == subtree_hash(b, ignore):
+            result.unchanged += 1
+        else:
+            result.changes.append(_definition_change(section, name, a, b, ignore))
+    return result
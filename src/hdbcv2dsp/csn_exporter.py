@@ -19,7 +19,8 @@ import copy
 import uuid
 import zipfile
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
 
 # Project types
 from hdbcv2dsp.parse_sql_view import SQLViewModel
@@ -27,12 +28,30 @@ from hdbcv2dsp.parse_cv import CVModel
 from hdbcv2dsp.parse_procedure import ProcedureModel
 from hdbcv2dsp.parse_abap_cds import ABAPCDSModel
 from hdbcv2dsp.artifacts import ArtifactNode
+from hdbcv2dsp.cv_to_sql import cv_to_sql_view
+from hdbcv2dsp.cv_optimize import analyze_filter_pushdown, prune_cv_model
+from hdbcv2dsp.csn_chunks import (
+    chunk_definitions, chunked_packages, definition_dependencies, import_order_manifest,
+)
+from hdbcv2dsp.export_cache import ExportCache, artifact_fingerprint, content_hash, delta_package
+from hdbcv2dsp.identifiers import NameIndex, name_key
+from hdbcv2dsp.instrument import count, timed
+from hdbcv2dsp.cost_estimate import TableStats
+from hdbcv2dsp.proc_flow import decompose_procedure
+from hdbcv2dsp.project_export import resolve_view_project
+from hdbcv2dsp.rf_planner import ReplicationFlowPlan, plan_replication
+from hdbcv2dsp.sql_text import sql_clauses
+from hdbcv2dsp.stub_columns import infer_stub_columns
+from hdbcv2dsp.type_infer import SchemaIndex, expression_type, topological_views
 
 
 # ======================================================================
 # Small utilities
 # ======================================================================
 
+# element type when nothing better is known about a column
+_DEFAULT_ELEMENT = {"type": "cds.String", "length": 500}
+
 def _sanitize(name: str) -> str:
     """Safe identifier for CSN definition names."""
     safe = re.sub(r"[^A-Za-z0-9_]", "_", (name or "").strip())
@@ -73,35 +92,90 @@ def _collect_sources_from_graph(graph: Optional[Dict[str, ArtifactNode]]) -> Lis
     """
     if not graph:
         return []
-    base_kinds = {"Table", "RemoteTable", "Dataset", "CSV", "ABAP_TABLE", "ABAP_VIEW"}
+    base_kinds = {k.upper() for k in ("Table", "RemoteTable", "Dataset", "CSV", "ABAP_TABLE", "ABAP_VIEW")}
+
+    def is_base(node_id: str) -> bool:
+        node = graph.get(node_id)
+        return node is None or (getattr(node, "kind", "") or "").upper() in base_kinds
+
     src: set[str] = set()
     for node_id, node in graph.items():
-        kind = (getattr(node, "kind", "") or "")
-        if kind.upper() in {k.upper() for k in base_kinds}:
+        if is_base(node_id):
             src.add(node_id)
-        # Also collect inputs of non-table nodes (often table names)
+        # Also collect inputs of non-table nodes (often table names), but not
+        # inputs that are views / CV nodes / procedures of the graph themselves
         for inp in getattr(node, "inputs", []) or []:
-            if inp and not inp.startswith("#"):
+            if inp and not inp.startswith("#") and is_base(inp):
                 src.add(inp)
-    # prune obvious non-table markers
-    out = [s for s in src if s and not s.startswith("#")]
-    return sorted(set(out))
+    # prune obvious non-table markers; one entry per object whatever its spelling
+    # (qualified spellings first, so a bare T folds into SCHEMA.T)
+    names = NameIndex()
+    out: List[str] = []
+    for s in sorted(src, key=lambda s: (-len(name_key(s)), s)):
+        if s and not s.startswith("#") and names.resolve(s) is None:
+            out.append(names.add(s))
+    return sorted(out)
 
 
 # ======================================================================
 # NEUTRAL CSN builder (tables + neutral SQL views)
 # ======================================================================
 
+def _table_definition(t_name: str, spec: dict) -> dict:
+    elements = {}
+    for col in spec.get("columns", []):
+        el = dict(col)  # expected keys: name, and cds.* type fields already provided
+        col_name = el.pop("name")
+        elements[col_name] = el
+    return {
+        "kind": "entity",
+        "elements": elements,
+        "@EndUserText.label": t_name,
+        "@ObjectModel.modelingPattern": {"#": "DATA_STRUCTURE"},
+        "@ObjectModel.supportedCapabilities": [{"#": "DATA_STRUCTURE"}],
+    }
+
+
+def _stub_table_definition(src: str, columns: Optional[Dict[str, dict]] = None) -> dict:
+    """Entity for a base source without schema; *columns* come from stub_columns (usage in the project)."""
+    return {
+        "kind": "entity",
+        "elements": dict(columns) if columns else {
+            "__PLACEHOLDER__": {"type": "cds.String", "length": 1}
+        },
+        "@EndUserText.label": src,
+        "@ObjectModel.supportedCapabilities": [{"#": "DATA_STRUCTURE"}],
+    }
+
+
+def _neutral_view_definition(v: SQLViewModel, elements: Optional[Dict[str, dict]] = None) -> dict:
+    elems = _elements_from_view(v, elements)
+    sql_body = _sql_select_body(v.sql)
+    return {
+        "kind": "view",
+        "@EndUserText.label": v.name,
+        "elements": elems,
+        # --- FIX: This block populates the Field List and the SQL Editor ---
+        "query": {
+            "sql": sql_body
+        },
+        # For compatibility with some tenant versions:
+        "@DataWarehouse.sqlEditor.query": sql_body
+    }
+
+
+@timed("export.neutral_csn")
 def _make_neutral_csn(
     package_name: str,
     sql_views: List[SQLViewModel],
     base_sources: List[str],
     view_mode: str,                       # 'sql' | 'graphical' (we only emit neutral SQL)
     table_mode: str,                      # 'view_only' | 'tables_only' | 'local_stub'
-    include_analytic: bool,               # reserved for future
+    include_analytic: bool,               # analytic models are written by build_csn_artifacts_zip
     cv_model: Optional[CVModel],
     procedures: List[ProcedureModel],
     table_schemas: Optional[Dict[str, dict]] = None,
+    cache: Optional[ExportCache] = None,
 ):
     """
     Build a minimal, neutral CSN that imports fine in Datasphere:
@@ -109,7 +183,9 @@ def _make_neutral_csn(
     - Optional SQL Views (neutral representation that we stash SQL text into
       under '_neutralView.sql' for our own round-trip)
     We keep this intentionally simple to avoid coupling to CSN schema changes.
+    Definitions go through *cache* (see export_cache) when one is given.
     """
+    cache = cache or ExportCache(None)
     csn_pkg = {
         "$version": "1.0",
         "version": {"csn": "1.0"},
@@ -120,60 +196,38 @@ def _make_neutral_csn(
     # 1) Tables (explicit schemas)
     table_schemas = table_schemas or {}
     for t_name, spec in table_schemas.items():
-        def_name = t_name
-        elements = {}
-        for col in spec.get("columns", []):
-            el = dict(col)  # expected keys: name, and cds.* type fields already provided
-            col_name = el.pop("name")
-            elements[col_name] = el
-        csn_pkg["definitions"][def_name] = {
-            "kind": "entity",
-            "elements": elements,
-            "@EndUserText.label": t_name,
-            "@ObjectModel.modelingPattern": {"#": "DATA_STRUCTURE"},
-            "@ObjectModel.supportedCapabilities": [{"#": "DATA_STRUCTURE"}],
-        }
+        csn_pkg["definitions"][t_name] = cache.definition(
+            "table", t_name, spec, partial(_table_definition, t_name, spec))
         created_tables.append(t_name)
 
+    # columns of sources without schema, from every reference in the project (one pass)
+    defined = NameIndex(csn_pkg["definitions"])
+    for t_name, spec in table_schemas.items():
+        if spec.get("schema"):
+            defined.add(f'{spec["schema"]}.{t_name}', t_name)
+    stubs = [src for src in base_sources if defined.resolve(src) is None]
+    used = infer_stub_columns(stubs, sql_views or [], procedures or [], [cv_model] if cv_model else [])
+
     # 2) Tables (stubs from base_sources) only if requested and not already defined
     if table_mode in ("tables_only", "local_stub"):
-        for src in base_sources:
-            if src in csn_pkg["definitions"]:
-                continue  # skip if a view/table with that name already exists
-            csn_pkg["definitions"][src] = {
-                "kind": "entity",
-                "elements": {
-                    "__PLACEHOLDER__": {"type": "cds.String", "length": 1}
-                },
-                "@EndUserText.label": src,
-                "@ObjectModel.supportedCapabilities": [{"#": "DATA_STRUCTURE"}],
-            }
-            created_tables.append(src)    
-    # 3) Views (neutral) – only when not tables-only
+        for src in stubs:
+            columns = used.get(src)
+            csn_pkg["definitions"][src] = cache.definition(
+                "table", src, columns, partial(_stub_table_definition, src, columns))
+            created_tables.append(src)
+    # 3) Views (neutral) – only when not tables-only; element types follow the
+    #    table schemas / stub columns through the views in dependency order
+    view_elements: Dict[str, Dict[str, dict]] = {}
     if table_mode != "tables_only":
+        view_elements = _infer_view_elements(sql_views or [], table_schemas, used)
         for v in sql_views or []:
-            elems = _elements_from_view(v)
-            if not elems:
-                elems = {"COL1": {"type": "cds.String", "length": 500}}
-
-            def_name = v.name
-            sql_body = _sql_select_body(v.sql)
-            
-            csn_pkg["definitions"][def_name] = {
-                "kind": "view",
-                "@EndUserText.label": v.name,
-                "elements": elems,
-                # --- FIX: This block populates the Field List and the SQL Editor ---
-                "query": {
-                    "sql": sql_body
-                },
-                # For compatibility with some tenant versions:
-                "@DataWarehouse.sqlEditor.query": sql_body 
-            } 
-
-    # (We do not emit Calculation Views or Procedures in this neutral package;
-    #  the app generates a DOCX instead for those artifacts.)
-    return {"csn": csn_pkg, "created_tables": created_tables}
+            elems = view_elements.get(v.name)
+            csn_pkg["definitions"][v.name] = cache.definition(
+                "view", v.name, (artifact_fingerprint(v), elems), partial(_neutral_view_definition, v, elems))
+
+    # (Calculation Views arrive here already compiled to a SQL view by
+    #  build_csn_artifacts_zip; Procedures are still covered by the DOCX only.)
+    return {"csn": csn_pkg, "created_tables": created_tables, "view_elements": view_elements}
 
 
 def _simple_manifest(
@@ -202,75 +256,182 @@ def _simple_manifest(
     }
 
 # ======================================================================
-# ENHANCED ANALYTIC MODEL BUILDER (non-CSN, Datasphere import-compatible)
+# ANALYTIC MODEL BUILDER (businessLayerDefinitions, Datasphere import-compatible)
 # ======================================================================
-def _make_analytic_model_enhanced(
-    package_name: str,
-    sql_views: List[SQLViewModel],
-    cv_model: Optional[CVModel]
-):
-    """
-    Build an enhanced Analytic Model JSON (NOT CSN).
-    Supports:
-      - attributes
-      - measures
-      - basic aggregation semantics
-      - simple level-based hierarchies (optional)
-      - no date-role detection (Option C)
-    """
+# Attributes/measures are derived from:
+#   - CV logicalModel (+ calculated measures found on any node)
+#   - SQL View select list (aggregate functions → measures)
+#   - ABAP CDS element annotations (@Aggregation.default, @Semantics.amount/quantity)
+# Column names are resolved once per source through _view_columns(), the same
+# index used for view elements, so generation stays linear in the column count.
+
+_AGG_FUNC_RE = re.compile(r"\b(SUM|COUNT|AVG|MIN|MAX)\s*\(", re.IGNORECASE)
+
+# CDS @Aggregation.default enum → analytic model aggregation
+_CDS_AGGREGATION = {
+    "SUM": "SUM", "MIN": "MIN", "MAX": "MAX", "AVG": "AVG",
+    "COUNT": "COUNT", "COUNT_DISTINCT": "COUNT_DISTINCT",
+}
+
+
+def _analytic_columns_from_cv(cv_model: CVModel) -> Tuple[List[str], List[Dict[str, str]]]:
+    calc: Dict[str, str] = {}
+    for node in cv_model.nodes.values():
+        calc.update(node.calculated_measures)
+    # aggregation types come from the node feeding the logicalModel
+    top = cv_model.nodes.get(cv_model.logical_model_node or "")
+    aggregations = {m: a.upper() for m, a in (top.aggregations if top else {}).items()}
+    measures: List[Dict[str, str]] = []
+    for m in cv_model.logical_measures or []:
+        agg = aggregations.get(m, "SUM")
+        # counts are re-aggregated by summing the per-row counts of the view
+        measure = {"name": m, "aggregation": "SUM" if agg == "COUNT" else _CDS_AGGREGATION.get(agg, "SUM")}
+        if m in calc:
+            measure["formula"] = calc[m]
+        measures.append(measure)
+    return list(cv_model.logical_attributes or []), measures
+
+
+def _analytic_columns_from_view(v: SQLViewModel) -> Tuple[List[str], List[Dict[str, str]]]:
+    attributes: List[str] = []
+    measures: List[Dict[str, str]] = []
+    for name, expr in _view_columns(v):
+        m = _AGG_FUNC_RE.search(expr)
+        if m:
+            fn = m.group(1).upper()
+            # counts are re-aggregated by summing the per-row counts
+            measures.append({"name": name, "aggregation": "SUM" if fn == "COUNT" else fn})
+        else:
+            attributes.append(name)
+    return attributes, measures
+
+
+def _analytic_columns_from_cds(cds: ABAPCDSModel) -> Tuple[List[str], List[Dict[str, str]]]:
+    attributes: List[str] = []
+    measures: List[Dict[str, str]] = []
+    for el in cds.elements or []:
+        if el.startswith("_"):
+            continue  # exposed association, not a column
+        agg = cds.element_annotation(el, "Aggregation.default")
+        agg = agg.get("#", "").upper() if isinstance(agg, dict) else ""
+        if agg in _CDS_AGGREGATION:
+            measures.append({"name": el, "aggregation": _CDS_AGGREGATION[agg]})
+        elif not agg and (cds.element_annotation(el, "Semantics.amount.currencyCode")
+                          or cds.element_annotation(el, "Semantics.quantity.unitOfMeasure")):
+            measures.append({"name": el, "aggregation": "SUM"})
+        else:
+            attributes.append(el)
+    return attributes, measures
 
-    # Determine base view
-    if cv_model:
-        base_name = cv_model.cv_id
-        attr_list = cv_model.logical_attributes or []
-        meas_list = cv_model.logical_measures or []
-    elif sql_views:
-        v = sql_views[0]
-        base_name = v.name
-
-        # Attributes = non-aggregated columns
-        attr_list = []
-        meas_list = []
-        for col in (v.columns or []):
-            u = col.upper()
-            if any(fn in u for fn in ("SUM(", "AVG(", "COUNT(", "MIN(", "MAX(")):
-                # Derive measure name from alias or fallback
-                name = col
-                # Attempt to parse alias
-                m = re.search(r"\bAS\s+([A-Za-z_]\w*)", col, re.IGNORECASE)
-                if m:
-                    name = m.group(1)
-                meas_list.append({
-                    "name": name,
-                    "expression": col,
-                    "aggregation": "SUM"  # default
-                })
-            else:
-                attr_list.append({"name": col})
-    else:
-        return None
 
-    # Convert CV metadata into the enhanced structure
-    if cv_model:
-        attr_list = [{"name": a} for a in attr_list]
-        meas_list = [{"name": m, "expression": m, "aggregation": "SUM"} for m in meas_list]
-
-    model_name = f"{base_name}_AnalyticModel"
-
-    analytic_model = {
-        "formatVersion": "1.0",
-        "model": {
-            "name": model_name,
-            "description": f"Analytic model for {base_name} generated by SphereAhead.",
-            "baseView": base_name,
-            "attributes": attr_list,
-            "measures": meas_list,
-            # Optional: simple hierarchy stub for dimension-like fields
-            "hierarchies": []
+def _analytic_business_definition(
+    model_name: str,
+    base_view_name: str,
+    attributes: List[str],
+    measures: List[Dict[str, str]],
+    base_obj: Optional[dict] = None,
+) -> dict:
+    """One businessLayerDefinitions entry; *base_obj* (from a tenant template) keeps unknown keys."""
+    obj = copy.deepcopy(base_obj) if base_obj else {}
+    obj["identifier"] = {"key": model_name}
+    obj["text"] = model_name
+    obj["sourceModel"] = {
+        "factSources": {
+            base_view_name: {
+                "text": base_view_name,
+                "dataEntity": {"key": base_view_name}
+            }
+        },
+        "dimensionSources": {}
+    }
+    obj["attributes"] = {
+        a: {
+            "text": a,
+            "attributeType": "FactSourceAttribute",
+            "attributeMapping": {base_view_name: {"key": a}},
         }
+        for a in attributes
     }
+    out_measures: Dict[str, dict] = {}
+    for m in measures:
+        name = m["name"]
+        if m.get("formula"):
+            out_measures[name] = {
+                "measureType": "CalculatedMeasure",
+                "text": name,
+                "formula": m["formula"],
+                "isAuxiliary": False,
+            }
+        else:
+            out_measures[name] = {
+                "measureType": "FactSourceMeasure",
+                "sourceKey": base_view_name,
+                "text": name,
+                "key": name,
+                "aggregation": m.get("aggregation") or "SUM",
+                "isAuxiliary": False,
+            }
+    obj["measures"] = out_measures
+    return obj
+
+
+def _analytic_template_base(template_bytes: Optional[bytes]) -> Optional[dict]:
+    if not template_bytes:
+        return None
+    template = _load_template(template_bytes)
+    defs = template.get("businessLayerDefinitions") or {}
+    if not defs:
+        return None
+    return defs[sorted(defs.keys())[0]]
+
+
+def build_analytic_models_package(
+    *,
+    cv_models: Optional[List[CVModel]] = None,
+    sql_views: Optional[List[SQLViewModel]] = None,
+    abap_cds_list: Optional[List[ABAPCDSModel]] = None,
+    template_bytes: Optional[bytes] = None,
+    base_view_names: Optional[Dict[str, str]] = None,
+    cache: Optional[ExportCache] = None,
+) -> dict:
+    """
+    Build one Analytic Model package for many source objects at once.
+    base_view_names optionally maps a source name (CV id / view / CDS name)
+    to the Datasphere object the model sits on (e.g. an RF target table);
+    by default it is the definition key the neutral CSN export emits (the raw name).
+    """
+    base_view_names = base_view_names or {}
+    cache = cache or ExportCache(None)
+    base_obj = _analytic_template_base(template_bytes)
+
+    entries: List[Tuple[str, object, Callable]] = []
+    for cv in cv_models or []:
+        entries.append((cv.cv_id, cv, _analytic_columns_from_cv))
+    for v in sql_views or []:
+        entries.append((v.name, v, _analytic_columns_from_view))
+    for cds in abap_cds_list or []:
+        entries.append((cds.name, cds, _analytic_columns_from_cds))
+
+    def business(model_name: str, base_view: str, obj: object, columns: Callable) -> dict:
+        return _analytic_business_definition(model_name, base_view, *columns(obj), base_obj)
+
+    layer: Dict[str, dict] = {}
+    for src_name, obj, columns in entries:
+        base_view = base_view_names.get(src_name) or src_name
+        model_name = _sanitize(f"{src_name}_AM")
+        layer[model_name] = cache.definition(
+            "analytic_model", model_name, (artifact_fingerprint(obj), base_view),
+            partial(business, model_name, base_view, obj, columns))
 
-    return analytic_model
+    return {
+        "$version": "1.0",
+        "version": {"csn": "1.0"},
+        "definitions": {},  # empty by design
+        "meta": {
+            "creator": "CDS Compiler v1.0"
+        },
+        "businessLayerDefinitions": layer,
+    }
 
 
 # ======================================================================
@@ -283,7 +444,8 @@ def _load_template(template_bytes: bytes) -> dict:
     return json.loads(template_bytes.decode("utf-8"))
 
 
-def _apply_native_template(template: dict, view_model: SQLViewModel) -> dict:
+def _apply_native_template(template: dict, view_model: SQLViewModel,
+                           elements: Optional[Dict[str, dict]] = None) -> dict:
     """
     Clone a native SQL View template and inject:
       - definition name (sanitized)
@@ -328,7 +490,7 @@ def _apply_native_template(template: dict, view_model: SQLViewModel) -> dict:
     
     obj["@DataWarehouse.sqlEditor.query"] = sql_body
     obj.pop("query", None)
-    elems = _elements_from_view(view_model)
+    elems = _elements_from_view(view_model, elements)
     if elems:
         obj["elements"] = elems
 
@@ -338,112 +500,24 @@ def _apply_native_template(template: dict, view_model: SQLViewModel) -> dict:
         "definitions": { new_name: obj }
     }
 
-# --- Helpers used by _apply_native_template ---
-
-def _extract_select_segment(sql: str):
-    m = re.search(r"\bselect\b(.*?)\bfrom\b", sql, flags=re.I | re.S)
-    return m.group(1).strip() if m else ""
-
-def _split_comma(segment: str) -> List[str]:
-    out, buf, d = [], [], 0
-    for ch in segment:
-        if ch == '(':
-            d += 1
-        elif ch == ')':
-            d -= 1
-        if ch == ',' and d == 0:
-            out.append("".join(buf).strip()); buf = []
-        else:
-            buf.append(ch)
-    if buf:
-        out.append("".join(buf).strip())
-    return out
-
-def _extract_alias(expr: str) -> Optional[str]:
-    expr = expr.strip()
-    m = re.search(r"\bAS\s+([A-Za-z_][\w$]*)\b", expr, flags=re.I)
-    if m:
-        return m.group(1)
-    # trailing identifier after a space: "... expr alias"
-    m = re.search(r"\s+([A-Za-z_][\w$]*)\s*$", expr)
-    if m and " " in expr.strip():
-        return m.group(1)
-    return None
+# --- Helpers used by _apply_native_template / _neutral_view_definition ---
 
-def _infer_type(expr: str) -> str:
-    u = expr.upper()
-    # numeric aggregations
-    if any(fn+"(" in u for fn in ("SUM", "AVG", "MIN", "MAX", "STDDEV", "VARIANCE")):
-        return "cds.Decimal"
-    # count -> integer
-    if "COUNT(" in u:
-        return "cds.Integer"
-    # casts
-    if re.search(r"\bCAST\s*\(.*?AS\s+(INT|INTEGER|DECIMAL|NUMERIC|BIGINT|DOUBLE)\b", u):
-        return "cds.Decimal"
-    if re.search(r"\bDATE\b|\bTO_DATE\(", u):
-        return "cds.Date"
-    if re.search(r"\bTIMESTAMP\b", u):
-        return "cds.Timestamp"
-    return "cds.String"
-
-def _apply_defaults(elem_type: str) -> Dict[str, object]:
-    if elem_type == "cds.String":
-        return {"type": "cds.String", "length": 500}
-    if elem_type == "cds.Decimal":
-        return {"type": "cds.Decimal", "precision": 38, "scale": 10}
-    if elem_type == "cds.Integer":
-        return {"type": "cds.Integer"}
-    if elem_type in ("cds.Date", "cds.Time", "cds.Timestamp"):
-        return {"type": elem_type}
-    return {"type": elem_type}
-
-def _elements_from_view(v) -> dict[str, dict]:
+def _view_columns(v) -> List[Tuple[str, str]]:
     """
-    Infer Datasphere columns from the uploaded SQL:
+    Output column index of a SQL view as (name, expression) pairs:
       1) alias (quoted/unquoted) if present
       2) else simple ref name (EMP_GROUP) if expr is a plain reference
       3) else COL#
+    Names are unique (case-insensitive); shared by elements and analytic models.
     """
-    elems: dict[str, dict] = {}
-
     # Prefer pre-parsed columns if your parse_hdbview_or_sql provided them
     raw_cols = (getattr(v, "columns", None) or [])[:500]
 
     # If unavailable, parse SELECT list
     if not raw_cols:
-        sql = getattr(v, "sql", "") or ""
-        m = re.search(r'\bselect\b(.*?)\bfrom\b', sql, flags=re.I | re.S)
-        segment = m.group(1).strip() if m else ""
-        raw_cols = _split_comma(segment) if segment else []
-
-    if not raw_cols:
-        # Fallback to a single placeholder column to keep the view valid
-        return {"COL1": {"type": "cds.String", "length": 500}}
-
-    def _infer_type(expr: str) -> str:
-        u = (expr or "").upper()
-        if "COUNT(" in u:
-            return "cds.Integer"
-        if any(fn + "(" in u for fn in ("SUM", "AVG", "MIN", "MAX", "STDDEV", "VARIANCE")):
-            return "cds.Decimal"
-        if re.search(r'\bTIMESTAMP\b|\bCURRENT_TIMESTAMP\b', u):
-            return "cds.Timestamp"
-        if re.search(r'\bDATE\b|\bTO_DATE\s*\(', u):
-            return "cds.Date"
-        return "cds.String"
-
-    def _apply_defaults(t: str) -> dict:
-        if t == "cds.String":
-            return {"type": "cds.String", "length": 500}
-        if t == "cds.Decimal":
-            return {"type": "cds.Decimal", "precision": 38, "scale": 10}
-        if t == "cds.Integer":
-            return {"type": "cds.Integer"}
-        if t in ("cds.Date", "cds.Time", "cds.Timestamp"):
-            return {"type": t}
-        return {"type": t}
+        raw_cols = sql_clauses(getattr(v, "sql", "") or "").columns
 
+    out: List[Tuple[str, str]] = []
     seen: set[str] = set()
     for i, raw in enumerate(raw_cols, 1):
         expr = raw.strip()
@@ -464,11 +538,39 @@ def _elements_from_view(v) -> dict[str, dict]:
             name = f"{base}_{k}"
             k += 1
         seen.add(name.upper())
+        out.append((name, expr))
+    return out
 
-        t = _infer_type(expr)
-        elems[name] = _apply_defaults(t)
 
-    return elems    
+def _infer_view_elements(
+    views: List[SQLViewModel],
+    table_schemas: Optional[Dict[str, dict]] = None,
+    source_columns: Optional[Dict[str, Dict[str, dict]]] = None,
+) -> Dict[str, Dict[str, dict]]:
+    """
+    Element types for every view (names via _view_columns, types via type_infer).
+    Views are typed in dependency order so a view reading another uploaded
+    view sees that view's element types; table columns come from
+    *table_schemas* and *source_columns* (stub columns inferred from usage).
+    """
+    index = SchemaIndex.from_schemas(source_columns, table_schemas)
+    out: Dict[str, Dict[str, dict]] = {}
+    for v in topological_views(views):
+        column = index.scope(v.sql)
+        elems = {name: expression_type(expr, column) or dict(_DEFAULT_ELEMENT) for name, expr in _view_columns(v)}
+        index.add(v.name, elems)
+        out[v.name] = elems
+    return out
+
+
+def _elements_from_view(v, elements: Optional[Dict[str, dict]] = None) -> dict[str, dict]:
+    """
+    Datasphere columns of a view: *elements* from _infer_view_elements when the
+    whole project was typed, else the view typed on its own.
+    """
+    elems = elements if elements is not None else _infer_view_elements([v])[v.name]
+    # Fallback to a single placeholder column to keep the view valid
+    return dict(elems) or {"COL1": dict(_DEFAULT_ELEMENT)}
 
 # ======================================================================
 # REPLICATION FLOW (ABAP CDS) — template patcher
@@ -548,38 +650,12 @@ def _patch_replication_objects(def_obj: Dict, cds_name: str, target_table: str,
     return obj
 
 
-def _apply_rf_template(template_bytes: bytes,
-                       cds: ABAPCDSModel,
-                       load_type: str = "INITIAL_AND_DELTA",
-                       content_type: Optional[str] = None,
-                       target_table: Optional[str] = None) -> Dict:
-    template = json.loads(template_bytes.decode("utf-8"))
-    base_key = _first_def_key(template)
-    if not base_key:
-        raise ValueError("Invalid Replication Flow template JSON (no definitions found).")
-    base_obj = copy.deepcopy(template["definitions"][base_key])
-
-    new_name = _sanitize(f"RF_{cds.name}")
-    new_obj = _patch_replication_objects(
-        base_obj,
-        cds_name=cds.name,
-        target_table=target_table or _sanitize(cds.name),
-        load_type=load_type,
-        content_type=content_type,
-    )
-
-    return {
-        "$version": template.get("$version", "1.0"),
-        "version": template.get("version", {"csn": "1.0"}),
-        "definitions": {new_name: new_obj},
-    }
-
 # --- new: extract a simple column reference name (with optional schema/alias and quoting) ---
 _SIMPLE_REF_RE = re.compile(
     r'''^\s*
         (?:
-            (?:"[^"]+"|`[^`]+`|\[[:\w\$]+\])\s*\.\s*   # optional qualifier "SCHEMA"."TABLE" or alias
-        )?
+            (?:"[^"]+"|`[^`]+`|\[[:\w\$]+\]|[A-Za-z_][\w\$]*)\s*\.\s*   # optional qualifiers "SCHEMA"."TABLE", alias
+        )*
         (?:"([^"]+)"|`([^`]+)`|\[([A-Za-z_][\w\$]*)\]|([A-Za-z_][\w\$]*))
         \s*$
     ''',
@@ -590,62 +666,30 @@ _SIMPLE_REF_RE = re.compile(
 # ANALYTIC MODEL TEMPLATE PATCHER (Tenant-Independent)
 # ======================================================================
 def _apply_analytic_model_template(
-    template_bytes: bytes,
+    template_bytes: Optional[bytes],
     model_name: str,
     base_view_name: str,
     attributes: List[str],
     measures: List[Dict[str, str]]
 ):
     """
-    Build a minimal, valid Analytic Model CSN that Datasphere will accept
-    WITHOUT requiring explicit schema or columns.
-    Datasphere will auto-populate attributes and measures after deployment.
+    Build a single Analytic Model package. When a tenant template is given,
+    its first businessLayerDefinitions entry is cloned and patched; the
+    attributes/measures are always written out explicitly.
     """
-
-    analytic_model = {
-        "kind": "analyticmodel",
-        "@EndUserText.label": model_name,
-        "sourceModel": {
-            "factSources": {
-                base_view_name: {
-                    "text": base_view_name,
-                    "dataEntity": { "key": base_view_name }
-                }
-            },
-            "dimensionSources": {}
-        },
-        # Leave these empty – Datasphere auto-populates them after deploy
-        "attributes": {},
-        "measures": {}
-    }
-
-    final_json = {
+    business = _analytic_business_definition(
+        model_name, base_view_name, attributes, measures,
+        _analytic_template_base(template_bytes),
+    )
+    return {
         "$version": "1.0",
         "version": {"csn": "1.0"},
         "definitions": {},  # empty by design
         "meta": {
             "creator": "CDS Compiler v1.0"
         },
-        "businessLayerDefinitions": {
-            model_name: {
-                "identifier": {"key": model_name},
-                "text": model_name,
-                "sourceModel": {
-                    "factSources": {
-                        base_view_name: {
-                            "text": base_view_name,
-                            "dataEntity": {"key": base_view_name}
-                        }
-                    },
-                    "dimensionSources": {}
-                },
-                "attributes": {},
-                "measures": {}
-            }
-        }
-    }    
-
-    return final_json
+        "businessLayerDefinitions": {model_name: business},
+    }
 
 def _extract_simple_ref_name(expr: str) -> str | None:
     """Return the column name if expr is a simple reference (with or without quoting)."""
@@ -661,8 +705,8 @@ def _extract_simple_ref_name(expr: str) -> str | None:
 # --- improved: alias extraction with support for quoted identifiers and trailing alias ---
 def _extract_alias(expr: str) -> str | None:
     s = (expr or "").strip()
-    # ... AS "Alias" | AS [Alias] | AS `Alias`
-    m = re.search(r'\bAS\s+("([^"]+)"|`([^`]+)`|\[([A-Za-z_][\w\$]*)\]|([A-Za-z_][\w\$]*))\b',
+    # ... AS "Alias" | AS [Alias] | AS `Alias` at the end (not the AS inside CAST(... AS type))
+    m = re.search(r'\bAS\s+("([^"]+)"|`([^`]+)`|\[([A-Za-z_][\w\$]*)\]|([A-Za-z_][\w\$]*))\s*$',
                   s, flags=re.I)
     if m:
         for i in range(2, 6):
@@ -672,7 +716,7 @@ def _extract_alias(expr: str) -> str | None:
     # trailing alias without AS (… expr "Alias"), quoted or unquoted
     m = re.search(r'\s+("([^"]+)"|`([^`]+)`|\[([A-Za-z_][\w\$]*)\]|([A-Za-z_][\w\$]*))\s*$',
                   s)
-    if m:
+    if m and (m.group(5) or "").upper() != "END":  # CASE ... END has no alias
         for i in range(2, 6):
             if m.group(i):
                 return m.group(i)
@@ -680,35 +724,6 @@ def _extract_alias(expr: str) -> str | None:
     # no alias found
     return None
 
-# --- minor: keep your segment splitter (comma-safe with parentheses), re-using yours or this ---
-def _split_comma(segment: str) -> list[str]:
-    out, buf, d, in_str, esc = [], [], 0, None, False
-    for ch in segment:
-        if in_str:
-            buf.append(ch)
-            if esc:
-                esc = False
-            elif ch == '\\':
-                esc = True
-            elif (in_str == '"' and ch == '"') or (in_str == "'" and ch == "'"):
-                in_str = None
-            continue
-        if ch in ("'", '"'):
-            in_str = ch
-            buf.append(ch)
-            continue
-        if ch == '(':
-            d += 1
-        elif ch == ')':
-            d = max(0, d - 1)
-        if ch == ',' and d == 0:
-            out.append("".join(buf).strip()); buf = []
-        else:
-            buf.append(ch)
-    if buf:
-        out.append("".join(buf).strip())
-    return out
-
 # ----------------------------------------------------------------------
 # Replication Flow helpers (place with other helpers, before main build)
 # ----------------------------------------------------------------------
@@ -724,79 +739,94 @@ def _detect_rf_shape(template: dict) -> str:
         return "definitions"
     raise ValueError("Template JSON has neither 'replicationflows' nor 'definitions' section with content.")
 
-def _apply_rf_template(template_bytes: bytes,
-                       cds: ABAPCDSModel,
-                       load_type: str = "INITIAL_AND_DELTA",
-                       content_type: Optional[str] = None,
-                       target_table: Optional[str] = None) -> Dict:
-    """
-    Clone a Replication Flow template that may store flows under either:
-      - template['replicationflows'][<name>], or
-      - template['definitions'][<name>]
-    Then patch:
-      - RF label, load type, content type
-      - Source object name (ABAP CDS)
-      - Target table name
-    """
+def _rf_template(template_bytes: bytes) -> Tuple[dict, str, dict]:
+    """(template, section, first flow object) of a Replication Flow template."""
     template = json.loads(template_bytes.decode("utf-8"))
     section = _detect_rf_shape(template)
-
     rf_map = template["replicationflows"] if section == "replicationflows" else template["definitions"]
     if not rf_map:
         raise ValueError(f"No objects found under '{section}' in template.")
-
-    base_key = sorted(rf_map.keys())[0]
-    base_obj = copy.deepcopy(rf_map[base_key])
-
-    new_name = _sanitize(f"RF_{cds.name}")
+    return template, section, rf_map[sorted(rf_map.keys())[0]]
+
+
+_RF_THREAD_KEY_RE = re.compile(r"^(source|target)\w*(connection|thread)", re.IGNORECASE)
+_RF_DELTA_KEY_RE = re.compile(r"delta\w*interval", re.IGNORECASE)
+
+
+def _patch_rf_settings(rfs: dict, flow: ReplicationFlowPlan) -> None:
+    """Thread limits and delta interval of the plan into the template's replicationFlowSetting."""
+    threads = {"source": flow.source_threads, "target": flow.target_threads}
+    found = False
+    for key in list(rfs):
+        m = _RF_THREAD_KEY_RE.match(key)
+        if m and isinstance(rfs[key], (int, float)):
+            rfs[key] = threads[m.group(1).lower()]
+            found = True
+    if not found:
+        rfs["sourceMaxConnections"], rfs["targetMaxConnections"] = flow.source_threads, flow.target_threads
+    if not flow.delta_minutes:
+        return
+    found = False
+    for key in list(rfs):
+        if _RF_DELTA_KEY_RE.search(key) and isinstance(rfs[key], (int, float)):
+            low = key.lower()
+            rfs[key] = (flow.delta_minutes // 60 if "hour" in low
+                        else flow.delta_minutes % 60 if "minute" in low else flow.delta_minutes)
+            found = True
+    if not found:
+        rfs["deltaCheckIntervalHour"], rfs["deltaCheckIntervalMinute"] = divmod(flow.delta_minutes, 60)
+
+
+def _apply_rf_template(base_obj: dict,
+                       flow: ReplicationFlowPlan,
+                       content_type: Optional[str] = None,
+                       target_tables: Optional[Dict[str, str]] = None) -> Dict:
+    """
+    Clone the template's Replication Flow object for one planned flow:
+      - RF label, content type, thread limits, delta interval
+      - one replication task per entity (cloned from the template's first
+        task): load type, source object (ABAP CDS), target table
+    """
     obj = copy.deepcopy(base_obj)
+    target_tables = target_tables or {}
 
     # --- Label
     if "@EndUserText.label" in obj:
-        obj["@EndUserText.label"] = new_name
+        obj["@EndUserText.label"] = _sanitize(flow.name)
 
-    # --- RF-wide settings (content type)
-    contents = obj.get("contents", {})
+    # --- RF-wide settings (content type, threads, delta interval)
+    contents = obj.setdefault("contents", {})
     rfs = contents.get("replicationFlowSetting", {})
-    if isinstance(rfs, dict) and content_type:
-        # Examples: "Native Type" or "Template Type" depending on tenant release
-        rfs["ABAPcontentType"] = content_type
-        rfs["ABAPcontentTypeDisabled"] = False
-        obj.setdefault("contents", {})["replicationFlowSetting"] = rfs
-
-    # --- Task load types and source/target names
-    tasks = contents.get("replicationTasks", [])
-    for t in tasks:
-        if not isinstance(t, dict):
-            continue
-        # Map UI choice to tenant loadType keywords
+    if isinstance(rfs, dict):
+        if content_type:
+            # Examples: "Native Type" or "Template Type" depending on tenant release
+            rfs["ABAPcontentType"] = content_type
+            rfs["ABAPcontentTypeDisabled"] = False
+        _patch_rf_settings(rfs, flow)
+        contents["replicationFlowSetting"] = rfs
+
+    # --- One task per entity: load type and source/target names
+    proto = next((t for t in contents.get("replicationTasks", []) if isinstance(t, dict)), None)
+    tasks = []
+    for e in flow.entities if proto is not None else []:
+        t = copy.deepcopy(proto)
         if "loadType" in t:
-            lt = load_type.upper().replace(" ", "_")
-            # Normalize common aliases
-            if lt == "INITIAL_ONLY": lt = "INITIAL"
-            if lt == "DELTA_ONLY":   lt = "DELTA"
-            t["loadType"] = lt
+            t["loadType"] = e.load_type
         src = t.get("sourceObject")
         if isinstance(src, dict) and "name" in src:
-            src["name"] = cds.name  # ABAP CDS entity name
+            src["name"] = e.name  # ABAP CDS entity name
         tgt = t.get("targetObject")
         if isinstance(tgt, dict) and "name" in tgt:
-            tgt["name"] = target_table or _sanitize(cds.name)
-    obj.setdefault("contents", {})["replicationTasks"] = tasks
-
-    # --- Return a package in the same shape as the template
-    pkg = {"$version": template.get("$version", "1.0"),
-           "version": template.get("version", {"csn": "1.0"})}
-    if section == "replicationflows":
-        pkg["replicationflows"] = { new_name: obj }
-    else:
-        pkg["definitions"] = { new_name: obj }
-    return pkg
+            tgt["name"] = target_tables.get(e.name) or _sanitize(e.name)
+        tasks.append(t)
+    contents["replicationTasks"] = tasks
+    return obj
 
 # ======================================================================
 # MAIN ENTRY — build zip bytes & manifest
 # ======================================================================
 
+@timed("export")
 def build_csn_artifacts_zip(
     *,
     package_name: str,
@@ -813,30 +843,62 @@ def build_csn_artifacts_zip(
     native_output_mode: str = "neutral",   # "neutral" | "native" | "both"
     # --- NEW for Replication Flow (ABAP CDS)
     abap_cds: Optional[ABAPCDSModel] = None,
+    abap_cds_list: Optional[List[ABAPCDSModel]] = None,
+    rf_stats: Optional[Dict[str, TableStats]] = None,
     rf_load_type: str = "INITIAL_AND_DELTA",
     rf_content_type: Optional[str] = None,
     rf_target_table: Optional[str] = None,
     analytic_model_template_bytes: Optional[bytes] = None,
+    cache_dir: Optional[str] = None,
+    chunk_max_bytes: Optional[int] = None,
 ) -> Tuple[bytes, dict]:
     """
     Builds a zip that contains one or more of:
       - csn.json (+ manifest.json) for Neutral
       - native_csn.json for Native SQL View (when 'both' mode)
-      - replication_csn.json or csn.json for Replication Flow (ABAP CDS)
+      - replication_csn.json or csn.json for Replication Flow (ABAP CDS):
+        abap_cds / abap_cds_list are grouped into flows by rf_planner
+        (rf_stats: row counts and daily changes), which sets thread
+        limits and delta intervals
+      - analytic_model.json when include_analytic is set
       - views_sql/<name>.sql for readable SQL snippets (neutral)
+      (a Calculation View is compiled into one SQL view and emitted like the others)
       - README.md with guidance
+    With *cache_dir*, definitions whose source/template/options hash is
+    unchanged since the last run are reused from the cache, and delta/
+    holds the same packages restricted to the changed definitions.
+    With *chunk_max_bytes*, the table/view package is written as
+    dependency-ordered csn_001.json..csn_N.json plus import_order.json
+    instead of one csn.json (see csn_chunks).
     """
     sql_views = list(sql_views or [])
     procedures = list(procedures or [])
     table_schemas = table_schemas or {}
+    # Replication Flow entities: abap_cds_list, or the single abap_cds
+    cds_list = list(abap_cds_list or ([abap_cds] if abap_cds else []))
+    abap_cds = abap_cds or (cds_list[0] if cds_list else None)
+
+    # ---------------- Incremental cache: templates and options affect every definition
+    cache = ExportCache(cache_dir, salt=content_hash(
+        native_template_bytes, analytic_model_template_bytes,
+        {"table_mode": table_mode, "view_mode": view_mode, "native_output_mode": native_output_mode,
+         "rf_load_type": rf_load_type, "rf_content_type": rf_content_type, "rf_target_table": rf_target_table},
+    ))
 
-    # ---------------- Collect sources from graph (for stubs if needed)
-    base_sources = _collect_sources_from_graph(graph)
+    # ---------------- Calculation View → one SQL view (CTEs, pruned columns)
+    cv_view = cv_to_sql_view(cv_model) if cv_model and cv_model.nodes and table_mode != "tables_only" else None
+
+    # ---------------- Project: views in dependency order, view-to-view references resolved
+    project = resolve_view_project(sql_views + ([cv_view] if cv_view else []))
+    export_views = project.views
+
+    # ---------------- Collect sources from graph (for stubs if needed); uploaded views are no tables
+    base_sources = [s for s in _collect_sources_from_graph(graph) if project.resolve(s) is None]
 
     # ---------------- Neutral CSN build (tables + neutral views)
     neutral = _make_neutral_csn(
         package_name=package_name,
-        sql_views=sql_views,
+        sql_views=export_views,
         base_sources=base_sources,
         view_mode=view_mode,
         table_mode=table_mode,
@@ -844,91 +906,179 @@ def build_csn_artifacts_zip(
         cv_model=cv_model,
         procedures=procedures,
         table_schemas=table_schemas,
+        cache=cache,
     )
     created_tables = neutral["created_tables"]
     csn = neutral["csn"]
 
+    # ---------------- Which packages get written
+    # If we're generating a Replication Flow, never write the neutral package.
+    if abap_cds:
+        write_neutral = False
+    else:
+        write_neutral = (
+            (native_output_mode == "neutral")
+            or (native_output_mode == "both")
+            or not native_template_bytes
+        )
+    write_native = (
+        native_template_bytes is not None
+        and native_output_mode in ("native", "both")
+    )
+
+    # ---------------- Native SQL Views (template)
+    native_pkg = None
+    if write_native and export_views and table_mode != "tables_only" and not abap_cds:
+        template = _load_template(native_template_bytes)
+        merged_defs = {}
+        native_pkg = {"$version": "1.0", "version": {"csn": "1.0"}}
+        view_elements = neutral["view_elements"]
+        for v in export_views:
+            elems = view_elements.get(v.name)
+            merged_defs.update(cache.definition(
+                "native_view", _sanitize(v.name), (artifact_fingerprint(v), elems),
+                lambda v=v, elems=elems: _apply_native_template(template, v, elems)["definitions"]))
+        native_pkg["definitions"] = merged_defs
+
+    # ---------------- Replication Flow (ABAP CDS)
+    rf_pkg = None
+    rf_plan = None
+    if cds_list:
+        rf_plan = plan_replication(cds_list, rf_stats, name=_sanitize(package_name), load_type=rf_load_type)
+    if rf_plan and rf_plan.flows and native_template_bytes:
+        template, section, base_obj = _rf_template(native_template_bytes)
+        targets = {abap_cds.name: rf_target_table} if abap_cds and rf_target_table else {}
+        by_name = {c.name: c for c in cds_list}
+        flows = {}
+        for flow in rf_plan.flows:
+            flows[_sanitize(flow.name)] = cache.definition(
+                "replication_flow", _sanitize(flow.name),
+                ([artifact_fingerprint(by_name[e.name]) for e in flow.entities], flow.as_dict(), targets),
+                lambda flow=flow: _apply_rf_template(base_obj, flow, content_type=rf_content_type, target_tables=targets))
+        # --- a package in the same shape as the template
+        rf_pkg = {"$version": template.get("$version", "1.0"),
+                  "version": template.get("version", {"csn": "1.0"}),
+                  section: flows}
+
     # ---------------- Manifest (common)
     manifest = _simple_manifest(
-        package_name, sql_views, cv_model, procedures, graph,
+        package_name, export_views, cv_model, procedures, graph,
         table_mode, view_mode, include_analytic, created_tables
     )
 
+    # ---------------- Analytic model(s), built up-front so the manifest lists them
+    analytic_model_pkg = None
+    if include_analytic and abap_cds:
+        model_name = f"{abap_cds.name}_AM"
+        base_view_name = rf_target_table or _sanitize(abap_cds.name)
+
+        def _cds_analytic_package() -> dict:
+            cds_attrs, cds_measures = _analytic_columns_from_cds(abap_cds)
+            return _apply_analytic_model_template(
+                template_bytes=analytic_model_template_bytes,
+                model_name=model_name,
+                base_view_name=base_view_name,
+                attributes=cds_attrs,
+                measures=cds_measures,
+            )
+
+        analytic_model_pkg = cache.definition(
+            "analytic_model", model_name, (artifact_fingerprint(abap_cds), base_view_name), _cds_analytic_package)
+    elif include_analytic and table_mode != "tables_only" and (sql_views or cv_model):
+        # point at the definition keys csn.json will hold: native-only output
+        # replaces the neutral package and keys views by their sanitized name
+        native_only = native_template_bytes is not None and native_output_mode == "native"
+        analytic_model_pkg = build_analytic_models_package(
+            cv_models=[cv_model] if cv_model else [],
+            sql_views=sql_views,
+            template_bytes=analytic_model_template_bytes,
+            base_view_names={v.name: _sanitize(v.name) if native_only else v.name for v in export_views},
+            cache=cache,
+        )
+    if export_views:
+        manifest.update(project.as_dict())
+    proc_flows = [f for f in (decompose_procedure(p) for p in procedures) if f.stages]
+    if proc_flows:
+        manifest["procedureFlows"] = {f.procedure: f.task_chain() for f in proc_flows}
+    if rf_plan:
+        manifest["replicationPlan"] = rf_plan.as_dict()
+    if cv_view:
+        manifest["cvPruning"] = prune_cv_model(cv_model)[1].as_dict()
+        manifest["cvFilterPushdown"] = [pf.as_dict() for pf in analyze_filter_pushdown(cv_model)]
+    if analytic_model_pkg:
+        manifest["analyticModels"] = sorted(analytic_model_pkg["businessLayerDefinitions"])
+    if cache_dir:
+        manifest["incremental"] = cache.summary()
+
     # ---------------- Write zip
+    written: Dict[str, dict] = {}  # zip name -> package, for the delta copies
     out = io.BytesIO()
     with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as z:
-        
-# If we're generating a Replication Flow, never write the neutral package.
-        if abap_cds:
-            write_neutral = False
-        else:
-            write_neutral = (
-                (native_output_mode == "neutral")
-                or (native_output_mode == "both")
-                or not native_template_bytes
-            )
-        write_native = (
-            native_template_bytes is not None
-            and native_output_mode in ("native", "both")
-        )
+
+        def write_pkg(name: str, pkg: dict) -> None:
+            written[name] = pkg
+            for section in ("definitions", "replicationflows", "businessLayerDefinitions"):
+                count("definitions", len(pkg.get(section) or {}))
+            if name == "csn.json" and chunk_max_bytes and pkg is not rf_pkg:
+                defs = pkg.get("definitions") or {}
+                deps = definition_dependencies(defs, graph, export_views)
+                chunks = chunk_definitions(defs, deps, chunk_max_bytes)
+                for chunk_name, chunk_pkg in chunked_packages(pkg, chunks).items():
+                    z.writestr(chunk_name, json.dumps(chunk_pkg, indent=2))
+                order = import_order_manifest(chunks)
+                z.writestr("import_order.json", json.dumps(order, indent=2))
+                manifest["importOrder"] = [c["file"] for c in order["chunks"]]
+                return
+            z.writestr(name, json.dumps(pkg, indent=2))
 
         # ============== Neutral CSN (tables + neutral views) ==============
         if write_neutral:
-            z.writestr("csn.json", json.dumps(csn, indent=2))
+            write_pkg("csn.json", csn)
             z.writestr("manifest.json", json.dumps(manifest, indent=2))
             # for convenience, write SELECT bodies for views
             if table_mode != "tables_only":
-                for v in sql_views:
+                for v in export_views:
                     z.writestr(f"views_sql/{v.name}.sql", _sql_select_body(v.sql))
 
+        # ============== Procedure stages (views / transformation flows) ===
+        for flow in proc_flows:
+            folder = f"procedure_flows/{_sanitize(flow.procedure)}"
+            z.writestr(f"{folder}.json", json.dumps(flow.as_dict(), indent=2))
+            for stage in flow.stages:
+                z.writestr(f"{folder}/{stage.name}.sql", stage.sql + "\n")
+
         # ============== Native SQL Views (template) =======================
-        if write_native and sql_views and table_mode != "tables_only" and not abap_cds:
-            template = _load_template(native_template_bytes)
-            merged_defs = {}
-            pkg = {"$version": "1.0", "version": {"csn": "1.0"}}
-            for v in sql_views:
-                obj = _apply_native_template(template, v)
-                merged_defs.update(obj["definitions"])
-            pkg["definitions"] = merged_defs
+        if native_pkg is not None:
             if native_output_mode == "native":
                 # Overwrite "csn.json" with the native package if native-only was requested
-                z.writestr("csn.json", json.dumps(pkg, indent=2))
+                write_pkg("csn.json", native_pkg)
                 z.writestr("manifest.json", json.dumps(manifest, indent=2))
             else:
                 # Include it alongside the neutral package
-                z.writestr("native_csn.json", json.dumps(pkg, indent=2))
+                write_pkg("native_csn.json", native_pkg)
 
         # ============== Replication Flow (ABAP CDS) =======================
-        if abap_cds and native_template_bytes:
-            rf_pkg = _apply_rf_template(
-                native_template_bytes, abap_cds,
-                load_type=rf_load_type,
-                content_type=rf_content_type,
-                target_table=rf_target_table or _sanitize(abap_cds.name)
-            )
+        if rf_pkg is not None:
             if native_output_mode == "native":
                 # If exclusive native requested (for RF we always consider native)
-                z.writestr("csn.json", json.dumps(rf_pkg, indent=2))
+                write_pkg("csn.json", rf_pkg)
                 z.writestr("manifest.json", json.dumps(manifest, indent=2))
             else:
                 # Save next to neutral
-                z.writestr("replication_csn.json", json.dumps(rf_pkg, indent=2))
-   
+                write_pkg("replication_csn.json", rf_pkg)
 
-        # ============= ANALYTIC MODEL (template-based injection) ========================
-        if analytic_model_template_bytes and include_analytic and abap_cds:
-            analytic_model_pkg = _apply_analytic_model_template(
-                template_bytes=analytic_model_template_bytes,
-                model_name=f"{abap_cds.name}_AM",
-                base_view_name=rf_target_table or _sanitize(abap_cds.name),
-                attributes=[],   # no SQL-derived attributes in RF mode
-                measures=[],     # template already carries structure
-            )
-            z.writestr(
-                "analytic_model.json",
-                json.dumps(analytic_model_pkg, indent=2)
-            )
+        # ============= ANALYTIC MODEL(S) (businessLayerDefinitions) ======
+        if analytic_model_pkg:
+            write_pkg("analytic_model.json", analytic_model_pkg)
 
+        # ============== Delta (incremental re-export) ======================
+        if cache_dir:
+            changed = cache.changed_keys()
+            for name, pkg in written.items():
+                delta = delta_package(pkg, changed)
+                if delta is not None:
+                    z.writestr(f"delta/{name}", json.dumps(delta, indent=2))
+            z.writestr("delta/changes.json", json.dumps(cache.summary(), indent=2))
 
         # ============== README ===========================================
         if abap_cds:
@@ -959,5 +1109,8 @@ def build_csn_artifacts_zip(
                     "Both neutral (csn.json) and native (native_csn.json) packages included.\n"
                 )
 
+    cache.save()
     out.seek(0)
-    return out.read(), manifest
\ No newline at end of file
+    data = out.read()
+    count("zip_bytes", len(data))
+    return data, manifest
\ No newline at end of file
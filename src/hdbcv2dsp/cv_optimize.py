@@ -0,0 +1,384 @@
+# hdbcv2dsp/cv_optimize.py
+# ======================================================================
+# Calculation View graph optimisation
+#  - Projection pushdown: required columns flow backwards from the
+#    logicalModel through node mappings, filters and formulas
+#  - Dead-node elimination: nodes the output never reaches are dropped
+#  - Filter pushdown: node filters are moved as close to the data
+#    sources as the graph allows (and flagged for replication filters)
+# ======================================================================
+from __future__ import annotations
+
+import copy
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from .parse_cv import CVModel, CVNode, Mapping, topo_order
+from .sql_text import find_top_level, split_top_level
+
+_STRING_LIT_RE = re.compile(r"'(?:[^']|'')*'")
+_QUALIFIED_REF_RE = re.compile(r'"((?:[^"]|"")+)"\s*\.\s*"((?:[^"]|"")+)"')
+_QUOTED_REF_RE = re.compile(r'"((?:[^"]|"")+)"')
+_BARE_WORD_RE = re.compile(r"\b[A-Za-z_][\w$]*\b")
+
+
+def expression_refs(expr: str, known: Optional[Set[str]] = None) -> Tuple[Set[Tuple[str, str]], Set[str]]:
+    """
+    Column references in a CV expression:
+      - qualified '"Node"."COL"' pairs
+      - unqualified quoted '"COL"' (plus bare words that are *known* columns)
+    """
+    text = _STRING_LIT_RE.sub(" ", expr or "")
+    qualified = {(a.replace('""', '"'), b.replace('""', '"')) for a, b in _QUALIFIED_REF_RE.findall(text)}
+    text = _QUALIFIED_REF_RE.sub(" ", text)
+    plain = {c.replace('""', '"') for c in _QUOTED_REF_RE.findall(text)}
+    if known:
+        text = _QUOTED_REF_RE.sub(" ", text)
+        plain |= {w for w in _BARE_WORD_RE.findall(text) if w in known}
+    return qualified, plain
+
+
+def node_outputs(node: CVNode) -> List[str]:
+    """Ordered output columns of a node (mapped attributes/measures, then calculated ones)."""
+    mapped = {m.target for m in node.mappings}
+    out: List[str] = []
+    seen: Set[str] = set()
+    for c in list(node.attributes) + list(node.measures) + [m.target for m in node.mappings]:
+        if c and c in mapped and c not in seen:
+            out.append(c); seen.add(c)
+    for c in list(node.calc_columns) + list(node.calculated_measures):
+        if c and c not in seen:
+            out.append(c); seen.add(c)
+    return out
+
+
+def root_node(model: CVModel) -> Optional[str]:
+    """Node that feeds the logicalModel (explicit id, else the last node nobody consumes)."""
+    if model.logical_model_node in model.nodes:
+        return model.logical_model_node
+    consumed = {i for n in model.nodes.values() for i in n.inputs}
+    order = topo_order(model)
+    for nid in reversed(order):
+        if nid not in consumed:
+            return nid
+    return order[-1] if order else None
+
+
+def input_of(node: CVNode, m: Mapping) -> str:
+    """Input node a mapping reads from (its own input, else the node's first)."""
+    return m.input or (node.inputs[0] if node.inputs else "")
+
+
+def required_columns(model: CVModel) -> Tuple[Dict[str, Set[str]], Dict[str, Set[str]]]:
+    """
+    Propagate required columns backwards from the logicalModel.
+    Returns (node id -> needed output columns, data source id -> needed source columns).
+    Nodes missing from the first dict are unreachable from the output.
+    """
+    need: Dict[str, Set[str]] = {}
+    ds_need: Dict[str, Set[str]] = {}
+    root = root_node(model)
+    if not root:
+        return need, ds_need
+
+    root_out = node_outputs(model.nodes[root])
+    wanted = set(model.logical_attributes) | set(model.logical_measures)
+    need[root] = (wanted & set(root_out)) or set(root_out)
+
+    def require(inp: str, col: str) -> None:
+        if inp in model.nodes:
+            need.setdefault(inp, set()).add(col)
+        elif inp:
+            ds_need.setdefault(inp, set()).add(col)
+
+    for nid in reversed(topo_order(model)):
+        if nid not in need:
+            continue
+        node = model.nodes[nid]
+        local = local_columns(node, need[nid])
+        by_target: Dict[str, List[Mapping]] = {}
+        for m in node.mappings:
+            by_target.setdefault(m.target, []).append(m)
+        for col in local:
+            maps = by_target.get(col, [])
+            if node.node_type == "UnionView" or col in node.join_attributes:
+                chosen = maps  # every input has to deliver the column
+            else:
+                chosen = maps[:1]
+            for m in chosen:
+                require(input_of(node, m), m.source)
+        # join conditions reference input columns directly
+        for inp, col in expression_refs(node.join_condition or "")[0]:
+            if inp in node.inputs:
+                require(inp, col)
+        for attr in node.join_attributes:
+            for m in by_target.get(attr, []):
+                require(input_of(node, m), m.source)
+    return need, ds_need
+
+
+def local_columns(node: CVNode, wanted: Set[str], include_filters: bool = True) -> Set[str]:
+    """Outputs the node must compute: wanted + everything filters/formulas reference (closure)."""
+    outputs = set(node_outputs(node))
+    local = set(wanted) & outputs
+    if include_filters:
+        for flt in node.filters:
+            local |= expression_refs(flt, outputs)[1] & outputs
+    formulas = dict(node.calc_columns)
+    formulas.update(node.calculated_measures)
+    pending = [c for c in local if c in formulas]
+    while pending:
+        c = pending.pop()
+        for ref in expression_refs(formulas[c], outputs)[1] & outputs:
+            if ref not in local:
+                local.add(ref)
+                if ref in formulas:
+                    pending.append(ref)
+    if node.node_type == "JoinView":
+        local |= set(node.join_attributes) & outputs
+    return local
+
+
+@dataclass
+class PruneReport:
+    removed_nodes: List[str] = field(default_factory=list)                   # unreachable from the logicalModel
+    removed_columns: Dict[str, List[str]] = field(default_factory=dict)     # node -> dropped outputs
+    removed_data_sources: List[str] = field(default_factory=list)
+    source_columns_read: Dict[str, List[str]] = field(default_factory=dict) # DS -> columns still read
+    source_columns_mapped: Dict[str, int] = field(default_factory=dict)     # DS -> columns mapped before
+
+    @property
+    def columns_removed(self) -> int:
+        return sum(len(v) for v in self.removed_columns.values())
+
+    def as_dict(self) -> dict:
+        return {
+            "removedNodes": self.removed_nodes,
+            "removedColumns": self.removed_columns,
+            "removedDataSources": self.removed_data_sources,
+            "sourceColumnsRead": self.source_columns_read,
+            "sourceColumnsMapped": self.source_columns_mapped,
+        }
+
+
+def prune_cv_model(model: CVModel) -> Tuple[CVModel, PruneReport]:
+    """
+    Return a copy of *model* with unreachable nodes, unused outputs (attributes,
+    measures, calculated items, mappings) and unreferenced data sources removed,
+    plus a report of what was dropped. The input model is left untouched.
+    """
+    need, ds_need = required_columns(model)
+    report = PruneReport()
+    pruned = copy.deepcopy(model)
+
+    for ds in model.data_sources:
+        report.source_columns_mapped[ds] = len({
+            m.source for n in model.nodes.values() for m in n.mappings if input_of(n, m) == ds
+        })
+
+    for nid in topo_order(model):
+        if nid not in need:
+            report.removed_nodes.append(nid)
+            del pruned.nodes[nid]
+            continue
+        node = pruned.nodes[nid]
+        keep = local_columns(node, need[nid])
+        dropped = [c for c in node_outputs(node) if c not in keep]
+        if not dropped:
+            continue
+        report.removed_columns[nid] = dropped
+        node.attributes = [a for a in node.attributes if a in keep]
+        node.measures = [m for m in node.measures if m in keep]
+        node.calc_columns = {k: v for k, v in node.calc_columns.items() if k in keep}
+        node.calculated_measures = {k: v for k, v in node.calculated_measures.items() if k in keep}
+        node.aggregations = {k: v for k, v in node.aggregations.items() if k in keep}
+        node.mappings = [m for m in node.mappings if m.target in keep]
+
+    for ds in list(pruned.data_sources):
+        if ds not in ds_need:
+            report.removed_data_sources.append(ds)
+            del pruned.data_sources[ds]
+    report.source_columns_read = {ds: sorted(cols) for ds, cols in ds_need.items()}
+    return pruned, report
+
+
+# ----------------------------------------------------------------------
+# Filter pushdown analysis
+# ----------------------------------------------------------------------
+
+@dataclass
+class PushedFilter:
+    node_id: str                  # node the filter is defined on
+    predicate: str                # original conjunct (node column names)
+    target: str                   # data source / node id the conjunct can be evaluated at
+    target_kind: str              # 'data_source' | 'node'
+    rewritten: str                # conjunct expressed in the target's column names
+    columns: List[str] = field(default_factory=list)  # target columns referenced
+    path: List[str] = field(default_factory=list)     # nodes passed on the way down (incl. node_id)
+    reason: Optional[str] = None  # why it stopped above a data source (if it did)
+
+    @property
+    def pushed(self) -> bool:
+        return self.target != self.node_id
+
+    @property
+    def replication_filter(self) -> bool:
+        """Usable as a Replication Flow row filter: lands on a source, no input parameters."""
+        return self.target_kind == "data_source" and "$$" not in self.predicate
+
+    def as_dict(self) -> dict:
+        d = {
+            "node": self.node_id,
+            "predicate": self.predicate,
+            "target": self.target,
+            "targetKind": self.target_kind,
+            "rewritten": self.rewritten,
+            "path": self.path,
+            "replicationFilter": self.replication_filter,
+        }
+        if self.reason:
+            d["reason"] = self.reason
+        return d
+
+
+_PRESERVED_SIDES = {  # join type -> input positions whose rows survive unchanged
+    "inner": {0, 1}, "referential": {0, 1},
+    "leftouter": {0}, "textjoin": {0},
+    "rightouter": {1},
+    "fullouter": set(),
+}
+
+
+def split_conjuncts(expr: str) -> List[str]:
+    """Split a predicate on top-level AND (only when there is no top-level OR); strings, quoted names and comments are opaque."""
+    text = (expr or "").strip()
+    if find_top_level(text, 0, "", words=("OR",)) < len(text):
+        return [text]
+    return split_top_level(text, "AND")
+
+
+def rewrite_predicate(pred: str, renames: Dict[str, str], qualifier: Optional[str] = None) -> str:
+    """Rename column references ('"COL"' and known bare words) outside string literals."""
+    def sub_col(name: str) -> str:
+        new = renames.get(name, name)
+        ref = '"' + new.replace('"', '""') + '"'
+        return f'"{qualifier}".{ref}' if qualifier else ref
+
+    out, pos = [], 0
+    for lit in list(_STRING_LIT_RE.finditer(pred)) + [None]:
+        end = lit.start() if lit else len(pred)
+        chunk = pred[pos:end]
+        chunk = _QUOTED_REF_RE.sub(lambda m: sub_col(m.group(1).replace('""', '"')), chunk)
+        chunk = re.sub(
+            r'(?<!["\w$:])([A-Za-z_][\w$]*)(?![\w$"])',
+            lambda m: sub_col(m.group(1)) if m.group(1) in renames else m.group(1),
+            chunk,
+        )
+        out.append(chunk)
+        if lit:
+            out.append(lit.group(0))
+            pos = lit.end()
+    return "".join(out)
+
+
+def analyze_filter_pushdown(model: CVModel) -> List[PushedFilter]:
+    """
+    For every node filter conjunct, find the lowest point it can be evaluated at
+    without changing results: through projections, aggregations (group-by
+    attributes only), the preserved side(s) of joins and every branch of a union,
+    stopping above nodes that have more than one consumer. Filters on columns that
+    are computed (calculated columns/measures) stay where they are.
+    """
+    need, _ = required_columns(model)
+    consumers: Dict[str, int] = {}
+    for n in model.nodes.values():
+        for inp in set(n.inputs):
+            consumers[inp] = consumers.get(inp, 0) + 1
+
+    results: List[PushedFilter] = []
+    for nid in topo_order(model):
+        if nid not in need:
+            continue
+        node = model.nodes[nid]
+        for flt in node.filters:
+            for conj in split_conjuncts(flt):
+                results.extend(_push_conjunct(model, consumers, node, conj))
+    return results
+
+
+def moved_conjuncts(pushdown: List[PushedFilter]) -> Set[Tuple[str, str]]:
+    """
+    (node_id, predicate) pairs that leave their node: every PushedFilter of the
+    conjunct was pushed. If any branch stopped at the origin the conjunct stays
+    there (and its pushed copies are not applied either).
+    """
+    stays = {(pf.node_id, pf.predicate) for pf in pushdown if not pf.pushed}
+    return {(pf.node_id, pf.predicate) for pf in pushdown} - stays
+
+
+def _push_conjunct(model: CVModel, consumers: Dict[str, int], origin: CVNode, conj: str) -> List[PushedFilter]:
+    outputs = set(node_outputs(origin))
+    qualified, cols = expression_refs(conj, outputs)
+    if qualified or not cols or not cols <= outputs:
+        return [PushedFilter(origin.node_id, conj, origin.node_id, "node", conj, sorted(cols),
+                             [origin.node_id], "references qualified or unknown columns")]
+
+    results: List[PushedFilter] = []
+    # frontier entries: (node, column names in that node's output, predicate text, path)
+    # The origin's own filter applies to its input, so start by crossing the origin.
+    frontier = [(origin, {c: c for c in cols}, conj, [origin.node_id], True)]
+    while frontier:
+        node, names, pred, path, own = frontier.pop()
+        calc = set(node.calc_columns) | set(node.calculated_measures)
+        stop_reason = None
+        if set(names.values()) & calc:
+            stop_reason = "uses calculated columns"
+        elif not own and node.node_type == "AggregationView" and set(names.values()) & set(node.measures):
+            stop_reason = "filters an aggregated measure"
+
+        branches: List[Tuple[str, Dict[str, str]]] = []
+        if not stop_reason:
+            branches, stop_reason = _pushable_inputs(node, set(names.values()))
+        if stop_reason:
+            results.append(PushedFilter(origin.node_id, conj, node.node_id, "node", pred,
+                                        sorted(names.values()), path, stop_reason))
+            continue
+
+        for inp, renames in branches:
+            new_pred = rewrite_predicate(pred, renames)
+            new_names = {c: renames[v] for c, v in names.items()}
+            if inp in model.nodes and consumers.get(inp, 0) <= 1:
+                frontier.append((model.nodes[inp], new_names, new_pred, path + [inp], False))
+            elif inp in model.nodes:
+                results.append(PushedFilter(origin.node_id, conj, node.node_id, "node", pred,
+                                            sorted(names.values()), path, f"{inp} has several consumers"))
+            else:
+                results.append(PushedFilter(origin.node_id, conj, inp, "data_source", new_pred,
+                                            sorted(new_names.values()), path))
+    return results
+
+
+def _pushable_inputs(node: CVNode, cols: Set[str]) -> Tuple[List[Tuple[str, Dict[str, str]]], Optional[str]]:
+    """Inputs a predicate on *cols* (node outputs) can move into, with output->input renames."""
+    per_input: Dict[str, Dict[str, str]] = {}
+    for m in node.mappings:
+        if m.target in cols:
+            per_input.setdefault(input_of(node, m), {}).setdefault(m.target, m.source)
+    complete = {inp: r for inp, r in per_input.items() if set(r) >= cols}
+
+    if node.node_type == "UnionView":
+        if len(complete) != len(set(node.inputs)):
+            return [], "not every union branch maps the columns"
+        return list(complete.items()), None
+    if node.node_type == "JoinView":
+        jt = (node.join_type or "inner").replace(" ", "").lower()
+        preserved = _PRESERVED_SIDES.get(jt, set())
+        sides = [(inp, r) for pos, inp in enumerate(node.inputs[:2]) if inp in complete and pos in preserved
+                 for r in [complete[inp]]]
+        if not sides:
+            return [], "columns do not come from a preserved join side"
+        return sides[:1], None
+    if not complete:
+        return [], "columns are not mapped from the input"
+    return list(complete.items())[:1], None
@@ -0,0 +1,327 @@
+# hdbcv2dsp/cv_to_sql.py
+# ======================================================================
+# Calculation View → single Datasphere SQL View
+#  - Every reachable node becomes a CTE (WITH "<node>" AS (...))
+#  - Columns are pruned top-down from the logicalModel (cv_optimize), so
+#    node outputs that nobody consumes never appear in the SQL
+#  - Filters are evaluated where cv_optimize's pushdown analysis puts
+#    them (ideally directly on the data source read)
+# ======================================================================
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+from .identifiers import canonical_name, quoted_name
+from .parse_cv import CVModel, CVNode, Mapping, topo_order
+from .parse_sql_view import SQLViewModel
+from .cv_optimize import (
+    PushedFilter,
+    analyze_filter_pushdown,
+    input_of,
+    local_columns,
+    moved_conjuncts,
+    node_outputs,
+    required_columns,
+    rewrite_predicate,
+    root_node,
+    split_conjuncts,
+)
+
+# CV joinType → SQL join keyword
+_JOIN_SQL = {
+    "inner": "INNER JOIN",
+    "leftouter": "LEFT OUTER JOIN",
+    "rightouter": "RIGHT OUTER JOIN",
+    "fullouter": "FULL OUTER JOIN",
+    "referential": "INNER JOIN",
+    "textjoin": "LEFT OUTER JOIN",
+}
+
+# CV aggregationType → SQL aggregate
+_AGG_SQL = {"sum": "SUM", "min": "MIN", "max": "MAX", "count": "COUNT", "avg": "AVG"}
+
+_PARAM_RE = re.compile(r"'?\$\$(\w+)\$\$'?")
+
+
+def _q(name: str) -> str:
+    return '"' + (name or "").replace('"', '""') + '"'
+
+
+def source_identifier(uri: Optional[str], ds_id: str) -> str:
+    """Quoted SQL reference for a CV data source ('SCHEMA.TABLE', HDI 'ns::obj', '/pkg/obj')."""
+    return quoted_name(uri or ds_id or "") or _q(ds_id)
+
+
+def translate_expression(expr: str) -> str:
+    """CV expression → Datasphere SQL ($$PARAM$$ placeholders become :PARAM)."""
+    return _PARAM_RE.sub(lambda m: ":" + m.group(1), expr or "").strip()
+
+
+# ----------------------------------------------------------------------
+# Node → SQL
+# ----------------------------------------------------------------------
+
+def _indent(sql: str, n: int = 4) -> str:
+    pad = " " * n
+    return "\n".join(pad + line if line else line for line in sql.splitlines())
+
+
+def _item(expr: str, alias: str) -> str:
+    return expr if expr == _q(alias) else f"{expr} AS {_q(alias)}"
+
+
+def _where(filters: List[str], pushed: List[Tuple[str, str]] = ()) -> str:
+    """WHERE clause; *pushed* holds (predicate, origin node) pairs moved here by pushdown."""
+    preds = [f"({translate_expression(f)})" for f in filters if f]
+    preds += [f"({translate_expression(p)})" + (f"  -- pushed down from {origin}" if origin else "")
+              for p, origin in pushed]
+    return ("\nWHERE " + "\n  AND ".join(preds)) if preds else ""
+
+
+def _wrap(inner: str, alias: str, items: List[str], filters: List[str]) -> str:
+    return (
+        "SELECT " + ",\n       ".join(items)
+        + f"\nFROM (\n{_indent(inner)}\n) AS {_q(alias)}"
+        + _where(filters)
+    )
+
+
+class _Compiler:
+    def __init__(self, model: CVModel):
+        self.model = model
+        self.need, self.ds_need = required_columns(model)
+        self.pushdown = analyze_filter_pushdown(model)
+        # conjuncts that left their node, and where they landed
+        self.moved: Dict[str, Set[str]] = {}
+        self.node_pushed: Dict[str, List[PushedFilter]] = {}
+        self.source_pushed: Dict[Tuple[str, str], List[PushedFilter]] = {}
+        moved = moved_conjuncts(self.pushdown)
+        for pf in self.pushdown:
+            if (pf.node_id, pf.predicate) not in moved:
+                continue
+            self.moved.setdefault(pf.node_id, set()).add(pf.predicate)
+            if pf.target_kind == "data_source":
+                self.source_pushed.setdefault((pf.path[-1], pf.target), []).append(pf)
+            else:
+                self.node_pushed.setdefault(pf.target, []).append(pf)
+
+    def filters(self, node: CVNode) -> List[str]:
+        """Node filters left after pushdown, plus predicates pushed onto this node."""
+        moved = self.moved.get(node.node_id, set())
+        kept = [c for f in node.filters for c in split_conjuncts(f) if c not in moved]
+        return kept + [pf.rewritten for pf in self.node_pushed.get(node.node_id, [])]
+
+    def source_filters(self, node: CVNode, inp: str, qualify: bool = False) -> List[Tuple[str, str]]:
+        """(predicate, origin) pairs to evaluate directly on data source *inp* inside *node*."""
+        out = []
+        for pf in self.source_pushed.get((node.node_id, inp), []):
+            pred = rewrite_predicate(pf.rewritten, {c: c for c in pf.columns}, inp) if qualify else pf.rewritten
+            out.append((pred, pf.node_id if pf.node_id != node.node_id else ""))
+        return out
+
+    def ref(self, inp: str) -> str:
+        if inp in self.model.nodes:
+            return _q(inp)
+        return source_identifier(self.model.data_sources.get(inp), inp)
+
+    def aliased(self, inp: str) -> str:
+        """Input reference aliased to its CV id so join conditions ('"DS"."COL"') resolve."""
+        ref = self.ref(inp)
+        return ref if ref == _q(inp) else f"{ref} AS {_q(inp)}"
+
+    def ordered(self, node: CVNode, cols: Set[str]) -> List[str]:
+        return [c for c in node_outputs(node) if c in cols]
+
+    def node_sql(self, node: CVNode) -> str:
+        wanted = self.need.get(node.node_id, set())
+        local = local_columns(node, wanted)
+        if node.node_type == "JoinView" and len(node.inputs) >= 2:
+            return self.join_sql(node, wanted, local)
+        if node.node_type == "UnionView" and len(node.inputs) >= 2:
+            return self.union_sql(node, wanted, local)
+        if node.node_type == "AggregationView":
+            return self.aggregation_sql(node, wanted, local)
+        sql = self.projection_sql(node, wanted, local)
+        if node.node_type not in ("ProjectionView", "AggregationView"):
+            sql = f"-- {node.node_type}: translated as a projection, review manually\n" + sql
+        return sql
+
+    # -- shared: mapped columns of a single-input node ------------------
+    def _mapped_items(self, node: CVNode, cols: List[str]) -> Tuple[List[str], bool]:
+        by_target = {}
+        for m in node.mappings:
+            by_target.setdefault(m.target, m)
+        items, renamed = [], False
+        for c in cols:
+            m = by_target.get(c)
+            if m is None:
+                continue
+            renamed |= m.source != m.target
+            items.append(_item(_q(m.source), c))
+        return items, renamed
+
+    def projection_sql(self, node: CVNode, wanted: Set[str], local: Set[str]) -> str:
+        src = self.ref(node.inputs[0]) if node.inputs else "DUMMY"
+        filters = self.filters(node)
+        pushed = self.source_filters(node, node.inputs[0]) if node.inputs else []
+        calc = {c: f for c, f in list(node.calc_columns.items()) + list(node.calculated_measures.items())
+                if c in local}
+        base_cols = [c for c in self.ordered(node, local) if c not in calc]
+        items, renamed = self._mapped_items(node, base_cols)
+        out_cols = self.ordered(node, wanted)
+        if not calc and not (renamed and filters):
+            # single level: filters can address the source columns directly
+            items, _ = self._mapped_items(node, [c for c in out_cols if c not in calc])
+            return "SELECT " + ",\n       ".join(items or ["*"]) + f"\nFROM {src}" + _where(filters, pushed)
+        inner = "SELECT " + ",\n       ".join(items or ["*"]) + f"\nFROM {src}" + _where([], pushed)
+        outer = [_item(f"({translate_expression(calc[c])})", c) if c in calc else _q(c) for c in out_cols]
+        return _wrap(inner, node.node_id + "$in", outer, filters)
+
+    def aggregation_sql(self, node: CVNode, wanted: Set[str], local: Set[str]) -> str:
+        src = self.ref(node.inputs[0]) if node.inputs else "DUMMY"
+        filters = self.filters(node)
+        pushed = self.source_filters(node, node.inputs[0]) if node.inputs else []
+        measures = set(node.measures)
+        post = {c: f for c, f in node.calculated_measures.items() if c in local}
+        pre_calc = {c: f for c, f in node.calc_columns.items() if c in local}
+        # filter-only columns are applied before aggregation and must not become GROUP BY keys
+        agg_cols = [c for c in self.ordered(node, local_columns(node, wanted, include_filters=False))
+                    if c not in post]
+        group = [c for c in agg_cols if c not in measures]
+
+        def agg(c: str, expr: str) -> str:
+            fn = _AGG_SQL.get((node.aggregations.get(c) or "sum").lower(), "SUM")
+            return f"{fn}({expr}) AS {_q(c)}"
+
+        mapped_cols = [c for c in self.ordered(node, local) if c not in pre_calc and c not in post]
+        items, renamed = self._mapped_items(node, mapped_cols)
+        if pre_calc or (renamed and filters):
+            # pre-aggregation level for renames / calculated attributes; node filters
+            # use output names, so they apply on the derived table (still before GROUP BY)
+            pre_items = items + [_item(f"({translate_expression(f)})", c) for c, f in pre_calc.items()]
+            inner = "SELECT " + ",\n       ".join(pre_items) + f"\nFROM {src}" + _where([], pushed)
+            select = [agg(c, _q(c)) if c in measures else _q(c) for c in agg_cols]
+            group_by = [_q(c) for c in group]
+            sql = ("SELECT " + ",\n       ".join(select)
+                   + f"\nFROM (\n{_indent(inner)}\n) AS {_q(node.node_id + '$in')}"
+                   + _where(filters))
+        else:
+            by_target = {m.target: m for m in reversed(node.mappings)}
+            select, group_by = [], []
+            for c in agg_cols:
+                expr = _q(by_target[c].source) if c in by_target else _q(c)
+                select.append(agg(c, expr) if c in measures else _item(expr, c))
+                if c not in measures:
+                    group_by.append(expr)
+            sql = "SELECT " + ",\n       ".join(select) + f"\nFROM {src}" + _where(filters, pushed)
+        if group_by:
+            sql += "\nGROUP BY " + ", ".join(group_by)
+        if post:
+            outer = [_item(f"({translate_expression(post[c])})", c) if c in post else _q(c)
+                     for c in self.ordered(node, wanted)]
+            sql = _wrap(sql, node.node_id + "$agg", outer, [])
+        return sql
+
+    def join_sql(self, node: CVNode, wanted: Set[str], local: Set[str]) -> str:
+        join_kw = _JOIN_SQL.get((node.join_type or "inner").replace(" ", "").lower(), "INNER JOIN")
+        by_target: Dict[str, List[Mapping]] = {}
+        for m in node.mappings:
+            by_target.setdefault(m.target, []).append(m)
+        calc = {c: f for c, f in list(node.calc_columns.items()) + list(node.calculated_measures.items())
+                if c in local}
+        base_cols = [c for c in self.ordered(node, local) if c not in calc]
+        items = []
+        for c in base_cols:
+            m = by_target[c][0]
+            items.append(_item(f"{_q(input_of(node, m))}.{_q(m.source)}", c))
+
+        left = node.inputs[0]
+        from_sql = f"FROM {self.aliased(left)}"
+        for right in node.inputs[1:]:
+            cond = self.join_condition(node, left, right, by_target)
+            from_sql += f"\n{join_kw} {self.aliased(right)}\n  ON {cond}"
+        pushed = [p for inp in node.inputs for p in self.source_filters(node, inp, qualify=True)]
+        inner = "SELECT " + ",\n       ".join(items or ["*"]) + "\n" + from_sql + _where([], pushed)
+        filters = self.filters(node)
+        out_cols = self.ordered(node, wanted)
+        if not calc and not filters and set(base_cols) == set(out_cols):
+            return inner
+        outer = [_item(f"({translate_expression(calc[c])})", c) if c in calc else _q(c) for c in out_cols]
+        return _wrap(inner, node.node_id + "$in", outer, filters)
+
+    def join_condition(self, node: CVNode, left: str, right: str,
+                       by_target: Dict[str, List[Mapping]]) -> str:
+        if node.join_condition and right == node.inputs[1]:
+            return translate_expression(node.join_condition)
+        attrs = list(node.join_attributes) or [
+            t for t, ms in by_target.items()
+            if {input_of(node, m) for m in ms} >= {left, right}
+        ]
+        preds = []
+        for attr in attrs:
+            lm = next((m for m in by_target.get(attr, []) if input_of(node, m) == left), None)
+            rm = next((m for m in by_target.get(attr, []) if input_of(node, m) == right), None)
+            if lm and rm:
+                preds.append(f"{_q(left)}.{_q(lm.source)} = {_q(right)}.{_q(rm.source)}")
+        return " AND ".join(preds) if preds else "1 = 1 /* no join attributes found, review */"
+
+    def union_sql(self, node: CVNode, wanted: Set[str], local: Set[str]) -> str:
+        calc = {c: f for c, f in list(node.calc_columns.items()) + list(node.calculated_measures.items())
+                if c in local}
+        base_cols = [c for c in self.ordered(node, local) if c not in calc]
+        branches = []
+        for inp in node.inputs:
+            by_target = {m.target: m for m in reversed(node.mappings) if input_of(node, m) == inp}
+            items = [_item(_q(by_target[c].source), c) if c in by_target else f"NULL AS {_q(c)}"
+                     for c in base_cols]
+            branches.append("SELECT " + ",\n       ".join(items or ["*"]) + f"\nFROM {self.ref(inp)}"
+                            + _where([], self.source_filters(node, inp)))
+        inner = "\nUNION ALL\n".join(branches)
+        filters = self.filters(node)
+        out_cols = self.ordered(node, wanted)
+        if not calc and not filters and base_cols == out_cols:
+            return inner
+        outer = [_item(f"({translate_expression(calc[c])})", c) if c in calc else _q(c) for c in out_cols]
+        return _wrap(inner, node.node_id + "$in", outer, filters)
+
+    def compile(self) -> str:
+        root = root_node(self.model)
+        if not root:
+            return ""
+        ctes = []
+        for nid in topo_order(self.model):
+            if nid in self.need:
+                ctes.append(f"{_q(nid)} AS (\n{_indent(self.node_sql(self.model.nodes[nid]))}\n)")
+        root_node_obj = self.model.nodes[root]
+        final_cols = self.ordered(root_node_obj, self.need[root])
+        logical = [c for c in list(self.model.logical_attributes) + list(self.model.logical_measures)
+                   if c in self.need[root]]
+        final_cols = logical or final_cols
+        return (
+            "WITH " + ",\n".join(ctes)
+            + "\nSELECT " + ",\n       ".join(_q(c) for c in final_cols)
+            + f"\nFROM {_q(root)}"
+        )
+
+
+def compile_cv_to_sql(model: CVModel) -> str:
+    """Compile a parsed Calculation View into one SQL statement (nodes inlined as CTEs)."""
+    return _Compiler(model).compile()
+
+
+def cv_to_sql_view(model: CVModel) -> SQLViewModel:
+    """Wrap the compiled SQL as a SQLViewModel so the CSN exporters can emit it like any SQL view."""
+    comp = _Compiler(model)
+    sql = comp.compile()
+    root = root_node(model)
+    columns: List[str] = []
+    if root:
+        logical = [c for c in list(model.logical_attributes) + list(model.logical_measures)
+                   if c in comp.need[root]]
+        columns = [_q(c) for c in (logical or comp.ordered(model.nodes[root], comp.need[root]))]
+    inputs = sorted({
+        canonical_name(model.data_sources.get(ds) or ds)
+        for ds in comp.ds_need
+    })
+    return SQLViewModel(name=model.cv_id, sql=sql, columns=columns, inputs=inputs)
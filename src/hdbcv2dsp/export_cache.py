@@ -0,0 +1,149 @@
+# hdbcv2dsp/export_cache.py
+# ======================================================================
+# Incremental re-export
+#  - Every generated definition (view, table, replication flow, analytic
+#    model) gets a content hash over its source artifact, the template it
+#    was cloned from and the export options
+#  - The hash and the serialised JSON are kept in a cache directory:
+#      <cache_dir>/export_manifest.json   key -> hash
+#      <cache_dir>/objects/<hash>.json    serialised definition
+#  - On re-run unchanged definitions are read back instead of rebuilt;
+#    changed/new/removed keys feed the delta package
+# ======================================================================
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Callable, Dict, Iterable, List, Optional
+
+MANIFEST_FILE = "export_manifest.json"
+_MANIFEST_VERSION = 1
+
+
+def content_hash(*parts: object) -> str:
+    """sha256 over strings / bytes / JSON-able values (dict keys sorted)."""
+    h = hashlib.sha256()
+    for part in parts:
+        if part is None:
+            data = b"\x00"
+        elif isinstance(part, (bytes, bytearray)):
+            data = bytes(part)
+        elif isinstance(part, str):
+            data = part.encode("utf-8")
+        else:
+            data = json.dumps(part, sort_keys=True, default=str).encode("utf-8")
+        h.update(len(data).to_bytes(8, "big"))
+        h.update(data)
+    return h.hexdigest()
+
+
+def artifact_fingerprint(obj: object) -> str:
+    """Stable text for a parsed artifact: its source SQL if it has one, else the model repr."""
+    sql = getattr(obj, "sql", None)
+    if sql:
+        return f"{type(obj).__name__}:{getattr(obj, 'name', '')}:{sql}"
+    return repr(obj)  # dataclass repr: fields in declaration order
+
+
+class ExportCache:
+    """
+    Per-definition cache for build_csn_artifacts_zip. *salt* folds in
+    everything that affects every definition (templates, options).
+    With root=None nothing is persisted and every definition counts as changed.
+    """
+
+    def __init__(self, root: Optional[str], salt: str = ""):
+        self.root = root
+        self.salt = salt
+        self.previous: Dict[str, str] = {}
+        self.current: Dict[str, str] = {}
+        self.changed: List[str] = []
+        self.reused: List[str] = []
+        if root:
+            path = os.path.join(root, MANIFEST_FILE)
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == _MANIFEST_VERSION:
+                    self.previous = dict(data.get("definitions") or {})
+
+    @staticmethod
+    def entry(kind: str, key: str) -> str:
+        return f"{kind}:{key}"
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", f"{digest}.json")
+
+    def definition(self, kind: str, key: str, fingerprint: object, build: Callable[[], dict]) -> dict:
+        """The definition for *key*: cached JSON if its hash is unchanged, else build() (and store it)."""
+        entry = self.entry(kind, key)
+        digest = content_hash(self.salt, kind, key, fingerprint)
+        self.current[entry] = digest
+        if self.root and self.previous.get(entry) == digest:
+            try:
+                with open(self._object_path(digest), "r", encoding="utf-8") as f:
+                    obj = json.load(f)
+                self.reused.append(entry)
+                return obj
+            except (OSError, ValueError):
+                pass  # cache object missing or damaged: rebuild
+        obj = build()
+        if self.root:
+            os.makedirs(os.path.join(self.root, "objects"), exist_ok=True)
+            with open(self._object_path(digest), "w", encoding="utf-8") as f:
+                json.dump(obj, f)
+        if self.previous.get(entry) != digest:
+            self.changed.append(entry)
+        else:
+            self.reused.append(entry)  # same hash, only the cached file was lost
+        return obj
+
+    @property
+    def removed(self) -> List[str]:
+        return sorted(set(self.previous) - set(self.current))
+
+    def changed_keys(self, kinds: Optional[Iterable[str]] = None) -> set:
+        """Definition keys (without kind prefix) that changed, optionally for some kinds only."""
+        wanted = set(kinds) if kinds is not None else None
+        out = set()
+        for entry in self.changed:
+            kind, key = entry.split(":", 1)
+            if wanted is None or kind in wanted:
+                out.add(key)
+        return out
+
+    def summary(self) -> dict:
+        return {
+            "changed": sorted(self.changed),
+            "reused": len(self.reused),
+            "removed": self.removed,
+        }
+
+    def save(self) -> None:
+        """Write the manifest and drop cached objects no definition points to any more."""
+        if not self.root:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump({"version": _MANIFEST_VERSION, "definitions": self.current}, f, indent=2, sort_keys=True)
+        live = set(self.current.values())
+        obj_dir = os.path.join(self.root, "objects")
+        if os.path.isdir(obj_dir):
+            for name in os.listdir(obj_dir):
+                if name.endswith(".json") and name[:-5] not in live:
+                    os.remove(os.path.join(obj_dir, name))
+
+
+_DEFINITION_SECTIONS = ("definitions", "businessLayerDefinitions", "replicationflows")
+
+
+def delta_package(pkg: dict, changed: set) -> Optional[dict]:
+    """Copy of a CSN / analytic package restricted to *changed* definition keys (None if nothing changed)."""
+    out = {k: v for k, v in pkg.items() if k not in _DEFINITION_SECTIONS}
+    found = False
+    for section in _DEFINITION_SECTIONS:
+        if section in pkg:
+            out[section] = {k: v for k, v in (pkg[section] or {}).items() if k in changed}
+            found |= bool(out[section])
+    return out if found else None
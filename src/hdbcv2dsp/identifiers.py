@@ -0,0 +1,171 @@
+# hdbcv2dsp/identifiers.py
+# ======================================================================
+# Canonical object identifiers
+#  - One parser for every spelling a source name arrives in:
+#      "SCHEMA"."TABLE", [dbo].[T], `db`.`t`, schema.table,
+#      the SCHEMA"."TABLE remnant of a quote-stripped name,
+#      HDI ns.sub::OBJECT and CV resourceUris (SCHEMA.T, /pkg/calculationviews/CV)
+#  - canonical_name() drops the quoting and keeps the spelling;
+#    name_key() is the case-folded tuple every lookup hashes on
+#  - NameIndex maps any alias (other spelling, default schema, HDI
+#    synonym, unique bare name) to the one canonical object, so graph
+#    merges, project export and type/column inference agree on which
+#    names denote the same object
+# ======================================================================
+from __future__ import annotations
+
+import json
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+Key = Tuple[str, ...]
+
+# one part: "quoted" | [bracketed] | `backticked` | bare (up to the next '.')
+_PART_RE = re.compile(r'\s*(?:"((?:[^"]|"")*)"|\[([^\]]*)\]|`([^`]*)`|([^."\[\]`]+))\s*')
+# repository resourceUri (/pkg.sub/calculationviews/CV_X); /BIC/... object names stay whole
+_REPO_URI_RE = re.compile(
+    r'^/?[\w.\-]+/(?:calculationviews|analyticviews|attributeviews|views|tables|procedures|functions)/([^/]+)$',
+    re.IGNORECASE)
+
+
+def _parts(raw: str) -> Tuple[Tuple[str, bool], ...]:
+    """(text, quoted) per part of *raw*."""
+    text = (raw or "").strip()
+    if not text:
+        return ()
+    uri = _REPO_URI_RE.match(text)
+    if uri:
+        text = uri.group(1)
+    if '"."' in text:                                         # SCHEMA"."TABLE remnant
+        text = ('' if text.startswith('"') else '"') + text + ('' if text.endswith('"') else '"')
+
+    parts = []
+    pos, n = 0, len(text)
+    while pos < n:
+        m = _PART_RE.match(text, pos)
+        if not m or m.end() == pos:
+            break
+        dq, br, bt, bare = m.groups()
+        if bare is not None:
+            parts.append((bare.strip(), False))
+        else:
+            parts.append(((dq or "").replace('""', '"') if dq is not None else (br if br is not None else bt), True))
+        pos = m.end()
+        if pos < n and text[pos] == ".":
+            pos += 1
+        elif pos < n:
+            return ((text, False),)                          # not an identifier chain: keep as is
+
+    # HDI: the namespace dots belong to the object name (ns.sub::OBJ)
+    for i, (p, quoted) in enumerate(parts):
+        if not quoted and "::" in p:
+            j = i
+            while j > 0 and not parts[j - 1][1]:
+                j -= 1
+            parts[j:i + 1] = [(".".join(q for q, _ in parts[j:i + 1]), False)]
+            break
+    return tuple((p, q) for p, q in parts if p)
+
+
+@lru_cache(maxsize=8192)
+def identifier_parts(raw: str) -> Tuple[str, ...]:
+    """('SCHEMA', 'TABLE') for any supported spelling; ('ns.sub::OBJ',) for HDI names."""
+    return tuple(p for p, _ in _parts(raw))
+
+
+def name_key(name: Union[str, Key]) -> Key:
+    """Case-folded lookup key of a name (string in any spelling, or already split parts)."""
+    parts = identifier_parts(name) if isinstance(name, str) else name
+    return tuple(p.upper() for p in parts if p)
+
+
+def canonical_name(raw: str) -> str:
+    """SCHEMA.TABLE spelling of *raw* (quotes/brackets dropped, case kept)."""
+    parts = identifier_parts(raw)
+    if len(parts) > 1:
+        return ".".join(f'"{p}"' if "." in p else p for p in parts)
+    if not parts:
+        return (raw or "").strip()
+    (part, quoted), = _parts(raw)
+    return f'"{part}"' if quoted and "." in part else part   # "My.Table" stays one part
+
+
+def quoted_name(raw: str) -> str:
+    """"SCHEMA"."TABLE" SQL reference of *raw*."""
+    return ".".join('"' + p.replace('"', '""') + '"' for p in identifier_parts(raw))
+
+
+def load_hdbsynonym(text: Union[str, bytes]) -> Dict[str, str]:
+    """Synonym -> target map of an .hdbsynonym file ({"SYN": {"target": {"object", "schema"?}}})."""
+    out: Dict[str, str] = {}
+    for syn, spec in (json.loads(text or "{}") or {}).items():
+        target = (spec or {}).get("target") or {}
+        if target.get("object"):
+            schema = quoted_name(target["schema"]) + "." if target.get("schema") else ""
+            out[syn] = schema + quoted_name(target["object"])
+    return out
+
+
+class NameIndex:
+    """Hash index: any alias of an object -> its canonical name."""
+
+    def __init__(self, names: Iterable[str] = (), default_schema: Optional[str] = None,
+                 synonyms: Optional[Dict[str, str]] = None):
+        self.default_schema = default_schema.upper().strip('"') if default_schema else None
+        self._full: Dict[Key, str] = {}
+        self._last: Dict[str, Optional[str]] = {}       # bare name -> object (None if ambiguous)
+        self._claims: Dict[str, Key] = {}               # bare object -> qualified name resolved to it
+        self._synonyms: Dict[Key, Key] = {}
+        for syn, target in (synonyms or {}).items():
+            self._synonyms[self.key(syn)] = self.key(target)
+        for name in names:
+            self.add(name)
+
+    def key(self, name: Union[str, Key]) -> Key:
+        key = name_key(name)
+        if len(key) == 1 and self.default_schema:
+            return (self.default_schema,) + key
+        return key
+
+    def add(self, name: str, canonical: Optional[str] = None) -> str:
+        """Register *name* (as *canonical*, default: itself); returns the object it already denotes, if any."""
+        key = self.key(name)
+        if not key:
+            return name
+        found = self._full.get(key)
+        if found is not None:
+            return found
+        canonical = canonical or name
+        self._full[key] = canonical
+        prev = self._last.get(key[-1], canonical)
+        self._last[key[-1]] = canonical if prev == canonical else None
+        return canonical
+
+    def resolve(self, name: Union[str, Key]) -> Optional[str]:
+        """Canonical object *name* denotes, None if unknown (or an ambiguous bare name)."""
+        key = self.key(name)
+        seen = set()
+        while key and key in self._synonyms and key not in self._full and key not in seen:
+            seen.add(key)
+            key = self._synonyms[key]
+        if not key:
+            return None
+        found = self._full.get(key)
+        if found is not None or self.default_schema:
+            return found
+        if len(key) == 1:
+            return self._last.get(key[0])
+        # SCHEMA.T for an object known only as bare T; once a second schema
+        # claims the same bare name the qualified names stay apart
+        bare = self._full.get(key[-1:])
+        if bare is None or self._last.get(key[-1]) != bare:
+            return None
+        claim = self._claims.setdefault(key[-1], key)
+        return bare if claim == key else None
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, (str, tuple)) and self.resolve(name) is not None
+
+    def __len__(self) -> int:
+        return len(self._full)
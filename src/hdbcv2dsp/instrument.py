@@ -0,0 +1,205 @@
+# hdbcv2dsp/instrument.py
+# ======================================================================
+# Per-stage timing and counters
+#  - Off unless a collect() block is active: stage() / count() then cost
+#    one ContextVar lookup, so the hooks stay in the hot paths for good
+#  - collect() gives a request (Streamlit run, CLI call, benchmark) its
+#    own Metrics; ContextVar keeps concurrent sessions apart
+#  - Stages nest: "export" around "export.neutral_csn" ... are timed
+#    separately (wall time, calls, max); counters are free-form names
+#    (artifacts, bytes_read, regex_passes, graph_nodes, definitions ...)
+#  - Export: as_dict() / to_json(), to_prometheus() (text exposition
+#    format); the app renders the same dict as its diagnostics panel
+#  - profile="cprofile" | "pyinstrument" also captures a profile of the
+#    block (pyinstrument is an optional dependency)
+# ======================================================================
+from __future__ import annotations
+
+import io
+import json
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Callable, Dict, Iterator, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable)
+
+
+@dataclass
+class StageTiming:
+    calls: int = 0
+    total: float = 0.0            # seconds
+    max: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.calls += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+
+@dataclass
+class Metrics:
+    stages: Dict[str, StageTiming] = field(default_factory=dict)
+    counters: Dict[str, float] = field(default_factory=dict)
+    profile: Optional[str] = None         # cProfile / pyinstrument text report
+    profile_engine: Optional[str] = None
+
+    def count(self, name: str, n: float = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def as_dict(self) -> dict:
+        out = {
+            "stages": {k: {"calls": v.calls, "seconds": round(v.total, 6), "maxSeconds": round(v.max, 6)}
+                       for k, v in sorted(self.stages.items())},
+            "counters": dict(sorted(self.counters.items())),
+        }
+        if self.profile:
+            out["profile"] = {"engine": self.profile_engine, "report": self.profile}
+        return out
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.as_dict(), indent=indent)
+
+    def to_prometheus(self, prefix: str = "hdbcv2dsp") -> str:
+        """Prometheus text exposition format (stage label per timing, one counter per counter name)."""
+        lines = [
+            f"# HELP {prefix}_stage_seconds_total Wall time spent per pipeline stage.",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+        ]
+        lines += [f'{prefix}_stage_seconds_total{{stage="{_label(k)}"}} {v.total:.6f}' for k, v in sorted(self.stages.items())]
+        lines += [f"# HELP {prefix}_stage_calls_total Calls per pipeline stage.",
+                  f"# TYPE {prefix}_stage_calls_total counter"]
+        lines += [f'{prefix}_stage_calls_total{{stage="{_label(k)}"}} {v.calls}' for k, v in sorted(self.stages.items())]
+        for k, v in sorted(self.counters.items()):
+            metric = f"{prefix}_{_metric(k)}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {int(v) if float(v).is_integer() else v}"]
+        return "\n".join(lines) + "\n"
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _metric(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+_current: ContextVar[Optional[Metrics]] = ContextVar("hdbcv2dsp_metrics", default=None)
+
+
+def current() -> Optional[Metrics]:
+    """Metrics of the active collect() block, None when instrumentation is off."""
+    return _current.get()
+
+
+def count(name: str, n: float = 1) -> None:
+    m = _current.get()
+    if m is not None:
+        m.count(name, n)
+
+
+class _Stage:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics: Metrics, name: str):
+        self.metrics, self.name = metrics, name
+
+    def __enter__(self) -> "_Stage":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        timing = self.metrics.stages.get(self.name)
+        if timing is None:
+            timing = self.metrics.stages[self.name] = StageTiming()
+        timing.add(time.perf_counter() - self.start)
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoStage":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name: str, **counts: float):
+    """Time the with-block as *name*; keyword counts are added to the counters."""
+    m = _current.get()
+    if m is None:
+        return _NO_STAGE
+    for k, v in counts.items():
+        m.count(k, v)
+    return _Stage(m, name)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator form of stage()."""
+    def deco(fn: F) -> F:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            m = _current.get()
+            if m is None:
+                return fn(*args, **kwargs)
+            with _Stage(m, name):
+                return fn(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return deco
+
+
+@contextmanager
+def _profiled(metrics: Metrics, engine: str) -> Iterator[None]:
+    if engine == "pyinstrument":
+        try:
+            from pyinstrument import Profiler  # optional dependency
+        except ImportError as e:
+            raise ImportError("pyinstrument is required for profile='pyinstrument' (pip install pyinstrument)") from e
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            metrics.profile = profiler.output_text(unicode=True, color=False)
+            metrics.profile_engine = engine
+        return
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(40)
+        metrics.profile = out.getvalue()
+        metrics.profile_engine = "cprofile"
+
+
+@contextmanager
+def collect(profile: Optional[str] = None, metrics: Optional[Metrics] = None) -> Iterator[Metrics]:
+    """
+    Turn instrumentation on for the block and yield its Metrics (a fresh
+    one unless *metrics* is given, e.g. to add several runs up).
+    *profile* = "cprofile" | "pyinstrument" also captures a profile.
+    """
+    metrics = metrics if metrics is not None else Metrics()
+    token = _current.set(metrics)
+    try:
+        if profile:
+            with _profiled(metrics, profile):
+                yield metrics
+        else:
+            yield metrics
+    finally:
+        _current.reset(token)
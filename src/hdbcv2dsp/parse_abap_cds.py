@@ -1,9 +1,15 @@
 # hdbcv2dsp/parse_abap_cds.py
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 import re
 
+from .compact import compact_model
+from .instrument import count, timed
+from .sql_text import find_top_level, split_top_level
+
+@compact_model(intern=("name", "sql_view_name", "keys", "sources", "associations", "elements",
+                       "annotations", "element_annotations"))
 @dataclass
 class ABAPCDSModel:
     name: str
@@ -14,51 +20,254 @@ class ABAPCDSModel:
     keys: List[str] = field(default_factory=list)       # list of key <col> tokens in select list
     sources: List[str] = field(default_factory=list)    # FROM/JOIN base identifiers
     associations: List[str] = field(default_factory=list)  # association to <target>
+    elements: List[str] = field(default_factory=list)   # projection list output names (in order)
+    annotations: Dict[str, object] = field(default_factory=dict)  # entity-level, flattened 'A.b.c' -> typed value
+    element_annotations: Dict[str, Dict[str, object]] = field(default_factory=dict)  # element -> flattened annotations
+
+    def annotation(self, path: str, default: object = None) -> object:
+        return get_annotation(self.annotations, path, default)
+
+    def element_annotation(self, element: str, path: str, default: object = None) -> object:
+        return get_annotation(self.element_annotations.get(element) or {}, path, default)
 
 def _strip_comments(txt: str) -> str:
-    txt = re.sub(r"/\*.*?\*/", " ", txt, flags=re.S)  # /* ... */
+    count("regex_passes", 3)
+    txt = re.sub(r"/\*.*?(?:\*/|\Z)", " ", txt, flags=re.S)  # /* ... */ (unterminated: to the end)
     txt = re.sub(r"//.*?$", " ", txt, flags=re.M)     # // ...
     txt = re.sub(r"--.*?$", " ", txt, flags=re.M)     # -- ...
     return txt
 
+# -------------------------------
+# Annotation index
+# -------------------------------
+# Annotations are flattened to dotted paths with typed values:
+#   true/false -> bool, 'text' -> str, #ENUM -> {"#": "ENUM"} (CSN style),
+#   numbers -> int/float, [ ... ] -> list, bare '@A.b' -> True.
+# '@Analytics: { dataExtraction.enabled: true }' and
+# '@Analytics.dataExtraction.enabled: true' both end up under the same key.
+
+_ANN_START_RE = re.compile(r"@<?\s*([A-Za-z_]\w*(?:\s*\.\s*[A-Za-z_]\w*)*)")
+_ANN_KEY_RE = re.compile(r"\s*([A-Za-z_]\w*(?:\s*\.\s*[A-Za-z_]\w*)*)\s*")
+_ANN_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+_ANN_WORD_RE = re.compile(r"[A-Za-z_$][\w$.]*")
+_DEFINE_RE = re.compile(r"\bdefine\s+(?:root\s+)?view(?:\s+entity)?\s+([A-Za-z_]\w*)", re.I)
+
+def _skip_ws(t: str, i: int) -> int:
+    n = len(t)
+    while i < n and t[i].isspace():
+        i += 1
+    return i
+
+def _parse_ann_value(t: str, i: int) -> Tuple[object, int]:
+    i = _skip_ws(t, i)
+    if i >= len(t):
+        return True, i
+    ch = t[i]
+    if ch == "'":
+        buf, i = [], i + 1
+        while i < len(t):
+            if t[i] == "'":
+                if t[i + 1:i + 2] == "'":  # '' escape
+                    buf.append("'"); i += 2
+                    continue
+                return "".join(buf), i + 1
+            buf.append(t[i]); i += 1
+        return "".join(buf), i
+    if ch == "#":
+        m = _ANN_WORD_RE.match(t, i + 1)
+        if m:
+            return {"#": m.group(0)}, m.end()
+        return {"#": ""}, i + 1
+    if ch == "{":
+        obj: Dict[str, object] = {}
+        i += 1
+        while i < len(t):
+            i = _skip_ws(t, i)
+            if i < len(t) and t[i] == ",":
+                i += 1
+                continue
+            if i >= len(t) or t[i] == "}":
+                return obj, i + 1
+            km = _ANN_KEY_RE.match(t, i)
+            if not km or not km.group(1):
+                return obj, _skip_to_close(t, i)
+            key = re.sub(r"\s+", "", km.group(1))
+            i = km.end()
+            if i < len(t) and t[i] == ":":
+                val, i = _parse_ann_value(t, i + 1)
+            else:
+                val = True
+            _flatten_into(obj, key, val)
+        return obj, i
+    if ch == "[":
+        items: List[object] = []
+        i += 1
+        while i < len(t):
+            i = _skip_ws(t, i)
+            if i < len(t) and t[i] == ",":
+                i += 1
+                continue
+            if i >= len(t) or t[i] == "]":
+                return items, i + 1
+            val, j = _parse_ann_value(t, i)
+            if j <= i:
+                return items, _skip_to_close(t, i)
+            items.append(val)
+            i = j
+        return items, i
+    m = _ANN_NUMBER_RE.match(t, i)
+    if m:
+        num = m.group(0)
+        return (float(num) if "." in num else int(num)), m.end()
+    m = _ANN_WORD_RE.match(t, i)
+    if m:
+        word = m.group(0)
+        low = word.lower()
+        if low == "true":
+            return True, m.end()
+        if low == "false":
+            return False, m.end()
+        if low == "null":
+            return None, m.end()
+        return word, m.end()
+    return True, i
+
+def _skip_to_close(t: str, i: int) -> int:
+    """Recovery for malformed annotation values: jump past the close bracket of the enclosing value."""
+    return min(find_top_level(t, i, "") + 1, len(t))
+
+def _flatten_into(out: Dict[str, object], prefix: str, value: object) -> None:
+    if isinstance(value, dict) and "#" not in value:
+        if not value:
+            out[prefix] = True
+        for k, v in value.items():
+            out[f"{prefix}.{k}"] = v
+    else:
+        out[prefix] = value
+
+def _parse_annotations(t: str, i: int) -> Tuple[Dict[str, object], int]:
+    """Parse consecutive '@...' annotations starting at t[i]; returns (flattened, end)."""
+    anns: Dict[str, object] = {}
+    while True:
+        i = _skip_ws(t, i)
+        m = _ANN_START_RE.match(t, i)
+        if not m:
+            return anns, i
+        key = re.sub(r"\s+", "", m.group(1))
+        i = _skip_ws(t, m.end())
+        if i < len(t) and t[i] == ":":
+            val, i = _parse_ann_value(t, i + 1)
+        else:
+            val = True
+        _flatten_into(anns, key, val)
+
+def get_annotation(annotations: Dict[str, object], path: str, default: object = None) -> object:
+    """Look up a flattened annotation ('Analytics.dataCategory'); CDS names are case-insensitive."""
+    path = path.lstrip("@")
+    if path in annotations:
+        return annotations[path]
+    low = path.lower()
+    for k, v in annotations.items():
+        if k.lower() == low:
+            return v
+    return default
+
+def annotation_tree(annotations: Dict[str, object], prefix: str = "") -> Dict[str, object]:
+    """Rebuild the nested tree for all annotations under *prefix* (e.g. 'Semantics')."""
+    prefix = prefix.lstrip("@")
+    low = prefix.lower() + "." if prefix else ""
+    tree: Dict[str, object] = {}
+    for k, v in annotations.items():
+        if low and not k.lower().startswith(low):
+            continue
+        node = tree
+        parts = k[len(low):].split(".")
+        for part in parts[:-1]:
+            nxt = node.get(part)
+            if not isinstance(nxt, dict) or "#" in nxt:
+                nxt = node[part] = {}
+            node = nxt
+        node[parts[-1]] = v
+    return tree
+
+def _element_name(expr: str) -> Optional[str]:
+    e = re.sub(r"^\s*key\s+", "", expr, flags=re.I).strip()
+    m = re.search(r"\bas\s+([A-Za-z_]\w*)\s*$", e, flags=re.I)
+    if m:
+        return m.group(1)
+    m = re.search(r"([A-Za-z_$]\w*)\s*$", e)
+    return m.group(1) if m else None
+
+def _parse_element_list(t: str, start: int) -> Tuple[List[str], Dict[str, Dict[str, object]]]:
+    """Walk the '{ ... }' element list starting after its '{'; returns (names, per-element annotations)."""
+    names: List[str] = []
+    out: Dict[str, Dict[str, object]] = {}
+    i, n = start, len(t)
+    while i < n:
+        anns, i = _parse_annotations(t, i)
+        # read the element expression up to a top-level ',' or the closing '}'
+        j = find_top_level(t, i, ",")
+        name = _element_name(t[i:j])
+        if name:
+            names.append(name)
+            if anns:
+                out[name] = anns
+        if j >= n or t[j] == "}":
+            break
+        i = j + 1
+    return names, out
+
+@timed("parse.abap_cds")
 def parse_abap_cds_text(text: str) -> ABAPCDSModel:
+    count("artifacts")
     t = _strip_comments(text or "")
 
     # 1) Name from DEFINE VIEW / DEFINE VIEW ENTITY
-    m = re.search(r"\bdefine\s+view(?:\s+entity)?\s+([A-Za-z_]\w*)", t, flags=re.I)
-    name = m.group(1) if m else "UNKNOWN_CDS"
+    count("regex_passes")
+    define_m = _DEFINE_RE.search(t)
+    name = define_m.group(1) if define_m else "UNKNOWN_CDS"
+
+    # 1b) Annotation index: entity-level (header before DEFINE) and per element
+    header_end = define_m.start() if define_m else len(t)
+    annotations: Dict[str, object] = {}
+    pos = t.find("@", 0, header_end)
+    while pos != -1:
+        found, end = _parse_annotations(t, pos)
+        annotations.update(found)
+        pos = t.find("@", max(end, pos + 1), header_end)
+    elements: List[str] = []
+    element_annotations: Dict[str, Dict[str, object]] = {}
+    if define_m:
+        brace = t.find("{", define_m.end())
+        if brace != -1:
+            elements, element_annotations = _parse_element_list(t, brace + 1)
 
     # 2) Classic SQL view (DEFINE VIEW with @AbapCatalog.sqlViewName)
+    count("regex_passes")
     m = re.search(r"@AbapCatalog\.sqlViewName\s*:\s*'([^']+)'", t, flags=re.I)
     sql_view = m.group(1) if m else None
 
-    # 3) Extraction + CDC annotations
-    extraction_enabled = bool(re.search(r"@Analytics\.dataExtraction\.enabled\s*:\s*true", t, flags=re.I))
-    cdc_m = re.search(r"@Analytics\.dataExtraction\.delta\.changeDataCapture\.[^\s\}]+", t, flags=re.I)
-    cdc_ann = cdc_m.group(0) if cdc_m else None
+    # 3) Extraction + CDC annotations (read from the index so bracketed forms count too)
+    extraction_enabled = get_annotation(annotations, "Analytics.dataExtraction.enabled") is True
+    cdc_ann = next(
+        (f"@{k}" for k in annotations
+         if k.lower().startswith("analytics.dataextraction.delta.changedatacapture.")),
+        None,
+    )
 
     # 4) Parameters
+    count("regex_passes")
     pm = re.search(r"\bdefine\s+view(?:\s+entity)?\s+[A-Za-z_]\w*\s*\((.*?)\)\s+as\s+select", t, flags=re.I | re.S)
     params: List[str] = []
     if pm:
-        raw = pm.group(1)
-        parts, buf, depth = [], [], 0
-        for ch in raw:
-            if ch == '(':
-                depth += 1
-            elif ch == ')':
-                depth = max(0, depth - 1)
-            if ch == ',' and depth == 0:
-                parts.append(''.join(buf).strip()); buf = []
-            else:
-                buf.append(ch)
-        if buf: parts.append(''.join(buf).strip())
-        params = [p for p in parts if p]
+        params = split_top_level(pm.group(1))
 
     # 5) Keys in select list
+    count("regex_passes")
     keys = re.findall(r"\bkey\s+([A-Za-z_][\w\.]*)", t, flags=re.I)
 
     # 6) Sources (FROM / JOIN)
+    count("regex_passes", 2)
     sources: List[str] = []
     for m in re.finditer(r"\bfrom\s+([A-Za-z_][\w\.]*)", t, flags=re.I):
         sources.append(m.group(1))
@@ -67,6 +276,7 @@ def parse_abap_cds_text(text: str) -> ABAPCDSModel:
     sources = sorted(set(sources))
 
     # 7) Associations
+    count("regex_passes")
     associations = [m.group(1) for m in re.finditer(r"\bassociation\s+to\s+([A-Za-z_][\w\.]*)", t, flags=re.I)]
 
     return ABAPCDSModel(
@@ -78,4 +288,7 @@ def parse_abap_cds_text(text: str) -> ABAPCDSModel:
         keys=sorted(set(keys)),
         sources=sources,
         associations=sorted(set(associations)),
+        elements=elements,
+        annotations=annotations,
+        element_annotations=element_annotations,
     )
\ No newline at end of file
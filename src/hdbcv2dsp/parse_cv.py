@@ -1,18 +1,27 @@
 from __future__ import annotations
+import os
 import xml.etree.ElementTree as ET
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 
+from .compact import compact_model, intern_model
+from .instrument import count, timed
+from .source_io import SourceLike, is_path
+
 NS = {
     "Calculation": "http://www.sap.com/ndb/BiModelCalculation.ecore",
     "xsi": "http://www.w3.org/2001/XMLSchema-instance",
 }
 
+@compact_model(intern=("source", "target", "input"))
 @dataclass
 class Mapping:
     source: str
     target: str
+    input: Optional[str] = None  # node or DS id the source column comes from
 
+@compact_model(intern=("node_id", "node_type", "attributes", "measures", "join_type",
+                       "join_attributes", "aggregations", "inputs", "mappings"))
 @dataclass
 class CVNode:
     node_id: str
@@ -24,9 +33,13 @@ class CVNode:
     filters: List[str] = field(default_factory=list)
     join_type: Optional[str] = None
     join_condition: Optional[str] = None
+    join_attributes: List[str] = field(default_factory=list)
+    aggregations: Dict[str, str] = field(default_factory=dict)  # measure id -> aggregationType
     inputs: List[str] = field(default_factory=list)  # node or DS ids (no leading '#')
     mappings: List[Mapping] = field(default_factory=list)
 
+@compact_model(intern=("cv_id", "output_view_type", "data_category", "data_sources",
+                       "nodes", "logical_attributes", "logical_measures", "logical_model_node"))
 @dataclass
 class CVModel:
     cv_id: str
@@ -38,10 +51,17 @@ class CVModel:
     nodes: Dict[str, CVNode] = field(default_factory=dict)
     logical_attributes: List[str] = field(default_factory=list)
     logical_measures: List[str] = field(default_factory=list)
-
-def parse_hdbcalculationview(xml_path: str) -> CVModel:
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
+    logical_model_node: Optional[str] = None  # node feeding the logicalModel (its 'id')
+
+@timed("parse.cv")
+def parse_hdbcalculationview(source: SourceLike) -> CVModel:
+    """Parse a CV from a file path or raw bytes (the XML declaration decides the encoding)."""
+    if is_path(source):
+        count("bytes_read", os.path.getsize(source))
+        root = ET.parse(source).getroot()
+    else:
+        count("bytes_read", len(source))
+        root = ET.fromstring(bytes(source))
     cv_id = root.attrib.get("id", "UNKNOWN")
     description = root.attrib.get("description", "")
     output_view_type = root.attrib.get("outputViewType", "")
@@ -84,6 +104,8 @@ def parse_hdbcalculationview(xml_path: str) -> CVModel:
             if meas_parent is not None:
                 for m in meas_parent.findall("measure"):
                     node.measures.append(m.attrib.get("id"))
+                    if m.attrib.get("aggregationType"):
+                        node.aggregations[m.attrib.get("id")] = m.attrib["aggregationType"]
 
             calc_meas = cv.find("calculatedMeasures")
             if calc_meas is not None:
@@ -92,6 +114,14 @@ def parse_hdbcalculationview(xml_path: str) -> CVModel:
                     formula_el = cm.find("formula")
                     node.calculated_measures[cm_id] = (formula_el.text.strip() if formula_el is not None else "")
 
+            calc_attrs = cv.find("calculatedViewAttributes")
+            if calc_attrs is not None:
+                for ca in calc_attrs.findall("calculatedViewAttribute"):
+                    formula_el = ca.find("formula")
+                    node.calc_columns[ca.attrib.get("id")] = (
+                        formula_el.text.strip() if formula_el is not None and formula_el.text else ""
+                    )
+
             filters_el = cv.find("filters")
             if filters_el is not None:
                 for flt in filters_el.findall("filter"):
@@ -101,6 +131,12 @@ def parse_hdbcalculationview(xml_path: str) -> CVModel:
             jt = cv.find("joinType")
             if jt is not None and jt.text:
                 node.join_type = jt.text.strip()
+            elif cv.attrib.get("joinType"):
+                node.join_type = cv.attrib["joinType"]
+
+            for ja in cv.findall("joinAttribute"):
+                if ja.attrib.get("name"):
+                    node.join_attributes.append(ja.attrib["name"])
 
             for inp in cv.findall("input"):
                 left = inp.attrib.get("left")
@@ -119,17 +155,20 @@ def parse_hdbcalculationview(xml_path: str) -> CVModel:
                     if expr is not None and expr.text:
                         node.join_condition = expr.text.strip()
 
+                input_id = (node_ref or left or right or "").replace("#", "") or None
                 for mp in inp.findall("mapping"):
                     src = mp.attrib.get("source")
                     tgt = mp.attrib.get("target")
                     if src and tgt:
-                        node.mappings.append(Mapping(src, tgt))
+                        node.mappings.append(Mapping(src, tgt, input_id))
 
             model.nodes[node.node_id] = node
 
     # logical model
     logical = root.find("logicalModel")
     if logical is not None:
+        if logical.attrib.get("id") in model.nodes:
+            model.logical_model_node = logical.attrib["id"]
         attrs = logical.find("attributes")
         if attrs is not None:
             for a in attrs.findall("attribute"):
@@ -143,7 +182,9 @@ def parse_hdbcalculationview(xml_path: str) -> CVModel:
                 if mid:
                     model.logical_measures.append(mid)
 
-    return model
+    count("artifacts")
+    count("cv_nodes", len(model.nodes))
+    return intern_model(model)
 
 def topo_order(model: CVModel) -> list[str]:
     from collections import defaultdict, deque
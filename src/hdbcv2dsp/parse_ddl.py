@@ -0,0 +1,307 @@
+# hdbcv2dsp/parse_ddl.py
+# ======================================================================
+# Table schema ingestion from DDL dumps
+#  - HANA / T-SQL / ANSI  CREATE [COLUMN|ROW|TEMPORARY] TABLE ... ( ... )
+#  - HDI .hdbtable        COLUMN TABLE "name" ( ... )   (no CREATE)
+#  - XS classic .hdbtable table.columns = [{name = ...; sqlType = ...;}];
+#  - .hdbcds              entity Name { key ID : Integer; ... };
+# Every table in a file is picked up in one pass; exact length, precision
+# and scale are kept, keys (inline, table-level, CONSTRAINT ... PRIMARY
+# KEY, pkcolumns, CDS 'key') and NOT NULL are carried over.
+# Output: {table: {"columns": [{"name", "type", ...}], "schema"?}} — the
+# table_schemas format _make_neutral_csn expects.
+# ======================================================================
+from __future__ import annotations
+
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from .instrument import timed
+from .source_io import SourceLike, is_path, read_text
+from .sql_text import matching_close, split_top_level
+
+# strings are kept, comments blanked (same length, so offsets stay valid)
+_COMMENT_OR_STRING_RE = re.compile(
+    r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|(--[^\n]*|//[^\n]*|/\*.*?\*/)", re.DOTALL)
+
+_IDENT = r'(?:"[^"]+"|\[[^\]]+\]|`[^`]+`|[A-Za-z_#@$][\w#@$]*)'
+_QUALIFIED = rf'{_IDENT}(?:\s*\.\s*{_IDENT})*'
+
+_SQL_TABLE_RE = re.compile(
+    rf'(?:\bCREATE\s+(?:OR\s+REPLACE\s+)?(?:(?:GLOBAL|LOCAL)\s+)?(?:TEMPORARY\s+)?(?:COLUMN\s+|ROW\s+)?TABLE'
+    rf'|(?:^|;)\s*(?:COLUMN|ROW)\s+TABLE)'
+    rf'\s+(?:IF\s+NOT\s+EXISTS\s+)?(?P<name>{_QUALIFIED})\s*\(',
+    re.IGNORECASE | re.MULTILINE,
+)
+_CDS_ENTITY_RE = re.compile(rf'\bentity\s+(?P<name>{_QUALIFIED})\s*(?::\s*[\w.:]+\s*)?\{{')
+_HDBTABLE_COLUMNS_RE = re.compile(r'\btable\.columns\s*=\s*\[', re.IGNORECASE)
+_HDBTABLE_PK_RE = re.compile(r'\btable\.primaryKey\.pkcolumns\s*=\s*\[([^\]]*)\]', re.IGNORECASE)
+_HDBTABLE_SCHEMA_RE = re.compile(r'\btable\.schemaName\s*=\s*"([^"]+)"', re.IGNORECASE)
+_HDBTABLE_PROP_RE = re.compile(r'(\w+)\s*=\s*("(?:[^"]|"")*"|[^;}\s]+)\s*;?')
+
+# column: <name> <type>[(<args>)] <constraints...>
+_COLUMN_RE = re.compile(
+    rf'^\s*(?P<name>{_IDENT})\s+(?P<type>\[?[A-Za-z_][\w.]*\]?(?:\s+(?:PRECISION|VARYING))?)'
+    r'\s*(?:\((?P<args>[^)]*)\))?(?P<rest>.*)$',
+    re.IGNORECASE | re.DOTALL,
+)
+_CDS_ELEMENT_RE = re.compile(
+    rf'^\s*(?P<key>key\s+)?(?P<name>{_IDENT})\s*:\s*(?P<type>[\w.:]+)'
+    r'\s*(?:\((?P<args>[^)]*)\))?(?P<rest>.*)$',
+    re.IGNORECASE | re.DOTALL,
+)
+_TABLE_CONSTRAINT_RE = re.compile(r'^\s*(?:CONSTRAINT\s+\S+\s+)?(PRIMARY\s+KEY|FOREIGN\s+KEY|UNIQUE|CHECK|INDEX|KEY)\b',
+                                  re.IGNORECASE)
+_PK_COLUMNS_RE = re.compile(r'PRIMARY\s+KEY\s*(?:CLUSTERED|NONCLUSTERED|INVERTED\s+\w+)?\s*\(([^)]*)\)', re.IGNORECASE)
+_NOT_NULL_RE = re.compile(r'\bNOT\s+NULL\b', re.IGNORECASE)
+_INLINE_PK_RE = re.compile(r'\bPRIMARY\s+KEY\b', re.IGNORECASE)
+
+# ----------------------------------------------------------------------
+# Types
+# ----------------------------------------------------------------------
+_FALLBACK = {"type": "cds.String", "length": 500}
+
+_FIXED_TYPES = {
+    # integers
+    "TINYINT": {"type": "cds.hana.TINYINT"}, "SMALLINT": {"type": "cds.hana.SMALLINT"},
+    "INT": {"type": "cds.Integer"}, "INTEGER": {"type": "cds.Integer"}, "MEDIUMINT": {"type": "cds.Integer"},
+    "BIGINT": {"type": "cds.Integer64"},
+    # approximate numerics
+    "REAL": {"type": "cds.hana.REAL"}, "DOUBLE": {"type": "cds.Double"},
+    "DOUBLE PRECISION": {"type": "cds.Double"}, "FLOAT": {"type": "cds.Double"},
+    "SMALLDECIMAL": {"type": "cds.hana.SMALLDECIMAL"},
+    "MONEY": {"type": "cds.Decimal", "precision": 19, "scale": 4},
+    "SMALLMONEY": {"type": "cds.Decimal", "precision": 10, "scale": 4},
+    # boolean / ids
+    "BOOLEAN": {"type": "cds.Boolean"}, "BIT": {"type": "cds.Boolean"},
+    "UNIQUEIDENTIFIER": {"type": "cds.UUID"}, "UUID": {"type": "cds.UUID"},
+    # dates
+    "DATE": {"type": "cds.Date"}, "DAYDATE": {"type": "cds.Date"},
+    "TIME": {"type": "cds.Time"}, "SECONDTIME": {"type": "cds.Time"},
+    "SECONDDATE": {"type": "cds.DateTime"}, "SMALLDATETIME": {"type": "cds.DateTime"},
+    "TIMESTAMP": {"type": "cds.Timestamp"}, "LONGDATE": {"type": "cds.Timestamp"},
+    "DATETIME": {"type": "cds.Timestamp"}, "DATETIME2": {"type": "cds.Timestamp"},
+    "DATETIMEOFFSET": {"type": "cds.Timestamp"},
+    # large objects
+    "CLOB": {"type": "cds.LargeString"}, "NCLOB": {"type": "cds.LargeString"},
+    "TEXT": {"type": "cds.LargeString"}, "NTEXT": {"type": "cds.LargeString"},
+    "BLOB": {"type": "cds.LargeBinary"}, "IMAGE": {"type": "cds.LargeBinary"},
+    "ST_GEOMETRY": {"type": "cds.hana.ST_GEOMETRY"}, "ST_POINT": {"type": "cds.hana.ST_POINT"},
+}
+_STRING_TYPES = {"VARCHAR", "NVARCHAR", "CHAR", "NCHAR", "ALPHANUM", "SHORTTEXT", "CHARACTER",
+                 "CHARACTER VARYING", "VARCHAR2", "NVARCHAR2", "STRING"}
+_BINARY_TYPES = {"VARBINARY", "BINARY"}
+_DECIMAL_TYPES = {"DECIMAL", "DEC", "NUMERIC", "NUMBER"}
+
+# hdbcds (CDS) built-in types
+_CDS_TYPES = {
+    "STRING": "cds.String", "LARGESTRING": "cds.LargeString", "BINARY": "cds.Binary",
+    "LARGEBINARY": "cds.LargeBinary", "INTEGER": "cds.Integer", "INTEGER64": "cds.Integer64",
+    "DECIMAL": "cds.Decimal", "DECIMALFLOAT": "cds.DecimalFloat", "BINARYFLOAT": "cds.Double",
+    "DOUBLE": "cds.Double", "LOCALDATE": "cds.Date", "LOCALTIME": "cds.Time",
+    "UTCDATETIME": "cds.DateTime", "UTCTIMESTAMP": "cds.Timestamp", "BOOLEAN": "cds.Boolean",
+    "DATE": "cds.Date", "TIME": "cds.Time", "DATETIME": "cds.DateTime", "TIMESTAMP": "cds.Timestamp",
+    "UUID": "cds.UUID",
+}
+
+
+def _int_args(args: Optional[str]) -> List[Optional[int]]:
+    out: List[Optional[int]] = []
+    for a in (args or "").split(","):
+        a = a.strip()
+        out.append(int(a) if a.isdigit() else None)
+    return out
+
+
+def sql_type_to_cds(type_name: str, args: Optional[str] = None) -> Dict[str, object]:
+    """CDS element type for a SQL column type, keeping length / precision / scale exactly."""
+    t = re.sub(r'\s+', ' ', type_name.strip().strip("[]").upper())
+    if args is None:
+        m = re.match(r'^([A-Z_][\w ]*?)\s*\(([^)]*)\)\s*$', t)
+        if m:
+            t, args = m.group(1).strip(), m.group(2)
+    nums = _int_args(args)
+    if t in _DECIMAL_TYPES:
+        if not args:
+            # HANA: DECIMAL without precision is a floating decimal
+            return {"type": "cds.DecimalFloat"}
+        precision = nums[0] or 38
+        scale = nums[1] if len(nums) > 1 and nums[1] is not None else 0
+        return {"type": "cds.Decimal", "precision": precision, "scale": scale}
+    if t in _STRING_TYPES:
+        if args and args.strip().upper() == "MAX":
+            return {"type": "cds.LargeString"}
+        return {"type": "cds.String", "length": nums[0] or (1 if t in ("CHAR", "NCHAR", "CHARACTER") else 5000)}
+    if t in _BINARY_TYPES:
+        if args and args.strip().upper() == "MAX":
+            return {"type": "cds.LargeBinary"}
+        return {"type": "cds.Binary", "length": nums[0] or 1}
+    if t in ("FLOAT",) and nums and nums[0] is not None and nums[0] <= 24:
+        return {"type": "cds.hana.REAL"}
+    if t in _FIXED_TYPES:
+        return dict(_FIXED_TYPES[t])
+    return dict(_FALLBACK)
+
+
+def cds_type_to_element(type_name: str, args: Optional[str] = None) -> Dict[str, object]:
+    """Element for an hdbcds type (String(40), Decimal(15, 2), hana.TINYINT, ...)."""
+    raw = type_name.strip()
+    upper = raw.upper()
+    if upper.startswith("HANA."):
+        return {"type": "cds.hana." + raw[5:].upper()}
+    if upper.startswith("CDS."):
+        upper = upper[4:]
+    base = _CDS_TYPES.get(upper)
+    if base is None:
+        return sql_type_to_cds(raw, args)
+    elem: Dict[str, object] = {"type": base}
+    nums = _int_args(args)
+    if base in ("cds.String", "cds.Binary") and nums and nums[0]:
+        elem["length"] = nums[0]
+    elif base == "cds.Decimal" and nums and nums[0]:
+        elem["precision"] = nums[0]
+        elem["scale"] = nums[1] if len(nums) > 1 and nums[1] is not None else 0
+    return elem
+
+
+# ----------------------------------------------------------------------
+# Scanning helpers
+# ----------------------------------------------------------------------
+
+def _blank_comments(text: str) -> str:
+    return _COMMENT_OR_STRING_RE.sub(lambda m: " " * len(m.group(0)) if m.group(1) else m.group(0), text)
+
+
+def _unquote(ident: str) -> str:
+    ident = ident.strip()
+    if len(ident) >= 2 and ident[0] + ident[-1] in ('""', "[]", "``"):
+        return ident[1:-1]
+    return ident
+
+
+def _split_qualified(name: str) -> Tuple[Optional[str], str]:
+    parts = [_unquote(p) for p in re.findall(_IDENT, name)]
+    if not parts:
+        return None, name.strip()
+    return (".".join(parts[:-1]) or None), parts[-1]
+
+
+# ----------------------------------------------------------------------
+# Dialects
+# ----------------------------------------------------------------------
+
+def _sql_columns(block: str) -> List[dict]:
+    columns: List[dict] = []
+    keys: List[str] = []
+    for part in split_top_level(block):
+        if _TABLE_CONSTRAINT_RE.match(part):
+            m = _PK_COLUMNS_RE.search(part)
+            if m:
+                keys += [_unquote(re.sub(r'\s+(ASC|DESC)\s*$', '', k.strip(), flags=re.I))
+                         for k in m.group(1).split(",")]
+            continue
+        m = _COLUMN_RE.match(part)
+        if not m:
+            continue
+        col = {"name": _unquote(m.group("name")), **sql_type_to_cds(m.group("type"), m.group("args"))}
+        rest = m.group("rest") or ""
+        if _INLINE_PK_RE.search(rest):
+            col["key"] = True
+        if _NOT_NULL_RE.search(rest) or col.get("key"):
+            col["notNull"] = True
+        columns.append(col)
+    for c in columns:
+        if c["name"] in keys:
+            c["key"] = True
+            c["notNull"] = True
+    return columns
+
+
+def _cds_columns(block: str) -> List[dict]:
+    columns: List[dict] = []
+    for part in split_top_level(block, ";"):
+        m = _CDS_ELEMENT_RE.match(part)
+        if not m or m.group("type").lower().startswith(("association", "composition")):
+            continue
+        col = {"name": _unquote(m.group("name")), **cds_type_to_element(m.group("type"), m.group("args"))}
+        if m.group("key"):
+            col["key"] = True
+        if m.group("key") or _NOT_NULL_RE.search(m.group("rest") or ""):
+            col["notNull"] = True
+        columns.append(col)
+    return columns
+
+
+def _hdbtable_columns(block: str, pk: List[str]) -> List[dict]:
+    columns: List[dict] = []
+    for entry in split_top_level(block):
+        if not entry.startswith("{"):
+            continue
+        props = {k.lower(): _unquote(v) for k, v in _HDBTABLE_PROP_RE.findall(entry.strip("{}"))}
+        if "name" not in props:
+            continue
+        args = ",".join(props[k] for k in ("length", "precision", "scale") if k in props) or None
+        if "precision" in props and "scale" not in props:
+            args = f"{props['precision']},0"
+        col = {"name": props["name"], **sql_type_to_cds(props.get("sqltype", ""), args)}
+        if props["name"] in pk:
+            col["key"] = True
+        if col.get("key") or props.get("nullable", "").lower() == "false":
+            col["notNull"] = True
+        columns.append(col)
+    return columns
+
+
+@timed("parse.ddl")
+def parse_ddl_text(text: str, default_name: Optional[str] = None) -> Dict[str, dict]:
+    """All tables defined in *text*; *default_name* names an XS classic .hdbtable (which has none)."""
+    clean = _blank_comments(text)
+    tables: Dict[str, dict] = {}
+
+    def add(qualified: str, columns: List[dict]) -> None:
+        if not columns:
+            return
+        schema, name = _split_qualified(qualified)
+        spec: Dict[str, object] = {"columns": columns}
+        if schema:
+            spec["schema"] = schema
+        tables[name] = spec
+
+    pos = 0
+    while True:
+        m = _SQL_TABLE_RE.search(clean, pos)
+        if not m:
+            break
+        open_pos = m.end() - 1
+        close = matching_close(clean, open_pos)
+        if close == -1:
+            break
+        block = clean[open_pos + 1:close]
+        if not re.match(r'\s*SELECT\b', block, re.IGNORECASE):  # CREATE TABLE ... AS (SELECT ...)
+            add(m.group("name"), _sql_columns(block))
+        pos = close + 1
+
+    for m in _CDS_ENTITY_RE.finditer(clean):
+        close = matching_close(clean, m.end() - 1)
+        if close != -1:
+            add(m.group("name"), _cds_columns(clean[m.end():close]))
+
+    m = _HDBTABLE_COLUMNS_RE.search(clean)
+    if m:
+        close = matching_close(clean, m.end() - 1)
+        pk_m = _HDBTABLE_PK_RE.search(clean)
+        pk = [_unquote(k) for k in split_top_level(pk_m.group(1))] if pk_m else []
+        schema_m = _HDBTABLE_SCHEMA_RE.search(clean)
+        name = default_name or "TABLE"
+        if close != -1:
+            add(f'"{schema_m.group(1)}"."{name}"' if schema_m else f'"{name}"',
+                _hdbtable_columns(clean[m.end():close], pk))
+    return tables
+
+
+def parse_ddl(source: SourceLike, default_name: Optional[str] = None) -> Dict[str, dict]:
+    """parse_ddl_text() for a path / bytes source; a path also supplies the default table name."""
+    if default_name is None and is_path(source):
+        default_name = os.path.splitext(os.path.basename(os.fspath(source)))[0]
+    return parse_ddl_text(read_text(source), default_name)
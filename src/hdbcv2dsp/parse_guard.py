@@ -0,0 +1,108 @@
+# hdbcv2dsp/parse_guard.py
+# ======================================================================
+# Per-artifact time budgets for the regex parsers
+#  - time_budget(seconds): the with-block raises ParseBudgetExceeded once
+#    its wall time is up. On the main thread (Unix) an ITIMER_REAL alarm
+#    interrupts the regex engine mid-match, so even a backtracking
+#    search is cut short; elsewhere (Streamlit script threads, worker
+#    pools, Windows) there are no signals and the deadline is only seen
+#    at checkpoint() calls between regex passes
+#  - guarded(primary, fallback, text): run the regex extraction of one
+#    artifact under the budget and hand the text to the linear scanner
+#    when it runs out (parse_timeouts / parse_fallbacks counters); the
+#    fallback is token based (sql_tokens, sql_text) and never budgeted
+#  - Without an interrupting timer, texts over LINEAR_ONLY_CHARS go
+#    straight to the fallback: nothing could stop a quadratic pattern
+#  - PARSE_BUDGET_SECONDS (env HDBCV2DSP_PARSE_BUDGET) is the default
+#    budget per artifact; 0 turns the guard off
+# ======================================================================
+from __future__ import annotations
+
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional, TypeVar
+
+from .instrument import count
+
+T = TypeVar("T")
+
+PARSE_BUDGET_SECONDS = float(os.environ.get("HDBCV2DSP_PARSE_BUDGET", "") or 2.0)
+LINEAR_ONLY_CHARS = 64_000
+
+
+class ParseBudgetExceeded(TimeoutError):
+    pass
+
+
+_deadline: ContextVar[Optional[float]] = ContextVar("hdbcv2dsp_parse_deadline", default=None)
+
+
+def can_interrupt() -> bool:
+    """True when an alarm can interrupt a running regex (main thread, SIGALRM, no foreign timer)."""
+    return (hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+            and signal.getitimer(signal.ITIMER_REAL)[0] == 0)
+
+
+def checkpoint() -> None:
+    """Raise ParseBudgetExceeded when the active budget is used up."""
+    deadline = _deadline.get()
+    if deadline is not None and time.monotonic() > deadline:
+        raise ParseBudgetExceeded("parse budget exceeded")
+
+
+@contextmanager
+def time_budget(seconds: Optional[float]) -> Iterator[None]:
+    """Limit the with-block to *seconds* (None / 0: no limit; an outer, tighter budget stays in charge)."""
+    if not seconds or seconds <= 0:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None and outer <= deadline:
+        yield
+        return
+    token = _deadline.set(deadline)
+    if not can_interrupt():
+        try:
+            yield
+        finally:
+            _deadline.reset(token)
+        return
+
+    armed = [True]
+
+    def _alarm(signum, frame):
+        if armed[0]:
+            raise ParseBudgetExceeded(f"parse budget of {seconds:g}s exceeded")
+
+    previous = signal.signal(signal.SIGALRM, _alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        armed[0] = False
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+        _deadline.reset(token)
+
+
+def guarded(primary: Callable[[str], T], fallback: Callable[[str], T], text: str,
+            seconds: Optional[float] = None) -> T:
+    """primary(text) within the budget (default PARSE_BUDGET_SECONDS), else fallback(text)."""
+    seconds = PARSE_BUDGET_SECONDS if seconds is None else seconds
+    if not seconds or seconds <= 0:
+        return primary(text)
+    if len(text) > LINEAR_ONLY_CHARS and not can_interrupt():
+        count("parse_fallbacks")
+        return fallback(text)
+    try:
+        with time_budget(seconds):
+            return primary(text)
+    except ParseBudgetExceeded:
+        count("parse_timeouts")
+        count("parse_fallbacks")
+        return fallback(text)
@@ -1,36 +1,35 @@
 from dataclasses import dataclass, field
-from typing import Dict, List
+from typing import Dict, List, Optional, Set, Tuple
 import re
 
+from .compact import compact_model, lazy_text
+from .identifiers import canonical_name
+from .instrument import count, timed
+from .parse_guard import checkpoint, guarded
+from .sql_deps import sql_dependencies
+from .sql_text import paren_pairs, split_top_level, sql_tokens
+from .source_io import SourceLike, read_source
+
+@compact_model(intern=("name", "reads_from", "writes_to", "calls", "temp_tables", "table_variables", "ctas_targets"))
 @dataclass
 class ProcedureModel:
     name: str
-    sql: str
+    sql: Optional[str]  # None when keep_source=False: re-read from source_path on access
     parameters: List[Dict[str, str]] = field(default_factory=list)  # {'mode','name','type'}
     reads_from: List[str] = field(default_factory=list)
     writes_to: List[str] = field(default_factory=list)
     calls: List[str] = field(default_factory=list)
     temp_tables: List[str] = field(default_factory=list)            # NEW
+    table_variables: List[str] = field(default_factory=list)        # SQLScript lt_x = SELECT / DECLARE lt TABLE
     ctas_targets: List[str] = field(default_factory=list)           # NEW (MVP detection)
+    source_path: Optional[str] = None
 
-def parse_hdbprocedure_or_sql(path: str) -> ProcedureModel:
-    with open(path, "r", encoding="utf-8", errors="ignore") as f:
-        sql = f.read()
-
-    # --- 1) Name: CREATE/ALTER + PROCEDURE/PROC ---
-    name_m = re.search(
-        r'\b(CREATE|ALTER)\s+(PROCEDURE|PROC)\s+("?[\w:#.$/\[\]\.]+?"?)',
-        sql, re.IGNORECASE
-    )
-    raw_name = name_m.group(3) if name_m else "UNKNOWN_PROCEDURE"
-    name = raw_name.strip('"').strip('[]')  # normalize [] or " "
-    # Optional: collapse [schema].[name] to schema.name
-    name = name.replace('[', '').replace(']', '')
-
-    # --- 2) Parameters: support both ( ... ) and inline before AS ---
-    params: List[Dict[str, str]] = []
+ProcedureModel = lazy_text(ProcedureModel, "sql", "source_path")
 
-    # Try ( ... ) form first
+def _header(sql: str) -> Tuple[str, Set[str]]:
+    """Raw parameter text and CTAS targets by regex (lazy .*? passes may scan to the end of the text)."""
+    # Parameters: support both ( ... ) and inline before AS; try ( ... ) form first
+    count("regex_passes")
     paren = re.search(
         r'\b(PROCEDURE|PROC)\s+[^(\s]+\s*\((.*?)\)\s*AS\b',
         sql, re.IGNORECASE | re.DOTALL
@@ -40,6 +39,8 @@ def parse_hdbprocedure_or_sql(path: str) -> ProcedureModel:
     if paren:
         raw = paren.group(2)
     else:
+        checkpoint()
+        count("regex_passes")
         # Inline: grab everything after name up to the first AS
         after = re.search(
             r'\b(CREATE|ALTER)\s+(PROCEDURE|PROC)\s+("?[\w:#.$/\[\]\.]+?"?)\s+(.*?)\bAS\b',
@@ -48,56 +49,95 @@ def parse_hdbprocedure_or_sql(path: str) -> ProcedureModel:
         if after:
             raw = after.group(4)
 
-    if raw:
-        for part in re.split(r',(?![^(]*\))', raw):
-            ptxt = part.strip()
-            if not ptxt:
-                continue
-            pm = re.match(
-                r'\s*(?:(IN|OUT|INOUT)\s+)?("?[\w:#.$/\[\]\.]+?"?)\s+([\w\(\)]+)',
-                ptxt, re.IGNORECASE
-            )
-            if pm:
-                mode = (pm.group(1) or 'IN').upper()
-                pname = pm.group(2).strip('"').strip('[]')
-                ptype = pm.group(3)
-                params.append({'mode': mode, 'name': pname, 'type': ptype})
-
-    # --- 3) Dependencies (MVP regex) ---
-    reads, writes, calls = set(), set(), set()
-
-    for grp in re.findall(r'\bFROM\s+([^\s,();]+)|\bJOIN\s+([^\s,();]+)', sql, re.IGNORECASE):
-        for t in grp:
-            if t:
-                reads.add(t.strip('"'))
-
-    for tgt in re.findall(r'\bINSERT\s+INTO\s+([^\s(;,]+)', sql, re.IGNORECASE):
-        writes.add(tgt.strip('"'))
-    for tgt in re.findall(r'\bUPDATE\s+([^\s(;,]+)', sql, re.IGNORECASE):
-        writes.add(tgt.strip('"'))
-    for tgt in re.findall(r'\bMERGE\s+INTO\s+([^\s(;,]+)', sql, re.IGNORECASE):
-        writes.add(tgt.strip('"'))
-
-    for c in re.findall(r'\bCALL\s+([^\s(;,]+)', sql, re.IGNORECASE):
-        calls.add(c.strip('"'))
-
-    # --- 4) Temp tables and CTAS (Synapse/MPP style) ---
-    temp_tables = set()
-    # CREATE TABLE #Temp ...
-    for t in re.findall(r'\bCREATE\s+TABLE\s+(#\w+)', sql, re.IGNORECASE):
-        temp_tables.add(t)
-    # SELECT ... INTO #Temp ...
-    for t in re.findall(r'\bINTO\s+(#\w+)', sql, re.IGNORECASE):
-        temp_tables.add(t)
-
     # CTAS targets (MVP): CREATE TABLE <name> WITH (...) AS SELECT
+    checkpoint()
+    count("regex_passes")
     ctas_targets = set()
     for m in re.findall(r'\bCREATE\s+TABLE\s+([#\w\.\[\]]+)\s+WITH\s*\(.*?\)\s+AS\s+SELECT',
                         sql, re.IGNORECASE | re.DOTALL):
         ctas_targets.add(m.replace('[', '').replace(']', ''))
+    return raw, ctas_targets
+
+
+def _header_linear(sql: str) -> Tuple[str, Set[str]]:
+    """Linear fallback of _header: one token pass, brackets matched by depth."""
+    spans: List[Tuple[int, int]] = []
+    toks = sql_tokens(sql, spans)
+
+    closes = paren_pairs(toks)
+
+    raw = ""
+    for i, tok in enumerate(toks[:-2]):
+        if tok in (("kw", "CREATE"), ("kw", "ALTER")) and toks[i + 1] in (("kw", "PROCEDURE"), ("ref", ("PROC",))):
+            if toks[i + 2][0] != "ref" or i + 3 >= len(toks):
+                break
+            if toks[i + 3] == ("op", "("):
+                end = closes.get(i + 3, -1)
+                if end != -1:
+                    raw = sql[spans[i + 3][1]:spans[end][0]]
+            else:
+                end = next((j for j in range(i + 3, len(toks)) if toks[j] == ("kw", "AS")), None)
+                if end is not None:
+                    raw = sql[spans[i + 3][0]:spans[end][0]] if end > i + 3 else ""
+            break
+
+    ctas_targets = set()
+    for i, tok in enumerate(toks[:-4]):
+        if (tok == ("kw", "CREATE") and toks[i + 1] == ("kw", "TABLE") and toks[i + 2][0] == "ref"
+                and toks[i + 3] == ("kw", "WITH") and toks[i + 4] == ("op", "(")):
+            end = closes.get(i + 4, -1)
+            if end != -1 and toks[end + 1:end + 3] == [("kw", "AS"), ("kw", "SELECT")]:
+                ctas_targets.add(".".join(toks[i + 2][1]))
+    return raw, ctas_targets
+
+
+def _parameters(raw: str) -> List[Dict[str, str]]:
+    params: List[Dict[str, str]] = []
+    for ptxt in split_top_level(raw):
+        pm = re.match(
+            r'\s*(?:(IN|OUT|INOUT)\s+)?("?[\w:#.$/\[\]\.]+?"?)\s+([\w\(\)]+)',
+            ptxt, re.IGNORECASE
+        )
+        if pm:
+            mode = (pm.group(1) or 'IN').upper()
+            pname = pm.group(2).strip('"').strip('[]')
+            ptype = pm.group(3)
+            params.append({'mode': mode, 'name': pname, 'type': ptype})
+    return params
+
+
+@timed("parse.procedure")
+def parse_hdbprocedure_or_sql(source: SourceLike, keep_source: bool = True,
+                              budget_seconds: Optional[float] = None) -> ProcedureModel:
+    """Parse a procedure from a file path, bytes or mmap (see source_io for encoding detection).
+
+    The regex header extraction runs under a time budget (see parse_guard) and falls back to a linear token scan.
+    """
+    sql, path = read_source(source)
+    count("artifacts")
+
+    # --- 1) Name: CREATE/ALTER + PROCEDURE/PROC ---
+    name_m = re.search(
+        r'\b(CREATE|ALTER)\s+(PROCEDURE|PROC)\s+((?:"[^"]*"|\[[^\]]*\]|[\w:#.$/])+)',
+        sql, re.IGNORECASE
+    )
+    raw_name = name_m.group(3) if name_m else "UNKNOWN_PROCEDURE"
+    name = canonical_name(raw_name)  # "S"."P", [schema].[name] -> S.P
+
+    # --- 2) Parameters and 4) CTAS targets (Synapse/MPP style) ---
+    raw, ctas_targets = guarded(_header, _header_linear, sql, budget_seconds)
+    params = _parameters(raw)
+
+    # --- 3) Dependencies: one scope-aware pass; CTEs, table variables,
+    #        parameters, cursors and temp tables are not reads/writes ---
+    deps = sql_dependencies(sql)
+
+    # --- 4) Temp tables ---
+    temp_tables = deps.names("temp_table")
 
     return ProcedureModel(
-        name=name, sql=sql, parameters=params,
-        reads_from=sorted(reads), writes_to=sorted(writes), calls=sorted(calls),
-        temp_tables=sorted(temp_tables), ctas_targets=sorted(ctas_targets)
-    )
\ No newline at end of file
+        name=name, sql=sql if keep_source or not path else None, parameters=params,
+        reads_from=deps.reads, writes_to=deps.writes, calls=deps.calls,
+        temp_tables=temp_tables, table_variables=deps.names("table_variable"), ctas_targets=sorted(ctas_targets),
+        source_path=path,
+    )
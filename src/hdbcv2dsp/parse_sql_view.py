@@ -1,19 +1,26 @@
 from dataclasses import dataclass, field
-from typing import List, Set, Optional
+from typing import List, Optional, Tuple
 import re
 
+from .compact import compact_model, lazy_text
+from .identifiers import canonical_name
+from .instrument import count, timed
+from .parse_guard import checkpoint, guarded
+from .sql_deps import sql_dependencies
+from .sql_text import split_top_level, sql_clauses
+from .source_io import SourceLike, read_source
+
+@compact_model(intern=("name", "columns", "inputs"))
 @dataclass
 class SQLViewModel:
     name: str
-    sql: str
+    sql: Optional[str]  # None when keep_source=False: re-read from source_path on access
     columns: List[str] = field(default_factory=list)
     inputs: List[str] = field(default_factory=list)  # upstream tables/views
     where: Optional[str] = None
     group_by: Optional[str] = None
     having: Optional[str] = None
-
-# split on commas that are NOT inside parentheses
-_COMMA_OUTSIDE_PARENS = re.compile(r',(?=(?:[^()]*\([^()]*\))*[^()]*$)')
+    source_path: Optional[str] = None
 
 # CREATE [OR REPLACE] VIEW <identifier>
 _VIEW_NAME_RE = re.compile(
@@ -28,14 +35,6 @@ _SELECT_LIST_RE = re.compile(
     re.IGNORECASE | re.DOTALL
 )
 
-# FROM / JOIN sources (schema-qualified, quoted or unquoted)
-_SOURCE_TOKENS_RE = re.compile(
-    r'\bFROM\s+((?:"[^"]+"|\w+)(?:\.(?:"[^"]+"|\w+))?)'
-    r'|'
-    r'\b(?:LEFT|RIGHT|FULL|INNER|OUTER|CROSS)?\s*JOIN\s+((?:"[^"]+"|\w+)(?:\.(?:"[^"]+"|\w+))?)',
-    re.IGNORECASE
-)
-
 # Clauses
 _WHERE_RE = re.compile(r'\bWHERE\b\s+(.*?)(?:\bGROUP\s+BY\b|\bHAVING\b|\bORDER\s+BY\b|\bLIMIT\b|\bUNION\b|$)', re.IGNORECASE | re.DOTALL)
 _GROUP_BY_RE = re.compile(r'\bGROUP\s+BY\b\s+(.*?)(?:\bHAVING\b|\bORDER\s+BY\b|\bLIMIT\b|\bUNION\b|$)', re.IGNORECASE | re.DOTALL)
@@ -44,54 +43,60 @@ _HAVING_RE = re.compile(r'\bHAVING\b\s+(.*?)(?:\bORDER\s+BY\b|\bLIMIT\b|\bUNION\
 # Correctly handle HTML &gt; -> >
 _HTML_GT = re.compile(r'&gt;', re.IGNORECASE)
 
+SQLViewModel = lazy_text(SQLViewModel, "sql", "source_path", lambda text: _HTML_GT.sub('>', text))
+
 def _norm_ident(s: str) -> str:
-    s = s.strip()
-    if s.startswith('"') and s.endswith('"') and len(s) >= 2:
-        return s[1:-1]
-    return s
+    return canonical_name(s)
+
+def _clauses(sql: str) -> Tuple[List[str], Optional[str], Optional[str], Optional[str]]:
+    """Select list and WHERE / GROUP BY / HAVING by regex (each pass may scan to the end of the text)."""
+    columns: List[str] = []
+    count("regex_passes")
+    sel = _SELECT_LIST_RE.search(sql)
+    if sel:
+        columns = split_top_level(sel.group(1).strip())
+    found = []
+    for rx in (_WHERE_RE, _GROUP_BY_RE, _HAVING_RE):
+        checkpoint()
+        count("regex_passes")
+        m = rx.search(sql)
+        found.append(m.group(1).strip() if m else None)
+    return columns, found[0], found[1], found[2]
+
+
+def _clauses_linear(sql: str) -> Tuple[List[str], Optional[str], Optional[str], Optional[str]]:
+    """Linear fallback of _clauses: one token pass over the outermost query (sql_text.sql_clauses)."""
+    c = sql_clauses(sql)
+    return c.columns, c.where, c.group_by, c.having
+
+
+@timed("parse.sql_view")
+def parse_hdbview_or_sql(source: SourceLike, keep_source: bool = True,
+                         budget_seconds: Optional[float] = None) -> SQLViewModel:
+    """Parse a view from a file path, bytes or mmap (see source_io for encoding detection).
 
-def parse_hdbview_or_sql(path: str) -> SQLViewModel:
-    with open(path, "r", encoding="utf-8", errors="ignore") as f:
-        sql = f.read()
+    The regex clause extraction runs under a time budget (see parse_guard) and falls back to a linear token scan.
+    """
+    sql, path = read_source(source)
+    count("artifacts")
 
     # normalize common HTML entity if present in uploads
     sql = _HTML_GT.sub('>', sql)
 
     # 1) view name
+    count("regex_passes")
     m = _VIEW_NAME_RE.search(sql)
     name = _norm_ident(m.group(1)) if m else "UNKNOWN_VIEW"
 
-    # 2) select list -> columns[]
-    columns: List[str] = []
-    sel = _SELECT_LIST_RE.search(sql)
-    if sel:
-        raw = sel.group(1).strip()
-        columns = [p.strip() for p in _COMMA_OUTSIDE_PARENS.split(raw) if p.strip()]
-
-    # 3) upstream sources -> inputs[]
-    srcs: Set[str] = set()
-    for g1, g2 in _SOURCE_TOKENS_RE.findall(sql):
-        ident = g1 or g2
-        if ident:
-            srcs.add(_norm_ident(ident))
-
-    # 4) Extra clauses
-    where_clause = None
-    m_where = _WHERE_RE.search(sql)
-    if m_where:
-        where_clause = m_where.group(1).strip()
-
-    group_by_clause = None
-    m_gb = _GROUP_BY_RE.search(sql)
-    if m_gb:
-        group_by_clause = m_gb.group(1).strip()
-
-    having_clause = None
-    m_hav = _HAVING_RE.search(sql)
-    if m_hav:
-        having_clause = m_hav.group(1).strip()
+    # 2) select list -> columns[], 4) extra clauses
+    columns, where_clause, group_by_clause, having_clause = guarded(_clauses, _clauses_linear, sql, budget_seconds)
+
+    # 3) upstream sources -> inputs[] (WITH names and table functions such as STRING_SPLIT excluded)
+    deps = sql_dependencies(sql)
+    srcs = deps.reads + [c for c in deps.calls if c not in deps.reads]
 
     return SQLViewModel(
-        name=name, sql=sql, columns=columns, inputs=sorted(srcs),
-        where=where_clause, group_by=group_by_clause, having=having_clause
-    )
\ No newline at end of file
+        name=name, sql=sql if keep_source or not path else None, columns=columns, inputs=sorted(srcs),
+        where=where_clause, group_by=group_by_clause, having=having_clause,
+        source_path=path,
+    )
@@ -0,0 +1,229 @@
+# hdbcv2dsp/proc_flow.py
+# ======================================================================
+# Procedure → Datasphere stages (SQL views / transformation flows)
+#  - sql_deps cuts the body into data statements; statement s1 feeds s2
+#    when s2 reads a local object (temp table, table variable) s1
+#    produced last, or reads / rewrites an external table s1 wrote
+#  - Linear chains (s1 feeds only s2, s2 is fed only by s1, through a
+#    local whose producing statement is a plain SELECT) fuse into one
+#    stage: the intermediate results become CTEs of the stage's SELECT
+#  - A stage producing a local becomes a SQL view; one that loads or
+#    changes a table becomes a transformation flow (locals that are
+#    changed in place are materialised as staging tables); CALLs stay
+#    procedure steps of the task chain
+#  - Stages are levelled by longest path; stages sharing a level have no
+#    dependency between them and can run in parallel in the task chain
+# ======================================================================
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from .identifiers import identifier_parts
+from .instrument import timed
+from .parse_procedure import ProcedureModel
+from .sql_deps import SQLStatement, sql_dependencies
+
+# load type of a transformation stage by the verb of its final statement
+_LOADS = {"INSERT": "append", "UPSERT": "upsert", "MERGE": "upsert", "REPLACE": "upsert",
+          "UPDATE": "update", "DELETE": "delete", "TRUNCATE": "truncate", "CREATE": "replace"}
+_SELECT_START_RE = re.compile(r"\b(?:SELECT|WITH)\b", re.IGNORECASE)
+_ASSIGN_RE = re.compile(r"^[^=]*?:?=\s*", re.DOTALL)
+_INSERT_HEAD_RE = re.compile(r"^\s*INSERT\s+INTO\s+\S+\s*(?:\([^)]*\)\s*)?(?=SELECT\b|WITH\b|\()", re.IGNORECASE)
+_CTAS_HEAD_RE = re.compile(r"^.*?\bTABLE\s+\S+\s*(?:\([^)]*\)\s*)?(?:WITH\s*\([^)]*\)\s*)?AS\s*", re.IGNORECASE | re.DOTALL)
+
+
+@dataclass
+class FlowStage:
+    name: str
+    kind: str                           # 'view' | 'transformation' | 'procedure'
+    sql: str
+    statements: List[int] = field(default_factory=list)   # indices into the data statements
+    target: Optional[str] = None        # object the stage produces or loads
+    load: Optional[str] = None          # transformation: append | upsert | update | delete | truncate | replace
+    reads: List[str] = field(default_factory=list)        # external objects
+    depends_on: List[str] = field(default_factory=list)   # stage names
+    level: int = 0
+    parallel: bool = False
+
+    def as_dict(self) -> dict:
+        d = {"name": self.name, "kind": self.kind, "level": self.level, "parallel": self.parallel,
+             "target": self.target, "reads": self.reads, "dependsOn": self.depends_on,
+             "statements": self.statements, "sql": self.sql}
+        if self.load:
+            d["load"] = self.load
+        return d
+
+
+@dataclass
+class ProcedureFlow:
+    procedure: str
+    stages: List[FlowStage] = field(default_factory=list)
+
+    def task_chain(self) -> List[List[str]]:
+        """Stage names per step; the stages of one step can run in parallel."""
+        steps: List[List[str]] = []
+        for s in self.stages:
+            while len(steps) <= s.level:
+                steps.append([])
+            steps[s.level].append(s.name)
+        return steps
+
+    def as_dict(self) -> dict:
+        return {"procedure": self.procedure, "stages": [s.as_dict() for s in self.stages],
+                "taskChain": self.task_chain()}
+
+
+def _safe(name: str) -> str:
+    return re.sub(r"\W", "_", name).strip("_").upper() or "X"
+
+
+def _select_of(st: SQLStatement, local: str) -> Optional[str]:
+    """The SELECT that produces *local* in *st* (None when the statement is no plain producer)."""
+    text = st.text
+    if st.verb == "ASSIGN":
+        body = _ASSIGN_RE.sub("", text, count=1)
+        return body if _SELECT_START_RE.match(body) else None
+    if st.verb in ("SELECT", "WITH"):
+        pattern = re.compile(r"\bINTO\s+" + re.escape(local) + r"(?![\w#$])", re.IGNORECASE)
+        return pattern.sub("", text, count=1) if pattern.search(text) else None
+    if st.verb == "INSERT" and local not in st.uses[1:] and _INSERT_HEAD_RE.match(text):
+        return _INSERT_HEAD_RE.sub("", text, count=1)
+    if st.verb == "CREATE" and _CTAS_HEAD_RE.match(text):
+        return _CTAS_HEAD_RE.sub("", text, count=1)
+    return None
+
+
+def _rename(text: str, names: Dict[str, str]) -> str:
+    """Point references to locals (:lt, lt, #t) at the CTE / stage object replacing them."""
+    for old, new in names.items():
+        pattern = r'(?<![\w#$."]):?' + re.escape(old) + r'(?![\w#$"])'
+        text = re.sub(pattern, new, text, flags=re.IGNORECASE)
+    return text
+
+
+def _with(ctes: List[Tuple[str, str]], select: str) -> str:
+    if not ctes:
+        return select
+    head = ",\n".join(f'"{name}" AS (\n{body.strip()}\n)' for name, body in ctes)
+    if re.match(r"\s*WITH\b", select, re.IGNORECASE):   # merge into the statement's own WITH list
+        return "WITH " + head + ",\n" + re.sub(r"^\s*WITH\s+", "", select, count=1, flags=re.IGNORECASE)
+    return "WITH " + head + "\n" + select
+
+
+@timed("proc_flow")
+def decompose_procedure(p: ProcedureModel) -> ProcedureFlow:
+    """Stages of *p* in statement order, with dependencies, levels and parallel flags."""
+    flow = ProcedureFlow(procedure=p.name)
+    deps = sql_dependencies(p.sql or "")
+    stmts = [s for s in deps.statements if s.verb != "DECLARE" and (s.writes or s.defines or s.calls or s.verb in ("SELECT", "WITH"))]
+    if not stmts:
+        return flow
+
+    # ---- statement DAG: edges (producer, consumer, local name or None)
+    edges: Dict[int, Dict[int, Optional[str]]] = {i: {} for i in range(len(stmts))}   # consumer -> producer -> local
+    last_def: Dict[str, int] = {}
+    last_write: Dict[str, int] = {}
+    readers: Dict[str, List[int]] = {}
+    modified: Set[str] = set()           # locals changed in place (UPDATE #t, INSERT INTO existing #t ...)
+    for i, st in enumerate(stmts):
+        for u in st.uses:
+            if u.upper() in last_def:
+                edges[i].setdefault(last_def[u.upper()], u)
+        for d in st.defines:
+            if d.upper() in last_def:
+                if any(u.upper() == d.upper() for u in st.uses):
+                    modified.add(d.upper())
+                edges[i].setdefault(last_def[d.upper()], None)
+        for obj in st.reads:
+            if obj.upper() in last_write:
+                edges[i].setdefault(last_write[obj.upper()], None)
+            readers.setdefault(obj.upper(), []).append(i)
+        for obj in st.writes:
+            for j in readers.get(obj.upper(), []) + ([last_write[obj.upper()]] if obj.upper() in last_write else []):
+                if j != i:
+                    edges[i].setdefault(j, None)
+            last_write[obj.upper()] = i
+        for d in st.defines:
+            last_def[d.upper()] = i
+    consumers: Dict[int, List[int]] = {i: [] for i in range(len(stmts))}
+    for c, producers in edges.items():
+        for prod in producers:
+            consumers[prod].append(c)
+
+    # ---- fuse linear chains through a plain-SELECT local producer
+    group_of = list(range(len(stmts)))
+    ctes: Dict[int, Tuple[str, str]] = {}          # statement -> (local, select) when it became a CTE
+    for c in range(len(stmts)):
+        if len(edges[c]) != 1:
+            continue
+        (prod, local), = edges[c].items()
+        if not local or len(consumers[prod]) != 1 or local.upper() in modified:
+            continue
+        producer = stmts[prod]
+        if producer.writes or producer.calls or len(producer.defines) != 1:
+            continue
+        select = _select_of(producer, local)
+        if select is None or stmts[c].verb in ("MERGE", "UPDATE", "DELETE", "UPSERT", "TRUNCATE", "CALL", "EXEC", "EXECUTE"):
+            continue
+        ctes[prod] = (local, select)
+        group_of[prod] = c
+    for i in reversed(range(len(stmts))):         # chains: follow to the chain's last statement
+        g = i
+        while group_of[g] != g:
+            g = group_of[g]
+        group_of[i] = g
+
+    # ---- stages
+    proc = _safe(identifier_parts(p.name)[-1] if identifier_parts(p.name) else p.name)
+    finals = sorted(set(group_of))
+    stage_of: Dict[int, FlowStage] = {}
+    produced_by: Dict[str, str] = {}                 # local -> object the stage materialises it as
+    for n, final in enumerate(finals, 1):
+        members = [i for i in range(len(stmts)) if group_of[i] == final]
+        st = stmts[final]
+        local_target = st.defines[-1] if st.defines else None
+        label = _safe(local_target or (st.writes[0] if st.writes else st.calls[0] if st.calls else "RESULT"))
+        name = f"{proc}_{n:02d}_{label}"
+
+        # CTE names for the fused locals, then upstream stage objects for the rest
+        local_names = {ctes[m][0]: _safe(ctes[m][0]) for m in members if m in ctes}
+        renames = {**produced_by, **{k: f'"{v}"' for k, v in local_names.items()}}
+        chain = [(local_names[ctes[m][0]], _rename(ctes[m][1], renames)) for m in members if m in ctes]
+
+        if st.calls and not st.writes and not st.defines:
+            kind, load, target = "procedure", None, st.calls[0]
+            sql = _rename(st.text, renames)
+        elif st.writes or (local_target and local_target.upper() in modified):
+            kind, load = "transformation", _LOADS.get(st.verb, "replace")
+            target = st.writes[0] if st.writes else name
+            select = _select_of(st, st.writes[0] if st.writes else local_target) if st.verb in ("INSERT", "CREATE") else None
+            sql = _with(chain, _rename(select, renames)) if select is not None else _rename(st.text, renames)
+        else:
+            kind, load, target = "view", None, name
+            select = _select_of(st, local_target) if local_target else st.text
+            sql = _with(chain, _rename(select if select is not None else st.text, renames))
+
+        reads = sorted({r for m in members for r in stmts[m].reads})
+        stage = FlowStage(name=name, kind=kind, sql=sql.strip(), statements=members, target=target, load=load, reads=reads)
+        for m in members:
+            stage_of[m] = stage
+        if local_target:
+            produced_by[local_target] = f'"{target}"'
+        flow.stages.append(stage)
+
+    # ---- stage dependencies, levels, parallel flags
+    for final in finals:
+        stage = stage_of[final]
+        ups = {stage_of[prod].name for m in stage.statements for prod in edges[m] if stage_of[prod] is not stage}
+        stage.depends_on = [s.name for s in flow.stages if s.name in ups]
+    level = {s.name: 0 for s in flow.stages}
+    for s in flow.stages:                            # stages are in statement order: producers come first
+        s.level = level[s.name] = max((level[d] + 1 for d in s.depends_on), default=0)
+    per_level: Dict[int, int] = {}
+    for s in flow.stages:
+        per_level[s.level] = per_level.get(s.level, 0) + 1
+    for s in flow.stages:
+        s.parallel = per_level[s.level] > 1
+    return flow
@@ -0,0 +1,289 @@
+# hdbcv2dsp/profile_schema.py
+# ======================================================================
+# Table schemas from sample data (CSV / Parquet)
+#  - Files are streamed in chunks (pandas read_csv chunksize, pyarrow
+#    iter_batches), each chunk is profiled with vectorised numpy string /
+#    numeric ops and folded into one ColumnProfile per column
+#  - Profiles track: null count, max string length, integer range,
+#    decimal digits before/after the point, surviving date formats,
+#    boolean literals
+#  - element() turns a profile into the tightest CDS element:
+#    TINYINT/SMALLINT/Integer/Integer64, Decimal(p,s), Date/Time/
+#    Timestamp, Boolean, String(max length); notNull when no nulls seen
+# Parquet needs pyarrow (optional dependency).
+# ======================================================================
+from __future__ import annotations
+
+import io
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+from .source_io import SourceLike, detect_encoding, is_path
+
+_NULL_TOKENS = ["", "NULL", "NA", "N/A", "NAN", "NONE", "?"]
+_BOOL_TOKENS = ["TRUE", "FALSE"]
+
+# (strftime format, CDS type) — tried only while every value so far parses
+_DATE_FORMATS = [
+    ("%Y-%m-%d", "cds.Date"),
+    ("%Y%m%d", "cds.Date"),
+    ("%d.%m.%Y", "cds.Date"),
+    ("%m/%d/%Y", "cds.Date"),
+    ("%d/%m/%Y", "cds.Date"),
+    ("%Y-%m-%d %H:%M:%S", "cds.Timestamp"),
+    ("%Y-%m-%dT%H:%M:%S", "cds.Timestamp"),
+    ("%Y-%m-%d %H:%M:%S.%f", "cds.Timestamp"),
+    ("%Y-%m-%dT%H:%M:%S.%f", "cds.Timestamp"),
+    ("%d.%m.%Y %H:%M:%S", "cds.Timestamp"),
+    ("%H:%M:%S", "cds.Time"),
+]
+
+# integer CDS types by value range (HANA TINYINT is unsigned)
+_INT_RANGES = [
+    (int(np.iinfo(np.uint8).min), int(np.iinfo(np.uint8).max), "cds.hana.TINYINT"),
+    (int(np.iinfo(np.int16).min), int(np.iinfo(np.int16).max), "cds.hana.SMALLINT"),
+    (int(np.iinfo(np.int32).min), int(np.iinfo(np.int32).max), "cds.Integer"),
+    (int(np.iinfo(np.int64).min), int(np.iinfo(np.int64).max), "cds.Integer64"),
+]
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+@dataclass
+class ColumnProfile:
+    name: str
+    rows: int = 0
+    nulls: int = 0
+    max_length: int = 0
+    maybe_int: bool = True
+    maybe_decimal: bool = True
+    maybe_bool: bool = True
+    int_min: Optional[int] = None
+    int_max: Optional[int] = None
+    int_digits: int = 0           # digits before the decimal point
+    scale: int = 0                # digits after the decimal point
+    date_formats: Optional[Set[str]] = None   # None = not tested yet
+    fixed: Optional[Dict[str, object]] = None  # type taken from a typed (Parquet) column
+
+    @property
+    def non_null(self) -> int:
+        return self.rows - self.nulls
+
+    def element(self) -> Dict[str, object]:
+        """Tightest CDS element that holds every value seen."""
+        elem = dict(self.fixed) if self.fixed else self._inferred()
+        if self.rows and not self.nulls:
+            elem["notNull"] = True
+        return elem
+
+    def _inferred(self) -> Dict[str, object]:
+        if not self.non_null:
+            return {"type": "cds.String", "length": max(self.max_length, 1)}
+        if self.maybe_bool:
+            return {"type": "cds.Boolean"}
+        if self.maybe_int and self.int_min is not None:
+            for lo, hi, cds_type in _INT_RANGES:
+                if lo <= self.int_min and self.int_max <= hi:
+                    return {"type": cds_type}
+            return {"type": "cds.Decimal", "precision": min(max(self.int_digits, 1), 38), "scale": 0}
+        if self.maybe_decimal:
+            return {"type": "cds.Decimal",
+                    "precision": min(max(self.int_digits + self.scale, 1), 38),
+                    "scale": min(self.scale, 38)}
+        if self.date_formats:
+            kinds = {t for f, t in _DATE_FORMATS if f in self.date_formats}
+            return {"type": "cds.Timestamp" if "cds.Timestamp" in kinds else sorted(kinds)[0]}
+        return {"type": "cds.String", "length": max(self.max_length, 1)}
+
+
+# ----------------------------------------------------------------------
+# Chunk profiling (vectorised)
+# ----------------------------------------------------------------------
+
+def _profile_text(prof: ColumnProfile, s: pd.Series) -> None:
+    # fixed-width numpy strings: np.char ops loop in C, unlike the pandas .str accessor
+    a = np.char.strip(s.to_numpy(dtype=str, na_value=""))
+    upper = np.char.upper(a)
+    null = np.isin(upper, _NULL_TOKENS)
+    prof.rows += len(a)
+    prof.nulls += int(null.sum())
+    v, upper = a[~null], upper[~null]
+    if not len(v):
+        return
+    length = np.char.str_len(v)
+    prof.max_length = max(prof.max_length, int(length.max()))
+    if prof.maybe_bool and not np.isin(upper, _BOOL_TOKENS).all():
+        prof.maybe_bool = False
+
+    if prof.maybe_int or prof.maybe_decimal:
+        # [+-]digits[.digits]: drop one '.', one leading sign, the rest must be digits
+        dot = np.char.find(v, ".")
+        no_dot = np.char.replace(v, ".", "", 1)
+        signed = (np.char.startswith(no_dot, "-") | np.char.startswith(no_dot, "+")).astype(np.int64)
+        body = np.char.lstrip(no_dot, "+-")
+        matched = np.char.isdigit(body) & (np.char.str_len(body) == np.char.str_len(no_dot) - signed)
+        whole_len = np.where(dot >= 0, dot, length) - signed
+        # leading zeros (material numbers, ZIP codes) must stay text
+        starts_zero = np.char.startswith(body, "0")
+        if not matched.all() or (starts_zero & (whole_len > 1)).any():
+            prof.maybe_int = prof.maybe_decimal = False
+        else:
+            int_digits = int(np.where(starts_zero, 0, whole_len).max())
+            prof.int_digits = max(prof.int_digits, int_digits)
+            prof.scale = max(prof.scale, int(np.where(dot >= 0, length - dot - 1, 0).max()))
+            if (dot >= 0).any():
+                prof.maybe_int = False
+            if prof.maybe_int:
+                if int_digits > 18:
+                    prof.int_min, prof.int_max = -(10 ** int_digits), 10 ** int_digits  # beyond int64: Decimal(p, 0)
+                else:
+                    nums = v.astype(np.int64)
+                    lo, hi = int(nums.min()), int(nums.max())
+                    prof.int_min = lo if prof.int_min is None else min(prof.int_min, lo)
+                    prof.int_max = hi if prof.int_max is None else max(prof.int_max, hi)
+
+    # numbers win over compact dates (20240131); only text columns try date formats
+    if not (prof.maybe_int or prof.maybe_decimal or prof.maybe_bool):
+        if prof.date_formats is None:
+            # earlier chunks were not date-checked: only a first look may open the candidates
+            prior = prof.non_null - len(v)
+            prof.date_formats = {f for f, _ in _DATE_FORMATS} if not prior else set()
+        for fmt in list(prof.date_formats):
+            # cheap rejection on a head sample before parsing the whole chunk
+            for sample in (v[:64], v):
+                if pd.to_datetime(sample, format=fmt, errors="coerce").isna().any():
+                    prof.date_formats.discard(fmt)
+                    break
+                if len(sample) == len(v):
+                    break
+
+
+def _profile_typed(prof: ColumnProfile, s: pd.Series, arrow_type=None) -> None:
+    """Columns that already carry a type (Parquet): narrow integers, keep declared decimals."""
+    if s.dtype == object or pd.api.types.is_string_dtype(s.dtype):
+        if arrow_type is None or not (_arrow_is(arrow_type, "is_decimal") or _arrow_is(arrow_type, "is_date")):
+            _profile_text(prof, s)
+            return
+    null = s.isna()
+    prof.rows += len(s)
+    prof.nulls += int(null.sum())
+    v = s[~null]
+    if pd.api.types.is_bool_dtype(s.dtype):
+        prof.fixed = {"type": "cds.Boolean"}
+    elif pd.api.types.is_integer_dtype(s.dtype):
+        prof.maybe_bool = prof.maybe_decimal = False
+        if not v.empty:
+            lo, hi = int(v.min()), int(v.max())
+            prof.int_min = lo if prof.int_min is None else min(prof.int_min, lo)
+            prof.int_max = hi if prof.int_max is None else max(prof.int_max, hi)
+            prof.int_digits = max(prof.int_digits, len(str(max(abs(lo), abs(hi)))))
+    elif pd.api.types.is_float_dtype(s.dtype):
+        prof.fixed = {"type": "cds.Double"}
+    elif pd.api.types.is_datetime64_any_dtype(s.dtype):
+        prof.fixed = {"type": "cds.Timestamp"}
+    elif _arrow_is(arrow_type, "is_decimal"):
+        prof.fixed = {"type": "cds.Decimal", "precision": arrow_type.precision, "scale": arrow_type.scale}
+    else:  # date32 arrives as datetime.date objects
+        prof.fixed = {"type": "cds.Date"}
+
+
+def _arrow_is(arrow_type, check: str) -> bool:
+    if arrow_type is None:
+        return False
+    import pyarrow.types as pat  # only reached for Parquet input
+    return bool(getattr(pat, check)(arrow_type))
+
+
+def _schema(table_name: str, profiles: Dict[str, ColumnProfile]) -> Dict[str, dict]:
+    return {table_name: {"columns": [{"name": p.name, **p.element()} for p in profiles.values()]}}
+
+
+# ----------------------------------------------------------------------
+# Readers
+# ----------------------------------------------------------------------
+
+def _csv_handle(source: SourceLike, encoding: Optional[str]):
+    if is_path(source):
+        if encoding is None:
+            with open(source, "rb") as f:
+                encoding, _ = detect_encoding(f.read(4096))
+        return os.fspath(source), encoding
+    data = bytes(source)
+    if encoding is None:
+        encoding, _ = detect_encoding(data)
+    return io.BytesIO(data), encoding
+
+
+def profile_csv_columns(
+    source: SourceLike,
+    sep: str = ",",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    max_rows: Optional[int] = None,
+    encoding: Optional[str] = None,
+) -> Dict[str, ColumnProfile]:
+    handle, encoding = _csv_handle(source, encoding)
+    profiles: Dict[str, ColumnProfile] = {}
+    seen = 0
+    reader = pd.read_csv(handle, sep=sep, dtype=str, keep_default_na=False, na_filter=False,
+                         chunksize=chunk_rows, encoding="utf-8-sig" if encoding == "utf-8" else encoding)
+    with reader:
+        for chunk in reader:
+            if max_rows is not None:
+                chunk = chunk.iloc[: max(max_rows - seen, 0)]
+            for col in chunk.columns:
+                prof = profiles.setdefault(col, ColumnProfile(name=str(col).strip()))
+                _profile_text(prof, chunk[col])
+            seen += len(chunk)
+            if max_rows is not None and seen >= max_rows:
+                break
+    return profiles
+
+
+def profile_csv(source: SourceLike, table_name: Optional[str] = None, **kwargs) -> Dict[str, dict]:
+    """{table: {"columns": [...]}} for a CSV sample (path or bytes); kwargs go to profile_csv_columns()."""
+    name = table_name or (os.path.splitext(os.path.basename(os.fspath(source)))[0] if is_path(source) else "TABLE")
+    return _schema(name, profile_csv_columns(source, **kwargs))
+
+
+def profile_parquet_columns(
+    source: SourceLike,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    max_rows: Optional[int] = None,
+) -> Dict[str, ColumnProfile]:
+    try:
+        import pyarrow.parquet as pq  # optional dependency
+    except ImportError as e:
+        raise ImportError("pyarrow is required to profile Parquet files (pip install pyarrow)") from e
+    pf = pq.ParquetFile(os.fspath(source) if is_path(source) else io.BytesIO(bytes(source)))
+    arrow_types = {f.name: f.type for f in pf.schema_arrow}
+    profiles: Dict[str, ColumnProfile] = {}
+    seen = 0
+    for batch in pf.iter_batches(batch_size=chunk_rows):
+        frame = batch.to_pandas()
+        if max_rows is not None:
+            frame = frame.iloc[: max(max_rows - seen, 0)]
+        for col in frame.columns:
+            prof = profiles.setdefault(col, ColumnProfile(name=str(col)))
+            _profile_typed(prof, frame[col], arrow_types.get(col))
+        seen += len(frame)
+        if max_rows is not None and seen >= max_rows:
+            break
+    return profiles
+
+
+def profile_parquet(source: SourceLike, table_name: Optional[str] = None, **kwargs) -> Dict[str, dict]:
+    name = table_name or (os.path.splitext(os.path.basename(os.fspath(source)))[0] if is_path(source) else "TABLE")
+    return _schema(name, profile_parquet_columns(source, **kwargs))
+
+
+def profile_frame(frame: pd.DataFrame, table_name: str) -> Dict[str, dict]:
+    """Profile an in-memory DataFrame (typed columns keep their dtype)."""
+    profiles: Dict[str, ColumnProfile] = {}
+    for col in frame.columns:
+        _profile_typed(profiles.setdefault(col, ColumnProfile(name=str(col))), frame[col])
+    return _schema(table_name, profiles)
+
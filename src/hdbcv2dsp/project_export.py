@@ -0,0 +1,83 @@
+# hdbcv2dsp/project_export.py
+# ======================================================================
+# Whole-project SQL view export
+#  - Many uploaded views (plus a compiled Calculation View) go into one
+#    package; a NameIndex over the uploaded views tells view-to-view
+#    references apart from base tables, whatever the spelling
+#    (SCHEMA.V, "SCHEMA"."V", bare V)
+#  - Views are emitted in dependency order (a view after the views it
+#    reads), so a multi-view package imports in one shot
+#  - Only inputs no uploaded view provides are external prerequisites
+# ======================================================================
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from .artifacts import ArtifactNode, topo_order_nodes
+from .identifiers import NameIndex
+from .parse_sql_view import SQLViewModel
+
+
+@dataclass
+class ViewProject:
+    views: List[SQLViewModel] = field(default_factory=list)           # dependency order
+    upstream: Dict[str, List[str]] = field(default_factory=dict)      # view -> uploaded views it reads
+    external: Dict[str, List[str]] = field(default_factory=dict)      # base object -> views reading it
+    names: NameIndex = field(default_factory=NameIndex, repr=False)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """The uploaded view *name* refers to (any spelling), None for base objects."""
+        return self.names.resolve(name or "")
+
+    @property
+    def prerequisites(self) -> List[str]:
+        return sorted(self.external)
+
+    def graph(self) -> Dict[str, ArtifactNode]:
+        """Artifact graph with view inputs pointing at the uploaded views' own names."""
+        g: Dict[str, ArtifactNode] = {}
+        for v in self.views:
+            inputs = self.upstream.get(v.name, []) + [s for s, users in self.external.items() if v.name in users]
+            g[v.name] = ArtifactNode(id=v.name, kind="SQLView", inputs=sorted(set(inputs)))
+        for src in self.external:
+            g.setdefault(src, ArtifactNode(id=src, kind="Table", inputs=[]))
+        return g
+
+    def as_dict(self) -> dict:
+        return {
+            "viewOrder": [v.name for v in self.views],
+            "viewDependencies": {k: v for k, v in self.upstream.items() if v},
+            "prerequisites": self.prerequisites,
+        }
+
+
+def resolve_view_project(
+    views: Iterable[SQLViewModel],
+    default_schema: Optional[str] = None,
+    synonyms: Optional[Dict[str, str]] = None,
+) -> ViewProject:
+    """Index the uploaded views, split every input into view reference / external object, order the views."""
+    views = list(views)
+    project = ViewProject(names=NameIndex(default_schema=default_schema, synonyms=synonyms))
+    for v in views:
+        if v.name:
+            project.names.add(v.name)
+    external = NameIndex(default_schema=default_schema, synonyms=synonyms)   # one entry per base object
+
+    by_name = {v.name: v for v in views}
+    nodes: Dict[str, ArtifactNode] = {}
+    for v in views:
+        ups: List[str] = []
+        for src in v.inputs or []:
+            target = project.resolve(src)
+            if target and target != v.name:
+                ups.append(target)
+            elif not target:
+                users = project.external.setdefault(external.add(src), [])
+                if v.name not in users:
+                    users.append(v.name)
+        project.upstream[v.name] = sorted(set(ups))
+        nodes[v.name] = ArtifactNode(id=v.name, kind="SQLView", inputs=project.upstream[v.name])
+    project.views = [by_name[n] for n in topo_order_nodes(nodes)]
+    return project
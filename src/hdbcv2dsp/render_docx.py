@@ -3,6 +3,8 @@ from docx import Document
 from docx.shared import Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from .parse_cv import CVModel, topo_order
+from .cv_optimize import analyze_filter_pushdown, moved_conjuncts, prune_cv_model, split_conjuncts
+from .summarize import summarize_cv_pruning, summarize_filter_pushdown
 
 def _add_title(doc: Document, title: str):
     p = doc.add_paragraph()
@@ -31,6 +33,24 @@ def render_docx(model: CVModel, output_path: str, title: str | None = None):
         "these steps rebuild the logic natively there."
     )
 
+    # Optimisation: only rebuild what reaches the logical model
+    model, prune_report = prune_cv_model(model)
+    _add_heading(doc, "Optimisation (projection pushdown / dead nodes)", 1)
+    for s in summarize_cv_pruning(prune_report):
+        _add_bullet(doc, s)
+    pushdown = analyze_filter_pushdown(model)
+    _add_heading(doc, "Filter pushdown", 1)
+    for s in summarize_filter_pushdown(pushdown):
+        _add_bullet(doc, s)
+    # node -> pushed conjuncts it should carry; same notion of "moved" as cv_to_sql
+    moved = moved_conjuncts(pushdown)
+    pushed_into: dict = {}
+    for pf in pushdown:
+        if (pf.node_id, pf.predicate) in moved:
+            pushed_into.setdefault(pf.path[-1], []).append(pf)
+    lowered = {(pf.node_id, pf.predicate) for pf in pushdown
+               if (pf.node_id, pf.predicate) in moved and pf.path[-1] != pf.node_id}
+
     # Parameters
     if model.parameters:
         _add_heading(doc, "Parameters to define in Datasphere", 1)
@@ -60,8 +80,6 @@ def render_docx(model: CVModel, output_path: str, title: str | None = None):
                 cols = sorted({m.target for m in node.mappings if m.target})
                 if cols:
                     _add_bullet(doc, "Select columns: " + ", ".join(cols))
-            for flt in node.filters:
-                _add_bullet(doc, f"Add filter: {flt}")
 
         elif node.node_type == "JoinView":
             _add_bullet(doc, "Create a Graphical View with a Join node")
@@ -96,6 +114,19 @@ def render_docx(model: CVModel, output_path: str, title: str | None = None):
         else:
             _add_bullet(doc, "Node type not fully handled in MVP — add manual steps here.")
 
+        # filters of any node type: kept here, applied lower, or pushed into this node
+        for flt in node.filters:
+            conjs = split_conjuncts(flt)
+            kept = [c for c in conjs if (node.node_id, c) not in moved]
+            if kept:
+                _add_bullet(doc, f"Add filter: {' AND '.join(kept)}")
+            lower = [c for c in conjs if (node.node_id, c) in lowered]
+            if lower:
+                _add_bullet(doc, f"Filter {' AND '.join(lower)} is applied lower in the graph (see Filter pushdown)")
+        for pf in pushed_into.get(node.node_id, []):
+            origin = f"pushed down from {pf.node_id}" if pf.node_id != node.node_id else f"on source {pf.target}"
+            _add_bullet(doc, f"Add filter: {pf.rewritten} ({origin})")
+
         step += 1
 
     # Semantics
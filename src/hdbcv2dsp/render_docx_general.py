@@ -10,9 +10,16 @@ from docx.enum.text import WD_ALIGN_PARAGRAPH
 from .parse_cv import CVModel, topo_order as cv_topo_order
 from .parse_sql_view import SQLViewModel
 from .parse_procedure import ProcedureModel
+from .proc_flow import ProcedureFlow, decompose_procedure
 from .parse_abap_cds import ABAPCDSModel  # NEW
 from .artifacts import ArtifactNode, topo_order_nodes
-from .summarize import summarize_cv, summarize_sql_view, summarize_procedure, summarize_abap_cds  # NEW
+from .cost_estimate import TableStats, estimate_costs, format_bytes
+from .rf_planner import ReplicationFlowPlan, describe_flow, plan_replication
+from .instrument import timed
+from .cv_to_sql import compile_cv_to_sql
+from .cv_optimize import analyze_filter_pushdown, prune_cv_model
+from .summarize import summarize_cv, summarize_abap_cds  # NEW
+from .summarize import summarize_cv_pruning, summarize_filter_pushdown, summarize_many
 
 #############################
 # Formatting helpers
@@ -65,8 +72,21 @@ def _notes_sql(doc: Document):
     _bullet(doc, "For very large joins/aggregations, consider **replicating** hot tables to local storage for performance.")
     _bullet(doc, "Document any hard‑coded date ranges / predicates and externalize them via input parameters if needed.")
 
-def _step_by_step_proc_in_datasphere(doc: Document):
+def _step_by_step_proc_in_datasphere(doc: Document, flow: Optional[ProcedureFlow] = None):
     _heading(doc, "Step-by-step set-up in Datasphere", 2)
+    if flow and flow.stages:
+        kinds = {"view": "SQL View", "transformation": "Transformation Flow", "procedure": "Task Chain step (call)"}
+        _bullet(doc, f"Create the **{len(flow.stages)} stages** derived from the procedure's statements:")
+        for s in flow.stages:
+            load = f", {s.load} into {s.target}" if s.kind == "transformation" else ""
+            after = f" — after {_fmt_list(s.depends_on)}" if s.depends_on else ""
+            _subbullet(doc, f"{s.name}: {kinds.get(s.kind, s.kind)}{load}{after}" + (" (parallel)" if s.parallel else ""))
+        _bullet(doc, "Orchestrate them with a **Task Chain** in this order (stages of one step can run in parallel):")
+        for i, step in enumerate(flow.task_chain(), 1):
+            _subbullet(doc, f"Step {i}: {_fmt_list(step)}")
+        _bullet(doc, "Create the **Local Tables** the transformation flows load before the first run.")
+        _bullet(doc, "Deploy and run end‑to‑end; validate row counts and key‑by‑key samples.")
+        return
     _bullet(doc, "Identify the **stages** inside the procedure (reads → transforms → writes).")
     _bullet(doc, "Rebuild as **SQL Views** and/or **Transformation Flows**:")
     _subbullet(doc, "Set up **Local Tables** for intermediate staging if needed.")
@@ -117,13 +137,18 @@ def _step_by_step_procedure(doc: Document, p: ProcedureModel):
     pass  # <-- remove this pass; keep your original function body
 
 # NEW: ABAP CDS replication guidance
-def _step_by_step_abap_cds(doc: Document, cds: ABAPCDSModel):
+def _step_by_step_abap_cds(doc: Document, cds: ABAPCDSModel, flow: Optional[ReplicationFlowPlan] = None):
     _heading(doc, "Step-by-step set-up in Datasphere (Replication Flow)", 2)
     _bullet(doc, "Create a **Replication Flow**:")
     _subbullet(doc, "Source connection: ABAP/SAP S/4HANA; Container: *CDS Views Enabled for Data Extraction*.")
     _subbullet(doc, f"Add source object: `{cds.name}`.")
     _subbullet(doc, "Target: Local table (new or map to existing). Choose **Load Type**: *Initial and Delta* when CDC is available.")
-    _subbullet(doc, "Optionally tune **Source/Target Thread Limits** and schedule delta frequency.")
+    if flow:
+        _subbullet(doc, f"Planned flow — {describe_flow(flow)}.")
+        if len(flow.entities) > 1:
+            _subbullet(doc, "Replicated together: " + _fmt_list([e.name for e in flow.entities], limit=10))
+    else:
+        _subbullet(doc, "Optionally tune **Source/Target Thread Limits** and schedule delta frequency.")
     _bullet(doc, "Deploy and **Run** the replication flow, then validate row counts against the CDS view output.")
     # Hints
     _heading(doc, "Notes & Considerations", 3)
@@ -135,6 +160,7 @@ def _step_by_step_abap_cds(doc: Document, cds: ABAPCDSModel):
 #############################
 # Main renderer
 #############################
+@timed("docx.render")
 def render_docx_general(
     output_path: str,
     title: Optional[str],
@@ -143,6 +169,8 @@ def render_docx_general(
     procedures: Optional[List[ProcedureModel]] = None,
     graph: Optional[Dict[str, ArtifactNode]] = None,
     abap_cds_list: Optional[List[ABAPCDSModel]] = None,  # NEW
+    summary_workers: Optional[int] = None,
+    table_stats: Optional[Dict[str, TableStats]] = None,
 ):
     """
     Renders a mixed-artifact DOCX guide with a consistent structure across:
@@ -170,12 +198,21 @@ def render_docx_general(
     # -----------------------------
     if abap_cds_list:
         _heading(doc, "ABAP CDS", 1)
+        rf_plan = plan_replication(abap_cds_list, table_stats)
+        if len(abap_cds_list) > 1 or table_stats:
+            _heading(doc, "Replication plan", 2)
+            for flow in rf_plan.flows:
+                _bullet(doc, describe_flow(flow))
+            for name, reason in rf_plan.skipped.items():
+                _bullet(doc, f"Skipped {name}: {reason}")
+            for w in rf_plan.warnings:
+                _bullet(doc, w)
         for cds in abap_cds_list:
             _heading(doc, f"CDS: {cds.name}", 2)
             _heading(doc, "Understanding (plain-English)", 3)
             for s in summarize_abap_cds(cds):
                 _bullet(doc, s)
-            _step_by_step_abap_cds(doc, cds)
+            _step_by_step_abap_cds(doc, cds, rf_plan.flow_of(cds.name))
 
     # -----------------------------
     # Calculation View section
@@ -197,6 +234,20 @@ def render_docx_general(
             _heading(doc, "Source objects (prepare as Remote/Replicated Tables)", 2)
             for ds_id, uri in cv_model.data_sources.items():
                 _bullet(doc, f"{ds_id} → {uri}")
+        if cv_model.nodes:
+            _, prune_report = prune_cv_model(cv_model)
+            _heading(doc, "Optimisation (projection pushdown / dead nodes)", 2)
+            for s in summarize_cv_pruning(prune_report):
+                _bullet(doc, s)
+            _heading(doc, "Filter pushdown", 2)
+            for s in summarize_filter_pushdown(analyze_filter_pushdown(cv_model)):
+                _bullet(doc, s)
+        cv_sql = compile_cv_to_sql(cv_model) if cv_model.nodes else ""
+        if cv_sql:
+            _heading(doc, "Generated SQL View (Datasphere)", 2)
+            _bullet(doc, "Nodes are inlined as CTEs; columns that never reach the logical model are pruned. "
+                         "Paste into a SQL View or import the generated CSN package.")
+            doc.add_paragraph(cv_sql)
         _step_by_step_calc_view(doc, cv_model)
 
 
@@ -209,12 +260,17 @@ def render_docx_general(
     # -----------------------------
     # SQL Views section
     # -----------------------------
+    # Views and procedures are summarized as one batch (parallel for big projects
+    # unless summary_workers=1)
+    batch = summarize_many(list(sql_views or []) + list(procedures or []), max_workers=summary_workers)
+    view_summaries, proc_summaries = batch[:len(sql_views or [])], batch[len(sql_views or []):]
+
     if sql_views:
         _heading(doc, "SQL Views", 1)
-        for v in sql_views:
+        for v, summary in zip(sql_views, view_summaries):
             _heading(doc, f"SQL View: {v.name}", 2)
             _heading(doc, "Understanding (plain-English)", 3)
-            for s in summarize_sql_view(v):
+            for s in summary:
                 _bullet(doc, s)
             if getattr(v, 'inputs', None):
                 _bullet(doc, "Upstream sources: " + _fmt_list(v.inputs))
@@ -234,10 +290,10 @@ def render_docx_general(
     # -----------------------------
     if procedures:
         _heading(doc, "Stored Procedures", 1)
-        for p in procedures:
+        for p, summary in zip(procedures, proc_summaries):
             _heading(doc, f"Procedure: {p.name}", 2)
             _heading(doc, "Understanding (plain-English)", 3)
-            for s in summarize_procedure(p):
+            for s in summary:
                 _bullet(doc, s)
             if getattr(p, 'parameters', None):
                 _bullet(doc, "Parameters: " + ", ".join([f"{x['mode']} {x['name']} {x['type']}" for x in p.parameters]))
@@ -251,7 +307,7 @@ def render_docx_general(
 
 
             # === NEW: tailored steps + notes for Procedure ===
-            _step_by_step_proc_in_datasphere(doc)
+            _step_by_step_proc_in_datasphere(doc, decompose_procedure(p))
             _notes_proc(doc)
 
 
@@ -266,6 +322,21 @@ def render_docx_general(
             node = graph[node_id]
             _bullet(doc, f"{i}. {node_id} ({node.kind})")
 
+        report = estimate_costs(graph, table_stats, cv_model, sql_views)
+        if report.sources:
+            _heading(doc, "Source placement (estimated)", 1)
+            if not table_stats:
+                _bullet(doc, "No table statistics supplied: sizes are defaults; upload a stats file (table, rows, column widths) for real estimates.")
+            for src in report.sources:
+                _bullet(doc, f"{src.source}: **{src.mode}** — {src.reason}")
+            views = [a for a in report.artifacts.values() if a.kind != "Table"]
+            if views:
+                _heading(doc, "Estimated volume per artifact", 2)
+                for a in sorted(views, key=lambda a: -a.remote_bytes)[:25]:
+                    flag = " (defaults)" if a.estimated else ""
+                    _bullet(doc, f"{a.id}: ~{a.rows:,.0f} rows, {format_bytes(a.remote_bytes)} pulled from sources per run, "
+                                 f"join fan-out ×{a.fanout:.2f}, reduction ×{a.reduction:.2f}{flag}")
+
     # Validation & Publish
     _heading(doc, "Validation", 1)
     _bullet(doc, "Compare row counts against the source artifacts for a known time slice.")
@@ -0,0 +1,198 @@
+# hdbcv2dsp/rf_planner.py
+# ======================================================================
+# Replication Flow plan for ABAP CDS extraction
+#  - Volumes come from a stats file (cost_estimate.load_table_stats):
+#    rows x row width = initial load, daily_changes / change_rate = delta
+#    volume; entities without stats get the cost_estimate defaults
+#  - Entities are packed into flows (longest-processing-time first: the
+#    biggest initial load goes to the least loaded flow), enough flows to
+#    keep each under max_objects_per_flow and max_initial_bytes_per_flow;
+#    initial-only entities (no CDC) are packed apart from delta entities
+#  - The thread budget is split over the flows by initial-load share
+#    (1..max_flow_threads each, source and target alike)
+#  - Delta interval: time for an entity to collect delta_batch_rows
+#    changes, snapped down to the standard steps; a flow runs at the
+#    interval of its most volatile entity (entities with known change
+#    rates decide over the default)
+#  - Parameterised CDS entities cannot be replicated and are skipped
+# ======================================================================
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from .cost_estimate import DEFAULT_ROW_BYTES, DEFAULT_ROWS, TableStats, format_bytes
+from .identifiers import NameIndex
+from .instrument import timed
+from .parse_abap_cds import ABAPCDSModel
+
+MAX_OBJECTS_PER_FLOW = 50
+MAX_INITIAL_BYTES_PER_FLOW = 50 * (1 << 30)
+TOTAL_THREADS = 20
+MAX_FLOW_THREADS = 10
+DELTA_BATCH_ROWS = 100_000
+DEFAULT_DELTA_MINUTES = 60
+DELTA_STEPS = (10, 15, 30, 60, 120, 240, 360, 720, 1440)     # minutes
+
+
+@dataclass
+class EntityLoad:
+    name: str
+    rows: float
+    row_bytes: float
+    daily_changes: Optional[float]
+    load_type: str                     # INITIAL | INITIAL_AND_DELTA | DELTA
+    delta_minutes: Optional[int] = None
+    estimated: bool = False            # no stats: default volume
+
+    @property
+    def initial_bytes(self) -> float:
+        return self.rows * self.row_bytes if self.load_type != "DELTA" else 0.0
+
+    def as_dict(self) -> dict:
+        return {"name": self.name, "rows": round(self.rows), "rowBytes": round(self.row_bytes),
+                "initialBytes": round(self.initial_bytes),
+                "dailyChanges": None if self.daily_changes is None else round(self.daily_changes),
+                "loadType": self.load_type, "deltaIntervalMinutes": self.delta_minutes, "estimated": self.estimated}
+
+
+@dataclass
+class ReplicationFlowPlan:
+    name: str
+    entities: List[EntityLoad] = field(default_factory=list)
+    source_threads: int = 1
+    target_threads: int = 1
+    delta_minutes: Optional[int] = None
+
+    @property
+    def initial_bytes(self) -> float:
+        return sum(e.initial_bytes for e in self.entities)
+
+    def as_dict(self) -> dict:
+        return {"name": self.name, "entities": [e.as_dict() for e in self.entities],
+                "initialBytes": round(self.initial_bytes), "sourceThreads": self.source_threads,
+                "targetThreads": self.target_threads, "deltaIntervalMinutes": self.delta_minutes}
+
+
+@dataclass
+class ReplicationPlan:
+    flows: List[ReplicationFlowPlan] = field(default_factory=list)
+    skipped: Dict[str, str] = field(default_factory=dict)        # entity -> reason
+    warnings: List[str] = field(default_factory=list)
+
+    def flow_of(self, entity: str) -> Optional[ReplicationFlowPlan]:
+        return next((f for f in self.flows if any(e.name == entity for e in f.entities)), None)
+
+    def as_dict(self) -> dict:
+        return {"flows": [f.as_dict() for f in self.flows], "skipped": self.skipped, "warnings": self.warnings}
+
+
+def delta_interval(daily_changes: Optional[float], batch_rows: float = DELTA_BATCH_ROWS) -> int:
+    """Minutes until *batch_rows* changes pile up, snapped down to DELTA_STEPS."""
+    if not daily_changes or daily_changes <= 0:
+        return DEFAULT_DELTA_MINUTES if daily_changes is None else DELTA_STEPS[-1]
+    minutes = 24 * 60 * batch_rows / daily_changes
+    return max([s for s in DELTA_STEPS if s <= minutes] or [DELTA_STEPS[0]])
+
+
+def _has_delta(cds: ABAPCDSModel) -> bool:
+    """CDC mapping or another @Analytics.dataExtraction.delta method (e.g. byElement)."""
+    return bool(cds.cdc_annotation) or any(
+        k.lower().startswith("analytics.dataextraction.delta.") for k in (cds.annotations or {}))
+
+
+def _split_threads(flows: List[ReplicationFlowPlan], total: int, cap: int) -> None:
+    """Largest-remainder split of *total* threads by initial-load share (1..cap per flow)."""
+    volume = sum(f.initial_bytes for f in flows)
+    shares = [(f.initial_bytes / volume if volume else 1 / len(flows)) * total for f in flows]
+    threads = [max(1, min(cap, int(s))) for s in shares]
+    order = sorted(range(len(flows)), key=lambda i: shares[i] - int(shares[i]), reverse=True)
+    spare = total - sum(threads)
+    for i in order:
+        if spare <= 0:
+            break
+        if threads[i] < cap:
+            threads[i] += 1
+            spare -= 1
+    for f, t in zip(flows, threads):
+        f.source_threads = f.target_threads = t
+
+
+def _pack(entities: List[EntityLoad], max_objects: int, max_bytes: float) -> List[List[EntityLoad]]:
+    if not entities:
+        return []
+    volume = sum(e.initial_bytes for e in entities)
+    n = max(math.ceil(len(entities) / max_objects), math.ceil(volume / max_bytes) if max_bytes else 1, 1)
+    n = min(n, len(entities))
+    bins: List[List[EntityLoad]] = [[] for _ in range(n)]
+    load = [0.0] * n
+    for e in sorted(entities, key=lambda e: (-e.initial_bytes, e.name)):
+        open_bins = [i for i in range(n) if len(bins[i]) < max_objects] or list(range(n))
+        i = min(open_bins, key=lambda i: (load[i], len(bins[i])))
+        bins[i].append(e)
+        load[i] += e.initial_bytes
+    return [b for b in bins if b]
+
+
+@timed("rf_plan")
+def plan_replication(
+    cds_list: List[ABAPCDSModel],
+    stats: Optional[Dict[str, TableStats]] = None,
+    name: str = "CDS",
+    load_type: str = "INITIAL_AND_DELTA",
+    max_objects_per_flow: int = MAX_OBJECTS_PER_FLOW,
+    max_initial_bytes_per_flow: float = MAX_INITIAL_BYTES_PER_FLOW,
+    total_threads: int = TOTAL_THREADS,
+    max_flow_threads: int = MAX_FLOW_THREADS,
+    delta_batch_rows: float = DELTA_BATCH_ROWS,
+) -> ReplicationPlan:
+    """
+    Group *cds_list* into replication flows. *load_type* is the requested
+    load type (INITIAL_ONLY / INITIAL_AND_DELTA / DELTA_ONLY); entities
+    without CDC fall back to an initial load. A single flow is named
+    RF_<entity>, several RF_<name>_<n>.
+    """
+    plan = ReplicationPlan()
+    stat_names = NameIndex(stats or ())
+    wanted = load_type.upper().replace(" ", "_")
+    loads: List[EntityLoad] = []
+    for cds in cds_list:
+        if cds.parameters:
+            plan.skipped[cds.name] = "has input parameters (not supported by Replication Flows)"
+            continue
+        if not cds.extraction_enabled:
+            plan.warnings.append(f"{cds.name}: @Analytics.dataExtraction.enabled is not set")
+        key = stat_names.resolve(cds.name) or (stat_names.resolve(cds.sql_view_name) if cds.sql_view_name else None)
+        st = (stats or {}).get(key) if key else None
+        if wanted.startswith("INITIAL_ONLY") or wanted == "INITIAL":
+            lt = "INITIAL"
+        elif not _has_delta(cds):
+            lt = "INITIAL"
+            plan.warnings.append(f"{cds.name}: no delta annotation (change data capture / byElement), initial load only")
+        else:
+            lt = "DELTA" if wanted.startswith("DELTA") else "INITIAL_AND_DELTA"
+        e = EntityLoad(name=cds.name, rows=st.rows if st else float(DEFAULT_ROWS),
+                       row_bytes=st.row_bytes if st else float(DEFAULT_ROW_BYTES),
+                       daily_changes=st.daily_changes if st else None, load_type=lt, estimated=st is None)
+        if lt != "INITIAL":
+            e.delta_minutes = delta_interval(e.daily_changes, delta_batch_rows)
+        loads.append(e)
+
+    groups = _pack([e for e in loads if e.load_type != "INITIAL"], max_objects_per_flow, max_initial_bytes_per_flow)
+    groups += _pack([e for e in loads if e.load_type == "INITIAL"], max_objects_per_flow, max_initial_bytes_per_flow)
+    for i, members in enumerate(groups, 1):
+        flow_name = f"RF_{members[0].name}" if len(groups) == 1 and len(members) == 1 else f"RF_{name}_{i:02d}"
+        deltas = [e.delta_minutes for e in members if e.delta_minutes and e.daily_changes is not None]
+        deltas = deltas or [e.delta_minutes for e in members if e.delta_minutes]
+        plan.flows.append(ReplicationFlowPlan(name=flow_name, entities=sorted(members, key=lambda e: e.name),
+                                              delta_minutes=min(deltas) if deltas else None))
+    if plan.flows:
+        _split_threads(plan.flows, max(total_threads, len(plan.flows)), max_flow_threads)
+    return plan
+
+
+def describe_flow(flow: ReplicationFlowPlan) -> str:
+    delta = f", delta every {flow.delta_minutes} min" if flow.delta_minutes else ", initial load only"
+    return (f"{flow.name}: {len(flow.entities)} object(s), {format_bytes(flow.initial_bytes)} initial load, "
+            f"source/target thread limit {flow.source_threads}/{flow.target_threads}{delta}")
@@ -0,0 +1,93 @@
+# hdbcv2dsp/source_io.py
+# ======================================================================
+# Shared input layer for all parsers
+#  - Sources can be a file path, raw bytes (e.g. a Streamlit upload) or
+#    an mmap; nothing is written to temp files
+#  - BOM / encoding detection: UTF-8 (with or without BOM), UTF-16/32
+#    LE/BE (SSMS exports), falling back to cp1252 instead of dropping bytes
+#  - Files are memory-mapped and decoded straight from the mapping, so
+#    a large dump exists once as text and not additionally as bytes
+# ======================================================================
+from __future__ import annotations
+
+import codecs
+import mmap
+import os
+from typing import Optional, Tuple, Union
+
+from .instrument import count
+
+SourceLike = Union[str, "os.PathLike[str]", bytes, bytearray, memoryview, mmap.mmap]
+
+_BOMS = (  # longest first: the UTF-32 LE BOM starts with the UTF-16 LE one
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+_SNIFF_BYTES = 4096
+
+
+def detect_encoding(data: Union[bytes, bytearray, memoryview, mmap.mmap]) -> Tuple[str, int]:
+    """Return (encoding, BOM length) for a byte buffer."""
+    head = bytes(data[:_SNIFF_BYTES])
+    for bom, enc in _BOMS:
+        if head.startswith(bom):
+            return enc, len(bom)
+    # BOM-less UTF-16: ASCII-heavy SQL/XML has a NUL in every other byte
+    if len(head) >= 4:
+        even_nul = head[0::2].count(0)
+        odd_nul = head[1::2].count(0)
+        half = len(head) // 2
+        if odd_nul > half * 0.6 and even_nul < half * 0.1:
+            return "utf-16-le", 0
+        if even_nul > half * 0.6 and odd_nul < half * 0.1:
+            return "utf-16-be", 0
+    return "utf-8", 0
+
+
+def decode_bytes(data: Union[bytes, bytearray, memoryview, mmap.mmap],
+                 encoding: Optional[str] = None) -> str:
+    """
+    Decode a buffer without silently losing bytes: detected/declared encoding
+    first, then cp1252 (Windows exports), then latin-1 (never fails).
+    """
+    bom = 0
+    if encoding is None:
+        encoding, bom = detect_encoding(data)
+    view = memoryview(data)[bom:]
+    try:
+        for enc in (encoding, "cp1252"):
+            try:
+                return str(view, enc)
+            except UnicodeDecodeError:
+                continue
+        return str(view, "latin-1")
+    finally:
+        view.release()
+
+
+def is_path(source: SourceLike) -> bool:
+    return isinstance(source, (str, os.PathLike))
+
+
+def read_text(source: SourceLike, encoding: Optional[str] = None) -> str:
+    """Text of a path / bytes / mmap source (files are decoded from a memory map)."""
+    if not is_path(source):
+        count("bytes_read", len(source))
+        return decode_bytes(source, encoding)
+    with open(source, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        count("bytes_read", size)
+        if size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return decode_bytes(mm, encoding)
+
+
+def read_source(source: SourceLike, encoding: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """(text, origin path or None) — parsers keep the path for lazy re-reads."""
+    path = os.fspath(source) if is_path(source) else None
+    return read_text(source, encoding), path
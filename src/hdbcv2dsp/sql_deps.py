@@ -0,0 +1,427 @@
+# hdbcv2dsp/sql_deps.py
+# ======================================================================
+# Scope-aware dependency extraction (views and SQLScript procedures)
+#  - One pass over the sql_tokens() stream; names defined inside the
+#    text are tracked per scope and never reported as dependencies:
+#      WITH cte AS (...)                 statement scope
+#      lt = SELECT ..., DECLARE lt TABLE  BEGIN ... END block scope
+#      IN/OUT table parameters            procedure scope
+#      #temp, CREATE ... TEMPORARY TABLE  session (whole text)
+#      DECLARE CURSOR c / c CURSOR        block scope
+#  - :var references, @variables and built-in table functions
+#    (STRING_SPLIT, SERIES_GENERATE_*, ...) are never objects
+#  - What is left are the external reads / writes / calls, in canonical
+#    spelling (see identifiers)
+#  - The same pass cuts the text into statements (at ';', BEGIN/END,
+#    IF ... THEN / ELSE, and statement verbs at the top level) and keeps
+#    per statement which local objects it reads and produces; this is
+#    the dataflow proc_flow builds its stage DAG from
+# ======================================================================
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from .identifiers import canonical_name
+from .instrument import timed
+from .sql_text import paren_pairs, sql_tokens
+
+Token = Tuple[str, object]
+
+# table functions that read no catalog object
+_BUILTIN_TABLE_FUNCS = frozenset("""
+    STRING_SPLIT SERIES_GENERATE_INTEGER SERIES_GENERATE_DECIMAL SERIES_GENERATE_DATE
+    SERIES_GENERATE_TIME SERIES_GENERATE_TIMESTAMP UNNEST JSON_TABLE XMLTABLE OPENJSON
+    APPLY_FILTER MAP_MERGE MAP_REDUCE RECORD_COUNT
+""".split())
+# functions whose argument list uses FROM as a keyword: EXTRACT(YEAR FROM d)
+_FROM_ARG_FUNCS = frozenset("EXTRACT TRIM SUBSTRING SUBSTR POSITION OVERLAY".split())
+# END <word> closes a statement that opened no block
+_END_NO_BLOCK = frozenset("IF FOR WHILE LOOP REPEAT".split())
+# verbs that start a new statement at the top level even without a ';' before them
+_VERBS = frozenset("INSERT UPDATE DELETE MERGE UPSERT TRUNCATE CREATE DROP DECLARE CALL EXEC EXECUTE".split())
+_SCALAR_KINDS = ("variable", "cursor")
+
+
+@dataclass
+class SQLStatement:
+    text: str
+    verb: str                                             # first word; ASSIGN for lt = ...
+    reads: List[str] = field(default_factory=list)        # external objects
+    writes: List[str] = field(default_factory=list)
+    calls: List[str] = field(default_factory=list)
+    uses: List[str] = field(default_factory=list)         # local objects read (temp tables, table variables, parameters)
+    defines: List[str] = field(default_factory=list)      # local objects produced or modified
+
+
+@dataclass
+class SQLDependencies:
+    reads: List[str] = field(default_factory=list)
+    writes: List[str] = field(default_factory=list)
+    calls: List[str] = field(default_factory=list)
+    local: Dict[str, str] = field(default_factory=dict)   # name -> cte | table_variable | variable | parameter | temp_table | cursor
+    statements: List[SQLStatement] = field(default_factory=list)   # data statements only (control flow dropped)
+
+    def names(self, kind: str) -> List[str]:
+        return sorted(n for n, k in self.local.items() if k == kind)
+
+
+def _word(tok: Optional[Token]) -> str:
+    """Upper-cased keyword or single-part identifier ('' otherwise)."""
+    if tok is None:
+        return ""
+    kind, value = tok
+    if kind == "kw":
+        return value
+    if kind == "ref" and len(value) == 1:
+        return value[0].upper()
+    return ""
+
+
+def _ref_name(tok: Token) -> str:
+    return ".".join(tok[1]) if tok[0] == "ref" else ""
+
+
+class _Scanner:
+    def __init__(self, text: str):
+        self.text = text
+        self.spans: List[Tuple[int, int]] = []
+        self.toks = sql_tokens(text, self.spans)
+        self.n = len(self.toks)
+        self.closes = paren_pairs(self.toks)              # '(' -> its ')' (unbalanced: absent)
+        self.session: Dict[str, str] = {}              # temp tables, parameters
+        self.blocks: List[Optional[Dict[str, str]]] = [{}]   # BEGIN ... END scopes (CASE markers are None)
+        self.ctes: Dict[str, str] = {}                 # current statement
+        self.parens: List[str] = []                    # function name per open '('
+        self.reads: Set[str] = set()
+        self.writes: Set[str] = set()
+        self.calls: Set[str] = set()
+        self.local: Dict[str, str] = {}                # first spelling -> kind
+        self._local_keys: Set[str] = set()
+        self.statements: List[SQLStatement] = []
+        self.first: Optional[int] = None               # first token of the current statement
+        self.cur: Dict[str, Dict[str, None]] = {}      # current statement: field -> ordered set
+
+    # ------------------------------------------------------------------
+    # Names
+    # ------------------------------------------------------------------
+    def _note(self, name: str, kind: str) -> None:
+        if name.upper() not in self._local_keys:
+            self._local_keys.add(name.upper())
+            self.local[name] = kind
+
+    def _define(self, name: str, kind: str, scope: Optional[Dict[str, str]] = None, produced: bool = True) -> None:
+        key = name.upper()
+        if scope is None:
+            scope = next(b for b in reversed(self.blocks) if b is not None)
+        scope.setdefault(key, kind)
+        self._note(name, kind)
+        if produced:
+            self._add("defines", name)
+
+    def _kind(self, name: str) -> Optional[str]:
+        key = name.upper()
+        if key in self.ctes:
+            return "cte"
+        for b in reversed(self.blocks):
+            if b is not None and key in b:
+                return b[key]
+        if key in self.session:
+            return self.session[key]
+        if key[:1] == "#":
+            return "temp_table"
+        if key[:1] == "@":
+            return "variable"
+        return None
+
+    def _is_local(self, name: str) -> bool:
+        return self._kind(name) is not None
+
+    def _add(self, what: str, name: str) -> None:
+        self.cur.setdefault(what, {})[name] = None
+        if what in ("reads", "writes", "calls"):
+            getattr(self, what).add(name)
+
+    def _use(self, name: str) -> None:
+        if self._kind(name) not in (None, "cte") + _SCALAR_KINDS:
+            self._add("uses", name)
+
+    def _object(self, i: int) -> Optional[str]:
+        """External object named at token *i* (None for locals, variables, non-names)."""
+        if i >= self.n or self.toks[i][0] != "ref":
+            return None
+        if i > 0 and self.toks[i - 1] == ("op", ":"):
+            return None
+        name = _ref_name(self.toks[i])
+        return None if self._is_local(name) else canonical_name(name)
+
+    def _write(self, i: int) -> None:
+        """Write target at token *i*: an external write, or a modified local."""
+        if i >= self.n or self.toks[i][0] != "ref":
+            return
+        name = _ref_name(self.toks[i])
+        target = self._object(i)
+        if target:
+            self._add("writes", target)
+        elif self._kind(name) not in (None, "cte"):
+            self._use(name)
+            self._add("defines", name)
+
+    # ------------------------------------------------------------------
+    # Statements
+    # ------------------------------------------------------------------
+    def _close(self, end: int) -> None:
+        """End the current statement before token *end*."""
+        if self.first is not None and end > self.first:
+            cur = self.cur
+            if any(cur.get(k) for k in ("reads", "writes", "calls", "uses", "defines")):
+                first_tok = self.toks[self.first]
+                assign = first_tok[0] == "ref" and self.first + 1 < self.n \
+                    and self.toks[self.first + 1] in (("op", "="), ("op", ":"))
+                self.statements.append(SQLStatement(
+                    text=self.text[self.spans[self.first][0]:self.spans[end - 1][1]].strip(),
+                    verb="ASSIGN" if assign else _word(first_tok),
+                    **{k: list(cur.get(k, {})) for k in ("reads", "writes", "calls", "uses", "defines")},
+                ))
+        self.first = None
+        self.cur = {}
+        self.ctes = {}
+
+    # ------------------------------------------------------------------
+    def run(self) -> None:
+        toks, n = self.toks, self.n
+        in_header = True            # procedure / view signature, before AS or the first BEGIN
+        control_then = False        # IF / ELSEIF condition pending: its THEN opens a statement
+        i = 0
+        while i < n:
+            tok = toks[i]
+            kind, value = tok
+            if kind in ("num", "str") or (kind == "op" and value not in ("(", ")", ";")):
+                if self.first is None:
+                    self.first = i
+                if value == ":" and i + 1 < n and toks[i + 1][0] == "ref":
+                    self._use(_ref_name(toks[i + 1]))
+                i += 1
+                continue
+            word = _word(tok)
+            nxt = toks[i + 1] if i + 1 < n else None
+            prev = _word(toks[i - 1]) if i else ""
+
+            # ---- statement boundaries (the boundary token belongs to no statement)
+            if tok == ("op", ";"):
+                self._close(i)
+                i += 1
+                continue
+            if word == "BEGIN" and _word(nxt) not in ("TRAN", "TRANSACTION"):
+                self._close(i)
+                in_header = False
+                self.blocks.append({})
+                i += 1
+                continue
+            if word == "END" and (self.blocks[-1] is not None or _word(nxt) == "CASE") \
+                    and (len(self.blocks) > 1 or _word(nxt) in _END_NO_BLOCK):
+                self._close(i)
+                if _word(nxt) in _END_NO_BLOCK:
+                    i += 1
+                else:
+                    self.blocks.pop()
+                    if _word(nxt) == "CASE":
+                        i += 1
+                i += 1
+                continue
+            if (word == "THEN" and control_then) or (word == "ELSE" and self.blocks[-1] is not None) \
+                    or word in ("DO", "LOOP") or (word == "AS" and in_header and not self.parens):
+                self._close(i)
+                control_then = False
+                if word == "AS":
+                    in_header = False
+                i += 1
+                continue
+            if word in _VERBS and not self.parens and self.first is not None \
+                    and prev not in ("THEN", "ELSE", "FOR", "ON"):
+                self._close(i)
+
+            start = self.first is None
+            if start:
+                self.first = i
+
+            if tok == ("op", "("):
+                self.parens.append(_word(toks[i - 1]) if i and toks[i - 1][0] == "ref" else "")
+            elif tok == ("op", ")"):
+                if self.parens:
+                    self.parens.pop()
+            elif word == "CASE":
+                self.blocks.append(None)
+            elif word == "END":
+                if self.blocks[-1] is None:
+                    self.blocks.pop()          # CASE ... END expression
+            elif word in ("IF", "ELSEIF") and (start or word == "ELSEIF"):
+                control_then = True
+            elif in_header and word in ("IN", "OUT", "INOUT") and nxt and nxt[0] == "ref":
+                self._define(_ref_name(nxt), "parameter", self.session, produced=False)
+            elif word == "WITH":
+                i = self._with(i)
+                continue
+            elif word == "DECLARE":
+                self._declare(i)
+            elif start and kind == "ref" and len(value) == 1 and (
+                    nxt == ("op", "=") or (nxt == ("op", ":") and i + 2 < n and toks[i + 2] == ("op", "="))):
+                k = i + 2 + (nxt == ("op", ":"))
+                rhs = toks[k] if k < n else None
+                table = rhs in (("kw", "SELECT"), ("op", ":")) or _word(rhs) in _BUILTIN_TABLE_FUNCS
+                self._define(value[0], "table_variable" if table else "variable")
+            elif word in ("FROM", "JOIN", "USING"):
+                if not (self.parens and self.parens[-1] in _FROM_ARG_FUNCS):
+                    i = self._from_items(i + 1, write=word == "FROM" and prev == "DELETE")
+                    continue
+            elif word == "INTO":
+                self._into(i)
+            elif word in ("UPDATE", "UPSERT", "TRUNCATE"):
+                j = i + 1 + (_word(nxt) == "TABLE")
+                if j < n and _word(toks[j]) != "SET" and prev != "FOR":
+                    self._write(j)
+            elif word == "CREATE":
+                self._create(i)
+            elif word in ("CALL", "EXEC", "EXECUTE"):
+                j = i + 1
+                if j < n and toks[j][0] == "ref" and not _ref_name(toks[j]).startswith("@"):
+                    self._add("calls", canonical_name(_ref_name(toks[j])))
+            i += 1
+        self._close(n)
+
+    # ------------------------------------------------------------------
+    def _with(self, i: int) -> int:
+        """WITH name [(cols)] AS (...) [, ...]: register the CTE names; returns the next index to scan."""
+        toks, n = self.toks, self.n
+        j = i + 1
+        if j < n and _word(toks[j]) == "RECURSIVE":
+            j += 1
+        if not (j < n and toks[j][0] == "ref" and len(toks[j][1]) == 1):
+            return i + 1            # WITH HINT(...), WITH (NOLOCK), ...
+        k = j + 1
+        if k < n and toks[k] == ("op", "("):           # column list
+            k = self.closes.get(k, n) + 1
+        if not (k < n and toks[k] == ("kw", "AS")):
+            return i + 1
+        self.ctes[toks[j][1][0].upper()] = "cte"
+        self._note(toks[j][1][0], "cte")
+        # later CTEs of the same WITH list: ", name [(cols)] AS (" at this depth
+        depth, m = 0, k
+        while m + 1 < n:
+            m += 1
+            t = toks[m]
+            if t == ("op", "("):
+                m = self.closes.get(m, n)
+            elif t == ("op", ")"):
+                depth -= 1
+            elif depth == 0 and t == ("op", ",") and m + 2 < n and toks[m + 1][0] == "ref" \
+                    and toks[m + 2] in (("kw", "AS"), ("op", "(")):
+                name = toks[m + 1][1][0]
+                self.ctes[name.upper()] = "cte"
+                self._note(name, "cte")
+            elif depth == 0 and (t[0] == "kw" and t[1] != "AS" or t == ("op", ";")):
+                break       # main query
+        return k + 1
+
+    def _declare(self, i: int) -> None:
+        toks, n = self.toks, self.n
+        j = i + 1
+        if j < n and _word(toks[j]) == "CURSOR" and j + 1 < n and toks[j + 1][0] == "ref":
+            self._define(_ref_name(toks[j + 1]), "cursor", produced=False)     # DECLARE CURSOR c FOR
+        elif j < n and toks[j][0] == "ref":
+            kind = {"CURSOR": "cursor", "TABLE": "table_variable"}.get(_word(toks[j + 1]) if j + 1 < n else "", "variable")
+            self._define(_ref_name(toks[j]), kind, produced=False)             # DECLARE lt TABLE (...), lv INT
+
+    def _from_items(self, j: int, write: bool = False) -> int:
+        """FROM a [AS x], b, c JOIN ...: record each object; returns the index after the list."""
+        toks, n = self.toks, self.n
+        while j < n:
+            if toks[j] == ("op", ":"):
+                if j + 1 < n and toks[j + 1][0] == "ref":
+                    self._use(_ref_name(toks[j + 1]))
+                j += 2                               # :table_variable
+            elif toks[j][0] == "ref":
+                name = _ref_name(toks[j])
+                if j + 1 < n and toks[j + 1] == ("op", "("):
+                    if name.upper() not in _BUILTIN_TABLE_FUNCS and not self._is_local(name):
+                        self._add("calls", canonical_name(name))      # table function
+                    return j                         # its '(' is scanned normally
+                if write:
+                    self._write(j)
+                else:
+                    target = self._object(j)
+                    if target:
+                        self._add("reads", target)
+                    else:
+                        self._use(name)
+                j += 1
+            else:
+                return j                             # (subquery, keyword, ...
+            if j < n and toks[j] == ("kw", "AS"):
+                j += 1
+            if j < n and toks[j][0] == "ref" and len(toks[j][1]) == 1 and toks[j + 1:j + 2] != [("op", "(")]:
+                j += 1                               # alias
+            if j < n and toks[j] == ("op", ","):
+                j += 1
+                continue
+            return j
+        return j
+
+    def _into(self, i: int) -> None:
+        """INSERT/MERGE INTO t writes t; SELECT ... INTO #t / lv defines a local."""
+        toks, n = self.toks, self.n
+        j = i + 1
+        if j >= n or toks[j][0] != "ref":
+            return
+        before = _word(toks[i - 1]) if i else ""
+        name = _ref_name(toks[j])
+        if before in ("INSERT", "MERGE", "UPSERT", "REPLACE"):
+            if name.startswith("#"):
+                self._define(name, "temp_table", self.session, produced=False)
+            self._write(j)
+        elif name.startswith("#"):
+            self._define(name, "temp_table", self.session)
+        elif len(toks[j][1]) == 1 and not self._is_local(name):
+            self._define(name, "variable")           # SELECT ... INTO lv
+        elif self._is_local(name):
+            self._add("defines", name)
+
+    def _create(self, i: int) -> None:
+        """CREATE [LOCAL|GLOBAL] [TEMPORARY] [COLUMN|ROW] TABLE t: temp tables are local, others writes."""
+        toks, n = self.toks, self.n
+        j = i + 1
+        temporary = False
+        while j < n and _word(toks[j]) in ("LOCAL", "GLOBAL", "TEMPORARY", "TEMP", "COLUMN", "ROW", "VIRTUAL"):
+            temporary = temporary or _word(toks[j]) in ("TEMPORARY", "TEMP")
+            j += 1
+        if not (j + 1 < n and _word(toks[j]) == "TABLE" and toks[j + 1][0] == "ref"):
+            return
+        name = _ref_name(toks[j + 1])
+        # CTAS (... [(cols)] [WITH (...)] AS SELECT) produces rows; a plain column list only a shape
+        k, ctas = j + 2, False
+        while k < n:
+            if toks[k] == ("op", "("):
+                k = self.closes.get(k, n) + 1
+            elif _word(toks[k]) == "WITH":
+                k += 1
+            else:
+                ctas = _word(toks[k]) == "AS"
+                break
+        if temporary or name.startswith("#"):
+            self._define(name, "temp_table", self.session, produced=ctas)
+        else:
+            self._write(j + 1)
+
+
+@timed("sql_deps")
+def sql_dependencies(text: str) -> SQLDependencies:
+    """External reads / writes / calls of a view or procedure text, local names excluded."""
+    scanner = _Scanner(text or "")
+    scanner.run()
+    return SQLDependencies(
+        reads=sorted(scanner.reads),
+        writes=sorted(scanner.writes),
+        calls=sorted(scanner.calls),
+        local=scanner.local,
+        statements=scanner.statements,
+    )
@@ -0,0 +1,231 @@
+# hdbcv2dsp/sql_text.py
+# ======================================================================
+# Linear-time scanning helpers for SQL / CDS text
+#  - sql_tokens: the shared SQL tokenizer (one _TOKEN_RE pass; keywords,
+#    dotted identifier chains joined into one ref, optional text spans)
+#  - One regex pass that only stops at the characters that matter
+#    (quotes, comments, brackets, the separators); every match consumes
+#    its text, so nothing is ever re-scanned: O(n) whatever the input
+#  - Strings '..' (doubled '' inside), quoted identifiers ".." and `..`,
+#    -- / // line comments and /* */ block comments are opaque; an
+#    unterminated string or comment runs to the end of the text
+#  - Depth counts ( [ { together; a stray closer never drives it below 0
+#  - split_top_level / find_top_level: separators (characters or whole
+#    keywords such as AND / OR) outside brackets;
+#    matching_close: bracket matcher on text, paren_pairs on sql_tokens
+#  - sql_clauses: select list and WHERE / GROUP BY / HAVING / ORDER BY of
+#    the outermost query, from one token pass
+# ======================================================================
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Pattern, Sequence, Tuple
+
+from .instrument import count
+
+# leading whitespace is consumed with each token (no separate whitespace matches)
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+      (?P<skip>--[^\n]*|//[^\n]*|/\*.*?(?:\*/|\Z))
+    | (?P<str>N?'(?:[^']|'')*')
+    | (?P<qid>"(?:[^"]|"")+"|\[[^\[\]]+\]|`[^`]+`)
+    | (?P<num>\d+\.\d*|\.\d+|\d+)
+    | (?P<id>[A-Za-z_#@$][\w#@$]*)
+    | (?P<op><>|!=|<=|>=|\|\||[=<>+\-*/(),.;:])
+    )""", re.X | re.S)
+
+_KEYWORDS = frozenset("""
+    ALL ALTER AND ANY AS ASC BEGIN BETWEEN BY CALL CASE CAST COLUMN CREATE CROSS
+    CURRENT_DATE CURRENT_TIME CURRENT_TIMESTAMP DATE DECLARE DEFAULT DELETE DESC DISTINCT DO ELSE ELSEIF END
+    ESCAPE EXCEPT EXISTS FALSE FETCH FIRST FOR FROM FULL GROUP HAVING IF IN INNER
+    INSERT INTERSECT INTO IS JOIN LAST LATERAL LEFT LIKE LIMIT MERGE MINUS NOT NULL
+    NULLS OFFSET ON OR ORDER OUTER OVER PARTITION PROCEDURE REPLACE RETURN RIGHT ROWS
+    SELECT SET SOME TABLE THEN TIMESTAMP TOP TRUE UNION UPDATE USING VALUES VIEW WHEN
+    WHERE WHILE WITH
+""".split())
+
+_OPAQUE = r"""'(?:[^']|'')*'?|"(?:[^"]|"")*"?|`[^`]*`?|--[^\n]*|//[^\n]*|/\*.*?(?:\*/|\Z)"""
+_OPEN = frozenset("([{")
+_CLOSE = frozenset(")]}")
+_PAIRS = {"(": ")", "[": "]", "{": "}"}
+
+
+@lru_cache(maxsize=None)
+def _scanner(stops: str, words: Tuple[str, ...] = ()) -> Pattern[str]:
+    seps = f"|[{re.escape(stops)}]" if stops else ""
+    if words:
+        seps += r"|\b(?:" + "|".join(map(re.escape, words)) + r")\b"
+    return re.compile(f"{_OPAQUE}|[()\\[\\]{{}}]{seps}", re.S | re.I)
+
+
+# ('ref', parts) identifiers incl. dotted chains, ('kw', WORD), ('num', text),
+# ('str', text), ('op', text)
+
+def sql_tokens(text: str, spans: Optional[List[Tuple[int, int]]] = None) -> List[Tuple[str, object]]:
+    """Token list of a SQL text (comments dropped, dotted identifier chains joined).
+
+    With a *spans* list, the (start, end) text offsets of every token are appended to it.
+    """
+    count("regex_passes")
+    out: List[Tuple[str, object]] = []
+    for m in _TOKEN_RE.finditer(text):
+        kind = m.lastgroup
+        if kind == "skip":
+            continue
+        value = m.group(kind)
+        if kind in ("id", "qid"):
+            if kind == "id" and value.upper() in _KEYWORDS:
+                out.append(("kw", value.upper()))
+                if spans is not None:
+                    spans.append(m.span(kind))
+                continue
+            part = value[1:-1] if kind == "qid" else value
+            # join a dotted chain: "S"."T"."C" -> one ref
+            if len(out) >= 2 and out[-1] == ("op", ".") and out[-2][0] == "ref":
+                out.pop()
+                _, parts = out.pop()
+                out.append(("ref", parts + (part,)))
+                if spans is not None:
+                    spans.pop()
+                    spans[-1] = (spans[-1][0], m.end(kind))
+                continue
+            out.append(("ref", (part,)))
+        else:
+            out.append((kind, value))
+        if spans is not None:
+            spans.append(m.span(kind))
+    return out
+
+
+def split_top_level(text: str, sep: str = ",") -> List[str]:
+    """Parts of *text* between the *sep* outside brackets, strings and comments (stripped, empties dropped).
+
+    *sep* is one character or a keyword such as "AND" (whole word, any case).
+    """
+    word = len(sep) > 1
+    parts: List[str] = []
+    depth, start = 0, 0
+    for m in (_scanner("", (sep,)) if word else _scanner(sep)).finditer(text):
+        tok = m.group()
+        if (tok.upper() == sep.upper()) if word else tok == sep:
+            if depth == 0:
+                parts.append(text[start:m.start()])
+                start = m.end()
+        elif tok in _OPEN:
+            depth += 1
+        elif tok in _CLOSE:
+            depth = max(depth - 1, 0)
+    parts.append(text[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def find_top_level(text: str, start: int = 0, stops: str = ",", words: Tuple[str, ...] = ()) -> int:
+    """Index of the first of *stops* (characters) or *words* (keywords, any case) outside brackets from *start*,
+    or of the first closer without opener; len(text) if none."""
+    depth, words_upper = 0, tuple(w.upper() for w in words)
+    for m in _scanner(stops, words_upper).finditer(text, start):
+        tok = m.group()
+        if tok in _OPEN:
+            depth += 1
+        elif tok in _CLOSE:
+            if depth == 0:
+                return m.start()
+            depth -= 1
+        elif depth == 0 and ((len(tok) == 1 and tok in stops) or tok.upper() in words_upper):
+            return m.start()
+    return len(text)
+
+
+def matching_close(text: str, open_pos: int) -> int:
+    """Index of the bracket closing text[open_pos] ('(', '[' or '{'), skipping strings and comments; -1 if unbalanced."""
+    opener = text[open_pos]
+    closer = _PAIRS[opener]
+    depth = 0
+    for m in _scanner("").finditer(text, open_pos):
+        tok = m.group()
+        if tok == opener:
+            depth += 1
+        elif tok == closer:
+            depth -= 1
+            if depth == 0:
+                return m.start()
+    return -1
+
+
+def paren_pairs(tokens: Sequence[Tuple[str, object]]) -> Dict[int, int]:
+    """Index of the matching ')' per '(' token of a sql_tokens() list (unbalanced: absent)."""
+    out: Dict[int, int] = {}
+    opened: List[int] = []
+    for i, tok in enumerate(tokens):
+        if tok == ("op", "("):
+            opened.append(i)
+        elif tok == ("op", ")") and opened:
+            out[opened.pop()] = i
+    return out
+
+
+@dataclass
+class SQLClauses:
+    columns: List[str] = field(default_factory=list)    # select list items
+    where: Optional[str] = None
+    group_by: Optional[str] = None
+    having: Optional[str] = None
+    order_by: Optional[str] = None
+
+
+# a clause runs up to the next of these at its own bracket level (or ';' / the enclosing ')')
+_CLAUSE_ENDS = {
+    "WHERE": ("GROUP", "HAVING", "ORDER", "LIMIT", "UNION", "INTERSECT", "EXCEPT", "MINUS", "WITH"),
+    "GROUP": ("HAVING", "ORDER", "LIMIT", "UNION", "INTERSECT", "EXCEPT", "MINUS", "WITH"),
+    "HAVING": ("ORDER", "LIMIT", "UNION", "INTERSECT", "EXCEPT", "MINUS", "WITH"),
+    "ORDER": ("LIMIT", "OFFSET", "FETCH", "UNION", "INTERSECT", "EXCEPT", "MINUS", "WITH"),
+}
+
+
+def sql_clauses(sql: str) -> SQLClauses:
+    """Clauses of the outermost query of *sql* (the first SELECT at the lowest bracket level)."""
+    spans: List[Tuple[int, int]] = []
+    toks = sql_tokens(sql, spans)
+    depth, depths = 0, []
+    for tok in toks:
+        if tok == ("op", ")"):
+            depth = max(depth - 1, 0)
+        depths.append(depth)
+        if tok == ("op", "("):
+            depth += 1
+    selects = [i for i, tok in enumerate(toks) if tok == ("kw", "SELECT")]
+    out = SQLClauses()
+    if not selects:
+        return out
+    level = min(depths[i] for i in selects)
+    sel = next(i for i in selects if depths[i] == level)
+
+    def text(a: int, b: int) -> str:
+        return sql[spans[a][0]:spans[b - 1][1]].strip() if b > a else ""
+
+    frm = next((j for j in range(sel + 1, len(toks)) if depths[j] == level and toks[j] == ("kw", "FROM")), None)
+    if frm is not None:
+        out.columns = split_top_level(sql[spans[sel][1]:spans[frm][0]])
+
+    found: Dict[str, str] = {}
+    i = sel + 1
+    while i < len(toks) and depths[i] >= level and toks[i] != ("op", ";"):
+        word = toks[i][1] if toks[i][0] == "kw" and depths[i] == level else None
+        if word not in _CLAUSE_ENDS or word in found:
+            i += 1
+            continue
+        start = i + 2 if word in ("GROUP", "ORDER") else i + 1
+        if word in ("GROUP", "ORDER") and toks[i + 1:i + 2] != [("kw", "BY")]:
+            i += 1
+            continue
+        j = start
+        while j < len(toks) and not (depths[j] < level or toks[j] == ("op", ";")
+                                     or (depths[j] == level and toks[j][0] == "kw" and toks[j][1] in _CLAUSE_ENDS[word])):
+            j += 1
+        found[word] = text(start, j)
+        i = j
+    out.where, out.group_by = found.get("WHERE"), found.get("GROUP")
+    out.having, out.order_by = found.get("HAVING"), found.get("ORDER")
+    return out
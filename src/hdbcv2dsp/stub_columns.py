@@ -0,0 +1,299 @@
+# hdbcv2dsp/stub_columns.py
+# ======================================================================
+# Stub-table columns from usage
+#  - Base sources without an uploaded schema are still referenced by the
+#    parsed views, procedures and CV mappings; every reference names a
+#    column and its context usually hints at the type:
+#      SUM(x), x * 2, x > 10.5         -> numeric
+#      x = 'A', x LIKE ..., UPPER(x)   -> string
+#      x >= CURRENT_DATE, YEAR(x)      -> date / timestamp
+#      a.x = b.y                       -> same type as b.y (unified at the end)
+#  - One pass over the project: each statement is tokenised once, its
+#    FROM/JOIN aliases are resolved against a single name index of the
+#    stub sources, and evidence is folded per (source, column)
+#  - Unqualified columns are only attributed when a statement reads from
+#    exactly one source
+# ======================================================================
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .identifiers import NameIndex
+from .instrument import timed
+from .parse_cv import CVModel
+from .sql_text import sql_tokens
+
+_NUMERIC_FUNCS = frozenset("SUM AVG STDDEV VAR VARIANCE ROUND ABS FLOOR CEIL POWER SQRT MOD SIGN LN LOG "
+                           "TO_DECIMAL TO_DOUBLE TO_INTEGER TO_BIGINT".split())
+_STRING_FUNCS = frozenset("UPPER LOWER UCASE LCASE SUBSTRING SUBSTR LEFT RIGHT TRIM LTRIM RTRIM LPAD RPAD "
+                          "CONCAT LENGTH LOCATE INSTR REPLACE TO_NVARCHAR TO_VARCHAR".split())
+_DATE_FUNCS = frozenset("YEAR MONTH DAYOFMONTH DAYOFYEAR WEEK WEEKDAY QUARTER ADD_DAYS ADD_MONTHS "
+                        "ADD_YEARS ADD_WORKDAYS DAYS_BETWEEN MONTHS_BETWEEN YEARS_BETWEEN LAST_DAY".split())
+_TIMESTAMP_FUNCS = frozenset("HOUR MINUTE SECOND ADD_SECONDS SECONDS_BETWEEN NANO100_BETWEEN".split())
+
+_COMPARISON = frozenset(["=", "<>", "!=", "<", ">", "<=", ">="])
+_ARITHMETIC = frozenset(["+", "-", "*", "/"])
+
+_ELEMENTS = {
+    "cds.String": {"type": "cds.String", "length": 500},
+    "cds.Integer": {"type": "cds.Integer"},
+    "cds.Decimal": {"type": "cds.Decimal", "precision": 38, "scale": 10},
+    "cds.Date": {"type": "cds.Date"},
+    "cds.Timestamp": {"type": "cds.Timestamp"},
+}
+
+
+def _merge_type(a: Optional[str], b: Optional[str]) -> Optional[str]:
+    """Widest type both pieces of evidence fit in (conflicts fall back to String)."""
+    if a is None or a == b:
+        return b
+    if b is None:
+        return a
+    pair = {a, b}
+    if pair == {"cds.Integer", "cds.Decimal"}:
+        return "cds.Decimal"
+    if pair == {"cds.Date", "cds.Timestamp"}:
+        return "cds.Timestamp"
+    return "cds.String"
+
+
+def _statements(tokens: List[Tuple[str, object]]) -> Iterable[List[Tuple[str, object]]]:
+    start = 0
+    for i, tok in enumerate(tokens):
+        if tok == ("op", ";"):
+            if i > start:
+                yield tokens[start:i]
+            start = i + 1
+    if start < len(tokens):
+        yield tokens[start:]
+
+
+def _literal_type(tok: Tuple[str, object]) -> Optional[str]:
+    kind, value = tok
+    if kind == "num":
+        return "cds.Decimal" if "." in value else "cds.Integer"
+    if kind == "str":
+        return "cds.String"
+    if kind == "kw":
+        if value in ("CURRENT_DATE", "DATE"):
+            return "cds.Date"
+        if value in ("CURRENT_TIMESTAMP", "TIMESTAMP"):
+            return "cds.Timestamp"
+    return None
+
+
+def from_bindings(
+    toks: List[Tuple[str, object]], resolve: Callable[[Tuple[str, ...]], Optional[str]],
+) -> Tuple[Dict[str, str], Set[str], int]:
+    """FROM/JOIN items of a statement: alias/table name -> resolved source, names *resolve* does not know, item count."""
+    aliases: Dict[str, str] = {}
+    others: Set[str] = set()
+    items = 0
+    i, n = 0, len(toks)
+    while i < n:
+        if toks[i] not in (("kw", "FROM"), ("kw", "JOIN")):
+            i += 1
+            continue
+        i += 1
+        while i < n:
+            items += 1
+            if toks[i][0] != "ref":
+                break  # derived table / table function: nothing to bind here
+            parts = toks[i][1]
+            source = resolve(parts)
+            names = [parts[-1].upper()]
+            j = i + 1
+            if j < n and toks[j] == ("kw", "AS"):
+                j += 1
+            if j < n and toks[j][0] == "ref" and len(toks[j][1]) == 1:
+                names.append(toks[j][1][0].upper())
+                j += 1
+            for name in names:
+                if source:
+                    aliases[name] = source
+                else:
+                    others.add(name)
+            i = j
+            if i < n and toks[i] == ("op", ","):
+                i += 1
+                continue
+            break
+    return aliases, others, items
+
+
+# ----------------------------------------------------------------------
+# Index
+# ----------------------------------------------------------------------
+
+class _UsageIndex:
+    """Name index of the stub sources plus the per-column evidence collected so far."""
+
+    def __init__(self, sources: Iterable[str]):
+        self.names = NameIndex(sources)
+        self.columns: Dict[str, Dict[str, str]] = {}            # source -> COLUMN -> spelling
+        self.types: Dict[Tuple[str, str], Optional[str]] = {}   # (source, COLUMN) -> type
+        self.parent: Dict[Tuple[str, str], Tuple[str, str]] = {}  # join equalities (union-find)
+
+    def resolve(self, name) -> Optional[str]:
+        return self.names.resolve(name)
+
+    def add(self, source: str, column: str, type_: Optional[str] = None) -> Tuple[str, str]:
+        node = (source, column.upper())
+        self.columns.setdefault(source, {}).setdefault(node[1], column)
+        self.types[node] = _merge_type(self.types.get(node), type_)
+        return node
+
+    def _find(self, node: Tuple[str, str]) -> Tuple[str, str]:
+        while self.parent.get(node, node) != node:
+            node = self.parent[node]
+        return node
+
+    def link(self, a: Tuple[str, str], b: Tuple[str, str]) -> None:
+        ra, rb = self._find(a), self._find(b)
+        if ra != rb:
+            self.parent[ra] = rb
+
+    def elements(self) -> Dict[str, Dict[str, dict]]:
+        group_type: Dict[Tuple[str, str], Optional[str]] = {}
+        for node, t in self.types.items():
+            root = self._find(node)
+            group_type[root] = _merge_type(group_type.get(root), t)
+        out: Dict[str, Dict[str, dict]] = {}
+        for source, cols in self.columns.items():
+            out[source] = {
+                spelling: dict(_ELEMENTS[group_type.get(self._find((source, upper))) or "cds.String"])
+                for upper, spelling in cols.items()
+            }
+        return out
+
+    # ------------------------------------------------------------------
+    # One statement
+    # ------------------------------------------------------------------
+
+    def scan(self, text: str, default: Optional[str] = None, rename: Optional[Dict[str, str]] = None) -> None:
+        """Collect the columns *text* uses; *default* owns unqualified columns (CV filters)."""
+        for toks in _statements(sql_tokens(text or "")):
+            if ("kw", "BEGIN") in toks:
+                # procedure header / block start: parameters are not columns
+                toks = toks[len(toks) - toks[::-1].index(("kw", "BEGIN")):]
+            aliases, others, items = from_bindings(toks, self.resolve)
+            single = default
+            if single is None and items == 1 and len(set(aliases.values())) == 1:
+                single = next(iter(aliases.values()))
+            self._scan_statement(toks, aliases, others, single, rename or {})
+
+    def _column_at(self, toks, i, aliases, others, single, rename) -> Optional[Tuple[str, str]]:
+        kind, parts = toks[i]
+        if kind != "ref":
+            return None
+        prev = toks[i - 1] if i else ("op", "")
+        nxt = toks[i + 1] if i + 1 < len(toks) else ("op", "")
+        if nxt == ("op", "(") or prev in (("op", ":"), ("kw", "AS"), ("kw", "FROM"), ("kw", "JOIN"),
+                                          ("kw", "INTO"), ("kw", "UPDATE"), ("kw", "CALL")):
+            return None  # function, parameter, alias, table name
+        if len(parts) >= 2:
+            qual = parts[-2].upper()
+            source = aliases.get(qual) or (None if qual in others else self.resolve(parts[:-1]))
+            return (source, parts[-1]) if source else None
+        name = parts[0]
+        if name.startswith("@"):
+            return None  # T-SQL variable
+        if single is None or name.upper() in aliases or name.upper() in others:
+            return None
+        if rename and name not in rename:
+            return None  # CV filter on a calculated column
+        if prev[0] in ("ref", "num", "str") or prev == ("op", ")"):
+            return None  # alias without AS
+        return single, rename.get(name, name)
+
+    def _scan_statement(self, toks, aliases, others, single, rename) -> None:
+        n = len(toks)
+        for i in range(n):
+            col = self._column_at(toks, i, aliases, others, single, rename)
+            if not col:
+                continue
+            node = self.add(*col)
+            prev = toks[i - 1] if i else ("op", "")
+            nxt = toks[i + 1] if i + 1 < n else ("op", "")
+            # function argument
+            if prev == ("op", "(") and i >= 2 and toks[i - 2][0] == "ref" and len(toks[i - 2][1]) == 1:
+                fn = toks[i - 2][1][0].upper()
+                if fn in _NUMERIC_FUNCS:
+                    self.add(*col, "cds.Decimal")
+                elif fn in _STRING_FUNCS:
+                    self.add(*col, "cds.String")
+                elif fn in _DATE_FUNCS:
+                    self.add(*col, "cds.Date")
+                elif fn in _TIMESTAMP_FUNCS:
+                    self.add(*col, "cds.Timestamp")
+            # x LIKE ..., x || ...
+            if nxt in (("kw", "LIKE"), ("op", "||")) or prev == ("op", "||"):
+                self.add(*col, "cds.String")
+            # x <op> other / other <op> x
+            for op, other_i in ((nxt, i + 2), (prev, i - 2)):
+                if op[0] != "op" or not 0 <= other_i < n:
+                    continue
+                if op[1] in _COMPARISON or op[1] in _ARITHMETIC:
+                    other = toks[other_i]
+                    if other_i == i + 2 and other == ("op", "-") and other_i + 1 < n:
+                        other = toks[other_i + 1]  # negative literal
+                    lit = _literal_type(other)
+                    if op[1] in _ARITHMETIC:
+                        if lit in ("cds.Integer", "cds.Decimal") or other[0] == "ref":
+                            self.add(*col, "cds.Decimal")
+                    elif lit:
+                        self.add(*col, lit)
+                    elif other[0] == "ref" and op[1] == "=":
+                        peer = self._column_at(toks, other_i, aliases, others, single, rename)
+                        if peer:
+                            self.link(node, self.add(*peer))
+            # x BETWEEN lit AND lit, x IN (lit, ...)
+            if nxt == ("kw", "BETWEEN") and i + 2 < n:
+                self.add(*col, _literal_type(toks[i + 2]))
+            if nxt == ("kw", "IN") and i + 3 < n and toks[i + 2] == ("op", "("):
+                self.add(*col, _literal_type(toks[i + 3]))
+
+    def _data_source(self, cv: CVModel, ds_id: Optional[str]) -> Optional[str]:
+        if ds_id not in cv.data_sources:
+            return None
+        return self.resolve(cv.data_sources[ds_id] or ds_id) or self.resolve(ds_id)
+
+    def scan_cv(self, cv: CVModel) -> None:
+        """CV mappings name data source columns directly; measures are numeric."""
+        for node in cv.nodes.values():
+            ds_inputs = [i for i in node.inputs if i in cv.data_sources]
+            measures = set(node.measures)
+            rename: Dict[str, str] = {}
+            for m in node.mappings:
+                source = self._data_source(cv, m.input)
+                if not source:
+                    continue
+                self.add(source, m.source, "cds.Decimal" if m.target in measures else None)
+                rename[m.target] = m.source
+            # filters of a node fed by one data source refer to its (mapped) columns
+            if len(ds_inputs) == 1 and rename:
+                source = self._data_source(cv, ds_inputs[0])
+                if source:
+                    for f in node.filters:
+                        self.scan(f, default=source, rename=rename)
+
+
+@timed("stub_columns")
+def infer_stub_columns(
+    sources: Iterable[str],
+    sql_views: Iterable[object] = (),
+    procedures: Iterable[object] = (),
+    cv_models: Iterable[CVModel] = (),
+) -> Dict[str, Dict[str, dict]]:
+    """
+    Source -> {column: CDS element} for every column of *sources* the
+    project references. Sources nothing refers to are left out.
+    """
+    index = _UsageIndex(sources)
+    if not index.names:
+        return {}
+    for obj in list(sql_views) + list(procedures):
+        index.scan(getattr(obj, "sql", None) or "")
+    for cv in cv_models:
+        index.scan_cv(cv)
+    return index.elements()
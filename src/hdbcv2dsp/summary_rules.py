@@ -0,0 +1,357 @@
+# hdbcv2dsp/summary_rules.py
+# ======================================================================
+# Data-driven summarization rules
+#  - A rule is a trigger (keywords and/or a regex) plus a bullet template
+#  - Rules load from JSON or YAML (PyYAML optional); the built-in domain
+#    hints below use the same format
+#  - Matching cost does not grow with the rule count:
+#      * rules are planned per artifact kind and source attribute; sources
+#        no rule reads are never touched
+#      * keywords are located with str.find (C speed) or, for large
+#        keyword sets, one tokenizing pass plus set intersection
+#      * a keyword rule's pattern is matched *at* its keyword occurrences
+#        (it must start with the keyword), not over the whole text
+#      * pattern-only rules with a required literal are prefiltered by a
+#        substring test; the rest share one combined alternation (rules
+#        with named groups or backreferences keep their own pattern)
+# ======================================================================
+from __future__ import annotations
+
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Token = word, optionally prefixed with # (temp table) or @ (T-SQL variable)
+_TOKEN_RE = re.compile(r"[#@]?\w+")
+
+_LIST_FIELDS = ("temp_tables", "reads_from", "writes_to", "calls", "inputs", "columns")
+
+# Escapes/groups must not leak letters into a "required literal"
+_ESCAPE_RE = re.compile(r"\\(?:x[0-9a-fA-F]{2}|u[0-9a-fA-F]{4}|U[0-9a-fA-F]{8}|N\{[^}]*\}|\d+|.)")
+_GROUP_PREFIX_RE = re.compile(r"\(\?(?:P<\w+>|P=\w+\)|[a-zA-Z-]+[:)]|[:=!<>]+)")
+_CHAR_CLASS_RE = re.compile(r"\[(?:\\.|[^\]])*\]")
+_LITERAL_RUN_RE = re.compile(r"(\w{3,})([?*{]?)")
+
+# Sections place rule bullets around the structural ones (sources, temp tables, joins)
+SECTIONS = ("purpose", "details")
+
+
+@dataclass
+class SummaryRule:
+    id: str
+    bullet: str                                   # template: {count}, {match}, {matches}
+    keywords: List[str] = field(default_factory=list)   # any of these tokens triggers (case-insensitive)
+    requires: List[str] = field(default_factory=list)   # ...and all of these tokens must be present
+    pattern: Optional[str] = None                 # regex (case-insensitive); with keywords it is matched at them
+    source: str = "sql"                           # model attribute: 'sql' or a list such as 'temp_tables'
+    kinds: List[str] = field(default_factory=lambda: ["procedure"])  # 'procedure' | 'view'
+    section: str = "details"
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "SummaryRule":
+        if not d.get("id") or not d.get("bullet"):
+            raise ValueError(f"Summary rule needs 'id' and 'bullet': {d!r}")
+        if not d.get("keywords") and not d.get("pattern"):
+            raise ValueError(f"Summary rule '{d['id']}' needs 'keywords' or 'pattern'")
+        kinds = d.get("kinds") or ["procedure"]
+        return cls(
+            id=str(d["id"]),
+            bullet=str(d["bullet"]),
+            keywords=[str(k) for k in d.get("keywords") or []],
+            requires=[str(k) for k in d.get("requires") or []],
+            pattern=d.get("pattern"),
+            source=d.get("source", "sql"),
+            kinds=[kinds] if isinstance(kinds, str) else list(kinds),
+            section=d.get("section", "details"),
+        )
+
+
+# Built-in hints (formerly if-chains in summarize_procedure)
+DEFAULT_RULES: List[dict] = [
+    {"id": "aging-buckets", "section": "purpose",
+     "keywords": ["DATEDIFF", "@DAYS1", "@DAYS2", "@DAYS10"],
+     "bullet": "Computes time-based **aging buckets** using date differences and threshold parameters (e.g., @Days1..@Days10)."},
+    {"id": "window-functions", "section": "purpose",
+     "keywords": ["OVER"], "pattern": r"OVER\s*\(",
+     "bullet": "Uses **window functions** (OVER) to compute running/cumulative values (e.g., cumulative stock)."},
+    {"id": "temp-staging", "section": "purpose",
+     "keywords": ["INTO", "CREATE"], "requires": ["SELECT"], "pattern": r"INTO\s+#|CREATE\s+TABLE\s+#",
+     "bullet": "Stages intermediate results in **temporary tables** (#…) using SELECT INTO / CTAS."},
+    {"id": "debitcredit-h",
+     "keywords": ["DEBITCREDIT"], "pattern": r"DEBITCREDIT\s*=\s*'H'",
+     "bullet": "Applies filter **DebitCredit='H'** (outbound/credit movements) in parts of the logic."},
+    {"id": "debitcredit-s",
+     "keywords": ["DEBITCREDIT"], "pattern": r"DEBITCREDIT\s*=\s*'S'",
+     "bullet": "Applies filter **DebitCredit='S'** (inbound/debit movements) in parts of the logic."},
+    {"id": "case-buckets",
+     "keywords": ["CASE"],
+     "bullet": "Derives **bucket measures** via CASE/filtered SUM expressions."},
+    {"id": "outbound-quantity", "source": "temp_tables",
+     "pattern": r"outboundquantity",
+     "bullet": "**#OutboundQuantity** aggregates outbound quantities by Company/Plant/Product/SpecialStock up to the report date."},
+    {"id": "inventory-aging", "source": "temp_tables",
+     "pattern": r"inventoryaging",
+     "bullet": "**#InventoryAging** computes on-hand per posting date (cumulative arrivals minus outbound) and enriches with valuation/GL info."},
+]
+
+
+@dataclass
+class RuleScan:
+    """Rules that fired for one artifact."""
+    fired: List[Tuple[SummaryRule, List[str], int]]  # (rule, matched texts, count)
+
+    def bullets(self, section: str) -> List[str]:
+        out = []
+        for rule, matches, count in self.fired:
+            if rule.section != section:
+                continue
+            distinct = list(dict.fromkeys(matches))
+            out.append(rule.bullet.format(
+                count=count,
+                match=distinct[0] if distinct else "",
+                matches=", ".join(distinct[:6]) + (" …" if len(distinct) > 6 else ""),
+            ))
+        return out
+
+
+@dataclass
+class _SourcePlan:
+    """Compiled rules of one artifact kind that read one source attribute."""
+    keywords: Dict[str, List[int]] = field(default_factory=dict)       # TOKEN -> rule idx
+    anchored: Dict[int, re.Pattern] = field(default_factory=dict)      # keyword rule -> pattern matched at the keyword
+    literal: List[Tuple[int, str, re.Pattern]] = field(default_factory=list)  # (rule, required literal, pattern)
+    separate: List[Tuple[int, re.Pattern]] = field(default_factory=list)   # rules with named groups / backreferences
+    combined: Optional[re.Pattern] = None                              # remaining pattern-only rules
+    group_rule: Dict[int, int] = field(default_factory=dict)           # combined group index -> rule idx
+
+
+def _self_contained(pattern: str) -> bool:
+    """Named groups or numbered backreferences: inside the combined alternation they would break."""
+    return bool(re.compile(pattern).groupindex) or any(
+        re.fullmatch(r"\\[1-9]\d*", m.group(0)) for m in _ESCAPE_RE.finditer(_CHAR_CLASS_RE.sub("", pattern)))
+
+
+class RuleSet:
+    """
+    Compiled rules, planned per artifact kind and source attribute, so a scan
+    only touches the sources that some rule for that kind reads.
+    """
+
+    def __init__(self, rules: Iterable[SummaryRule] = ()):
+        self.rules: List[SummaryRule] = []
+        self._plans: Dict[str, Dict[str, _SourcePlan]] = {}
+        self.extend(rules)
+
+    def extend(self, rules: Iterable[SummaryRule]) -> "RuleSet":
+        by_id = {r.id: i for i, r in enumerate(self.rules)}
+        for r in rules:
+            if r.section not in SECTIONS:
+                raise ValueError(f"Summary rule '{r.id}': unknown section '{r.section}'")
+            if r.pattern:
+                re.compile(r.pattern)  # fail early, naming the rule's own pattern
+            if r.id in by_id:
+                self.rules[by_id[r.id]] = r  # later files override built-ins with the same id
+            else:
+                by_id[r.id] = len(self.rules)
+                self.rules.append(r)
+        self._plans = {}
+        for kind in sorted({k for r in self.rules for k in r.kinds}):
+            try:
+                self._plan(kind)       # compile the combined alternations now, not on the first scan
+            except re.error as e:
+                self._plans = {}
+                raise ValueError(f"Summary rules for '{kind}': combined pattern does not compile: {e}") from e
+        return self
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def _plan(self, kind: str) -> Dict[str, _SourcePlan]:
+        plans = self._plans.get(kind)
+        if plans is not None:
+            return plans
+        plans = {}
+        combined: Dict[str, List[str]] = {}
+        next_group: Dict[str, int] = {}
+        for i, r in enumerate(self.rules):
+            if kind not in r.kinds:
+                continue
+            plan = plans.setdefault(r.source, _SourcePlan())
+            if r.keywords:
+                for kw in r.keywords:
+                    plan.keywords.setdefault(kw.upper(), []).append(i)
+                if r.pattern:
+                    plan.anchored[i] = re.compile(r.pattern, re.IGNORECASE)
+            elif required_literal(r.pattern):
+                plan.literal.append((i, required_literal(r.pattern), re.compile(r.pattern, re.IGNORECASE)))
+            elif _self_contained(r.pattern):
+                plan.separate.append((i, re.compile(r.pattern, re.IGNORECASE)))
+            else:
+                g = next_group.get(r.source, 1)
+                plan.group_rule[g] = i
+                next_group[r.source] = g + 1 + re.compile(r.pattern).groups
+                combined.setdefault(r.source, []).append(f"({r.pattern})")
+        for src, parts in combined.items():
+            plans[src].combined = re.compile("|".join(parts), re.IGNORECASE)
+        self._plans[kind] = plans
+        return plans
+
+    def scan(self, artifact: object, kind: str) -> RuleScan:
+        hits: Dict[int, Tuple[List[str], int]] = {}
+        uppers: Dict[str, str] = {}
+        for src, plan in self._plan(kind).items():
+            text = _field_text(artifact, src)
+            if not text:
+                continue
+            upper = uppers[src] = text.upper()
+            same_len = len(upper) == len(text)  # upper() can expand e.g. 'ß'; positions then differ
+            # keyword rules: occurrence lookups; a pattern is only tried at the
+            # occurrences of its keyword, never over the whole text
+            for token, positions in _keyword_positions(upper, plan.keywords).items():
+                for i in plan.keywords[token]:
+                    if i in plan.anchored:
+                        rx = plan.anchored[i]
+                        if same_len:
+                            found = [m.group(0) for m in (rx.match(text, pos) for pos in positions) if m]
+                        else:
+                            found = [m.group(0) for m in rx.finditer(text)]
+                        if not found:
+                            continue
+                        matched, count = found, len(found)
+                    else:
+                        matched, count = [token], len(positions)
+                    prev, prev_n = hits.get(i, ([], 0))
+                    hits[i] = (prev + matched, prev_n + count)
+            # pattern-only rules with a required literal: C-speed substring test first
+            for i, literal, rx in plan.literal:
+                if literal in upper:
+                    found = [m.group(0) for m in rx.finditer(text)]
+                    if found:
+                        hits[i] = (found, len(found))
+            # rules whose groups must keep their own numbering / names
+            for i, rx in plan.separate:
+                found = [m.group(0) for m in rx.finditer(text)]
+                if found:
+                    hits[i] = (found, len(found))
+            # remaining pattern-only rules: one combined scan
+            if plan.combined is not None:
+                for m in plan.combined.finditer(text):
+                    i = plan.group_rule[m.lastindex]  # lastindex = outermost group that matched
+                    prev, prev_n = hits.get(i, ([], 0))
+                    hits[i] = (prev + [m.group(0)], prev_n + 1)
+        fired = []
+        for i in sorted(hits):
+            rule = self.rules[i]
+            if rule.requires:
+                if "sql" not in uppers:
+                    uppers["sql"] = _field_text(artifact, "sql").upper()
+                if not all(_first_token(uppers["sql"], t.upper()) for t in rule.requires):
+                    continue
+            fired.append((rule, *hits[i]))
+        return RuleScan(fired=fired)
+
+
+# Up to this many distinct keywords per source, each is located with str.find
+# (C speed, a few passes); beyond it one tokenizing pass is cheaper.
+_FIND_MAX_KEYWORDS = 200
+
+
+def _keyword_positions(upper: str, keywords: Dict[str, List[int]]) -> Dict[str, List[int]]:
+    """TOKEN -> start offsets, for the keywords that occur as whole tokens."""
+    if not keywords:
+        return {}
+    if len(keywords) <= _FIND_MAX_KEYWORDS:
+        found = {kw: token_positions(upper, kw) for kw in keywords if kw in upper}
+    else:
+        present = set(_TOKEN_RE.findall(upper)) & keywords.keys()
+        found = {kw: token_positions(upper, kw) for kw in present}
+    return {kw: pos for kw, pos in found.items() if pos}
+
+
+def _first_token(upper: str, token: str) -> bool:
+    return bool(token_positions(upper, token, limit=1))
+
+
+def token_positions(upper: str, token: str, limit: Optional[int] = None) -> List[int]:
+    """Start offsets of *token* as a whole token (same boundaries as _TOKEN_RE) in upper-cased text."""
+    out, start, n = [], 0, len(token)
+    while True:
+        pos = upper.find(token, start)
+        if pos < 0:
+            return out
+        before = upper[pos - 1] if pos else " "
+        after = upper[pos + n] if pos + n < len(upper) else " "
+        if not (before.isalnum() or before in "_#@") and not (after.isalnum() or after == "_"):
+            out.append(pos)
+            if limit and len(out) >= limit:
+                return out
+        start = pos + n
+
+
+def required_literal(pattern: str) -> Optional[str]:
+    """
+    Longest word literal every match of *pattern* must contain (upper-cased),
+    or None when unsure (alternation anywhere, or no run of 3+ word chars).
+    """
+    if "|" in pattern:
+        return None
+    text = _ESCAPE_RE.sub(" ", pattern)
+    text = _CHAR_CLASS_RE.sub(" ", text)
+    text = _GROUP_PREFIX_RE.sub(" ", text)
+    best = None
+    for m in _LITERAL_RUN_RE.finditer(text):
+        run = m.group(1)[:-1] if m.group(2) else m.group(1)  # a quantifier applies to the last char only
+        if len(run) >= 3 and (best is None or len(run) > len(best)):
+            best = run
+    return best.upper() if best else None
+
+
+def _field_text(artifact: object, fld: str) -> str:
+    value = getattr(artifact, fld, None)
+    if fld in _LIST_FIELDS or isinstance(value, list):
+        return "\n".join(str(v) for v in value or [])
+    return value or ""
+
+
+# ----------------------------------------------------------------------
+# Loading
+# ----------------------------------------------------------------------
+
+def parse_rules(text: str, fmt: Optional[str] = None) -> List[SummaryRule]:
+    """Rules from JSON or YAML text: a list of rule objects or {"rules": [...]}."""
+    fmt = (fmt or "").lower().lstrip(".")
+    if fmt in ("yaml", "yml") or (not fmt and not text.lstrip().startswith(("[", "{"))):
+        try:
+            import yaml  # optional dependency
+        except ImportError as e:
+            raise ImportError("PyYAML is required for YAML summary rules (pip install pyyaml)") from e
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+    if isinstance(data, dict):
+        data = data.get("rules", [])
+    return [SummaryRule.from_dict(d) for d in data or []]
+
+
+def load_rules(path: str) -> List[SummaryRule]:
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_rules(f.read(), os.path.splitext(path)[1])
+
+
+_DEFAULT_RULE_SET: Optional[RuleSet] = None
+
+
+def default_rule_set() -> RuleSet:
+    """
+    Built-in rules plus any files listed in HDBCV2DSP_SUMMARY_RULES
+    (os.pathsep-separated); compiled once per process.
+    """
+    global _DEFAULT_RULE_SET
+    if _DEFAULT_RULE_SET is None:
+        rs = RuleSet(SummaryRule.from_dict(d) for d in DEFAULT_RULES)
+        for path in filter(None, os.environ.get("HDBCV2DSP_SUMMARY_RULES", "").split(os.pathsep)):
+            rs.extend(load_rules(path))
+        _DEFAULT_RULE_SET = rs
+    return _DEFAULT_RULE_SET
@@ -0,0 +1,564 @@
+# hdbcv2dsp/type_infer.py
+# ======================================================================
+# Expression type inference for view elements
+#  - A small precedence parser over the sql_tokens() stream types one
+#    SELECT expression: literals, column references (resolved through the
+#    statement's FROM/JOIN aliases against a SchemaIndex), CAST, CASE,
+#    arithmetic with SQL precision/scale promotion, ||, COALESCE and the
+#    common HANA string / date / numeric / aggregate functions
+#  - SchemaIndex holds column types per object: uploaded table schemas,
+#    stub columns, and every view typed so far, so views typed in
+#    dependency order see their upstream views' element types
+#  - Anything that cannot be typed returns None (caller falls back)
+# ======================================================================
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .csn_chunks import definition_dependencies, dependency_levels
+from .parse_ddl import sql_type_to_cds
+from .identifiers import NameIndex
+from .sql_text import sql_tokens
+from .stub_columns import from_bindings
+
+Element = Dict[str, object]
+Token = Tuple[str, object]
+
+_MAX_PRECISION = 38
+_TYPE_FACETS = ("type", "length", "precision", "scale")
+
+# (precision, scale) of the integer types when they meet decimals
+_INT_DIGITS = {"cds.hana.TINYINT": 3, "cds.hana.SMALLINT": 5, "cds.Integer": 10, "cds.Integer64": 19}
+_INT_ORDER = ["cds.hana.TINYINT", "cds.hana.SMALLINT", "cds.Integer", "cds.Integer64"]
+_FLOATS = {"cds.Double", "cds.hana.REAL", "cds.DecimalFloat", "cds.hana.SMALLDECIMAL"}
+# rendered width when a value is turned into text
+_TEXT_WIDTH = {"cds.Date": 10, "cds.Time": 8, "cds.DateTime": 19, "cds.Timestamp": 27, "cds.Boolean": 5,
+               "cds.hana.TINYINT": 3, "cds.hana.SMALLINT": 6, "cds.Integer": 11, "cds.Integer64": 20}
+
+_BOOLEAN: Element = {"type": "cds.Boolean"}
+_INTEGER: Element = {"type": "cds.Integer"}
+_INTEGER64: Element = {"type": "cds.Integer64"}
+_DOUBLE: Element = {"type": "cds.Double"}
+_DATE: Element = {"type": "cds.Date"}
+_TIME: Element = {"type": "cds.Time"}
+_TIMESTAMP: Element = {"type": "cds.Timestamp"}
+
+
+# ----------------------------------------------------------------------
+# Type algebra
+# ----------------------------------------------------------------------
+
+def _decimal(precision: int, scale: int) -> Element:
+    scale = max(0, min(scale, _MAX_PRECISION))
+    return {"type": "cds.Decimal", "precision": max(1, min(precision, _MAX_PRECISION)), "scale": scale}
+
+
+def _string(length: Optional[int]) -> Element:
+    return {"type": "cds.String", "length": max(1, min(length or 5000, 5000))}
+
+
+def _digits(e: Element) -> Optional[Tuple[int, int]]:
+    """(precision, scale) of an exact numeric type, None otherwise."""
+    t = e.get("type")
+    if t in _INT_DIGITS:
+        return _INT_DIGITS[t], 0
+    if t == "cds.Decimal":
+        return int(e.get("precision") or _MAX_PRECISION), int(e.get("scale") or 0)
+    return None
+
+
+def _is_numeric(e: Optional[Element]) -> bool:
+    return bool(e) and (e.get("type") in _FLOATS or _digits(e) is not None)
+
+
+def _text_width(e: Optional[Element]) -> Optional[int]:
+    if not e:
+        return None
+    t = e.get("type")
+    if t == "cds.String":
+        return e.get("length")
+    if t == "cds.Decimal":
+        return int(e.get("precision") or _MAX_PRECISION) + 2
+    return _TEXT_WIDTH.get(t)
+
+
+def _arithmetic(a: Optional[Element], b: Optional[Element], op: str) -> Optional[Element]:
+    if not (_is_numeric(a) and _is_numeric(b)):
+        return None
+    if a["type"] in _FLOATS or b["type"] in _FLOATS:
+        return dict(_DOUBLE)
+    if a["type"] in _INT_DIGITS and b["type"] in _INT_DIGITS and op != "/":
+        wider = max(_INT_ORDER.index(a["type"]), _INT_ORDER.index(b["type"]), _INT_ORDER.index("cds.Integer"))
+        return {"type": _INT_ORDER[wider]}
+    (p1, s1), (p2, s2) = _digits(a), _digits(b)
+    if op in ("+", "-"):
+        scale = max(s1, s2)
+        return _decimal(max(p1 - s1, p2 - s2) + scale + 1, scale)
+    if op == "*":
+        return _decimal(p1 + p2, s1 + s2)
+    scale = max(6, s1 + p2 + 1)  # division
+    return _decimal(p1 - s1 + s2 + scale, scale)
+
+
+def unify_types(a: Optional[Element], b: Optional[Element]) -> Optional[Element]:
+    """Common type of two branches (CASE, COALESCE, UNION); None only when both are unknown."""
+    if not a or not b:
+        return dict(a or b) if (a or b) else None
+    if a == b:
+        return dict(a)
+    ta, tb = a["type"], b["type"]
+    if ta == tb == "cds.String":
+        return _string(max(a.get("length") or 5000, b.get("length") or 5000))
+    if _is_numeric(a) and _is_numeric(b):
+        if ta in _FLOATS or tb in _FLOATS:
+            return dict(_DOUBLE)
+        if ta in _INT_DIGITS and tb in _INT_DIGITS:
+            return {"type": _INT_ORDER[max(_INT_ORDER.index(ta), _INT_ORDER.index(tb))]}
+        (p1, s1), (p2, s2) = _digits(a), _digits(b)
+        scale = max(s1, s2)
+        return _decimal(max(p1 - s1, p2 - s2) + scale, scale)
+    if {ta, tb} <= {"cds.Date", "cds.DateTime", "cds.Timestamp"}:
+        return dict(_TIMESTAMP)
+    return _string(max(_text_width(a) or 5000, _text_width(b) or 5000))
+
+
+def _facets(e: Optional[dict]) -> Optional[Element]:
+    """Only the type facets of a column spec (no name/key/notNull)."""
+    if not e or not e.get("type"):
+        return None
+    return {k: e[k] for k in _TYPE_FACETS if k in e}
+
+
+# ----------------------------------------------------------------------
+# Function return types
+# ----------------------------------------------------------------------
+# rule(args, literal_ints) -> element; literal_ints[i] is the value of an
+# integer literal argument, else None
+
+def _first(args):
+    return args[0] if args else None
+
+
+def _sum(args, _lits):
+    a = _first(args)
+    if not _is_numeric(a):
+        return _decimal(_MAX_PRECISION, 10) if a is None else None
+    if a["type"] in _FLOATS:
+        return dict(_DOUBLE)
+    if a["type"] in _INT_DIGITS:
+        return dict(_INTEGER64)
+    return _decimal(_MAX_PRECISION, _digits(a)[1])
+
+
+def _avg(args, _lits):
+    a = _first(args)
+    if a is not None and a.get("type") in _FLOATS:
+        return dict(_DOUBLE)
+    scale = _digits(a)[1] if _is_numeric(a) and _digits(a) else 0
+    return _decimal(_MAX_PRECISION, max(scale, 6))
+
+
+def _same(args, _lits):
+    return dict(args[0]) if args and args[0] else None
+
+
+def _coalesce(args, _lits):
+    out = None
+    for a in args:
+        out = unify_types(out, a)
+    return out
+
+
+def _round(args, lits):
+    a = _first(args)
+    d = _digits(a) if a else None
+    if not d or a["type"] != "cds.Decimal":
+        return _same(args, lits)
+    scale = lits[1] if len(lits) > 1 and lits[1] is not None else 0
+    return _decimal(d[0] - d[1] + min(scale, d[1]) + 1, min(scale, d[1]))
+
+
+def _string_of_arg(args, _lits):
+    return _string(_text_width(_first(args)))
+
+
+def _string_len_arg(index: int, fallback_arg: bool = True):
+    def rule(args, lits):
+        if len(lits) > index and lits[index] is not None:
+            return _string(lits[index])
+        return _string(_text_width(_first(args))) if fallback_arg else _string(None)
+    return rule
+
+
+def _concat(args, _lits):
+    widths = [_text_width(a) for a in args]
+    return _string(sum(widths) if all(widths) else None)
+
+
+def _date_shift(args, _lits):
+    a = _first(args)
+    if a and a.get("type") in ("cds.Timestamp", "cds.DateTime"):
+        return dict(a)
+    return dict(_DATE)
+
+
+def _to_decimal(args, lits):
+    if len(lits) > 1 and lits[1] is not None:
+        return _decimal(lits[1], lits[2] if len(lits) > 2 and lits[2] is not None else 0)
+    return {"type": "cds.DecimalFloat"}
+
+
+def _fixed(element: Element):
+    return lambda _args, _lits: dict(element)
+
+
+_FUNCTIONS: Dict[str, Callable] = {
+    # aggregates / window functions
+    "SUM": _sum, "AVG": _avg, "MIN": _same, "MAX": _same,
+    "COUNT": _fixed(_INTEGER64), "ROW_NUMBER": _fixed(_INTEGER64), "RANK": _fixed(_INTEGER64),
+    "DENSE_RANK": _fixed(_INTEGER64), "NTILE": _fixed(_INTEGER),
+    "STDDEV": _fixed(_DOUBLE), "VAR": _fixed(_DOUBLE), "VARIANCE": _fixed(_DOUBLE),
+    "FIRST_VALUE": _same, "LAST_VALUE": _same, "LAG": _same, "LEAD": _same,
+    # null handling
+    "COALESCE": _coalesce, "IFNULL": _coalesce, "NVL": _coalesce, "ISNULL": _coalesce,
+    "NULLIF": _same, "GREATEST": _coalesce, "LEAST": _coalesce,
+    # numeric
+    "ROUND": _round, "ABS": _same, "FLOOR": _same, "CEIL": _same, "CEILING": _same, "SIGN": _fixed(_INTEGER),
+    "MOD": _same, "POWER": _fixed(_DOUBLE), "SQRT": _fixed(_DOUBLE), "LN": _fixed(_DOUBLE),
+    "LOG": _fixed(_DOUBLE), "EXP": _fixed(_DOUBLE),
+    "TO_INTEGER": _fixed(_INTEGER), "TO_INT": _fixed(_INTEGER), "TO_BIGINT": _fixed(_INTEGER64),
+    "TO_SMALLINT": _fixed({"type": "cds.hana.SMALLINT"}), "TO_TINYINT": _fixed({"type": "cds.hana.TINYINT"}),
+    "TO_DOUBLE": _fixed(_DOUBLE), "TO_REAL": _fixed({"type": "cds.hana.REAL"}), "TO_DECIMAL": _to_decimal,
+    # strings
+    "UPPER": _same, "LOWER": _same, "UCASE": _same, "LCASE": _same,
+    "TRIM": _same, "LTRIM": _same, "RTRIM": _same,
+    "SUBSTRING": _string_len_arg(2), "SUBSTR": _string_len_arg(2),
+    "LEFT": _string_len_arg(1), "RIGHT": _string_len_arg(1),
+    "LPAD": _string_len_arg(1, False), "RPAD": _string_len_arg(1, False),
+    "CONCAT": _concat, "REPLACE": _fixed(_string(5000)),
+    "TO_VARCHAR": _string_of_arg, "TO_NVARCHAR": _string_of_arg, "TO_CHAR": _string_of_arg,
+    "TO_ALPHANUM": _string_of_arg,
+    "LENGTH": _fixed(_INTEGER), "LOCATE": _fixed(_INTEGER), "INSTR": _fixed(_INTEGER),
+    # dates
+    "TO_DATE": _fixed(_DATE), "TO_DATS": _fixed(_string(8)), "CURRENT_DATE": _fixed(_DATE),
+    "TO_TIMESTAMP": _fixed(_TIMESTAMP), "TO_SECONDDATE": _fixed({"type": "cds.DateTime"}),
+    "TO_TIME": _fixed(_TIME), "NOW": _fixed(_TIMESTAMP),
+    "CURRENT_TIMESTAMP": _fixed(_TIMESTAMP), "CURRENT_UTCTIMESTAMP": _fixed(_TIMESTAMP),
+    "ADD_DAYS": _date_shift, "ADD_MONTHS": _date_shift, "ADD_YEARS": _date_shift,
+    "ADD_WORKDAYS": _date_shift, "LAST_DAY": _fixed(_DATE), "NEXT_DAY": _fixed(_DATE),
+    "ADD_SECONDS": _fixed(_TIMESTAMP),
+    "YEAR": _fixed(_INTEGER), "MONTH": _fixed(_INTEGER), "DAYOFMONTH": _fixed(_INTEGER),
+    "DAYOFYEAR": _fixed(_INTEGER), "WEEK": _fixed(_INTEGER), "WEEKDAY": _fixed(_INTEGER),
+    "QUARTER": _fixed(_INTEGER), "HOUR": _fixed(_INTEGER), "MINUTE": _fixed(_INTEGER),
+    "SECOND": _fixed(_DOUBLE), "DAYS_BETWEEN": _fixed(_INTEGER), "MONTHS_BETWEEN": _fixed(_INTEGER),
+    "YEARS_BETWEEN": _fixed(_INTEGER), "SECONDS_BETWEEN": _fixed(_INTEGER64),
+    "DATEDIFF": _fixed(_INTEGER), "DATEADD": lambda args, lits: _date_shift(args[2:], lits[2:]),
+}
+
+# keyword tokens that are called like functions
+_KEYWORD_FUNCTIONS = {"LEFT", "RIGHT", "REPLACE", "CURRENT_DATE", "CURRENT_TIMESTAMP"}
+
+
+# ----------------------------------------------------------------------
+# Expression parser
+# ----------------------------------------------------------------------
+
+_END = ("op", "")
+_COMPARISON = {"=", "<>", "!=", "<", ">", "<=", ">="}
+
+
+class _Typer:
+    """Precedence parser that computes the type of one expression (no tree is built)."""
+
+    def __init__(self, toks: List[Token], column: Callable[[Tuple[str, ...]], Optional[Element]]):
+        self.toks = toks
+        self.pos = 0
+        self.column = column
+
+    def peek(self, ahead: int = 0) -> Token:
+        i = self.pos + ahead
+        return self.toks[i] if i < len(self.toks) else _END
+
+    def take(self) -> Token:
+        tok = self.peek()
+        self.pos += 1
+        return tok
+
+    def accept(self, tok: Token) -> bool:
+        if self.peek() == tok:
+            self.pos += 1
+            return True
+        return False
+
+    def skip_parens(self) -> None:
+        """Skip a balanced (...) group starting at the current '('."""
+        depth = 0
+        while self.pos < len(self.toks):
+            tok = self.take()
+            if tok == ("op", "("):
+                depth += 1
+            elif tok == ("op", ")"):
+                depth -= 1
+                if depth <= 0:
+                    return
+
+    # -- precedence levels ------------------------------------------------
+    def expr(self) -> Optional[Element]:
+        t = self.conjunction()
+        while self.accept(("kw", "OR")):
+            self.conjunction()
+            t = dict(_BOOLEAN)
+        return t
+
+    def conjunction(self) -> Optional[Element]:
+        t = self.negation()
+        while self.accept(("kw", "AND")):
+            self.negation()
+            t = dict(_BOOLEAN)
+        return t
+
+    def negation(self) -> Optional[Element]:
+        if self.accept(("kw", "NOT")):
+            self.negation()
+            return dict(_BOOLEAN)
+        return self.predicate()
+
+    def predicate(self) -> Optional[Element]:
+        t = self.concat()
+        tok = self.peek()
+        if tok[0] == "op" and tok[1] in _COMPARISON:
+            self.take()
+            self.concat()
+            return dict(_BOOLEAN)
+        if tok == ("kw", "IS"):
+            self.take()
+            self.accept(("kw", "NOT"))
+            self.accept(("kw", "NULL"))
+            return dict(_BOOLEAN)
+        negated = tok == ("kw", "NOT")
+        nxt = self.peek(1) if negated else tok
+        if nxt in (("kw", "LIKE"), ("kw", "BETWEEN"), ("kw", "IN")):
+            self.pos += 2 if negated else 1
+            if nxt == ("kw", "IN"):
+                self.skip_parens()
+            else:
+                self.concat()
+                if nxt == ("kw", "BETWEEN") and self.accept(("kw", "AND")):
+                    self.concat()
+                if self.accept(("kw", "ESCAPE")):
+                    self.take()
+            return dict(_BOOLEAN)
+        return t
+
+    def concat(self) -> Optional[Element]:
+        t = self.additive()
+        while self.accept(("op", "||")):
+            t = _concat([t, self.additive()], [])
+        return t
+
+    def additive(self) -> Optional[Element]:
+        t = self.term()
+        while self.peek() in (("op", "+"), ("op", "-")):
+            op = self.take()[1]
+            t = _arithmetic(t, self.term(), op)
+        return t
+
+    def term(self) -> Optional[Element]:
+        t = self.unary()
+        while self.peek() in (("op", "*"), ("op", "/")):
+            op = self.take()[1]
+            t = _arithmetic(t, self.unary(), op)
+        return t
+
+    def unary(self) -> Optional[Element]:
+        if self.peek() in (("op", "-"), ("op", "+")):
+            self.take()
+        return self.primary()
+
+    # -- primaries --------------------------------------------------------
+    def primary(self) -> Optional[Element]:
+        kind, value = tok = self.take()
+        if kind == "num":
+            if "." in value:
+                whole, frac = value.split(".", 1)
+                return _decimal(len(whole.lstrip("0")) + len(frac), len(frac))
+            return dict(_INTEGER if int(value) <= 2**31 - 1 else _INTEGER64)
+        if kind == "str":
+            return _string(len(value) - value.index("'") - 2 or 1)
+        if tok == ("op", "("):
+            if self.peek() == ("kw", "SELECT"):
+                self.pos -= 1
+                self.skip_parens()  # scalar subquery: not typed
+                return None
+            t = self.expr()
+            self.accept(("op", ")"))
+            return t
+        if tok == ("op", ":"):
+            self.take()  # :PARAMETER
+            return None
+        if kind == "kw":
+            return self.keyword(value)
+        if kind == "ref":
+            if self.peek() == ("op", "("):
+                return self.call(value[-1].upper())
+            return _facets(self.column(value))
+        return None
+
+    def keyword(self, word: str) -> Optional[Element]:
+        if word in _KEYWORD_FUNCTIONS and self.peek() == ("op", "("):
+            return self.call(word)
+        if word == "CASE":
+            return self.case()
+        if word == "CAST":
+            return self.cast()
+        if word in ("DATE", "TIMESTAMP") and self.peek()[0] == "str":
+            self.take()
+            return dict(_DATE if word == "DATE" else _TIMESTAMP)
+        if word == "CURRENT_DATE":
+            return dict(_DATE)
+        if word == "CURRENT_TIME":
+            return dict(_TIME)
+        if word == "CURRENT_TIMESTAMP":
+            return dict(_TIMESTAMP)
+        if word in ("TRUE", "FALSE"):
+            return dict(_BOOLEAN)
+        if word in ("DISTINCT", "ALL"):
+            return self.expr()
+        if word == "EXISTS":
+            self.skip_parens()
+            return dict(_BOOLEAN)
+        return None  # NULL and anything else
+
+    def call(self, name: str) -> Optional[Element]:
+        self.take()  # '('
+        args: List[Optional[Element]] = []
+        lits: List[Optional[int]] = []
+        if not self.accept(("kw", "DISTINCT")):
+            self.accept(("kw", "ALL"))
+        if self.accept(("op", "*")):
+            args.append(None)
+            lits.append(None)
+        while self.peek() not in (("op", ")"), _END):
+            start = self.pos
+            args.append(self.expr())
+            one = self.toks[start:self.pos]
+            lits.append(int(one[0][1]) if len(one) == 1 and one[0][0] == "num" and one[0][1].isdigit() else None)
+            if not self.accept(("op", ",")):
+                # unparsed tail of an argument (ORDER BY inside STRING_AGG, AS in EXTRACT, ...)
+                while self.peek() not in (("op", ")"), ("op", ","), _END):
+                    if self.peek() == ("op", "("):
+                        self.skip_parens()
+                    else:
+                        self.take()
+                self.accept(("op", ","))
+        self.accept(("op", ")"))
+        if self.peek() == ("kw", "OVER"):
+            self.take()
+            self.skip_parens()
+        rule = _FUNCTIONS.get(name)
+        return rule(args, lits) if rule else None
+
+    def case(self) -> Optional[Element]:
+        out: Optional[Element] = None
+        if self.peek() != ("kw", "WHEN"):
+            self.expr()  # simple CASE operand
+        while self.accept(("kw", "WHEN")):
+            self.expr()
+            if self.accept(("kw", "THEN")):
+                out = unify_types(out, self.expr())
+        if self.accept(("kw", "ELSE")):
+            out = unify_types(out, self.expr())
+        self.accept(("kw", "END"))
+        return out
+
+    def cast(self) -> Optional[Element]:
+        if not self.accept(("op", "(")):
+            return None
+        self.expr()
+        if not self.accept(("kw", "AS")):
+            return None
+        kind, value = self.take()
+        name = value[-1] if kind == "ref" else value
+        if self.peek()[0] == "ref" and self.peek()[1][0].upper() in ("PRECISION", "VARYING"):
+            name += " " + self.take()[1][0]
+        args = None
+        if self.accept(("op", "(")):
+            parts = []
+            while self.peek() not in (("op", ")"), _END):
+                tok = self.take()
+                if tok[0] in ("num", "ref"):
+                    parts.append(tok[1] if tok[0] == "num" else tok[1][-1])
+            args = ",".join(parts)
+            self.accept(("op", ")"))
+        self.accept(("op", ")"))
+        return sql_type_to_cds(str(name), args)
+
+
+def expression_type(expr: str, column: Callable[[Tuple[str, ...]], Optional[Element]] = lambda parts: None
+                    ) -> Optional[Element]:
+    """CDS element type of one SQL expression (a trailing alias is ignored); None if unknown."""
+    toks = sql_tokens(expr or "")
+    if not toks:
+        return None
+    try:
+        return _Typer(toks, column).expr()
+    except (ValueError, IndexError, TypeError):
+        return None
+
+
+# ----------------------------------------------------------------------
+# Schema index and statement scope
+# ----------------------------------------------------------------------
+
+class SchemaIndex:
+    """Object name (any spelling: SCHEMA.T, "SCHEMA"."T", bare T) -> column -> element."""
+
+    def __init__(self):
+        self.names = NameIndex()
+        self.objects: Dict[str, Dict[str, Element]] = {}
+
+    @classmethod
+    def from_schemas(cls, *schemas: Optional[Dict[str, object]]) -> "SchemaIndex":
+        """From table_schemas ({t: {"columns": [...]}}) and/or {t: {column: element}} maps."""
+        index = cls()
+        for schema in schemas:
+            for name, spec in (schema or {}).items():
+                if isinstance(spec, dict) and isinstance(spec.get("columns"), list):
+                    cols = {c["name"]: c for c in spec["columns"] if c.get("name")}
+                    if spec.get("schema"):
+                        index.add(f'{spec["schema"]}.{name}', cols)
+                else:
+                    cols = spec or {}
+                index.add(name, cols)
+        return index
+
+    def add(self, name: str, columns: Dict[str, dict]) -> None:
+        if not name:
+            return
+        typed = {c.upper(): _facets(e) for c, e in columns.items() if _facets(e)}
+        self.objects[self.names.add(name)] = typed
+
+    def resolve(self, parts: Tuple[str, ...]) -> Optional[str]:
+        return self.names.resolve(parts)
+
+    def scope(self, sql: Optional[str]) -> Callable[[Tuple[str, ...]], Optional[Element]]:
+        """Column resolver for expressions of the statement *sql* (its FROM/JOIN aliases)."""
+        aliases, _others, _items = from_bindings(sql_tokens(sql or ""), self.resolve)
+        sources = list(dict.fromkeys(aliases.values()))
+
+        def column(parts: Tuple[str, ...]) -> Optional[Element]:
+            col = parts[-1].upper()
+            if len(parts) >= 2:
+                key = aliases.get(parts[-2].upper()) or self.resolve(parts[:-1])
+                return (self.objects.get(key) or {}).get(col) if key else None
+            found = [self.objects[k][col] for k in sources if col in self.objects[k]]
+            return found[0] if len(found) == 1 else None
+
+        return column
+
+
+def topological_views(views: Iterable[object]) -> List[object]:
+    """Views ordered so every view comes after the uploaded views it reads from."""
+    views = list(views)
+    level = dependency_levels(definition_dependencies([v.name for v in views], None, views))
+    return sorted(views, key=lambda v: level.get(v.name, 0))
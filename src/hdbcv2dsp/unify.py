@@ -1,5 +1,7 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 from .artifacts import ArtifactNode
+from .identifiers import NameIndex, canonical_name
+from .instrument import count, timed
 from .parse_cv import CVModel
 from .parse_sql_view import SQLViewModel
 from .parse_procedure import ProcedureModel
@@ -7,19 +9,22 @@ from .parse_abap_cds import ABAPCDSModel  # NEW
 
 def graph_from_cv(model: CVModel) -> Dict[str, ArtifactNode]:
     g: Dict[str, ArtifactNode] = {}
+    # data sources are named after their resourceUri (the object they read), so
+    # they meet the same table referenced from views / procedures in merge_graphs
+    ds_names = {ds_id: canonical_name(uri or ds_id) or ds_id for ds_id, uri in model.data_sources.items()}
     for nid, n in model.nodes.items():
-        g[nid] = ArtifactNode(id=nid, kind="CV", inputs=list(n.inputs))
+        g[nid] = ArtifactNode(id=nid, kind="CV", inputs=[ds_names.get(i, i) for i in n.inputs])
     # Optional: include data sources as standalone 'Table' nodes
-    for ds_id in model.data_sources.keys():
-        g.setdefault(ds_id, ArtifactNode(id=ds_id, kind="Table", inputs=[]))
+    for ds_name in ds_names.values():
+        g.setdefault(ds_name, ArtifactNode(id=ds_name, kind="Table", inputs=[]))
     return g
 
 def graph_from_sql_views(views: List[SQLViewModel]) -> Dict[str, ArtifactNode]:
     g: Dict[str, ArtifactNode] = {}
     for v in views:
         g[v.name] = ArtifactNode(id=v.name, kind="SQLView", inputs=list(v.inputs))
-    for src in v.inputs:
-        g.setdefault(src, ArtifactNode(id=src, kind="Table", inputs=[]))
+        for src in v.inputs:
+            g.setdefault(src, ArtifactNode(id=src, kind="Table", inputs=[]))
     return g
 
 def graph_from_procedures(procs: List[ProcedureModel]) -> Dict[str, ArtifactNode]:
@@ -39,12 +44,28 @@ def graph_from_abap_cds(model: ABAPCDSModel) -> Dict[str, ArtifactNode]:
         g.setdefault(src, ArtifactNode(id=src, kind="Table", inputs=[]))
     return g
 
-def merge_graphs(*graphs: Dict[str, ArtifactNode]) -> Dict[str, ArtifactNode]:
+@timed("graph.merge")
+def merge_graphs(*graphs: Dict[str, ArtifactNode], names: Optional[NameIndex] = None) -> Dict[str, ArtifactNode]:
+    """
+    Union of *graphs*; every spelling of an object ("S"."T", S.T, [S].[T], bare T)
+    becomes one node, named as first seen. *names* carries a default schema /
+    HDI synonyms. A 'Table' placeholder takes the kind of the real artifact.
+    """
+    names = names or NameIndex()
+    for g in graphs:           # declared nodes name the object before mere input references
+        for k in g:
+            names.resolve(k) or names.add(k)
     merged: Dict[str, ArtifactNode] = {}
     for g in graphs:
         for k, v in g.items():
-            if k not in merged:
-                merged[k] = v
-            else:
-                merged[k].inputs = sorted(set(merged[k].inputs + v.inputs))
+            nid = names.resolve(k) or k
+            inputs = [names.resolve(i) or names.add(i) for i in v.inputs]
+            node = merged.get(nid)
+            if node is None:
+                merged[nid] = ArtifactNode(id=nid, kind=v.kind, inputs=sorted(set(inputs)))
+                continue
+            node.inputs = sorted(set(node.inputs + inputs))
+            if node.kind == "Table" and v.kind != "Table":
+                node.kind = v.kind
+    count("graph_nodes", len(merged))
     return merged
\ No newline at end of file
@@ -0,0 +1,59 @@
+# csn_diff: definition- and element-level changes between two exports, read from
+# packages or from export zips (also when the table/view package is chunked).
+from hdbcv2dsp.csn_diff import diff_csn, load_definitions
+from hdbcv2dsp.csn_exporter import build_csn_artifacts_zip
+from hdbcv2dsp.parse_sql_view import parse_hdbview_or_sql
+from hdbcv2dsp.unify import graph_from_sql_views
+
+
+def _views():
+    texts = [f"CREATE VIEW S.V{i} AS SELECT a.ID, a.AMOUNT_{i} FROM S.T{i} a WHERE a.ID > {i}" for i in range(6)]
+    return [parse_hdbview_or_sql(t.encode()) for t in texts]
+
+
+def _export(**kw):
+    views = _views()
+    data, _ = build_csn_artifacts_zip(package_name="P", cv_model=None, sql_views=views, procedures=[],
+                                      graph=graph_from_sql_views(views), table_mode="local_stub", **kw)
+    return data
+
+
+def test_chunked_export_reads_back_like_a_single_package():
+    whole = load_definitions(_export())
+    chunked = _export(chunk_max_bytes=600)
+    assert whole and load_definitions(chunked) == whole
+    diff = diff_csn(_export(), chunked)
+    assert diff.changes == [] and diff.unchanged == len(whole)
+
+
+def _package(**definitions):
+    return {"definitions": definitions}
+
+
+def test_element_level_changes():
+    old = _package(
+        V1={"kind": "entity", "@EndUserText.label": "Orders", "elements": {
+            "ID": {"type": "cds.Integer", "key": True},
+            "AMOUNT": {"type": "cds.Decimal", "precision": 15, "scale": 2},
+            "NOTE": {"type": "cds.String", "length": 100}}},
+        V2={"kind": "entity", "elements": {"ID": {"type": "cds.Integer"}}},
+        GONE={"kind": "entity", "elements": {}},
+    )
+    new = _package(
+        V1={"kind": "entity", "@EndUserText.label": "Orders (new)", "elements": {
+            "ID": {"type": "cds.Integer", "key": True},
+            "AMOUNT": {"type": "cds.Decimal", "precision": 17, "scale": 2},
+            "REGION": {"type": "cds.String", "length": 10}}},
+        V2={"kind": "entity", "elements": {"ID": {"type": "cds.Integer"}}},
+        NEW={"kind": "entity", "elements": {}},
+    )
+    diff = diff_csn(old, new)
+    assert (diff.added, diff.removed, diff.modified, diff.unchanged) == (["NEW"], ["GONE"], ["V1"], 1)
+    v1 = next(c for c in diff.changes if c.name == "V1")
+    assert v1.properties == ["@EndUserText.label"]
+    assert [(e.name, e.change) for e in v1.elements] == [("AMOUNT", "modified"), ("NOTE", "removed"),
+                                                          ("REGION", "added")]
+    assert v1.as_dict()["elements"][0]["fields"] == {"precision": [15, 17]}
+
+    ignored = diff_csn(old, new, ignore_keys=["@EndUserText.label"])
+    assert next(c for c in ignored.changes if c.name == "V1").properties == []
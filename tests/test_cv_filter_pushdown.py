@@ -0,0 +1,71 @@
+# Regression: a union filter that can only be pushed into some branches must
+# stay on the union (it used to be dropped from the union's WHERE).
+import pytest
+
+from hdbcv2dsp.cv_optimize import analyze_filter_pushdown, moved_conjuncts, split_conjuncts
+from hdbcv2dsp.cv_to_sql import compile_cv_to_sql
+from hdbcv2dsp.parse_cv import CVModel, CVNode, Mapping
+
+REGION_EU = "\"REGION\"='EU'"
+
+
+def _mappings(inp):
+    return [Mapping(c, c, inp) for c in ("REGION", "AMOUNT")]
+
+
+def _union_over_shared_projection() -> CVModel:
+    # U1 = P1 (also read by J1) UNION T2, filtered on REGION; J1 = U1 x P1
+    nodes = {
+        "P1": CVNode("P1", "ProjectionView", attributes=["REGION"], measures=["AMOUNT"],
+                     inputs=["T1"], mappings=_mappings("T1")),
+        "U1": CVNode("U1", "UnionView", attributes=["REGION"], measures=["AMOUNT"], filters=[REGION_EU],
+                     inputs=["P1", "T2"], mappings=_mappings("P1") + _mappings("T2")),
+        "J1": CVNode("J1", "JoinView", attributes=["REGION"], measures=["AMOUNT"], join_type="inner",
+                     join_attributes=["REGION"], inputs=["U1", "P1"], mappings=_mappings("U1")),
+    }
+    return CVModel("CV_REGION", "", "CalculationView", "CUBE",
+                   data_sources={"T1": "/T1", "T2": "/T2"}, nodes=nodes,
+                   logical_attributes=["REGION"], logical_measures=["AMOUNT"], logical_model_node="J1")
+
+
+def test_partially_pushed_union_filter_stays_on_union():
+    model = _union_over_shared_projection()
+    pushdown = analyze_filter_pushdown(model)
+    assert {(pf.target, pf.pushed) for pf in pushdown} == {("U1", False), ("T2", True)}
+    assert moved_conjuncts(pushdown) == set()
+
+    sql = compile_cv_to_sql(model)
+    union_cte = sql[sql.index('"U1" AS ('):sql.index('"J1" AS (')]
+    assert "WHERE (\"REGION\"='EU')" in union_cte
+
+
+def test_filter_stopping_at_join_is_a_modeling_step(tmp_path):
+    # A1 filters on REGION; the filter moves to J1 (not a preserved side) and the J1 step must say so
+    docx = pytest.importorskip("docx")
+    from hdbcv2dsp.render_docx import render_docx
+
+    nodes = {
+        "J1": CVNode("J1", "JoinView", attributes=["REGION"], measures=["AMOUNT"], join_type="leftOuter",
+                     join_attributes=["ID"], inputs=["T1", "T2"],
+                     mappings=[Mapping("AMOUNT", "AMOUNT", "T1"), Mapping("REGION", "REGION", "T2")]),
+        "A1": CVNode("A1", "AggregationView", attributes=["REGION"], measures=["AMOUNT"], filters=[REGION_EU],
+                     inputs=["J1"], mappings=_mappings("J1")),
+    }
+    model = CVModel("CV_REGION", "", "CalculationView", "CUBE", data_sources={"T1": "/T1", "T2": "/T2"},
+                    nodes=nodes, logical_attributes=["REGION"], logical_measures=["AMOUNT"], logical_model_node="A1")
+    assert [(pf.node_id, pf.target) for pf in analyze_filter_pushdown(model)] == [("A1", "J1")]
+
+    out = tmp_path / "cv.docx"
+    render_docx(model, str(out))
+    texts = [p.text for p in docx.Document(str(out)).paragraphs]
+    j1 = texts.index("1. Create view for node 'J1' (JoinView)")
+    a1 = texts.index("2. Create view for node 'A1' (AggregationView)")
+    assert f"Add filter: {REGION_EU} (pushed down from A1)" in texts[j1:a1]
+    assert any("applied lower" in t for t in texts[a1:])
+
+
+def test_split_conjuncts_treats_quoted_names_as_opaque():
+    assert split_conjuncts('"A AND B" = 1 AND "C" = 2') == ['"A AND B" = 1', '"C" = 2']
+    assert split_conjuncts('"X OR Y" = 1 and y = \'a and b\'') == ['"X OR Y" = 1', "y = 'a and b'"]
+    assert split_conjuncts('("A" = 1 OR "B" = 2) AND "C" = 3') == ['("A" = 1 OR "B" = 2)', '"C" = 3']
+    assert split_conjuncts('"A" = 1 AND "B" = 2 OR "C" = 3') == ['"A" = 1 AND "B" = 2 OR "C" = 3']
@@ -0,0 +1,55 @@
+# Projection pushdown / dead-node elimination: nodes the logicalModel never
+# reaches go, and a column survives when only a calculated measure, a join
+# condition or a filter uses it.
+from hdbcv2dsp.cv_optimize import prune_cv_model, required_columns
+from hdbcv2dsp.parse_cv import CVModel, CVNode, Mapping
+
+
+def _maps(inp, *cols):
+    return [Mapping(c, c, inp) for c in cols]
+
+
+def _sales_model() -> CVModel:
+    # A1 = aggregate(J1), J1 = P1 x P2 on ID and KEY2 (condition only); DEAD feeds nothing
+    nodes = {
+        "P1": CVNode("P1", "ProjectionView", attributes=["ID", "KEY2", "REGION", "FLAG", "UNUSED"],
+                     measures=["PRICE", "QTY"], filters=['"FLAG" = 1'], inputs=["T1"],
+                     mappings=_maps("T1", "ID", "KEY2", "REGION", "FLAG", "UNUSED", "PRICE", "QTY")),
+        "P2": CVNode("P2", "ProjectionView", attributes=["ID", "KEY2", "NAME", "NOTE"], inputs=["T2"],
+                     mappings=_maps("T2", "ID", "KEY2", "NAME", "NOTE")),
+        "J1": CVNode("J1", "JoinView", attributes=["ID", "REGION", "NAME", "FLAG", "NOTE"],
+                     measures=["PRICE", "QTY"], join_type="inner", join_attributes=["ID"],
+                     join_condition='"P1"."KEY2" = "P2"."KEY2"', inputs=["P1", "P2"],
+                     mappings=_maps("P1", "ID", "REGION", "FLAG", "PRICE", "QTY") + _maps("P2", "ID", "NAME", "NOTE")),
+        "A1": CVNode("A1", "AggregationView", attributes=["REGION", "NAME"], measures=["PRICE", "QTY"],
+                     calculated_measures={"REVENUE": '"PRICE" * "QTY"'}, inputs=["J1"],
+                     aggregations={"PRICE": "sum", "QTY": "sum"},
+                     mappings=_maps("J1", "REGION", "NAME", "PRICE", "QTY")),
+        "DEAD": CVNode("DEAD", "ProjectionView", attributes=["X"], inputs=["T3"], mappings=_maps("T3", "X")),
+    }
+    return CVModel("CV_SALES", "", "CalculationView", "CUBE",
+                   data_sources={"T1": "/T1", "T2": "/T2", "T3": "/T3"}, nodes=nodes,
+                   logical_attributes=["REGION", "NAME"], logical_measures=["REVENUE"], logical_model_node="A1")
+
+
+def test_required_columns_follow_formulas_join_conditions_and_filters():
+    need, ds_need = required_columns(_sales_model())
+    assert "DEAD" not in need and "T3" not in ds_need
+    assert need["A1"] == {"REGION", "NAME", "REVENUE"}
+    assert need["J1"] >= {"PRICE", "QTY"}                # only the calculated measure reads them
+    assert need["P1"] >= {"ID", "KEY2"} and need["P2"] >= {"ID", "KEY2"}   # join attribute / condition
+    assert ds_need["T1"] == {"ID", "KEY2", "REGION", "FLAG", "PRICE", "QTY"}  # FLAG: P1 filter
+    assert ds_need["T2"] == {"ID", "KEY2", "NAME"}
+
+
+def test_prune_drops_dead_node_and_unused_columns_only():
+    model = _sales_model()
+    pruned, report = prune_cv_model(model)
+    assert report.removed_nodes == ["DEAD"] and "DEAD" not in pruned.nodes
+    assert report.removed_data_sources == ["T3"] and "T3" not in pruned.data_sources
+    assert report.removed_columns == {"P1": ["UNUSED"], "P2": ["NOTE"], "J1": ["FLAG", "NOTE"]}
+    assert pruned.nodes["A1"].calculated_measures == {"REVENUE": '"PRICE" * "QTY"'}
+    assert [m.target for m in pruned.nodes["A1"].mappings] == ["REGION", "NAME", "PRICE", "QTY"]
+    assert "FLAG" in pruned.nodes["P1"].attributes and pruned.nodes["P1"].filters == ['"FLAG" = 1']
+    assert "KEY2" in pruned.nodes["P2"].attributes
+    assert "DEAD" in model.nodes and "UNUSED" in model.nodes["P1"].attributes   # input left untouched
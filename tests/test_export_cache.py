@@ -0,0 +1,68 @@
+# Incremental re-export: unchanged definitions come back from the cache,
+# changed / new / removed keys are reported and only changes go to delta/.
+import io
+import json
+import zipfile
+
+from hdbcv2dsp.csn_exporter import build_csn_artifacts_zip
+from hdbcv2dsp.export_cache import ExportCache, delta_package
+from hdbcv2dsp.parse_sql_view import parse_hdbview_or_sql
+from hdbcv2dsp.unify import graph_from_sql_views
+
+
+def _run(root, fingerprints):
+    cache = ExportCache(str(root), salt="opts")
+    built = []
+    for key, fp in fingerprints.items():
+        cache.definition("view", key, fp, lambda key=key, fp=fp: built.append(key) or {"kind": "entity", "fp": fp})
+    cache.save()
+    return cache, built
+
+
+def test_cache_hit_changed_removed_cycle(tmp_path):
+    first, built = _run(tmp_path, {"A": "a1", "B": "b1", "C": "c1"})
+    assert built == ["A", "B", "C"] and first.changed == ["view:A", "view:B", "view:C"]
+
+    second, built = _run(tmp_path, {"A": "a1", "B": "b2", "D": "d1"})
+    assert built == ["B", "D"]
+    assert second.reused == ["view:A"] and second.changed_keys() == {"B", "D"}
+    assert second.removed == ["view:C"]
+    assert second.summary() == {"changed": ["view:B", "view:D"], "reused": 1, "removed": ["view:C"]}
+    # save() dropped the objects of B's old hash and of C
+    assert len(list((tmp_path / "objects").iterdir())) == 3
+
+    third, built = _run(tmp_path, {"A": "a1", "B": "b2", "D": "d1"})
+    assert built == [] and third.changed == [] and third.removed == []
+
+
+def test_cache_without_root_rebuilds_everything():
+    cache = ExportCache(None)
+    cache.definition("view", "A", "a1", lambda: {"kind": "entity"})
+    cache.definition("view", "A", "a1", lambda: {"kind": "entity"})
+    assert cache.changed == ["view:A", "view:A"] and cache.reused == []
+
+
+def test_delta_package_keeps_only_changed_definitions():
+    pkg = {"version": {"csn": "1.0"}, "definitions": {"A": {}, "B": {}}, "replicationflows": {"R": {}}}
+    assert delta_package(pkg, {"B"}) == {"version": {"csn": "1.0"}, "definitions": {"B": {}}, "replicationflows": {}}
+    assert delta_package(pkg, {"X"}) is None
+
+
+def _export(cache_dir, where):
+    views = [parse_hdbview_or_sql(f"CREATE VIEW S.V{i} AS SELECT a.ID FROM S.T{i} a WHERE {w}".encode())
+             for i, w in enumerate(where)]
+    data, _ = build_csn_artifacts_zip(package_name="P", cv_model=None, sql_views=views, procedures=[],
+                                      graph=graph_from_sql_views(views), table_mode="local_stub",
+                                      cache_dir=str(cache_dir))
+    return zipfile.ZipFile(io.BytesIO(data))
+
+
+def test_re_export_writes_only_changed_views_to_delta(tmp_path):
+    _export(tmp_path, ["a.ID > 0", "a.ID > 1"])
+    z = _export(tmp_path, ["a.ID > 0", "a.ID > 1"])
+    assert "delta/csn.json" not in z.namelist()
+    assert json.loads(z.read("delta/changes.json"))["changed"] == []
+
+    z = _export(tmp_path, ["a.ID > 0", "a.ID > 5"])
+    assert sorted(json.loads(z.read("delta/csn.json"))["definitions"]) == ["S.V1"]
+    assert {"S.V0", "S.V1"} <= set(json.loads(z.read("csn.json"))["definitions"])   # full package stays whole
@@ -0,0 +1,59 @@
+# Canonical names and NameIndex: schemas, synonyms and default schemas; a
+# qualified name only falls back to a bare object while a single schema claims
+# it; quoted dotted names stay one part.
+from hdbcv2dsp.artifacts import ArtifactNode
+from hdbcv2dsp.identifiers import NameIndex, canonical_name, identifier_parts, load_hdbsynonym
+from hdbcv2dsp.unify import merge_graphs
+
+
+def _table(name):
+    return {name: ArtifactNode(id=name, kind="Table", inputs=[])}
+
+
+def test_schemas_sharing_a_bare_name_stay_apart():
+    merged = merge_graphs(_table("T"), _table("HR.T"), _table("SALES.T"))
+    assert sorted(merged) == ["HR.T", "SALES.T", "T"]
+
+
+def test_qualified_name_falls_back_to_unambiguous_bare_object():
+    names = NameIndex(["T"])
+    assert names.resolve('"HR"."T"') == "T"
+    assert names.resolve("SALES.T") is None
+
+
+def test_quoted_name_with_dot_stays_one_part():
+    assert canonical_name('"My.Table"') == '"My.Table"'
+    assert identifier_parts(canonical_name('"My.Table"')) == ("My.Table",)
+    assert canonical_name('"S"."My.Table"') == 'S."My.Table"'
+    assert canonical_name("ns.sub::OBJ") == "ns.sub::OBJ"
+
+
+def test_same_bare_name_in_two_schemas_is_ambiguous():
+    names = NameIndex(['"SALES"."ORDERS"', "HR.ORDERS", "HR.STAFF"])
+    assert names.resolve("sales.orders") == '"SALES"."ORDERS"'
+    assert names.resolve("HR.ORDERS") == "HR.ORDERS"
+    assert names.resolve("ORDERS") is None              # two schemas: no guess
+    assert names.resolve("STAFF") == "HR.STAFF"         # unique bare name
+    assert names.resolve("FIN.ORDERS") is None
+    assert len(names) == 3
+
+
+def test_synonyms_resolve_through_chains_and_stop_on_cycles():
+    synonyms = load_hdbsynonym("""{
+        "ORDERS_SYN": {"target": {"object": "ORDERS", "schema": "SALES"}},
+        "CHAIN": {"target": {"object": "ORDERS_SYN"}},
+        "LOOP_A": {"target": {"object": "LOOP_B"}},
+        "LOOP_B": {"target": {"object": "LOOP_A"}}
+    }""")
+    names = NameIndex(["SALES.ORDERS", "HR.ORDERS"], synonyms=synonyms)
+    assert names.resolve("ORDERS_SYN") == "SALES.ORDERS"
+    assert names.resolve("CHAIN") == "SALES.ORDERS"
+    assert names.resolve("LOOP_A") is None
+
+
+def test_default_schema_qualifies_bare_names():
+    names = NameIndex(default_schema="sales", synonyms={"S1": "ORDERS"})
+    assert names.add("ORDERS") == "ORDERS"
+    assert names.resolve("SALES.ORDERS") == names.resolve('"SALES".ORDERS') == "ORDERS"
+    assert names.resolve("S1") == "ORDERS"
+    assert names.resolve("HR.ORDERS") is None
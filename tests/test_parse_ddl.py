@@ -0,0 +1,54 @@
+# parse_ddl: every table of a dump in one pass, with exact CDS types, keys and
+# NOT NULL; separators inside DEFAULT strings and comments do not split columns.
+from hdbcv2dsp.parse_ddl import parse_ddl_text
+
+DUMP = """-- dump
+CREATE COLUMN TABLE "SALES"."ORDERS" (
+  "ORDER_ID" INTEGER NOT NULL,
+  "AMOUNT" DECIMAL(15, 2),
+  "NOTE" NVARCHAR(100) DEFAULT 'a,b', /* c, d */
+  "CREATED" TIMESTAMP,
+  PRIMARY KEY ("ORDER_ID")
+);
+CREATE TABLE dbo.[Customer Master] ([Id] BIGINT CONSTRAINT pk PRIMARY KEY, [Name] VARCHAR(40) NOT NULL,
+                                    Rate FLOAT, Born DATE);
+COLUMN TABLE "ITEMS" ("ID" INTEGER, "PRICE" DECIMAL(10), "FLAG" BOOLEAN);
+"""
+
+
+def test_sql_dump_with_several_tables():
+    tables = parse_ddl_text(DUMP)
+    assert list(tables) == ["ORDERS", "Customer Master", "ITEMS"]
+    assert tables["ORDERS"]["schema"] == "SALES" and tables["Customer Master"]["schema"] == "dbo"
+    assert "schema" not in tables["ITEMS"]
+    assert tables["ORDERS"]["columns"] == [
+        {"name": "ORDER_ID", "type": "cds.Integer", "notNull": True, "key": True},
+        {"name": "AMOUNT", "type": "cds.Decimal", "precision": 15, "scale": 2},
+        {"name": "NOTE", "type": "cds.String", "length": 100},
+        {"name": "CREATED", "type": "cds.Timestamp"},
+    ]
+    assert tables["Customer Master"]["columns"] == [
+        {"name": "Id", "type": "cds.Integer64", "key": True, "notNull": True},
+        {"name": "Name", "type": "cds.String", "length": 40, "notNull": True},
+        {"name": "Rate", "type": "cds.Double"},
+        {"name": "Born", "type": "cds.Date"},
+    ]
+    assert tables["ITEMS"]["columns"][1:] == [
+        {"name": "PRICE", "type": "cds.Decimal", "precision": 10, "scale": 0},
+        {"name": "FLAG", "type": "cds.Boolean"},
+    ]
+
+
+def test_cds_file_with_several_entities():
+    tables = parse_ddl_text("""context sales {
+      entity Orders { key ID : Integer; amount : Decimal(15, 2); note : String(40); };
+      entity Items { key ORDER_ID : Integer64; key POS : Integer; created : UTCTimestamp; };
+    };""")
+    assert list(tables) == ["Orders", "Items"]
+    assert tables["Orders"]["columns"][1:] == [
+        {"name": "amount", "type": "cds.Decimal", "precision": 15, "scale": 2},
+        {"name": "note", "type": "cds.String", "length": 40},
+    ]
+    assert [(c["name"], c.get("key", False)) for c in tables["Items"]["columns"]] == [
+        ("ORDER_ID", True), ("POS", True), ("created", False)]
+    assert tables["Items"]["columns"][2]["type"] == "cds.Timestamp"
@@ -0,0 +1,47 @@
+# sql_dependencies: CTEs, table variables, parameters and temp tables are local
+# to their scope and never reported as external reads / writes.
+from hdbcv2dsp.sql_deps import sql_dependencies
+
+PROCEDURE = """CREATE PROCEDURE S.P (IN it_keys TABLE (ID INT), OUT ot_res TABLE (ID INT, AMT DEC))
+LANGUAGE SQLSCRIPT AS
+BEGIN
+  DECLARE lt_x TABLE (ID INT);
+  lt_src = SELECT o.ID, o.AMT FROM S.ORDERS o JOIN :it_keys k ON k.ID = o.ID;
+  lt_x = SELECT ID FROM :lt_src;
+  CREATE LOCAL TEMPORARY TABLE #stage (ID INT, AMT DEC);
+  INSERT INTO #stage SELECT * FROM :lt_src;
+  CREATE TABLE #ctas WITH (DISTRIBUTION = ROUND_ROBIN) AS SELECT * FROM S.RATES;
+  INSERT INTO S.TARGET SELECT s.ID, s.AMT FROM #stage s JOIN #ctas r ON r.ID = s.ID;
+  CALL S.LOG_RUN(:lt_x);
+  ot_res = SELECT ID, AMT FROM S.TARGET;
+END"""
+
+
+def test_view_ctes_and_table_functions_are_not_dependencies():
+    deps = sql_dependencies("""CREATE VIEW V AS
+        WITH recent AS (SELECT * FROM "S"."ORDERS" WHERE D > 1),
+             top_c AS (SELECT C FROM recent JOIN S.CUSTOMERS c ON c.ID = recent.C)
+        SELECT * FROM top_c, TABLE(STRING_SPLIT('a,b', ',')) x""")
+    assert deps.reads == ["S.CUSTOMERS", "S.ORDERS"]
+    assert deps.calls == [] and deps.local == {"recent": "cte", "top_c": "cte"}
+
+
+def test_procedure_locals_stay_out_of_reads_and_writes():
+    deps = sql_dependencies(PROCEDURE)
+    assert deps.reads == ["S.ORDERS", "S.RATES", "S.TARGET"]
+    assert deps.writes == ["S.TARGET"] and deps.calls == ["S.LOG_RUN"]
+    assert deps.local == {"it_keys": "parameter", "ot_res": "parameter", "lt_x": "table_variable",
+                          "lt_src": "table_variable", "#stage": "temp_table", "#ctas": "temp_table"}
+    insert = next(s for s in deps.statements if s.writes == ["S.TARGET"])
+    assert insert.reads == [] and insert.uses == ["#stage", "#ctas"]
+
+
+def test_cte_and_block_locals_end_with_their_scope():
+    deps = sql_dependencies("""CREATE PROCEDURE P AS BEGIN
+      INSERT INTO S.A WITH recent AS (SELECT * FROM S.ORDERS) SELECT * FROM recent;
+      INSERT INTO S.B SELECT * FROM recent;
+      BEGIN DECLARE lt_in TABLE (ID INT); lt_in = SELECT ID FROM S.X; END;
+      SELECT * FROM lt_in;
+    END""")
+    assert deps.reads == ["S.ORDERS", "S.X", "lt_in", "recent"]
+    assert deps.writes == ["S.A", "S.B"]
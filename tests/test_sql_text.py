@@ -0,0 +1,17 @@
+# sql_text: the shared tokenizer and the top-level splitters agree on what is
+# opaque (strings, quoted names, comments) and never split inside brackets.
+from hdbcv2dsp.sql_text import find_top_level, split_top_level, sql_tokens
+
+
+def test_sql_tokens_joins_dotted_chains_and_keeps_spans():
+    spans = []
+    toks = sql_tokens('SELECT "S"."T".C /* x */ FROM [dbo].[T]', spans)
+    assert toks == [("kw", "SELECT"), ("ref", ("S", "T", "C")), ("kw", "FROM"), ("ref", ("dbo", "T"))]
+    assert spans[1] == (7, 16)
+
+
+def test_keyword_separators_are_whole_words_outside_quotes():
+    text = '"A AND B" = 1 AND band = 2 and (x AND y)'
+    assert split_top_level(text, "AND") == ['"A AND B" = 1', "band = 2", "(x AND y)"]
+    assert find_top_level("'a or b' OR c", 0, "", words=("OR",)) == 9
+    assert find_top_level('"OR" = 1', 0, "", words=("or",)) == len('"OR" = 1')
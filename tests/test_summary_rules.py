@@ -0,0 +1,21 @@
+# Pattern-only rules share one combined alternation; rules with backreferences
+# or named groups must keep their own pattern so the user's groups still work.
+from hdbcv2dsp.parse_procedure import ProcedureModel
+from hdbcv2dsp.summary_rules import RuleSet, SummaryRule
+
+
+def _rule(rule_id, pattern):
+    return SummaryRule.from_dict({"id": rule_id, "pattern": pattern, "bullet": rule_id + ": {matches}",
+                                  "section": "details", "kinds": ["procedure"]})
+
+
+def test_backreferences_and_named_groups_survive_the_combined_scan():
+    rules = RuleSet([
+        _rule("doubled", r"(\w)\1"),
+        _rule("digit_pair", r"(?P<d>\d)-(?P=d)"),
+        _rule("digit_colon", r"(?P<d>\d):"),
+        _rule("plain", r"\d+%"),
+    ])
+    proc = ProcedureModel(name="P", sql="SELECT xx FROM t WHERE a = '7-7' AND b = '5:' AND c = '20%'")
+    fired = {rule.id: matches for rule, matches, _ in rules.scan(proc, "procedure").fired}
+    assert fired == {"doubled": ["xx"], "digit_pair": ["7-7"], "digit_colon": ["5:"], "plain": ["20%"]}